@@ -9,6 +9,13 @@ from datetime import datetime, timedelta
 import os
 import sys
 
+# Adicionar path do projeto
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.model.preprocessing import write_energy_dataset
+
 def download_ercot_data():
     """
     Baixa dados reais do ERCOT (Electric Reliability Council of Texas).
@@ -160,8 +167,7 @@ def save_dataset(df, output_path='data/raw/energy_consumption.csv'):
     """
     Salva o dataset processado.
     """
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df.to_csv(output_path, index=False)
+    write_energy_dataset(df, output_path)
     
     print(f"💾 Dataset salvo em: {output_path}")
     print(f"\n📈 Estatísticas do consumo:")
@@ -1,148 +1,262 @@
 """
 GERADOR DE DATASET DE ENERGIA ELÉTRICA
 Simula dados realistas de consumo de energia baseado em padrões reais.
+
+Toda a simulação é vetorizada (matrizes tempo x medidor). Além da série
+única usada pelo sistema, gera datasets grandes com milhares de medidores
+sintéticos, cada um com seus próprios parâmetros, em resolução horária ou
+sub-horária. A saída é gravada em shards colunares com memória limitada,
+para benchmarks de treino, engenharia de features e serving multi-medidor.
 """
 
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+import argparse
 import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Adicionar path do projeto
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.model.columnar import ShardedWriter
+from src.model.preprocessing import ENERGY_SCHEMA, write_energy_dataset
+
+
+# === PADRÕES (índice = hora ou mês) ===
+# Pico manhã (7-9h) e noite (18-22h), madrugada baixa
+HOURLY_FACTOR = np.array([0.6] * 7 + [1.4] * 3 + [1.0] * 8 + [1.6] * 5 + [1.0])
+
+# Hemisfério sul: verão (Nov-Mar) com ar condicionado, inverno (Jun-Ago) com aquecimento
+SEASONAL_FACTOR = np.array([np.nan, 1.3, 1.3, 1.3, 1.0, 1.0, 1.1, 1.1, 1.1, 1.0, 1.0, 1.3, 1.3])
+TEMP_BASE = np.array([np.nan, 28, 28, 28, 22, 22, 15, 15, 15, 22, 22, 28, 28], dtype=float)
+TEMP_VARIATION = np.array([np.nan, 8, 8, 8, 7, 7, 6, 6, 6, 7, 7, 8, 8], dtype=float)
+
+# Feriados brasileiros principais (mês, dia)
+HOLIDAYS = [
+    (1, 1),   # Ano Novo
+    (4, 21),  # Tiradentes
+    (5, 1),   # Dia do Trabalho
+    (9, 7),   # Independência
+    (10, 12), # N. Sra. Aparecida
+    (11, 2),  # Finados
+    (11, 15), # Proclamação da República
+    (12, 25), # Natal
+]
+
+# Parâmetros da série única original (um medidor)
+LEGACY_METER = {
+    'base_kw': 5000.0,
+    'daily_amplitude': 1.0,
+    'peak_shift': 0,
+    'weekend_factor': 0.75,
+    'seasonal_amplitude': 1.0,
+    'temp_sensitivity': 0.02,
+    'temp_offset': 0.0,
+    'noise': 0.05,
+    'northern': False,
+}
+
+
+def sample_meter_params(n_meters, seed=42):
+    """
+    Sorteia parâmetros independentes para cada medidor sintético.
+
+    Returns:
+        DataFrame com uma linha por medidor
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'meter_id': np.arange(n_meters, dtype=np.int32),
+        'base_kw': rng.lognormal(mean=0.0, sigma=0.5, size=n_meters),
+        'daily_amplitude': rng.uniform(0.5, 1.5, n_meters),
+        'peak_shift': rng.integers(-2, 3, n_meters),
+        'weekend_factor': rng.uniform(0.6, 1.2, n_meters),
+        'seasonal_amplitude': rng.uniform(0.5, 1.5, n_meters),
+        'temp_sensitivity': rng.uniform(0.005, 0.03, n_meters),
+        'temp_offset': rng.normal(0, 3, n_meters),
+        'noise': rng.uniform(0.03, 0.15, n_meters),
+        'northern': rng.random(n_meters) < 0.5,
+    })
+
+
+def simulate(timestamps, params, rng):
+    """
+    Simula temperatura e consumo para todos os pares (timestamp, medidor).
+
+    Args:
+        timestamps: DatetimeIndex (T,)
+        params: DataFrame de parâmetros (M linhas)
+        rng: numpy Generator
+
+    Returns:
+        (temperatura, consumo) como matrizes (T, M)
+    """
+    T, M = len(timestamps), len(params)
+    hour = timestamps.hour.to_numpy()
+    fractional_hour = hour + timestamps.minute.to_numpy() / 60
+    month = timestamps.month.to_numpy()
+    weekend = timestamps.dayofweek.to_numpy() >= 5
+
+    def column(name):
+        return params[name].to_numpy()[None, :]
+
+    # Hemisfério norte: estações deslocadas em 6 meses
+    shifted_month = (month + 5) % 12 + 1
+    season_month = np.where(column('northern'), shifted_month[:, None], month[:, None])
+
+    # === TEMPERATURA ===
+    temp_daily = np.sin((fractional_hour[:, None] - 6) * np.pi / 12) * TEMP_VARIATION[season_month]
+    temperature = (TEMP_BASE[season_month] + column('temp_offset') + temp_daily
+                   + rng.normal(0, 2, (T, M)))
+
+    # === CONSUMO ===
+    peak_hour = (hour[:, None] - column('peak_shift')) % 24
+    hourly = 1 + column('daily_amplitude') * (HOURLY_FACTOR[peak_hour] - 1)
+    weekly = np.where(weekend[:, None], column('weekend_factor'), 1.0)
+    seasonal = 1 + column('seasonal_amplitude') * (SEASONAL_FACTOR[season_month] - 1)
+
+    consumption = (column('base_kw') * hourly * weekly * seasonal
+                   * (1 + (temperature - 22) * column('temp_sensitivity')))
+    consumption += rng.normal(0, 1, (T, M)) * consumption * column('noise')
+
+    # Garantir valores positivos
+    consumption = np.maximum(consumption, column('base_kw') * 0.02)
+    return temperature, consumption
+
+
+def calendar_columns(timestamps):
+    """Colunas de calendário e feriados (vetorizado)."""
+    keys = timestamps.month * 100 + timestamps.day
+    holidays = [month * 100 + day for month, day in HOLIDAYS]
+    return {
+        'hour': timestamps.hour,
+        'day_of_week': timestamps.dayofweek,
+        'month': timestamps.month,
+        'is_weekend': (timestamps.dayofweek >= 5).astype(int),
+        'is_holiday': np.isin(keys, holidays).astype(int),
+    }
+
 
 def generate_energy_dataset(days=730, output_path='data/raw/energy_consumption.csv'):
     """
     Gera dataset sintético de consumo de energia com padrões realistas.
-    
+
     Args:
         days: Número de dias de dados (730 = 2 anos)
         output_path: Caminho para salvar o dataset
     """
-    
+
     print("🔧 Gerando dataset de energia elétrica...")
-    
-    # Data inicial
-    start_date = datetime(2022, 1, 1, 0, 0, 0)
-    
-    # Criar timestamps (medições a cada hora)
-    timestamps = [start_date + timedelta(hours=i) for i in range(days * 24)]
-    
-    # Inicializar listas
-    consumption = []
-    temperature = []
-    
-    np.random.seed(42)  # Reprodutibilidade
-    
-    for i, ts in enumerate(timestamps):
-        # === PADRÕES TEMPORAIS ===
-        hour = ts.hour
-        day_of_week = ts.weekday()  # 0 = Segunda, 6 = Domingo
-        month = ts.month
-        
-        # Consumo base (em kWh)
-        base_consumption = 5000
-        
-        # === PADRÃO DIÁRIO ===
-        # Pico manhã (7-9h) e noite (18-22h)
-        if 7 <= hour <= 9:
-            hourly_factor = 1.4
-        elif 18 <= hour <= 22:
-            hourly_factor = 1.6
-        elif 0 <= hour <= 6:
-            hourly_factor = 0.6
-        else:
-            hourly_factor = 1.0
-        
-        # === PADRÃO SEMANAL ===
-        # Fim de semana consome menos
-        if day_of_week >= 5:  # Sábado e Domingo
-            weekly_factor = 0.75
-        else:
-            weekly_factor = 1.0
-        
-        # === PADRÃO SAZONAL ===
-        # Verão (Nov-Mar): mais consumo (ar condicionado)
-        # Inverno (Jun-Ago): consumo médio (aquecimento)
-        if month in [11, 12, 1, 2, 3]:  # Verão
-            seasonal_factor = 1.3
-            temp_base = 28
-            temp_variation = 8
-        elif month in [6, 7, 8]:  # Inverno
-            seasonal_factor = 1.1
-            temp_base = 15
-            temp_variation = 6
-        else:  # Primavera/Outono
-            seasonal_factor = 1.0
-            temp_base = 22
-            temp_variation = 7
-        
-        # === TEMPERATURA ===
-        # Variação diária de temperatura
-        temp_daily = np.sin((hour - 6) * np.pi / 12) * temp_variation
-        temp_noise = np.random.normal(0, 2)
-        temp = temp_base + temp_daily + temp_noise
-        
-        # === CONSUMO FINAL ===
-        consumption_value = (
-            base_consumption * 
-            hourly_factor * 
-            weekly_factor * 
-            seasonal_factor *
-            (1 + (temp - 22) * 0.02)  # Correlação com temperatura
-        )
-        
-        # Adicionar ruído realista
-        noise = np.random.normal(0, consumption_value * 0.05)
-        consumption_value += noise
-        
-        # Garantir valores positivos
-        consumption_value = max(consumption_value, 100)
-        
-        consumption.append(consumption_value)
-        temperature.append(temp)
-    
+
+    # Medições a cada hora a partir de 2022
+    timestamps = pd.date_range('2022-01-01', periods=days * 24, freq='h')
+    params = pd.DataFrame([LEGACY_METER])
+
+    rng = np.random.default_rng(42)  # Reprodutibilidade
+    temperature, consumption = simulate(timestamps, params, rng)
+
     # === CRIAR DATAFRAME ===
     df = pd.DataFrame({
         'timestamp': timestamps,
-        'consumption_kwh': consumption,
-        'temperature_celsius': temperature,
-        'hour': [ts.hour for ts in timestamps],
-        'day_of_week': [ts.weekday() for ts in timestamps],
-        'month': [ts.month for ts in timestamps],
-        'is_weekend': [1 if ts.weekday() >= 5 else 0 for ts in timestamps],
-        'season': [get_season(ts.month) for ts in timestamps]
+        'consumption_kwh': consumption[:, 0],
+        'temperature_celsius': temperature[:, 0],
+        **calendar_columns(timestamps),
     })
-    
-    # === ADICIONAR FERIADOS (simulação simplificada) ===
-    # Feriados brasileiros principais
-    holidays = [
-        (1, 1),   # Ano Novo
-        (4, 21),  # Tiradentes
-        (5, 1),   # Dia do Trabalho
-        (9, 7),   # Independência
-        (10, 12), # N. Sra. Aparecida
-        (11, 2),  # Finados
-        (11, 15), # Proclamação da República
-        (12, 25), # Natal
-    ]
-    
-    df['is_holiday'] = df.apply(
-        lambda row: 1 if (row['timestamp'].month, row['timestamp'].day) in holidays else 0,
-        axis=1
-    )
-    
-    # === SALVAR ===
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df.to_csv(output_path, index=False)
-    
+    df['season'] = df['month'].map(get_season)
+
+    # === SALVAR (CSV + cópia colunar binária) ===
+    write_energy_dataset(df, output_path)
+
     print(f"✅ Dataset gerado com sucesso!")
     print(f"📊 Total de registros: {len(df):,}")
     print(f"📅 Período: {df['timestamp'].min()} até {df['timestamp'].max()}")
     print(f"💾 Salvo em: {output_path}")
     print(f"\n📈 Estatísticas:")
     print(df['consumption_kwh'].describe())
-    
+
     return df
 
 
+def generate_meter_dataset(n_meters=1000, days=365, freq='1h', start='2022-01-01',
+                           output_dir='data/raw/synthetic_meters', meters_per_shard=250,
+                           max_shard_rows=1_000_000, seed=42):
+    """
+    Gera um dataset grande multi-medidor em shards colunares.
+
+    Cada shard cobre um bloco de medidores e um bloco de tempo com no
+    máximo max_shard_rows linhas, então a memória não depende do tamanho
+    total do dataset. As linhas de cada shard são ordenadas por timestamp
+    (e medidor), permitindo descartar row groups por intervalo.
+
+    Args:
+        n_meters: Número de medidores sintéticos
+        days: Dias simulados
+        freq: Resolução ('1h', '30min', '15min', ...)
+        start: Início da série
+        output_dir: Diretório do dataset
+        meters_per_shard: Medidores por shard
+        max_shard_rows: Limite de linhas por shard
+        seed: Semente (parâmetros e ruído são reproduzíveis)
+
+    Returns:
+        Manifest do dataset
+    """
+    step = pd.Timedelta(freq)
+    n_steps = int(pd.Timedelta(days=days) / step)
+    meters_per_shard = min(meters_per_shard, n_meters)
+    steps_per_shard = max(1, max_shard_rows // meters_per_shard)
+    step_hours = step / pd.Timedelta(hours=1)
+
+    print(f"🔧 Gerando {n_meters:,} medidores x {n_steps:,} passos ({freq}) = "
+          f"{n_meters * n_steps:,} linhas")
+
+    params = sample_meter_params(n_meters, seed=seed)
+    writer = ShardedWriter(output_dir, schema=ENERGY_SCHEMA)
+    params.to_csv(os.path.join(output_dir, 'meters.csv'), index=False)
+
+    for meter_start in range(0, n_meters, meters_per_shard):
+        block = params.iloc[meter_start:meter_start + meters_per_shard]
+        for step_start in range(0, n_steps, steps_per_shard):
+            timestamps = pd.date_range(pd.Timestamp(start) + step_start * step,
+                                       periods=min(steps_per_shard, n_steps - step_start), freq=step)
+            # Ruído semeado por bloco: mesmo resultado para os mesmos argumentos
+            rng = np.random.default_rng([seed, meter_start, step_start])
+            temperature, consumption = simulate(timestamps, block, rng)
+
+            T, M = consumption.shape
+            calendar = calendar_columns(timestamps)
+            voltage = rng.normal(240, 3, (T, M))
+            # Energia por intervalo (Wh) dividida entre as sub-medições
+            energy_wh = consumption * 1000 * step_hours
+            shares = rng.dirichlet([2, 1, 4], (T, M)) * 0.7
+
+            df = pd.DataFrame({
+                'timestamp': np.repeat(timestamps.values, M),
+                'meter_id': np.tile(block['meter_id'].to_numpy(), T),
+                'consumption_kwh': consumption.ravel(),
+                'temperature_celsius': temperature.ravel(),
+                **{name: np.repeat(np.asarray(values), M) for name, values in calendar.items()},
+                'Voltage': voltage.ravel(),
+                'Global_intensity': (consumption * 1000 / voltage).ravel(),
+                'Sub_metering_1': (energy_wh * shares[..., 0]).ravel(),
+                'Sub_metering_2': (energy_wh * shares[..., 1]).ravel(),
+                'Sub_metering_3': (energy_wh * shares[..., 2]).ravel(),
+            })
+            writer.write(df, meter_start=int(meter_start), meter_end=int(meter_start + M))
+            del df, temperature, consumption
+
+        print(f"   {min(meter_start + meters_per_shard, n_meters):,}/{n_meters:,} medidores")
+
+    manifest = writer.close(n_meters=n_meters, freq=freq, start=str(pd.Timestamp(start)),
+                            n_steps=n_steps, seed=seed)
+    print(f"✅ Dataset gerado: {manifest['n_rows']:,} linhas em {len(manifest['shards'])} shards")
+    print(f"💾 Salvo em: {output_dir}")
+    return manifest
+
+
 def get_season(month):
     """Retorna a estação do ano baseado no mês (Hemisfério Sul)"""
     if month in [12, 1, 2]:
@@ -156,11 +270,29 @@ def get_season(month):
 
 
 if __name__ == "__main__":
-    # Gerar dataset
-    df = generate_energy_dataset(days=730)
-    
-    print("\n🔍 Primeiras linhas do dataset:")
-    print(df.head(10))
-    
-    print("\n📊 Informações do dataset:")
-    print(df.info())
+    parser = argparse.ArgumentParser(description="Gerador de datasets sintéticos de energia")
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--meters", type=int, default=0,
+                        help="Número de medidores (0 = série única em data/raw/energy_consumption.csv)")
+    parser.add_argument("--freq", default="1h")
+    parser.add_argument("--output", default="data/raw/synthetic_meters")
+    parser.add_argument("--meters-per-shard", type=int, default=250)
+    parser.add_argument("--max-shard-rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.meters > 0:
+        generate_meter_dataset(
+            n_meters=args.meters, days=args.days, freq=args.freq, output_dir=args.output,
+            meters_per_shard=args.meters_per_shard, max_shard_rows=args.max_shard_rows,
+            seed=args.seed
+        )
+    else:
+        # Gerar dataset
+        df = generate_energy_dataset(days=args.days)
+
+        print("\n🔍 Primeiras linhas do dataset:")
+        print(df.head(10))
+
+        print("\n📊 Informações do dataset:")
+        print(df.info())
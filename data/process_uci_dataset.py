@@ -5,30 +5,63 @@ Converte o dataset UCI para o formato necessário pelo sistema.
 Dataset: Individual Household Electric Power Consumption
 Fonte: UCI Machine Learning Repository
 URL: https://archive.ics.uci.edu/ml/datasets/individual+household+electric+power+consumption
+
+O arquivo (~2M linhas por minuto) é lido em blocos de bytes direto do .zip,
+sem extração. Cada bloco é interpretado e agregado por intervalo em um
+processo separado; os agregados parciais (somas e contagens) são combinados
+no final, o que resolve intervalos divididos entre dois blocos.
+
+A resolução de saída é configurável: '1h' (padrão), '15min' ou '1min'.
 """
 
-import pandas as pd
-import numpy as np
 import os
-from datetime import datetime
+import sys
+
+from joblib import Parallel, delayed
+
+# Adicionar path do projeto
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
 
-def process_uci_dataset(input_path='data/raw/household_power_consumption.txt', 
-                        output_path='data/raw/energy_consumption.csv',
-                        num_days=None):
+from src.model.feature_spec import DEFAULT_RESOLUTION, SUPPORTED_RESOLUTIONS, resolution_steps
+from src.model.preprocessing import energy_dataset_path, write_energy_dataset
+from src.model.uci import (
+    DEFAULT_CHUNK_BYTES, aggregate_block, holiday_flags, iter_blocks, merge_aggregates,
+    open_source, simulate_temperature
+)
+
+
+def process_uci_dataset(input_path='data/raw/household_power_consumption.zip',
+                        output_path=None, num_days=None, n_jobs=-1,
+                        chunk_bytes=DEFAULT_CHUNK_BYTES, seed=42, resolution=DEFAULT_RESOLUTION):
     """
     Processa o dataset UCI para o formato necessário.
-    
+
     Args:
-        input_path: Caminho para o arquivo UCI baixado
+        input_path: Caminho para o .zip do UCI (ou o .txt extraído)
         output_path: Caminho para salvar o dataset processado
+            (None = energy_dataset_path(resolution))
         num_days: Número de dias para usar (None = TODOS os dados disponíveis)
+        n_jobs: Processos usados na agregação (-1 = todos os núcleos)
+        chunk_bytes: Tamanho dos blocos lidos do arquivo
+        seed: Semente da temperatura simulada
+        resolution: Resolução do dataset gerado ('1h', '15min' ou '1min')
     """
-    
+    output_path = output_path or energy_dataset_path(resolution)
+    steps_per_day = resolution_steps('1D', resolution)
+
     print("="*80)
     print("📊 PROCESSAMENTO DE DATASET REAL UCI")
     print("="*80)
     print()
-    
+
+    # Aceitar o .txt já extraído quando o .zip não existir
+    if not os.path.exists(input_path) and input_path.endswith('.zip'):
+        extracted = input_path[:-4] + '.txt'
+        if os.path.exists(extracted):
+            input_path = extracted
+
     # Verificar se arquivo existe
     if not os.path.exists(input_path):
         print(f"❌ Arquivo não encontrado: {input_path}")
@@ -36,170 +69,65 @@ def process_uci_dataset(input_path='data/raw/household_power_consumption.txt',
         print("📥 COMO OBTER O DATASET:")
         print("1. Acesse: https://archive.ics.uci.edu/ml/datasets/individual+household+electric+power+consumption")
         print("2. Baixe 'household_power_consumption.zip'")
-        print("3. Extraia e coloque 'household_power_consumption.txt' em data/raw/")
+        print("3. Coloque o .zip em data/raw/ (não é necessário extrair)")
         print()
         return False
-    
-    print(f"📂 Carregando dataset de: {input_path}")
-    
-    # Carregar dataset
-    # Carregar dataset em chunks para melhor performance
-    print("📂 Carregando dataset completo (pode levar alguns minutos)...")
-    df = pd.read_csv(input_path, sep=';', low_memory=False, 
-                     parse_dates={'DateTime': ['Date', 'Time']},
-                     dayfirst=True,
-                     dtype={'Global_active_power': 'float32',
-                            'Global_reactive_power': 'float32',
-                            'Voltage': 'float32',
-                            'Global_intensity': 'float32',
-                            'Sub_metering_1': 'float32',
-                            'Sub_metering_2': 'float32',
-                            'Sub_metering_3': 'float32'})
-    
-    print(f"✅ Dataset carregado: {len(df):,} registros")
-    print(f"📅 Período: {df['DateTime'].min()} até {df['DateTime'].max()}")
-    print()
-    
-    # Converter colunas para numérico
-    print("🔧 Convertendo colunas para numérico...")
-    numeric_cols = ['Global_active_power', 'Global_reactive_power', 'Voltage', 
-                    'Global_intensity', 'Sub_metering_1', 'Sub_metering_2', 'Sub_metering_3']
-    
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # Remover apenas linhas onde TODAS as colunas numéricas são NaN
-    # (mais permissivo - mantém mais dados)
-    print(f"📊 Registros antes da limpeza: {len(df):,}")
-    
-    # Remover apenas se Global_active_power for NaN (coluna principal)
-    # Preencher outros NaN com 0 ou média para manter mais dados
-    df_clean = df[df['Global_active_power'].notna()].copy()
-    
-    # Preencher NaN em outras colunas com 0 (para sub_metering) ou média (para voltage/intensity)
-    for col in ['Sub_metering_1', 'Sub_metering_2', 'Sub_metering_3']:
-        df_clean[col] = df_clean[col].fillna(0)
-    
-    for col in ['Voltage', 'Global_intensity']:
-        if df_clean[col].notna().sum() > 0:
-            df_clean[col] = df_clean[col].fillna(df_clean[col].mean())
-        else:
-            df_clean[col] = df_clean[col].fillna(0)
-    
-    df_clean['Global_reactive_power'] = df_clean['Global_reactive_power'].fillna(0)
-    
-    print(f"✅ Após limpeza otimizada: {len(df_clean):,} registros ({len(df_clean)/len(df)*100:.1f}% mantidos)")
-    print(f"   (Estratégia: manter máximo de dados possível)")
-    print()
-    
-    # Agregar para dados horários (o UCI tem dados por minuto)
-    print("⏰ Agregando para dados horários (usando TODOS os minutos disponíveis)...")
-    df_clean['timestamp'] = df_clean['DateTime'].dt.floor('h')  # 'h' em vez de 'H' (deprecated)
-    
-    # Agregar usando TODOS os dados disponíveis
-    df_hourly = df_clean.groupby('timestamp', as_index=False).agg({
-        'Global_active_power': 'mean',  # kW médio na hora
-        'Voltage': 'mean',
-        'Global_intensity': 'mean',
-        'Sub_metering_1': 'sum',  # Wh total na hora
-        'Sub_metering_2': 'sum',
-        'Sub_metering_3': 'sum'
-    })
-    
-    # Ordenar por timestamp
-    df_hourly = df_hourly.sort_values('timestamp').reset_index(drop=True)
-    
-    print(f"✅ Dados horários agregados: {len(df_hourly):,} registros")
-    print(f"   (De {len(df_clean):,} registros de minutos)")
-    print(f"   (Taxa de agregação: {len(df_clean)/len(df_hourly):.1f} minutos por hora)")
+
+    # Ler em blocos e agregar por intervalo em paralelo
+    print(f"📂 Lendo dataset em blocos de {chunk_bytes / 1024 / 1024:.0f} MB: {input_path}")
+    print(f"⏰ Agregando para resolução de {resolution} (usando TODOS os minutos disponíveis)...")
+    with open_source(input_path) as stream:
+        partials = Parallel(n_jobs=n_jobs, pre_dispatch='2*n_jobs')(
+            delayed(aggregate_block)(block, resolution) for block in iter_blocks(stream, chunk_bytes)
+        )
+    df_hourly, n_minutes = merge_aggregates(partials)
+
+    print(f"✅ Dados agregados: {len(df_hourly):,} registros")
+    print(f"   (De {n_minutes:,} registros de minutos)")
+    print(f"   (Taxa de agregação: {n_minutes/len(df_hourly):.1f} minutos por intervalo)")
     print()
-    
+
     # Selecionar dados (todos ou últimos N dias)
     if num_days is None:
         df_final = df_hourly.copy()
-        print(f"📊 Usando TODOS os dados disponíveis: {len(df_final):,} horas")
+        print(f"📊 Usando TODOS os dados disponíveis: {len(df_final):,} registros")
     else:
-        num_hours = num_days * 24
-        df_final = df_hourly.tail(num_hours).copy()
-        print(f"📊 Selecionando últimos {num_days} dias ({num_hours:,} horas)...")
+        num_rows = num_days * steps_per_day
+        df_final = df_hourly.tail(num_rows).reset_index(drop=True)
+        print(f"📊 Selecionando últimos {num_days} dias ({num_rows:,} registros)...")
     print()
-    
+
     # Renomear coluna principal
     df_final = df_final.rename(columns={'Global_active_power': 'consumption_kwh'})
-    
+
     # Adicionar features temporais
     print("🔧 Adicionando features temporais...")
     df_final['hour'] = df_final['timestamp'].dt.hour
     df_final['day_of_week'] = df_final['timestamp'].dt.dayofweek
     df_final['month'] = df_final['timestamp'].dt.month
     df_final['is_weekend'] = (df_final['day_of_week'] >= 5).astype(int)
-    
-    # Adicionar temperatura simulada baseada em sazonalidade
-    # (O dataset UCI não inclui temperatura, então simulamos de forma realista)
+
+    # O dataset UCI não inclui temperatura, então simulamos de forma realista
     print("🌡️ Simulando temperatura baseada em sazonalidade...")
-    
-    # Temperatura base por mês (França - hemisfério norte)
-    month_temp_base = {
-        1: 4,   # Janeiro - inverno
-        2: 6,   # Fevereiro
-        3: 10,  # Março - primavera
-        4: 13,  # Abril
-        5: 17,  # Maio
-        6: 20,  # Junho - verão
-        7: 22,  # Julho
-        8: 22,  # Agosto
-        9: 18,  # Setembro - outono
-        10: 14, # Outubro
-        11: 9,  # Novembro
-        12: 5   # Dezembro - inverno
-    }
-    
-    def calculate_temperature(row):
-        # Temperatura base do mês
-        base_temp = month_temp_base[row['month']]
-        
-        # Variação diária (mais quente à tarde)
-        daily_variation = np.sin((row['hour'] - 6) * np.pi / 12) * 4
-        
-        # Ruído realista
-        noise = np.random.normal(0, 2)
-        
-        return base_temp + daily_variation + noise
-    
-    df_final['temperature_celsius'] = df_final.apply(calculate_temperature, axis=1)
-    
-    # Adicionar feriados franceses principais
+    df_final['temperature_celsius'] = simulate_temperature(df_final['timestamp'], seed=seed)
+
     print("📅 Adicionando feriados...")
-    french_holidays = [
-        (1, 1),   # Ano Novo
-        (5, 1),   # Dia do Trabalho
-        (7, 14),  # Dia da Bastilha
-        (8, 15),  # Assunção
-        (11, 1),  # Dia de Todos os Santos
-        (11, 11), # Armistício
-        (12, 25)  # Natal
-    ]
-    
-    df_final['is_holiday'] = df_final.apply(
-        lambda row: 1 if (row['timestamp'].month, row['timestamp'].day) in french_holidays else 0,
-        axis=1
-    )
-    
+    df_final['is_holiday'] = holiday_flags(df_final['timestamp'])
+
     # Reordenar colunas
     columns_order = [
         'timestamp', 'consumption_kwh', 'temperature_celsius',
         'hour', 'day_of_week', 'month', 'is_weekend', 'is_holiday',
-        'Voltage', 'Global_intensity', 
+        'Voltage', 'Global_intensity',
         'Sub_metering_1', 'Sub_metering_2', 'Sub_metering_3'
     ]
-    
+
     df_final = df_final[columns_order]
-    
-    # Salvar
+
+    # Salvar (CSV + cópia colunar binária)
     print("💾 Salvando dataset processado...")
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df_final.to_csv(output_path, index=False)
-    
+    write_energy_dataset(df_final, output_path)
+
     print()
     print("="*80)
     print("✅ PROCESSAMENTO CONCLUÍDO COM SUCESSO!")
@@ -221,12 +149,21 @@ def process_uci_dataset(input_path='data/raw/household_power_consumption.txt',
     print("  2. python src/backend/main.py         # Iniciar backend")
     print("  3. Acesse http://localhost:8000/docs  # Testar API")
     print()
-    
+
     return True
 
 if __name__ == "__main__":
-    success = process_uci_dataset()
-    
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Processa o dataset UCI para o formato do sistema")
+    parser.add_argument("--input", default="data/raw/household_power_consumption.zip")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--resolution", default=DEFAULT_RESOLUTION, choices=SUPPORTED_RESOLUTIONS)
+    parser.add_argument("--days", type=int, default=None)
+    args = parser.parse_args()
+
+    success = process_uci_dataset(args.input, args.output, num_days=args.days, resolution=args.resolution)
+
     if not success:
         print("⚠️ Execute o download manual conforme instruções acima.")
         exit(1)
@@ -69,11 +69,46 @@ def check_system_health():
     return all_ok
 
 
+def run_forecast_scheduler(once=False):
+    """
+    Pré-calcula as previsões a cada virada de hora fora da API.
+    
+    Grava no backend de cache configurado; para a API ler os resultados,
+    use um backend compartilhado (CACHE_BACKEND=sqlite ou redis) e
+    desative o agendador interno (FORECAST_SCHEDULER_ENABLED=false).
+    """
+    from src.backend.api.routes import get_forecast_scheduler
+    from src.backend.core.config import settings
+    
+    if settings.CACHE_BACKEND == "memory":
+        print("⚠️ CACHE_BACKEND=memory: as previsões ficam só neste processo e a API não as verá")
+    
+    scheduler = get_forecast_scheduler()
+    if once:
+        summary = scheduler.run_once()
+        if scheduler.last_error:
+            print(f"❌ Erro: {scheduler.last_error}")
+            return False
+        for series, info in summary.items():
+            status = "recalculada" if info['compute_seconds'] is not None else "já atualizada"
+            print(f"✅ {series}: {status} (dados {info['data_version']}, gerada em {info['generated_at']})")
+        return True
+    
+    print(f"⏰ Agendador de previsões ativo (backend {settings.CACHE_BACKEND}); Ctrl+C para sair")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Agendador encerrado")
+    return True
+
+
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="Utilitários EnergyFlow AI")
-    parser.add_argument("command", choices=["cleanup", "health"])
+    parser.add_argument("command", choices=["cleanup", "health", "forecast-scheduler"])
+    parser.add_argument("--once", action="store_true",
+                        help="forecast-scheduler: calcula uma vez e sai")
     
     args = parser.parse_args()
     
@@ -81,3 +116,5 @@ if __name__ == "__main__":
         cleanup_logs()
     elif args.command == "health":
         check_system_health()
+    elif args.command == "forecast-scheduler":
+        sys.exit(0 if run_forecast_scheduler(args.once) else 1)
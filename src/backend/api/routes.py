@@ -3,24 +3,30 @@ ROTAS DA API
 Endpoints RESTful para o sistema de previsão.
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, File, HTTPException, Query, Request, Response, UploadFile, status
 from datetime import datetime
-import os
 import psutil
 import gc
 import logging
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional
 
 from src.backend.api.schemas import (
     PredictionInput, PredictionOutput,
     BatchPredictionInput, BatchPredictionOutput,
     HealthResponse, ErrorResponse,
-    ForecastRequest, ForecastOutput
+    ForecastRequest, ForecastOutput,
+    IngestOutput,
+    AnomalyScoreInput, AnomalyScoreOutput
 )
 from src.backend.core.predictor import EnergyPredictor
+from src.backend.core.cache import cache, canonical_key
 from src.backend.core.config import settings
+from src.backend.core.history import file_version, version_mtime
+from src.backend.core.http_cache import conditional, make_etag
 from src.backend.core.logger import setup_logger
 from src.backend.core.metrics import metrics, PerformanceMonitor
+from src.backend.core.singleflight import single_flight
 from src.backend.utils.validators import DataValidator
 
 # Logger
@@ -41,11 +47,162 @@ def get_predictor_instance():
     return _predictor
 
 
+def model_fingerprint() -> Optional[str]:
+    """Versão do modelo sem carregá-lo: a do preditor já carregado ou a do arquivo."""
+    if _predictor is not None and _predictor.model_version:
+        return _predictor.model_version
+    return file_version(settings.MODEL_PATH)
+
+
+# Série principal em memória (recarregada em segundo plano quando o arquivo muda)
+_history_store = None
+
+def get_history_store():
+    """Retorna o histórico em memória de DATA_PATH (criado sob demanda)."""
+    global _history_store
+    if _history_store is None:
+        from src.backend.core.history import HistoryStore
+        _history_store = HistoryStore(settings.DATA_PATH, check_interval=settings.HISTORY_CHECK_INTERVAL)
+    return _history_store
+
+
+def require_history():
+    """Histórico em memória ou 404 se o dataset não existir."""
+    store = get_history_store()
+    if store.snapshot() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dados históricos não encontrados. Execute o treinamento primeiro."
+        )
+    return store
+
+
+# Retreinamento disparado por drift (processo separado)
+_retrain_launcher = None
+_last_drift_check = 0
+
+def get_retrain_launcher():
+    """Retorna o controlador de retreinamento (criado sob demanda)."""
+    global _retrain_launcher
+    if _retrain_launcher is None:
+        from src.backend.core.retrain import RetrainLauncher
+        _retrain_launcher = RetrainLauncher()
+    return _retrain_launcher
+
+
+def start_retraining(reason: str) -> bool:
+    """Dispara src/model/train.py na resolução do modelo atual."""
+    predictor = get_predictor_instance()
+    resolution = predictor.resolution if predictor.is_ready() else settings.RESOLUTION
+    return get_retrain_launcher().start(reason, ['src/model/train.py', '--resolution', resolution])
+
+
+def reload_after_retraining():
+    """Descarta o preditor (modelo e referência de drift) após um retreino concluído."""
+    global _predictor
+    if _retrain_launcher is not None and _retrain_launcher.completed():
+        logger.info("Retreinamento concluído: recarregando modelo")
+        _predictor = None
+
+
+def check_drift(predictor):
+    """
+    Avalia o drift a cada DRIFT_CHECK_EVERY previsões e, com
+    DRIFT_AUTO_RETRAIN, dispara o retreinamento.
+    """
+    global _last_drift_check
+    monitor = predictor.drift_monitor
+    if monitor is None or monitor.samples - _last_drift_check < settings.DRIFT_CHECK_EVERY:
+        return
+    _last_drift_check = monitor.samples
+    report = monitor.report()
+    if report['drift_detected']:
+        logger.warning(f"Drift detectado: {report['drifted']} (PSI máx. {report['max_psi']:.3f})")
+        if settings.DRIFT_AUTO_RETRAIN:
+            start_retraining(f"drift em {', '.join(report['drifted'])}")
+
+
+# Campos de PredictionInput que compõem a chave do cache (ordem fixa)
+_PREDICTION_FIELDS = tuple(name for name in PredictionInput.model_fields if name != 'meter_id')
+
+
+def prediction_cache_key(predictor, input_data: Dict[str, Any], meter_id: Optional[int], history):
+    """
+    Chave do cache de previsões (None com o cache desligado).
+    
+    Inclui a versão do modelo; com histórico do medidor, inclui também o
+    fim do histórico e o intervalo atual, dos quais as features dependem.
+    Aplica PREDICTION_CACHE_QUANTA em input_data.
+    """
+    if not settings.PREDICTION_CACHE_ENABLED:
+        return None
+    context = (predictor.model_version, meter_id)
+    if history is not None:
+        import pandas as pd
+        
+        interval = pd.Timestamp(input_data['timestamp']).floor(pd.Timedelta(predictor.resolution))
+        context += (history['timestamp'].iloc[-1], interval)
+    return canonical_key('predict', input_data, _PREDICTION_FIELDS, context, settings.PREDICTION_CACHE_QUANTA)
+
+
+# Índice de histórico por medidor (carregado sob demanda)
+_meter_index = None
+
+def get_meter_index():
+    """Retorna o índice de histórico por medidor (None se não houver dataset multi-medidor)."""
+    global _meter_index
+    if _meter_index is None:
+        from src.model.meters import MeterHistoryIndex
+        _meter_index = MeterHistoryIndex.load_or_build(settings.METER_DATA_DIR, settings.METER_HISTORY_DIR)
+    return _meter_index
+
+
+def get_meter_history(meter_id: int):
+    """Histórico recente de um medidor ou 404."""
+    index = get_meter_index()
+    if index is None or meter_id not in index:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Medidor {meter_id} não encontrado."
+        )
+    return index.get(meter_id)
+
+
+# Detector de anomalias: estado por série mantido entre requisições
+_anomaly_detector = None
+_anomaly_lock = threading.Lock()
+
+def get_anomaly_detector():
+    """Retorna o detector de anomalias em streaming (criado sob demanda)."""
+    global _anomaly_detector
+    if _anomaly_detector is None:
+        from src.backend.core.anomaly import StreamingAnomalyDetector
+        _anomaly_detector = StreamingAnomalyDetector(
+            resolution=settings.RESOLUTION, threshold=settings.ANOMALY_THRESHOLD
+        )
+    return _anomaly_detector
+
+
+def get_series_history(meter_id: Optional[int] = None):
+    """Histórico bruto de uma série para os detectores (None se não houver)."""
+    if meter_id is not None:
+        index = get_meter_index()
+        return index.get(meter_id) if index is not None and meter_id in index else None
+    return get_history_store().frame(['consumption_kwh'])
+
+
 @router.get("/", tags=["Root"])
-async def root():
+async def root(request: Request, response: Response):
     """
     Endpoint raiz da API.
+    
+    Muda só com a versão da aplicação (ETag; 304 para If-None-Match).
     """
+    etag = make_etag('root', settings.APP_VERSION, len(router.routes))
+    cached = conditional(request, response, etag, None, settings.HTTP_CACHE_CONTROL['root'])
+    if cached is not None:
+        return cached
+    
     # Listar todas as rotas disponíveis para debug
     routes_list = []
     for route in router.routes:
@@ -125,16 +282,28 @@ async def predict_consumption(data: PredictionInput):
             # Adicionar timestamp (para compatibilidade)
             input_data['timestamp'] = datetime.now()
             
-            # Fazer previsão
-            logger.info(f"Fazendo previsão para temp={input_data['temperature_celsius']}°C, hora={input_data['hour']}")
-            prediction = predictor.predict_single(input_data)
+            # Histórico do medidor completa as features não informadas
+            meter_id = input_data.pop('meter_id', None)
+            history = get_meter_history(meter_id) if meter_id is not None else None
             
-            logger.info(f"Previsão concluída: {prediction:.2f} kWh")
+            key = prediction_cache_key(predictor, input_data, meter_id, history)
+            prediction = cache.get(key) if key is not None else None
+            
+            if prediction is None:
+                # Fazer previsão
+                logger.info(f"Fazendo previsão para temp={input_data['temperature_celsius']}°C, hora={input_data['hour']}")
+                prediction = predictor.predict_single(input_data, history=history)
+                check_drift(predictor)
+                if key is not None:
+                    cache.set(key, prediction, ttl=settings.PREDICTION_CACHE_TTL)
+                
+                logger.info(f"Previsão concluída: {prediction:.2f} kWh")
             
             return PredictionOutput(
                 predicted_consumption_kwh=prediction,
                 timestamp=datetime.now().isoformat(),
-                confidence="high"
+                confidence="high",
+                meter_id=meter_id
             )
         
         except HTTPException:
@@ -166,25 +335,56 @@ async def predict_batch(data: BatchPredictionInput):
         )
     
     try:
-        predictions = []
+        rows, histories, meter_ids = [], [], []
         
         for item in data.data:
             input_data = item.model_dump()
             input_data['timestamp'] = datetime.now()
             
-            pred = predictor.predict_single(input_data)
+            meter_id = input_data.pop('meter_id', None)
+            history = get_meter_history(meter_id) if meter_id is not None else None
+            key = prediction_cache_key(predictor, input_data, meter_id, history)
             
-            predictions.append(PredictionOutput(
-                predicted_consumption_kwh=pred,
+            rows.append((input_data, key))
+            histories.append(history)
+            meter_ids.append(meter_id)
+        
+        # Uma única consulta ao backend de cache para o lote inteiro
+        values = [None] * len(rows)
+        cached = [i for i, (_, key) in enumerate(rows) if key is not None]
+        for i, value in zip(cached, cache.get_many([rows[i][1] for i in cached])):
+            values[i] = value
+        misses = [i for i, value in enumerate(values) if value is None]
+        
+        # Só as linhas fora do cache vão ao modelo, em uma única chamada
+        if misses:
+            computed = predictor.predict_rows([rows[i][0] for i in misses], [histories[i] for i in misses])
+            for i, value in zip(misses, computed):
+                values[i] = value
+            cache.set_many(
+                {rows[i][1]: values[i] for i in misses if rows[i][1] is not None},
+                ttl=settings.PREDICTION_CACHE_TTL
+            )
+            check_drift(predictor)
+        logger.info(f"Lote de {len(values)} previsões ({len(values) - len(misses)} do cache)")
+        
+        predictions = [
+            PredictionOutput(
+                predicted_consumption_kwh=value,
                 timestamp=datetime.now().isoformat(),
-                confidence="high"
-            ))
+                confidence="high",
+                meter_id=meter_id
+            )
+            for value, meter_id in zip(values, meter_ids)
+        ]
         
         return BatchPredictionOutput(
             predictions=predictions,
             total=len(predictions)
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -192,6 +392,140 @@ async def predict_batch(data: BatchPredictionInput):
         )
 
 
+# Chave da previsão em cache de cada série (meter_id; None = série principal)
+_forecast_keys: Dict[Optional[int], tuple] = {}
+
+
+def forecast_target(predictor, meter_id: Optional[int]):
+    """
+    Chave do cache e função de cálculo da previsão de uma série.
+    
+    A chave reúne versão do modelo, resolução, série e versão do
+    histórico (versão do histórico em memória ou último timestamp do
+    medidor). Novos dados ou um novo modelo mudam a chave e a entrada
+    anterior é removida. O valor guardado traz a previsão, o instante do
+    cálculo e a versão dos dados usados.
+    """
+    from src.model.feature_spec import OnlineFeatureEvaluator
+    
+    if meter_id is not None:
+        history = get_meter_history(meter_id)
+        version = str(history['timestamp'].iloc[-1])
+        window = lambda: history
+    else:
+        store = require_history()
+        version = store.version
+        # Janela final do histórico em memória
+        lookback = OnlineFeatureEvaluator(resolution=predictor.resolution).history_size
+        window = lambda: store.tail(max(1000, lookback))
+    
+    key = ('forecast', predictor.model_version, predictor.resolution, meter_id, version)
+    previous = _forecast_keys.get(meter_id)
+    if previous is not None and previous != key:
+        cache.delete(previous)
+    _forecast_keys[meter_id] = key
+    
+    def compute(hours: int):
+        return {
+            'forecasts': predictor.predict_next_hours(window(), hours=hours),
+            'generated_at': datetime.now().isoformat(),
+            'data_version': version
+        }
+    return key, compute
+
+
+async def cached_forecast(predictor, meter_id: Optional[int], hours: int):
+    """
+    Previsão recursiva servida do cache por prefixo.
+    
+    Guarda-se o maior horizonte já pedido (ao menos
+    FORECAST_CACHE_MIN_HOURS, ou o horizonte pré-calculado pelo
+    agendador); horizontes menores são fatias dele, já que a previsão
+    recursiva de N passos é prefixo da de M > N passos. Requisições
+    simultâneas aguardam um único cálculo (single-flight).
+    
+    Returns:
+        (previsões, instante em que foram calculadas)
+    """
+    from src.model.feature_spec import resolution_steps
+    
+    key, compute = forecast_target(predictor, meter_id)
+    n_steps = resolution_steps(f'{hours}h', predictor.resolution)
+    # O recálculo (vencido, antecipado ou por horizonte maior) preserva o
+    # maior horizonte já guardado: um pedido de 24h não encurta a entrada
+    # de 168h pré-calculada pelo agendador
+    horizon = max(hours, settings.FORECAST_CACHE_MIN_HOURS)
+    if settings.FORECAST_SCHEDULER_ENABLED:
+        horizon = max(horizon, settings.FORECAST_PRECOMPUTE_HOURS)
+    entry = single_flight.peek(key)
+    if entry is not None:
+        per_hour = resolution_steps('1h', predictor.resolution)
+        horizon = max(horizon, -(-len(entry.value['forecasts']) // per_hour))
+    
+    ttl, stale_ttl = settings.FORECAST_CACHE_TTL, settings.CACHE_STALE_TTL
+    result = await single_flight.get_or_compute(key, lambda: compute(horizon), ttl, stale_ttl)
+    if len(result['forecasts']) < n_steps:
+        # Horizonte maior que o guardado: recalcula e substitui a entrada
+        result = await single_flight.refresh(key, lambda: compute(horizon), ttl, stale_ttl, flight=(key, horizon))
+    return result['forecasts'][:n_steps], result['generated_at']
+
+
+def precompute_forecasts(meter_ids=None, hours: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Calcula e grava no cache as previsões da série principal e dos
+    medidores configurados (executado pelo agendador, na thread dele).
+    
+    Séries cuja entrada já cobre o horizonte com o mesmo modelo e os
+    mesmos dados não são recalculadas.
+    
+    Returns:
+        Resumo por série (versão dos dados, instante do cálculo, duração)
+    """
+    import time
+    from src.model.feature_spec import resolution_steps
+    
+    predictor = get_predictor_instance()
+    if not predictor.is_ready():
+        raise RuntimeError("Modelo não está pronto")
+    get_history_store().refresh(wait=True)
+    
+    hours = hours or settings.FORECAST_PRECOMPUTE_HOURS
+    n_steps = resolution_steps(f'{hours}h', predictor.resolution)
+    meter_ids = settings.FORECAST_PRECOMPUTE_METERS if meter_ids is None else meter_ids
+    summary = {}
+    for meter_id in [None, *meter_ids]:
+        key, compute = forecast_target(predictor, meter_id)
+        entry = single_flight.peek(key)
+        if entry is not None and len(entry.value['forecasts']) >= n_steps:
+            value, duration = entry.value, None
+        else:
+            started = time.perf_counter()
+            value = compute(hours)
+            duration = time.perf_counter() - started
+            single_flight.store(key, value, settings.FORECAST_CACHE_TTL, settings.CACHE_STALE_TTL, duration)
+        summary['main' if meter_id is None else str(meter_id)] = {
+            'model_version': predictor.model_version,
+            'data_version': value['data_version'],
+            'generated_at': value['generated_at'],
+            'compute_seconds': duration
+        }
+    return summary
+
+
+# Agendador das previsões pré-calculadas (a cada virada de hora)
+_forecast_scheduler = None
+
+def get_forecast_scheduler():
+    """Retorna o agendador de pré-cálculo das previsões (criado sob demanda)."""
+    global _forecast_scheduler
+    if _forecast_scheduler is None:
+        from src.backend.core.scheduler import HourlyScheduler
+        _forecast_scheduler = HourlyScheduler(
+            precompute_forecasts, name='forecast-scheduler', delay=settings.FORECAST_SCHEDULE_DELAY
+        )
+    return _forecast_scheduler
+
+
 @router.post("/forecast", response_model=ForecastOutput, tags=["Forecast"])
 async def forecast_next_hours(request: ForecastRequest):
     """
@@ -199,12 +533,56 @@ async def forecast_next_hours(request: ForecastRequest):
     
     **Parâmetros:**
     - `hours_ahead`: Número de horas para prever (1-168)
+    - `meter_id`: Medidor (opcional; sem ele usa a série principal)
     
     **Retorna:**
-    - Lista de previsões horárias
+    - Lista de previsões, uma por intervalo da resolução do modelo (1h, 15min ou 1min)
+    
+    **Nota:** O histórico de um medidor vem do índice por medidor (busca O(1)).
+    Previsões ficam em cache até chegarem novos dados ou um novo modelo;
+    horizontes menores são servidos como prefixo do maior já calculado.
+    Com o agendador ativo (FORECAST_SCHEDULER_ENABLED) elas são
+    pré-calculadas a cada hora e `generated_at` indica quando.
+    Para cache HTTP (ETag/304), use GET /forecast.
+    """
+    return await forecast_response(request.hours_ahead, request.meter_id)
+
+
+@router.get("/forecast", response_model=ForecastOutput, tags=["Forecast"])
+async def get_forecast(
+    request: Request,
+    response: Response,
+    hours_ahead: int = Query(24, ge=1, le=168, description="Horas para prever (1-168)"),
+    meter_id: Optional[int] = Query(None, ge=0, description="Medidor (None = série principal)")
+):
+    """
+    Mesma previsão do POST /forecast como leitura condicional.
     
-    **Nota:** Requer dados históricos. Em produção, carrega do banco de dados.
+    O ETag vem da versão do modelo, da versão dos dados da série e do
+    horizonte; If-None-Match (ou If-Modified-Since, na série principal)
+    correspondente recebe 304 sem consultar o preditor. É um ETag fraco:
+    as previsões são as mesmas para essas versões, mas `generated_at`
+    muda quando a entrada é recalculada (TTL ou agendador).
     """
+    model_version = model_fingerprint()
+    if meter_id is None:
+        data_version = get_history_store().peek_version()
+        mtimes = [version_mtime(model_version), version_mtime(data_version)]
+        last_modified = max(mtimes) if None not in mtimes else None
+    else:
+        # A versão de um medidor é o fim do seu histórico (sem data de arquivo)
+        data_version = str(get_meter_history(meter_id)['timestamp'].iloc[-1])
+        last_modified = None
+    
+    etag = make_etag('forecast', model_version, meter_id, data_version, hours_ahead, weak=True)
+    cached = conditional(request, response, etag, last_modified, settings.HTTP_CACHE_CONTROL['forecast'])
+    if cached is not None:
+        return cached
+    return await forecast_response(hours_ahead, meter_id)
+
+
+async def forecast_response(hours_ahead: int, meter_id: Optional[int]) -> ForecastOutput:
+    """Previsão da série (pré-calculada ou do cache) no formato de resposta."""
     predictor = get_predictor_instance()
     if not predictor.is_ready():
         raise HTTPException(
@@ -213,30 +591,17 @@ async def forecast_next_hours(request: ForecastRequest):
         )
     
     try:
-        # Carregar dados históricos (demo)
-        historical_path = 'data/raw/energy_consumption.csv'
-        
-        if not os.path.exists(historical_path):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Dados históricos não encontrados. Execute o treinamento primeiro."
-            )
-        
-        import pandas as pd
-        df = pd.read_csv(historical_path)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
-        # Usar últimas 1000 linhas
-        df_recent = df.tail(1000)
-        
-        # Fazer previsão
-        forecasts = predictor.predict_next_hours(df_recent, hours=request.hours_ahead)
+        # Previsão (pré-calculada pelo agendador ou do cache quando modelo e histórico não mudaram)
+        forecasts, generated_at = await cached_forecast(predictor, meter_id, hours_ahead)
         
         return ForecastOutput(
             forecasts=forecasts,
-            total_hours=len(forecasts),
+            total_hours=hours_ahead,
             start_time=forecasts[0]['timestamp'],
-            end_time=forecasts[-1]['timestamp']
+            end_time=forecasts[-1]['timestamp'],
+            meter_id=meter_id,
+            resolution=predictor.resolution,
+            generated_at=generated_at
         )
     
     except HTTPException:
@@ -249,10 +614,19 @@ async def forecast_next_hours(request: ForecastRequest):
 
 
 @router.get("/model/info", tags=["Model"])
-async def get_model_info():
+async def get_model_info(request: Request, response: Response):
     """
     Retorna informações sobre o modelo carregado.
+    
+    ETag/Last-Modified vêm da versão do arquivo do modelo; um pedido
+    condicional correspondente recebe 304 sem consultar o preditor.
     """
+    version = model_fingerprint()
+    cached = conditional(request, response, make_etag('model_info', version), version_mtime(version),
+                         settings.HTTP_CACHE_CONTROL['model_info'])
+    if cached is not None:
+        return cached
+    
     try:
         predictor = get_predictor_instance()
         model_info = predictor.get_model_info()
@@ -275,41 +649,198 @@ async def get_model_info():
 
 
 @router.get("/stats", tags=["Statistics"])
-async def get_statistics():
+async def get_statistics(request: Request, response: Response):
     """
     Retorna estatísticas dos dados de treinamento.
+    
+    Lidas das estatísticas incrementais gravadas ao lado do dataset
+    (atualizadas a cada ingestão), com quantis e quebras por hora, dia da
+    semana e mês; o resumo fica em cache pela versão do dataset, com
+    requisições simultâneas aguardando uma única leitura. ETag e
+    Last-Modified vêm da mesma versão (304 sem ler nada).
     """
+    from src.model.dataset_stats import load_dataset_stats
+    
+    store = get_history_store()
+    version = store.peek_version()
+    if version is None:
+        require_history()
+    cached = conditional(request, response, make_etag('stats', version), version_mtime(version),
+                         settings.HTTP_CACHE_CONTROL['stats'])
+    if cached is not None:
+        return cached
+    
     try:
-        # Carregar dados
-        import pandas as pd
-        df = pd.read_csv('data/raw/energy_consumption.csv')
+        return await single_flight.get_or_compute(
+            ('stats', version),
+            lambda: load_dataset_stats(store.path).summary(),
+            settings.STATS_CACHE_TTL, settings.CACHE_STALE_TTL
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar estatísticas: {str(e)}"
+        )
+
+
+@router.get("/stats/analysis", tags=["Statistics"])
+async def get_time_series_analysis():
+    """
+    Análise da série de consumo: autocorrelação e periodograma via FFT,
+    decomposição por hora da semana e tendência em janelas móveis.
+    
+    O resultado é mantido em cache pela versão do histórico em memória e
+    só é recalculado quando o arquivo muda (um único cálculo para as
+    requisições simultâneas).
+    """
+    from src.backend.utils.export import DataAnalyzer
+    
+    store = require_history()
+    try:
+        fingerprint = store.version
         
-        stats = {
-            'total_records': len(df),
-            'consumption': {
-                'mean': float(df['consumption_kwh'].mean()),
-                'std': float(df['consumption_kwh'].std()),
-                'min': float(df['consumption_kwh'].min()),
-                'max': float(df['consumption_kwh'].max()),
-                'median': float(df['consumption_kwh'].median())
-            },
-            'temperature': {
-                'mean': float(df['temperature_celsius'].mean()),
-                'min': float(df['temperature_celsius'].min()),
-                'max': float(df['temperature_celsius'].max())
-            },
-            'date_range': {
-                'start': str(df['timestamp'].min()),
-                'end': str(df['timestamp'].max())
-            }
-        }
+        def analyze():
+            df = store.frame(['consumption_kwh'])
+            analysis = DataAnalyzer.analyze_time_series(df, 'consumption_kwh', resolution=settings.RESOLUTION)
+            analysis['fingerprint'] = fingerprint
+            return analysis
         
-        return stats
+        return await single_flight.get_or_compute(
+            ('stats_analysis', fingerprint), analyze, settings.STATS_CACHE_TTL, settings.CACHE_STALE_TTL
+        )
     
     except Exception as e:
+        logger.error(f"Erro na análise da série: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro ao buscar estatísticas: {str(e)}"
+            detail=f"Erro na análise da série: {str(e)}"
+        )
+
+
+@router.post("/anomalies/score", response_model=AnomalyScoreOutput, tags=["Anomaly"])
+def score_readings(request: AnomalyScoreInput):
+    """
+    Pontua novas leituras de consumo à medida que chegam.
+    
+    Cada leitura é comparada ao mesmo horário das semanas anteriores
+    (z-score robusto), à média exponencial do mesmo horário do dia e,
+    se `predicted_kwh` for informado, à previsão do modelo. O estado de
+    cada série é mantido entre chamadas (O(1) por leitura); na primeira
+    leitura de uma série ele é aquecido com o histórico disponível.
+    
+    Rota síncrona: a espera pelo lock e o carregamento do histórico rodam
+    no pool de threads do FastAPI, sem bloquear o event loop.
+    """
+    from src.backend.core.anomaly import MAIN_SERIES
+    
+    detector = get_anomaly_detector()
+    series = MAIN_SERIES if request.meter_id is None else str(request.meter_id)
+    try:
+        with _anomaly_lock:
+            if series not in detector:
+                history = get_series_history(request.meter_id)
+                if history is not None and len(history):
+                    detector.score_history(history.tail(detector.season_slots * detector.depth), series=series)
+            results = [
+                detector.update(r.timestamp, r.consumption_kwh, r.predicted_kwh, series=series)
+                for r in request.readings
+            ]
+    except Exception as e:
+        logger.error(f"Erro na detecção de anomalias: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro na detecção de anomalias: {str(e)}"
+        )
+    
+    anomalies = sum(result['is_anomaly'] for result in results)
+    if anomalies:
+        logger.warning(f"{anomalies} leituras anômalas na série {series}")
+    return AnomalyScoreOutput(series=series, results=results, anomalies=anomalies)
+
+
+@router.get("/anomalies", response_model=AnomalyScoreOutput, tags=["Anomaly"])
+async def list_anomalies(
+    last_n: int = Query(24 * 28, ge=1, le=1_000_000, description="Leituras mais recentes analisadas"),
+    meter_id: Optional[int] = Query(None, ge=0, description="Medidor (None = série principal)")
+):
+    """
+    Anomalias no histórico recente (modo em lote, vetorizado).
+    
+    Usa os mesmos detectores de /anomalies/score sobre as últimas
+    `last_n` leituras, sem alterar o estado do streaming.
+    """
+    from src.backend.core.anomaly import MAIN_SERIES, StreamingAnomalyDetector
+    
+    history = get_series_history(meter_id)
+    if history is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Histórico não encontrado para a série informada."
+        )
+    
+    detector = StreamingAnomalyDetector(resolution=settings.RESOLUTION, threshold=settings.ANOMALY_THRESHOLD)
+    # Leituras anteriores à janela servem só de contexto para os detectores
+    context = history.tail(last_n + detector.season_slots * detector.depth)
+    scored = detector.score_history(context, update_state=False).tail(last_n)
+    results = detector.records(scored[scored['is_anomaly']])
+    return AnomalyScoreOutput(
+        series=MAIN_SERIES if meter_id is None else str(meter_id),
+        results=results,
+        anomalies=len(results)
+    )
+
+
+# Ingestões simultâneas gravariam no mesmo CSV/estado
+_ingest_lock = threading.Lock()
+
+
+@router.post("/ingest", response_model=IngestOutput, tags=["Data"])
+def ingest_readings(
+    file: UploadFile = File(..., description="Leituras por minuto no formato UCI (separador ';')"),
+    meter_id: Optional[int] = Query(None, ge=0, description="Medidor (None = série principal)"),
+    flush: bool = Query(False, description="Finalizar também a última hora recebida")
+):
+    """
+    Ingere novas leituras por minuto de forma incremental.
+    
+    Apenas as horas completas são anexadas ao dataset (CSV, cópia colunar
+    e feature store); a última hora fica aberta até o próximo envio.
+    
+    Rota síncrona: as gravações em disco rodam no pool de threads do
+    FastAPI, sem bloquear o event loop.
+    """
+    from src.model.ingest import IncrementalIngester
+    
+    data = file.file.read()
+    try:
+        ingester = IncrementalIngester(
+            settings.DATA_PATH, settings.INGEST_STATE_PATH,
+            feature_store_dir=settings.FEATURE_STORE_DIR, resolution=settings.RESOLUTION
+        )
+        with _ingest_lock:
+            summary = ingester.ingest_bytes(data, meter_id=meter_id, flush=flush)
+            if meter_id is None:
+                # Recarrega o histórico em memória sem esperar o próximo intervalo
+                get_history_store().refresh()
+            elif len(ingester.last_rows):
+                # O índice por medidor vem dos shards: as horas novas entram em memória
+                index = get_meter_index()
+                if index is not None:
+                    index.update(meter_id, ingester.last_rows)
+        logger.info(f"Ingestão {summary['series']}: {summary['finalized_hours']} horas anexadas")
+        return IngestOutput(**summary)
+    
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Leituras inválidas: {str(e)}"
+        )
+    except Exception as e:
+        logger.error(f"Erro na ingestão: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro na ingestão: {str(e)}"
         )
 
 
@@ -323,8 +854,70 @@ async def get_metrics():
     - Total de requisições
     - Métricas por endpoint
     - Erros recentes
+    - Resumo do drift (PSI máximo e features em drift)
+    - Estatísticas do cache (entradas, bytes, hits, misses, despejos)
+    - Cálculos coalescidos (single-flight) e valores vencidos servidos
+    """
+    from src.backend.core.cache import cache
+    
+    result = metrics.get_metrics()
+    result['cache'] = cache.get_stats()
+    result['single_flight'] = single_flight.get_stats()
+    if _forecast_scheduler is not None:
+        result['forecast_scheduler'] = _forecast_scheduler.status()
+    predictor = get_predictor_instance()
+    monitor = predictor.drift_monitor if predictor.is_ready() else None
+    if monitor is not None:
+        report = monitor.report()
+        result['drift'] = {key: report[key] for key in ('samples', 'max_psi', 'drifted', 'drift_detected')}
+    return result
+
+
+@router.get("/drift", tags=["System"])
+async def get_drift_report():
+    """
+    Drift das entradas de /predict e das previsões em relação ao treinamento.
+    
+    PSI e KS por feature sobre histogramas de bins fixos (definidos no
+    treinamento); inclui o estado do último retreinamento disparado.
+    """
+    reload_after_retraining()
+    predictor = get_predictor_instance()
+    monitor = predictor.drift_monitor if predictor.is_ready() else None
+    if monitor is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Referência de drift não encontrada. Treine o modelo novamente."
+        )
+    
+    report = monitor.report()
+    report['retraining'] = get_retrain_launcher().status()
+    return report
+
+
+@router.post("/drift/retrain", tags=["System"])
+async def trigger_retraining(force: bool = Query(False, description="Retreinar mesmo sem drift detectado")):
+    """
+    Dispara o pipeline de treinamento em segundo plano.
+    
+    Sem `force`, só retreina se houver drift detectado.
     """
-    return metrics.get_metrics()
+    predictor = get_predictor_instance()
+    monitor = predictor.drift_monitor if predictor.is_ready() else None
+    report = monitor.report() if monitor is not None else None
+    if not force and not (report and report['drift_detected']):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Nenhum drift detectado. Use force=true para retreinar mesmo assim."
+        )
+    
+    reason = f"drift em {', '.join(report['drifted'])}" if report and report['drift_detected'] else "manual"
+    if not start_retraining(reason):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Já existe um retreinamento em andamento."
+        )
+    return {'started': True, 'reason': reason, 'retraining': get_retrain_launcher().status()}
 
 
 @router.get("/system/memory", tags=["System"])
@@ -12,6 +12,7 @@ class PredictionInput(BaseModel):
     """
     Modelo de entrada para previsão única.
     """
+    meter_id: Optional[int] = Field(None, ge=0, description="Medidor (usa o histórico recente dele para as features não informadas)")
     temperature_celsius: float = Field(..., ge=-50, le=60, description="Temperatura em Celsius")
     hour: int = Field(..., ge=0, le=23, description="Hora do dia (0-23)")
     day_of_week: int = Field(..., ge=0, le=6, description="Dia da semana (0=Segunda, 6=Domingo)")
@@ -49,6 +50,7 @@ class PredictionOutput(BaseModel):
     predicted_consumption_kwh: float = Field(..., description="Consumo previsto em kWh")
     timestamp: str = Field(..., description="Timestamp da previsão")
     confidence: Optional[str] = Field("high", description="Nível de confiança")
+    meter_id: Optional[int] = Field(None, description="Medidor da previsão")
     
     class Config:
         json_schema_extra = {
@@ -99,11 +101,13 @@ class ForecastRequest(BaseModel):
     Requisição para previsão de múltiplas horas.
     """
     hours_ahead: int = Field(24, ge=1, le=168, description="Horas para prever (1-168)")
+    meter_id: Optional[int] = Field(None, ge=0, description="Medidor (None = série principal)")
     
     class Config:
         json_schema_extra = {
             "example": {
-                "hours_ahead": 24
+                "hours_ahead": 24,
+                "meter_id": 42
             }
         }
 
@@ -116,3 +120,68 @@ class ForecastOutput(BaseModel):
     total_hours: int
     start_time: str
     end_time: str
+    meter_id: Optional[int] = None
+    resolution: str = "1h"
+    # Instante em que a previsão foi calculada (pelo agendador ou sob demanda)
+    generated_at: Optional[str] = None
+
+
+class IngestOutput(BaseModel):
+    """
+    Resumo de um lote de ingestão incremental.
+    """
+    series: str
+    minutes: int
+    late_minutes: int
+    finalized_hours: int
+    pending_hour: Optional[str] = None
+    watermark: Optional[str] = None
+
+
+class ReadingInput(BaseModel):
+    """
+    Leitura de consumo recebida para detecção de anomalias.
+    """
+    timestamp: datetime = Field(..., description="Início do intervalo medido")
+    consumption_kwh: float = Field(..., ge=0, description="Consumo medido (kWh)")
+    predicted_kwh: Optional[float] = Field(None, ge=0, description="Previsão do modelo para o intervalo (opcional)")
+
+
+class AnomalyScoreInput(BaseModel):
+    """
+    Lote de leituras novas de uma série, em ordem cronológica.
+    """
+    meter_id: Optional[int] = Field(None, ge=0, description="Medidor (None = série principal)")
+    readings: List[ReadingInput] = Field(..., min_length=1, max_length=10000)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "readings": [
+                    {"timestamp": "2010-11-26T21:00:00", "consumption_kwh": 6.2, "predicted_kwh": 1.4}
+                ]
+            }
+        }
+
+
+class AnomalyResult(BaseModel):
+    """
+    Escores de uma leitura (z de cada detector; None = histórico insuficiente).
+    """
+    timestamp: str
+    value: float
+    robust_z: Optional[float] = None
+    ewma_z: Optional[float] = None
+    residual_z: Optional[float] = None
+    score: float
+    is_anomaly: bool
+    detectors: List[str]
+
+
+class AnomalyScoreOutput(BaseModel):
+    """
+    Resultado da detecção de anomalias de um lote.
+    """
+    series: str
+    results: List[AnomalyResult]
+    anomalies: int
@@ -0,0 +1,327 @@
+"""
+DETECÇÃO DE ANOMALIAS EM STREAMING
+Escores de consumo anômalo com custo O(1) por leitura e estado por série.
+
+Três detectores, combinados em StreamingAnomalyDetector:
+
+    robust    z-score robusto (mediana/MAD) contra as últimas `depth`
+              leituras do mesmo horário da semana: o pico de toda noite ou
+              do fim de semana não dispara alarme
+    ewma      resíduo em relação à média exponencial do mesmo horário do
+              dia, normalizado pelo desvio exponencial dos resíduos
+    residual  erro da previsão do modelo (quando informada), normalizado
+              pela escala exponencial dos erros anteriores
+
+O estado de cada série são arrays numpy de tamanho fixo (buffer circular
+por horário da semana, médias/variâncias por horário do dia). update()
+processa uma leitura; score_history() calcula os mesmos escores de forma
+vetorizada sobre um histórico inteiro e deixa o estado pronto para seguir
+em streaming.
+
+zscore_outliers é o z-score global usado por DataValidator.detect_anomalies
+e DataAnalyzer.detect_outliers.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.model.feature_spec import DEFAULT_RESOLUTION, TARGET_COLUMN, resolution_steps
+
+
+# Série sem meter_id
+MAIN_SERIES = 'main'
+
+# MAD -> desvio padrão para dados normais
+MAD_TO_STD = 1.4826
+
+DETECTORS = ('robust', 'ewma', 'residual')
+
+
+def zscore_outliers(values, threshold=3.0):
+    """
+    Z-score global de uma série (média/desvio de todos os valores).
+
+    Returns:
+        (índices com |z| > threshold, array de |z|)
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) < 3:
+        return [], np.zeros(len(values))
+
+    std = values.std()
+    if std == 0:
+        return [], np.zeros(len(values))
+
+    z_scores = np.abs((values - values.mean()) / std)
+    return np.where(z_scores > threshold)[0].tolist(), z_scores
+
+
+def _sorted_median(ordered, count):
+    """Mediana de cada linha já ordenada (NaN no fim), com count valores válidos."""
+    rows = np.arange(len(ordered))
+    lo = np.maximum((count - 1) // 2, 0)
+    hi = np.maximum(count // 2, 0)
+    return (ordered[rows, lo] + ordered[rows, hi]) / 2
+
+
+def _robust_z(values, windows, min_periods, min_scale, relative_scale):
+    """z-score robusto de cada valor contra a linha correspondente de windows."""
+    count = np.isfinite(windows).sum(axis=1)
+    median = _sorted_median(np.sort(windows, axis=1), count)
+    mad = _sorted_median(np.sort(np.abs(windows - median[:, None]), axis=1), count)
+    scale = np.maximum(np.maximum(MAD_TO_STD * mad, min_scale), relative_scale * np.abs(median))
+    with np.errstate(invalid='ignore'):
+        return np.where(count >= min_periods, (values - median) / scale, np.nan)
+
+
+class _SeriesState:
+    """Estado compacto de uma série."""
+
+    __slots__ = ('ring', 'seen', 'ewma_mean', 'ewma_var', 'ewma_count',
+                 'residual_scale', 'residual_count', 'last_timestamp')
+
+    def __init__(self, season_slots, depth, daily_slots):
+        # Últimas `depth` leituras de cada horário da semana
+        self.ring = np.full((season_slots, depth), np.nan)
+        self.seen = np.zeros(season_slots, dtype=np.int64)
+        # Média e variância exponenciais por horário do dia
+        self.ewma_mean = np.zeros(daily_slots)
+        self.ewma_var = np.zeros(daily_slots)
+        self.ewma_count = np.zeros(daily_slots, dtype=np.int64)
+        # Escala (média exponencial de erro²) dos resíduos do modelo
+        self.residual_scale = 0.0
+        self.residual_count = 0
+        self.last_timestamp = None
+
+
+class StreamingAnomalyDetector:
+    """
+    Detectores de anomalia com estado por série.
+    """
+
+    def __init__(self, resolution=DEFAULT_RESOLUTION, season='168h', depth=8, daily='24h',
+                 alpha=0.1, residual_alpha=0.05, threshold=4.0, min_periods=3, min_scale=0.01,
+                 relative_scale=0.5):
+        """
+        Args:
+            resolution: Resolução das leituras ('1h', '15min', '1min')
+            season: Período do detector robusto (horário da semana)
+            depth: Leituras anteriores do mesmo horário usadas na mediana
+            daily: Período do detector EWMA (horário do dia)
+            alpha: Suavização da média/variância EWMA
+            residual_alpha: Suavização da escala dos resíduos do modelo
+            threshold: |z| acima do qual a leitura é anômala
+            min_periods: Observações mínimas antes de emitir um escore
+            min_scale: Escala mínima (kWh), evita z infinito em séries constantes
+            relative_scale: Escala mínima do detector robusto como fração da
+                mediana (o consumo doméstico varia de forma multiplicativa:
+                sem ela, horários de consumo base estável geram alarmes a
+                cada eletrodoméstico ligado)
+        """
+        self.resolution = resolution
+        self.step = pd.Timedelta(resolution).value
+        self.season_slots = resolution_steps(season, resolution)
+        self.daily_slots = resolution_steps(daily, resolution)
+        self.depth = depth
+        self.alpha = alpha
+        self.residual_alpha = residual_alpha
+        self.threshold = threshold
+        self.min_periods = min_periods
+        self.min_scale = min_scale
+        self.relative_scale = relative_scale
+        self._series = {}
+
+    def __contains__(self, series):
+        return series in self._series
+
+    def _state(self, series):
+        if series not in self._series:
+            self._series[series] = _SeriesState(self.season_slots, self.depth, self.daily_slots)
+        return self._series[series]
+
+    def _slots(self, ns):
+        steps = ns // self.step
+        return steps % self.season_slots, steps % self.daily_slots
+
+    # === STREAMING ===
+    def update(self, timestamp, value, predicted=None, series=MAIN_SERIES):
+        """
+        Calcula os escores de uma leitura e a incorpora ao estado da série.
+
+        Leituras repetidas ou atrasadas (timestamp <= última leitura da
+        série) são pontuadas, mas não alteram o estado.
+
+        Returns:
+            Dicionário com os escores de cada detector e is_anomaly
+        """
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_localize(None)
+        value = float(value)
+        season, daily = self._slots(timestamp.value)
+        state = self._state(series)
+        learn = state.last_timestamp is None or timestamp > state.last_timestamp
+        scores = dict.fromkeys(DETECTORS, np.nan)
+
+        scores['robust'] = _robust_z(np.array([value]), state.ring[season][None, :],
+                                     self.min_periods, self.min_scale, self.relative_scale)[0]
+
+        count = state.ewma_count[daily]
+        residual = value - state.ewma_mean[daily]
+        if count >= self.min_periods:
+            scores['ewma'] = residual / max(np.sqrt(state.ewma_var[daily]), self.min_scale)
+
+        error = None if predicted is None else value - float(predicted)
+        if error is not None and state.residual_count >= self.min_periods:
+            scores['residual'] = error / max(np.sqrt(state.residual_scale), self.min_scale)
+
+        if learn:
+            state.ring[season, state.seen[season] % self.depth] = value
+            state.seen[season] += 1
+
+            if count == 0:
+                state.ewma_mean[daily] = value
+            else:
+                state.ewma_mean[daily] += self.alpha * residual
+                state.ewma_var[daily] = (1 - self.alpha) * (state.ewma_var[daily] + self.alpha * residual * residual)
+            state.ewma_count[daily] = count + 1
+
+            if error is not None:
+                if state.residual_count == 0:
+                    state.residual_scale = error * error
+                else:
+                    state.residual_scale += self.residual_alpha * (error * error - state.residual_scale)
+                state.residual_count += 1
+            state.last_timestamp = timestamp
+
+        return self._result(timestamp, value, scores)
+
+    def _result(self, timestamp, value, scores):
+        flagged = [name for name in DETECTORS if abs(scores[name]) > self.threshold]
+        finite = [abs(z) for z in scores.values() if np.isfinite(z)]
+        return {
+            'timestamp': timestamp.isoformat(),
+            'value': value,
+            **{f'{name}_z': (float(z) if np.isfinite(z) else None) for name, z in scores.items()},
+            'score': float(max(finite)) if finite else 0.0,
+            'is_anomaly': bool(flagged),
+            'detectors': flagged,
+        }
+
+    def records(self, scored):
+        """Converte linhas de score_history() no formato de update()."""
+        return [
+            self._result(row.timestamp, row.value, {name: getattr(row, f'{name}_z') for name in DETECTORS})
+            for row in scored.itertuples(index=False)
+        ]
+
+    # === LOTE ===
+    def score_history(self, df, series=MAIN_SERIES, value_column=TARGET_COLUMN,
+                      prediction_column=None, update_state=True):
+        """
+        Escores vetorizados de um histórico inteiro (mesma definição de update()).
+
+        O histórico é avaliado desde o início; com update_state, o estado da
+        série passa a ser o do fim do histórico (substituindo o anterior) e
+        update() continua a partir dele.
+
+        Args:
+            df: DataFrame com 'timestamp' e value_column (uma série)
+            series: Série cujo estado é substituído
+            prediction_column: Coluna com previsões do modelo (opcional)
+            update_state: Se False, apenas calcula os escores
+
+        Returns:
+            DataFrame com timestamp, value, <detector>_z, score e is_anomaly
+        """
+        df = df[df[value_column].notna()].sort_values('timestamp', kind='stable')
+        timestamps = pd.to_datetime(df['timestamp'])
+        values = df[value_column].to_numpy(dtype=float)
+        season, daily = self._slots(np.asarray(timestamps, dtype='datetime64[ns]').astype(np.int64))
+        state = _SeriesState(self.season_slots, self.depth, self.daily_slots)
+
+        result = pd.DataFrame({'timestamp': timestamps.to_numpy(), 'value': values})
+        result['robust_z'] = self._robust_history(values, season, state)
+        result['ewma_z'] = self._ewma_history(values, daily, state)
+        result['residual_z'] = np.nan
+        if prediction_column is not None:
+            errors = values - df[prediction_column].to_numpy(dtype=float)
+            result['residual_z'] = self._residual_history(errors, state)
+
+        z = result[[f'{name}_z' for name in DETECTORS]].abs()
+        result['score'] = z.max(axis=1).fillna(0.0)
+        result['is_anomaly'] = (z > self.threshold).any(axis=1)
+
+        if update_state:
+            if len(result):
+                state.last_timestamp = pd.Timestamp(result['timestamp'].iloc[-1])
+            self._series[series] = state
+        return result
+
+    def _robust_history(self, values, season, state):
+        # Ordenar por (horário, tempo): leituras anteriores do mesmo horário ficam contíguas
+        order = np.lexsort((np.arange(len(values)), season))
+        ordered, slots = values[order], season[order]
+        position = pd.Series(slots).groupby(slots).cumcount().to_numpy()
+
+        # Janela k: a leitura k posições antes no mesmo horário
+        windows = np.full((len(values), self.depth), np.nan)
+        for lag in range(1, min(self.depth, len(values) - 1) + 1):
+            same = position[lag:] >= lag
+            windows[lag:, lag - 1] = np.where(same, ordered[:-lag], np.nan)
+
+        z = np.empty(len(values))
+        z[order] = _robust_z(ordered, windows, self.min_periods, self.min_scale, self.relative_scale)
+
+        # Estado: últimas `depth` leituras de cada horário
+        recent = position >= np.bincount(slots, minlength=self.season_slots)[slots] - self.depth
+        state.ring[slots[recent], position[recent] % self.depth] = ordered[recent]
+        state.seen[:] = np.bincount(slots, minlength=self.season_slots)
+        return z
+
+    def _ewma_history(self, values, daily, state):
+        alpha = self.alpha
+        # Matriz (rodada, horário): a rodada k contém a k-ésima leitura de cada
+        # horário, e a recorrência de update() avança todos os horários juntos
+        order = np.lexsort((np.arange(len(values)), daily))
+        slots = daily[order]
+        position = pd.Series(slots).groupby(slots).cumcount().to_numpy()
+        rounds = int(position.max()) + 1 if len(values) else 0
+        matrix = np.full((rounds, self.daily_slots), np.nan)
+        matrix[position, slots] = values[order]
+
+        z = np.full((rounds, self.daily_slots), np.nan)
+        mean, variance = state.ewma_mean, state.ewma_var
+        count = np.zeros(self.daily_slots, dtype=np.int64)
+        for k in range(rounds):
+            x = matrix[k]
+            seen = np.isfinite(x)
+            residual = np.where(seen, x - mean, 0.0)
+            if k >= self.min_periods:
+                z[k] = residual / np.maximum(np.sqrt(variance), self.min_scale)
+            if k == 0:
+                mean[seen] = x[seen]
+            else:
+                mean += alpha * residual
+                variance[:] = np.where(seen, (1 - alpha) * (variance + alpha * residual * residual), variance)
+            count += seen
+
+        state.ewma_count[:] = count
+        result = np.empty(len(values))
+        result[order] = z[position, slots]
+        return result
+
+    def _residual_history(self, errors, state):
+        valid = np.isfinite(errors)
+        scale = pd.Series(errors[valid] ** 2).ewm(alpha=self.residual_alpha, adjust=False).mean().to_numpy()
+        previous = np.concatenate([[np.nan], scale[:-1]])
+        count = np.arange(len(scale))
+
+        z = np.full(len(errors), np.nan)
+        with np.errstate(invalid='ignore'):
+            z[valid] = np.where(count >= self.min_periods,
+                                errors[valid] / np.maximum(np.sqrt(previous), self.min_scale), np.nan)
+        if len(scale):
+            state.residual_scale = float(scale[-1])
+            state.residual_count = int(len(scale))
+        return z
@@ -1,100 +1,224 @@
 """
 SISTEMA DE CACHE
-Cache em memória para previsões frequentes.
+Cache para previsões frequentes sobre um backend plugável.
+
+O CacheManager mantém os contadores de acerto/erro (iguais para todos os
+backends) e delega o armazenamento a um CacheBackend: LRU em memória
+(padrão), arquivo SQLite compartilhado pelos workers da máquina ou
+servidor Redis (ver cache_backends e CACHE_BACKEND).
 """
 
-from typing import Any, Optional
-from datetime import datetime, timedelta
-import hashlib
-import json
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+import sys
+import threading
+import time
+
+from src.backend.core.config import settings
+from src.backend.core.cache_backends import (
+    CacheBackend, MemoryBackend, MISSING as _MISSING, RedisBackend, SQLiteBackend
+)
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Estimativa de bytes ocupados por um valor.
+
+    Arrays NumPy/DataFrames usam o tamanho dos buffers; contêineres somam
+    os elementos até dois níveis de profundidade (o suficiente para
+    dicionários de previsão e listas de pontos).
+    """
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes + 128
+    memory_usage = getattr(value, 'memory_usage', None)
+    if callable(memory_usage) and hasattr(value, 'columns'):
+        return int(memory_usage(deep=False).sum()) + 128
+
+    size = sys.getsizeof(value)
+    if _depth >= 2:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(v, _depth + 1) for v in value)
+    return size
+
+
+def quantize(value: float, step: Optional[float]) -> float:
+    """Arredonda value para o múltiplo de step mais próximo (step vazio = inalterado)."""
+    if not step:
+        return value
+    return round(round(value / step) * step, 10)
+
+
+def canonical_key(namespace: str, data: Dict[str, Any], fields: Iterable[str],
+                  context: Tuple[Hashable, ...] = (),
+                  quanta: Optional[Dict[str, float]] = None) -> Tuple[Hashable, ...]:
+    """
+    Chave de cache como tupla (namespace, *context, valores de fields).
+
+    A ordem dos campos é fixa, então não há serialização nem hash
+    criptográfico: o custo é o de montar uma tupla. Campos em quanta são
+    arredondados no próprio dicionário, para que o valor calculado
+    corresponda exatamente à chave (todas as entradas do mesmo intervalo
+    recebem a mesma resposta).
+    """
+    if quanta:
+        for field, step in quanta.items():
+            if data.get(field) is not None:
+                data[field] = quantize(data[field], step)
+    return (namespace, *context, *(data.get(field) for field in fields))
 
 
 class CacheManager:
     """
-    Gerenciador de cache simples em memória.
-    Para produção, use Redis.
+    Cache com TTL sobre um backend (LRU em memória por padrão).
+    Para vários workers, use um backend compartilhado (SQLite ou Redis).
     """
-    
-    def __init__(self, default_ttl: int = 300):
+
+    def __init__(self, default_ttl: int = 300, max_entries: int = 10_000,
+                 max_bytes: Optional[int] = None, clock: Callable[[], float] = time.monotonic,
+                 sizeof: Callable[[Any], int] = estimate_size, backend: Optional[CacheBackend] = None):
         """
         Args:
             default_ttl: Tempo de vida padrão em segundos (5 minutos)
+            max_entries: Número máximo de entradas (backend em memória)
+            max_bytes: Orçamento de memória estimada (None = sem limite de bytes)
+            clock: Relógio monotônico em segundos (injetável em testes)
+            sizeof: Função de estimativa de tamanho dos valores
+            backend: Armazenamento (None = MemoryBackend com os limites acima)
         """
-        self.cache: dict = {}
         self.default_ttl = default_ttl
-    
-    def _generate_key(self, data: dict) -> str:
-        """
-        Gera chave única para os dados.
-        """
-        # Ordenar dict para garantir mesma chave para mesmos dados
-        sorted_data = json.dumps(data, sort_keys=True)
-        return hashlib.md5(sorted_data.encode()).hexdigest()
-    
-    def get(self, key: str) -> Optional[Any]:
-        """
-        Obtém valor do cache.
-        """
-        if key in self.cache:
-            value, expiry = self.cache[key]
-            
-            # Verificar se ainda é válido
-            if datetime.now() < expiry:
-                return value
-            else:
-                # Remover se expirado
-                del self.cache[key]
-        
-        return None
-    
-    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        self.backend = backend if backend is not None else MemoryBackend(max_entries, max_bytes, clock, sizeof)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Acompanhamento da recuperação após um reinício (ver cache_snapshot)
+        self.warm_restart = None
+
+    def _generate_key(self, data: dict) -> tuple:
+        """
+        Gera chave única para os dados (valores precisam ser hashable).
+        """
+        # Ordenar itens para garantir mesma chave para mesmos dados
+        return tuple(sorted(data.items()))
+
+    def _count(self, values: List[Any]):
+        found = sum(1 for v in values if v is not _MISSING)
+        with self._lock:
+            self.hits += found
+            self.misses += len(values) - found
+            if self.warm_restart is not None:
+                self.warm_restart.observe(found, len(values))
+
+    def get_many(self, keys: List[Any], default: Any = None) -> List[Any]:
+        """
+        Obtém vários valores com uma única consulta ao backend
+        (default nas posições ausentes ou expiradas).
+        """
+        values = self.backend.get_many(list(keys))
+        self._count(values)
+        return [default if v is _MISSING else v for v in values]
+
+    def get(self, key: Any, default: Any = None) -> Optional[Any]:
+        """
+        Obtém valor do cache (default se ausente ou expirado).
+        """
+        return self.get_many([key], default)[0]
+
+    def set_many(self, items: Dict[Any, Any], ttl: Optional[float] = None):
+        """
+        Armazena vários valores com o mesmo TTL.
+        """
+        if items:
+            self.backend.set_many(items, self.default_ttl if ttl is None else ttl)
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
         """
         Armazena valor no cache.
         """
-        if ttl is None:
-            ttl = self.default_ttl
-        
-        expiry = datetime.now() + timedelta(seconds=ttl)
-        self.cache[key] = (value, expiry)
-    
+        self.set_many({key: value}, ttl)
+
+    def delete(self, key: Any) -> bool:
+        """
+        Remove uma entrada; retorna se ela existia.
+        """
+        return self.backend.delete(key)
+
+    def __contains__(self, key: Any) -> bool:
+        return self.backend.contains(key)
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
     def get_or_compute(self, data: dict, compute_fn, ttl: Optional[int] = None) -> Any:
         """
         Obtém do cache ou computa se não existir.
         """
         key = self._generate_key(data)
-        
+
         # Tentar obter do cache
-        cached = self.get(key)
-        if cached is not None:
+        cached = self.get(key, _MISSING)
+        if cached is not _MISSING:
             return cached
-        
+
         # Computar
         result = compute_fn()
-        
+
         # Armazenar no cache
         self.set(key, result, ttl)
-        
+
         return result
-    
+
     def clear(self):
         """
         Limpa todo o cache.
         """
-        self.cache.clear()
-    
+        self.backend.clear()
+
     def get_stats(self) -> dict:
         """
         Retorna estatísticas do cache.
         """
-        now = datetime.now()
-        valid_entries = sum(1 for _, expiry in self.cache.values() if expiry > now)
-        
-        return {
-            "total_entries": len(self.cache),
-            "valid_entries": valid_entries,
-            "expired_entries": len(self.cache) - valid_entries
-        }
+        backend = self.backend.stats()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend.name,
+                "total_entries": backend['total_entries'],
+                "valid_entries": backend['total_entries'],
+                "bytes": backend.get('bytes'),
+                "max_entries": backend.get('max_entries'),
+                "max_bytes": backend.get('max_bytes'),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": backend.get('evictions'),
+                "expirations": backend.get('expirations'),
+                **{k: v for k, v in backend.items() if k not in ('total_entries', 'bytes', 'max_entries',
+                                                                 'max_bytes', 'evictions', 'expirations')},
+                **({"warm_restart": self.warm_restart.report()} if self.warm_restart is not None else {})
+            }
+
+
+def create_backend(name: str = settings.CACHE_BACKEND) -> CacheBackend:
+    """
+    Backend configurado em CACHE_BACKEND ('memory', 'sqlite' ou 'redis').
+    """
+    if name == 'memory':
+        return MemoryBackend(settings.CACHE_MAX_ENTRIES, settings.CACHE_MAX_BYTES, sizeof=estimate_size)
+    if name == 'sqlite':
+        return SQLiteBackend(settings.CACHE_SQLITE_PATH, max_entries=settings.CACHE_MAX_ENTRIES,
+                             count_interval=settings.CACHE_COUNT_INTERVAL)
+    if name == 'redis':
+        return RedisBackend(settings.CACHE_REDIS_URL, prefix=settings.CACHE_KEY_PREFIX,
+                            dedicated_db=settings.CACHE_REDIS_DEDICATED_DB,
+                            count_interval=settings.CACHE_COUNT_INTERVAL)
+    raise ValueError(f"Backend de cache desconhecido: {name}")
 
 
 # Instância global
-cache = CacheManager(default_ttl=300)  # 5 minutos
+cache = CacheManager(
+    default_ttl=settings.CACHE_TTL,  # 5 minutos
+    backend=create_backend()
+)
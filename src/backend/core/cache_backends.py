@@ -0,0 +1,559 @@
+"""
+BACKENDS DE CACHE
+Armazenamento usado pelo CacheManager.
+
+- MemoryBackend: LRU no próprio processo (objetos Python, sem serialização).
+- SQLiteBackend: arquivo local compartilhado pelos workers da mesma máquina.
+- RedisBackend: servidor compatível com o protocolo Redis (RESP), sem
+  dependência do pacote redis.
+
+Todos expõem a mesma interface em lote (get_many/set_many), de modo que
+uma previsão em lote faz uma única consulta ao backend. Os backends
+compartilhados gravam os valores com pickle (binário) e as chaves pela
+repr da tupla, que é estável entre processos para tipos primitivos.
+Como pickle executa código ao carregar, use apenas arquivos/servidores
+controlados pela própria aplicação.
+"""
+
+import heapq
+import os
+import pickle
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from src.backend.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Sentinela para distinguir "ausente" de um valor None armazenado
+MISSING = object()
+
+
+def encode_key(key: Any) -> bytes:
+    """Chave em bytes, igual em todos os processos (repr de tipos primitivos)."""
+    return repr(key).encode()
+
+
+def dump_value(value: Any) -> bytes:
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_value(data: bytes) -> Any:
+    return pickle.loads(data)
+
+
+class CacheBackend:
+    """
+    Interface dos backends de cache.
+
+    get_many devolve MISSING nas posições ausentes ou vencidas; stats
+    devolve os campos específicos do backend (entradas, bytes, despejos).
+    """
+
+    name = 'base'
+
+    def get_many(self, keys: List[Any]) -> List[Any]:
+        raise NotImplementedError
+
+    def set_many(self, items: Dict[Any, Any], ttl: float):
+        raise NotImplementedError
+
+    def delete(self, key: Any) -> bool:
+        raise NotImplementedError
+
+    def contains(self, key: Any) -> bool:
+        return self.get_many([key])[0] is not MISSING
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {'total_entries': len(self)}
+
+    def export_entries(self) -> Optional[List[tuple]]:
+        """
+        Entradas válidas como (chave, valor, segundos restantes), da menos
+        para a mais usada; None se o backend já persiste sozinho.
+        """
+        return None
+
+    def close(self):
+        pass
+
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'size')
+
+    def __init__(self, value, expires_at, size):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class MemoryBackend(CacheBackend):
+    """
+    LRU em memória limitado por entradas e por bytes estimados.
+
+    A expiração usa relógio monotônico e um heap ordenado pelo instante de
+    expiração: cada operação remove apenas as entradas já vencidas, sem
+    varrer o cache.
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sizeof: Callable[[Any], int] = sys.getsizeof):
+        """
+        Args:
+            max_entries: Número máximo de entradas
+            max_bytes: Orçamento de memória estimada (None = sem limite de bytes)
+            clock: Relógio monotônico em segundos (injetável em testes)
+            sizeof: Função de estimativa de tamanho dos valores
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Any, _Entry]" = OrderedDict()
+        # (expira_em, sequência, chave); itens sobrescritos ficam até vencerem
+        self._expiry_heap: list = []
+        self._sequence = 0
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        return entry
+
+    def _expire(self, now: float):
+        """Remove as entradas vencidas (topo do heap)."""
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, _, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            # Ignora itens do heap de valores já sobrescritos ou removidos
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key)
+                self.expirations += 1
+
+        # Sobrescritas acumulam itens obsoletos: reconstrói o heap se dominarem
+        if len(heap) > 2 * len(self._entries) + 64:
+            self._expiry_heap = [(e.expires_at, i, k) for i, (k, e) in enumerate(self._entries.items())]
+            heapq.heapify(self._expiry_heap)
+            self._sequence = len(self._expiry_heap)
+
+    def _evict(self):
+        """Despeja as entradas menos usadas até caber no orçamento."""
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def get_many(self, keys):
+        with self._lock:
+            self._expire(self._clock())
+            values = []
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    values.append(MISSING)
+                else:
+                    self._entries.move_to_end(key)
+                    values.append(entry.value)
+            return values
+
+    def set_many(self, items, ttl):
+        """Valores maiores que o orçamento de bytes inteiro não são armazenados."""
+        sized = [(key, value, self._sizeof(value)) for key, value in items.items()]
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            expires_at = now + ttl
+            for key, value, size in sized:
+                if key in self._entries:
+                    self._remove(key)
+                if self.max_bytes is not None and size > self.max_bytes:
+                    continue
+                self._entries[key] = _Entry(value, expires_at, size)
+                self._bytes += size
+                self._sequence += 1
+                heapq.heappush(self._expiry_heap, (expires_at, self._sequence, key))
+            self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def contains(self, key):
+        with self._lock:
+            self._expire(self._clock())
+            return key in self._entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._expiry_heap.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def export_entries(self):
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            return [(key, entry.value, entry.expires_at - now) for key, entry in self._entries.items()]
+
+    def stats(self):
+        with self._lock:
+            self._expire(self._clock())
+            return {
+                'total_entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Cache em um arquivo SQLite (modo WAL) compartilhado pelos processos da
+    mesma máquina.
+
+    Leituras não gravam no arquivo, então o despejo acima de max_entries
+    remove as entradas mais próximas do vencimento (não LRU). Vencidas e
+    excedentes são removidas a cada `purge_every` gravações.
+
+    O número de entradas e de bytes em stats()/len() é aproximado: contado
+    na limpeza ou no máximo a cada `count_interval` segundos (COUNT é O(n))
+    e somado às gravações deste processo desde então.
+    """
+
+    name = 'sqlite'
+
+    # Limite de parâmetros por consulta IN (...)
+    _BATCH = 500
+
+    def __init__(self, path: str, max_entries: int = 10_000, purge_every: int = 100,
+                 clock: Callable[[], float] = time.time, count_interval: float = 30.0):
+        """
+        Args:
+            path: Arquivo do banco (criado se não existir)
+            max_entries: Número máximo de entradas
+            purge_every: Gravações entre limpezas de vencidas/excedentes
+            clock: Relógio de parede em segundos (compartilhado entre processos)
+            count_interval: Segundos entre contagens completas para stats()
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.purge_every = purge_every
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.count_interval = count_interval
+        self._entries = 0
+        self._bytes = 0
+        self._counted_at: Optional[float] = None
+        self.evictions = 0
+        self.expirations = 0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache '
+            '(key BLOB PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)')
+
+    def get_many(self, keys):
+        encoded = [encode_key(k) for k in keys]
+        found = {}
+        with self._lock:
+            now = self._clock()
+            for start in range(0, len(encoded), self._BATCH):
+                batch = encoded[start:start + self._BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM cache WHERE expires_at > ? AND key IN ({','.join('?' * len(batch))})",
+                    [now, *batch]
+                ).fetchall()
+                found.update(rows)
+        return [load_value(found[k]) if k in found else MISSING for k in encoded]
+
+    def set_many(self, items, ttl):
+        rows = [(encode_key(k), dump_value(v)) for k, v in items.items()]
+        with self._lock:
+            expires_at = self._clock() + ttl
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                [(k, v, expires_at) for k, v in rows]
+            )
+            self._writes += len(rows)
+            # Estimativa até a próxima contagem (substituições contam em dobro)
+            self._entries += len(rows)
+            self._bytes += sum(len(v) for _, v in rows)
+            if self._writes >= self.purge_every:
+                self._writes = 0
+                self._purge()
+
+    def _count(self):
+        """Conta entradas válidas e bytes (O(n)); chamado com o lock."""
+        self._entries, self._bytes = self._conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache WHERE expires_at > ?',
+            (self._clock(),)
+        ).fetchone()
+        self._counted_at = self._clock()
+
+    def _purge(self):
+        """Remove vencidas e, acima de max_entries, as que vencem primeiro."""
+        self.expirations += self._conn.execute(
+            'DELETE FROM cache WHERE expires_at <= ?', (self._clock(),)
+        ).rowcount
+        self._count()
+        excess = self._entries - self.max_entries
+        if excess > 0:
+            self.evictions += self._conn.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at LIMIT ?)', (excess,)
+            ).rowcount
+            self._count()
+
+    def _approximate_counts(self):
+        """Entradas e bytes, recontando apenas se a última contagem for antiga."""
+        with self._lock:
+            if self._counted_at is None or self._clock() - self._counted_at >= self.count_interval:
+                self._count()
+            return self._entries, self._bytes
+
+    def delete(self, key):
+        with self._lock:
+            deleted = self._conn.execute('DELETE FROM cache WHERE key = ?', (encode_key(key),)).rowcount > 0
+            if deleted:
+                self._entries = max(self._entries - 1, 0)
+            return deleted
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM cache')
+            self._entries = self._bytes = 0
+            self._counted_at = self._clock()
+
+    def __len__(self):
+        return self._approximate_counts()[0]
+
+    def stats(self):
+        entries, size = self._approximate_counts()
+        return {
+            'total_entries': entries,
+            'bytes': size,
+            'max_entries': self.max_entries,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'path': self.path
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisError(Exception):
+    """Resposta de erro do servidor Redis."""
+
+
+class RedisBackend(CacheBackend):
+    """
+    Cache em um servidor compatível com Redis, via protocolo RESP.
+
+    Usa MGET para leituras em lote e SET ... PX em pipeline para
+    gravações; o vencimento e o despejo ficam a cargo do servidor
+    (maxmemory-policy). Falhas de conexão viram ausências (o cache nunca
+    derruba uma requisição) e a conexão é refeita na próxima operação.
+
+    Contagem de entradas: com um db exclusivo da aplicação (dedicated_db),
+    DBSIZE (O(1)); caso contrário um SCAN pelo prefixo, repetido no máximo
+    a cada `count_interval` segundos.
+    """
+
+    name = 'redis'
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', prefix: str = 'energyflow:',
+                 timeout: float = 1.0, dedicated_db: bool = False, count_interval: float = 30.0):
+        """
+        Args:
+            url: redis://[:senha@]host:porta/db
+            prefix: Prefixo das chaves (isola esta aplicação no servidor)
+            timeout: Timeout de conexão e leitura (s)
+            dedicated_db: O db da URL só tem chaves desta aplicação (conta com DBSIZE)
+            count_interval: Segundos entre contagens por SCAN (sem dedicated_db)
+        """
+        parts = urlsplit(url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 6379
+        self.db = int(parts.path.strip('/') or 0)
+        self.password = parts.password
+        self.prefix = prefix.encode()
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+        self.dedicated_db = dedicated_db
+        self.count_interval = count_interval
+        self._entries = 0
+        self._counted_at: Optional[float] = None
+        self.errors = 0
+
+    # ---- protocolo ----
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile('rb')
+        if self.password:
+            self._call([b'AUTH', self.password])
+        if self.db:
+            self._call([b'SELECT', self.db])
+
+    def _disconnect(self):
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    @staticmethod
+    def _encode_command(args) -> bytes:
+        out = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            out.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(out)
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Conexão com o Redis encerrada")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload
+        if kind == b'-':
+            raise RedisError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            return self._reader.read(length + 2)[:-2]
+        if kind == b'*':
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise RedisError(f"Resposta inválida: {line!r}")
+
+    def _pipeline(self, commands):
+        """Envia vários comandos de uma vez e lê as respostas em ordem."""
+        if self._sock is None:
+            self._connect()
+        self._sock.sendall(b''.join(self._encode_command(c) for c in commands))
+        return [self._read_reply() for _ in commands]
+
+    def _call(self, args):
+        return self._pipeline([args])[0]
+
+    def _execute(self, fn, fallback):
+        """Executa fn com a conexão; erros de rede devolvem fallback."""
+        with self._lock:
+            try:
+                return fn()
+            except (OSError, ConnectionError, RedisError) as e:
+                self.errors += 1
+                self._disconnect()
+                logger.warning(f"Cache Redis indisponível ({self.host}:{self.port}): {e}")
+                return fallback
+
+    def _key(self, key) -> bytes:
+        return self.prefix + encode_key(key)
+
+    def _scan(self) -> Iterable[bytes]:
+        cursor = b'0'
+        while True:
+            cursor, keys = self._call([b'SCAN', cursor, b'MATCH', self.prefix + b'*', b'COUNT', 1000])
+            yield from keys
+            if cursor == b'0':
+                return
+
+    # ---- interface ----
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        raw = self._execute(lambda: self._call([b'MGET', *(self._key(k) for k in keys)]), None)
+        if raw is None:
+            return [MISSING] * len(keys)
+        return [MISSING if v is None else load_value(v) for v in raw]
+
+    def set_many(self, items, ttl):
+        if not items:
+            return
+        ms = max(int(ttl * 1000), 1)
+        commands = [[b'SET', self._key(k), dump_value(v), b'PX', ms] for k, v in items.items()]
+        self._execute(lambda: self._pipeline(commands), None)
+
+    def delete(self, key):
+        return bool(self._execute(lambda: self._call([b'DEL', self._key(key)]), 0))
+
+    def clear(self):
+        def clear_prefix():
+            keys = list(self._scan())
+            for start in range(0, len(keys), 1000):
+                self._call([b'DEL', *keys[start:start + 1000]])
+        self._execute(clear_prefix, None)
+        self._entries, self._counted_at = 0, None
+
+    def __len__(self):
+        if self.dedicated_db:
+            return self._execute(lambda: self._call([b'DBSIZE']), 0)
+        now = time.monotonic()
+        if self._counted_at is None or now - self._counted_at >= self.count_interval:
+            errors = self.errors
+            count = self._execute(lambda: sum(1 for _ in self._scan()), 0)
+            if self.errors != errors:
+                return count
+            self._entries, self._counted_at = count, now
+        return self._entries
+
+    def stats(self):
+        return {
+            'total_entries': len(self),
+            'server': f"{self.host}:{self.port}/{self.db}",
+            'errors': self.errors
+        }
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
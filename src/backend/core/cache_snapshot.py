@@ -0,0 +1,233 @@
+"""
+SNAPSHOT DO CACHE (REINÍCIO AQUECIDO)
+Grava periodicamente o cache em memória em um arquivo binário compacto
+(pickle + zlib) e o recarrega ao iniciar a API.
+
+- Cada entrada guarda os segundos de vida restantes; ao recarregar,
+  desconta-se o tempo em que o arquivo ficou parado e as já vencidas
+  são descartadas.
+- O cabeçalho registra as impressões digitais do modelo e do dataset
+  (tamanho + mtime, mesmo formato de EnergyPredictor.model_version e
+  HistoryStore.version). As chaves do cache contêm essas versões; se uma
+  delas mudou, as entradas com a versão antiga são descartadas.
+- WarmRestart mede o tempo até a taxa de acerto voltar a
+  CACHE_RECOVERY_RATIO x a taxa registrada no snapshot.
+
+Backends compartilhados (SQLite/Redis) já sobrevivem ao reinício e não
+usam snapshot.
+"""
+
+import os
+import pickle
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+# Adicionar path do projeto
+project_root = str(Path(__file__).parent.parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.backend.core.config import settings
+from src.backend.core.history import file_version
+from src.backend.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def current_fingerprints() -> Dict[str, Optional[str]]:
+    """Versões atuais do modelo e do dataset principal."""
+    return {'model': file_version(settings.MODEL_PATH), 'dataset': file_version(settings.DATA_PATH)}
+
+
+def save_snapshot(cache, path: str, fingerprints: Dict[str, Optional[str]],
+                  clock: Callable[[], float] = time.time) -> Optional[int]:
+    """
+    Grava as entradas válidas do cache.
+
+    Returns:
+        Número de entradas gravadas (None se o backend não exporta entradas)
+    """
+    entries = cache.backend.export_entries()
+    if entries is None:
+        return None
+
+    records = []
+    for key, value, remaining in entries:
+        try:
+            records.append((key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), remaining))
+        except Exception:
+            # Valores não serializáveis simplesmente não sobrevivem ao reinício
+            continue
+
+    stats = cache.get_stats()
+    payload = {
+        'version': SNAPSHOT_VERSION,
+        'created_at': clock(),
+        'fingerprints': fingerprints,
+        'hit_rate': stats['hit_rate'] if stats['hits'] + stats['misses'] else None,
+        'entries': records,
+    }
+    data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+def load_snapshot(cache, path: str, fingerprints: Dict[str, Optional[str]],
+                  clock: Callable[[], float] = time.time) -> Optional[Dict[str, Any]]:
+    """
+    Recarrega um snapshot no cache, com TTLs descontados do tempo parado.
+
+    Returns:
+        Resumo (carregadas, vencidas, invalidadas, idade, taxa de acerto
+        anterior) ou None se não houver snapshot utilizável
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            payload = pickle.loads(zlib.decompress(f.read()))
+    except Exception as e:
+        logger.warning(f"Snapshot do cache ilegível ({path}): {e}")
+        return None
+    if payload.get('version') != SNAPSHOT_VERSION:
+        return None
+
+    age = max(clock() - payload['created_at'], 0.0)
+    # Versões que mudaram desde o snapshot: entradas que as contêm na chave são descartadas
+    outdated = {old for name, old in payload['fingerprints'].items()
+                if old is not None and old != fingerprints.get(name)}
+
+    report = {'loaded': 0, 'expired': 0, 'invalidated': 0, 'age_seconds': age,
+              'previous_hit_rate': payload['hit_rate'], 'outdated': sorted(outdated)}
+    for key, blob, remaining in payload['entries']:
+        remaining -= age
+        if remaining <= 0:
+            report['expired'] += 1
+        elif outdated and isinstance(key, tuple) and any(part in outdated for part in key):
+            report['invalidated'] += 1
+        else:
+            cache.set(key, pickle.loads(blob), ttl=remaining)
+            report['loaded'] += 1
+    return report
+
+
+class WarmRestart:
+    """
+    Tempo até a taxa de acerto se recuperar após um reinício.
+
+    As consultas são agrupadas em janelas de `window`; a recuperação é a
+    primeira janela com taxa >= ratio x a taxa anterior ao reinício.
+    """
+
+    def __init__(self, baseline_hit_rate: Optional[float], restored: int = 0, load_seconds: float = 0.0,
+                 window: int = 200, ratio: float = 0.9, clock: Callable[[], float] = time.monotonic):
+        self.baseline_hit_rate = baseline_hit_rate
+        self.target_hit_rate = None if baseline_hit_rate is None else ratio * baseline_hit_rate
+        self.restored = restored
+        self.load_seconds = load_seconds
+        self.window = window
+        self._clock = clock
+        self._started = clock()
+        self._hits = 0
+        self._lookups = 0
+        self.lookups = 0
+        self.last_window_hit_rate = None
+        self.recovery_seconds = None
+        self.lookups_to_recover = None
+
+    def observe(self, hits: int, lookups: int):
+        """Registra o resultado de uma consulta ao cache (chamado pelo CacheManager)."""
+        if self.recovery_seconds is not None:
+            return
+        self._hits += hits
+        self._lookups += lookups
+        self.lookups += lookups
+        if self._lookups < self.window:
+            return
+        self.last_window_hit_rate = self._hits / self._lookups
+        self._hits = self._lookups = 0
+        if self.target_hit_rate is not None and self.last_window_hit_rate >= self.target_hit_rate:
+            self.recovery_seconds = self._clock() - self._started
+            self.lookups_to_recover = self.lookups
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'restored_entries': self.restored,
+            'load_seconds': self.load_seconds,
+            'baseline_hit_rate': self.baseline_hit_rate,
+            'target_hit_rate': self.target_hit_rate,
+            'last_window_hit_rate': self.last_window_hit_rate,
+            'recovered': self.recovery_seconds is not None,
+            'recovery_seconds': self.recovery_seconds,
+            'lookups_to_recover': self.lookups_to_recover
+        }
+
+
+class CacheSnapshotter:
+    """
+    Grava o snapshot a cada `interval` segundos em uma thread e ao parar.
+    """
+
+    def __init__(self, cache, path: str, interval: float,
+                 fingerprints: Callable[[], Dict[str, Optional[str]]] = current_fingerprints):
+        self.cache = cache
+        self.path = path
+        self.interval = interval
+        self._fingerprints = fingerprints
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def restore(self) -> Optional[Dict[str, Any]]:
+        """Recarrega o snapshot e passa a acompanhar a recuperação."""
+        started = time.perf_counter()
+        report = load_snapshot(self.cache, self.path, self._fingerprints())
+        load_seconds = time.perf_counter() - started
+        self.cache.warm_restart = WarmRestart(
+            report['previous_hit_rate'] if report else None,
+            restored=report['loaded'] if report else 0,
+            load_seconds=load_seconds,
+            window=settings.CACHE_RECOVERY_WINDOW,
+            ratio=settings.CACHE_RECOVERY_RATIO
+        )
+        if report:
+            logger.info(
+                f"Cache restaurado: {report['loaded']} entradas em {load_seconds * 1000:.0f} ms "
+                f"({report['expired']} vencidas, {report['invalidated']} invalidadas)"
+            )
+        return report
+
+    def save(self):
+        try:
+            count = save_snapshot(self.cache, self.path, self._fingerprints())
+            if count is not None:
+                logger.info(f"Snapshot do cache: {count} entradas em {self.path}")
+        except Exception as e:
+            logger.error(f"Erro ao gravar snapshot do cache: {e}")
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.save()
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='cache-snapshot', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Interrompe a gravação periódica e grava um último snapshot."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.save()
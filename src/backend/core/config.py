@@ -39,6 +39,83 @@ class Settings(BaseSettings):
     # Paths
     MODEL_PATH: str = "src/model/saved_models/regression_model.pkl"
     SCALER_DIR: str = "src/model/saved_models"
+    DATA_PATH: str = "data/raw/energy_consumption.csv"
+    # Resolução de DATA_PATH ('1h', '15min' ou '1min'); o modelo carrega a sua em resolution.pkl
+    RESOLUTION: str = "1h"
+    FEATURE_STORE_DIR: str = "data/processed/feature_store"
+    METER_DATA_DIR: str = "data/raw/synthetic_meters"
+    METER_HISTORY_DIR: str = "data/processed/meter_history"
+    INGEST_STATE_PATH: str = "data/processed/ingest_state.json"
+    
+    # Intervalo mínimo (s) entre verificações de mudança do dataset em memória
+    HISTORY_CHECK_INTERVAL: float = 2.0
+    
+    # Anomalias: |z| acima do qual uma leitura é sinalizada
+    ANOMALY_THRESHOLD: float = 4.0
+    
+    # Cache em memória: TTL padrão (s) e orçamento de entradas/bytes estimados
+    CACHE_TTL: int = 300
+    CACHE_MAX_ENTRIES: int = 10_000
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # Backend: 'memory' (por processo), 'sqlite' (arquivo compartilhado pelos
+    # workers da máquina) ou 'redis' (servidor compartilhado)
+    CACHE_BACKEND: str = "memory"
+    CACHE_SQLITE_PATH: str = "data/processed/cache.sqlite3"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_KEY_PREFIX: str = "energyflow:"
+    # Contagem de entradas em /metrics: db Redis exclusivo usa DBSIZE; nos
+    # demais casos a contagem completa (O(n)) é refeita a cada N segundos
+    CACHE_REDIS_DEDICATED_DB: bool = False
+    CACHE_COUNT_INTERVAL: int = 30
+    # Snapshot do cache em memória para reinício aquecido: arquivo, intervalo (s;
+    # 0 = só no encerramento) e recuperação = taxa de acerto em janelas de
+    # CACHE_RECOVERY_WINDOW consultas >= CACHE_RECOVERY_RATIO x a do snapshot
+    CACHE_SNAPSHOT_ENABLED: bool = True
+    CACHE_SNAPSHOT_PATH: str = "data/processed/cache_snapshot.bin"
+    CACHE_SNAPSHOT_INTERVAL: int = 300
+    CACHE_RECOVERY_WINDOW: int = 200
+    CACHE_RECOVERY_RATIO: float = 0.9
+    
+    # Cache de /predict: TTL (s) e passo de arredondamento por campo de entrada
+    # (ex.: {"temperature_celsius": 0.5, "consumption_lag_1h": 0.01}); vazio = exato
+    PREDICTION_CACHE_ENABLED: bool = True
+    PREDICTION_CACHE_TTL: int = 3600
+    PREDICTION_CACHE_QUANTA: dict = {}
+    
+    # Cache de /forecast: horizonte mínimo calculado (horas) e TTL (s)
+    FORECAST_CACHE_MIN_HOURS: int = 24
+    FORECAST_CACHE_TTL: int = 6 * 3600
+    
+    # Pré-cálculo horário das previsões: horizonte (h), medidores além da série
+    # principal e segundos após a virada da hora (tempo para a ingestão gravar)
+    FORECAST_SCHEDULER_ENABLED: bool = True
+    FORECAST_PRECOMPUTE_HOURS: int = 168
+    FORECAST_PRECOMPUTE_METERS: list = []
+    FORECAST_SCHEDULE_DELAY: float = 5.0
+    
+    # TTL (s) das estatísticas e da análise da série (a chave já muda com o dataset)
+    STATS_CACHE_TTL: int = 3600
+    
+    # Coalescência de cálculos: threads, janela (s) em que um valor vencido ainda
+    # é servido enquanto recalcula e agressividade da expiração antecipada (0 = off)
+    SINGLE_FLIGHT_WORKERS: int = 4
+    CACHE_STALE_TTL: int = 300
+    CACHE_EARLY_EXPIRATION_BETA: float = 1.0
+    
+    # Cache HTTP (Cache-Control) dos endpoints de leitura; as respostas levam
+    # ETag/Last-Modified e pedidos condicionais recebem 304
+    HTTP_CACHE_CONTROL: dict = {
+        "root": "public, max-age=3600",
+        "model_info": "public, max-age=60, must-revalidate",
+        "stats": "public, max-age=60, must-revalidate",
+        "forecast": "public, max-age=60, must-revalidate",
+    }
+    
+    # Drift: previsões observadas antes de sinalizar drift e retreino automático
+    DRIFT_MIN_SAMPLES: int = 200
+    DRIFT_CHECK_EVERY: int = 100
+    DRIFT_AUTO_RETRAIN: bool = False
+    RETRAIN_LOG_PATH: str = "logs/retrain.log"
     
     # Model
     MODEL_TYPE: str = "regression_ml"
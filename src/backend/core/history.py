@@ -0,0 +1,209 @@
+"""
+HISTÓRICO EM MEMÓRIA
+Série principal carregada uma vez em arrays tipados e compartilhada pelas
+rotas (/forecast, /stats, /anomalies).
+
+O arquivo é verificado no máximo a cada `check_interval` segundos por
+tamanho e mtime (um os.stat, sem leitura); quando muda, uma thread
+recarrega a série (pela cópia colunar quando disponível) e troca o
+snapshot de uma vez. As requisições continuam usando o snapshot anterior
+durante a recarga, sem E/S no caminho da requisição.
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Adicionar path do projeto
+project_root = str(Path(__file__).parent.parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.backend.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Colunas usadas pelas features online, estatísticas e detectores
+HISTORY_COLUMNS = [
+    'consumption_kwh', 'temperature_celsius', 'is_holiday', 'Voltage',
+    'Global_intensity', 'Sub_metering_1', 'Sub_metering_2', 'Sub_metering_3',
+]
+
+
+def _version(stat) -> str:
+    """Versão de um arquivo a partir de (tamanho, mtime_ns), em hexadecimal."""
+    return f"{stat[0]:x}-{stat[1]:x}"
+
+
+def file_version(path: str) -> Optional[str]:
+    """Versão atual de um arquivo (mesmo formato de EnergyPredictor.model_version; None se ausente)."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return _version((stat.st_size, stat.st_mtime_ns))
+
+
+def version_mtime(version: Optional[str]) -> Optional[float]:
+    """Instante de modificação (s) codificado em uma versão; None se não for desse formato."""
+    try:
+        return int(version.split('-')[1], 16) / 1e9
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class _Snapshot:
+    """Conteúdo imutável de uma carga do arquivo."""
+    __slots__ = ('arrays', 'stat', 'version', 'loaded_at')
+
+    def __init__(self, arrays, stat):
+        self.arrays = arrays
+        self.stat = stat
+        self.version = _version(stat)
+        self.loaded_at = time.time()
+
+
+class HistoryStore:
+    """
+    Série histórica em memória com recarga em segundo plano.
+    """
+
+    def __init__(self, path: str, columns: List[str] = HISTORY_COLUMNS, check_interval: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            path: CSV do dataset (a cópia colunar ao lado dele é preferida)
+            columns: Colunas mantidas em memória, além de 'timestamp'
+            check_interval: Intervalo mínimo entre verificações do arquivo (s)
+            clock: Relógio monotônico (injetável em testes)
+        """
+        self.path = path
+        self.columns = list(columns)
+        self.check_interval = check_interval
+        self._clock = clock
+        self._snapshot: Optional[_Snapshot] = None
+        self._last_check = float('-inf')
+        self._lock = threading.Lock()
+        self._reloading: Optional[threading.Thread] = None
+        self.reloads = 0
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _load(self, stat) -> _Snapshot:
+        from src.model.preprocessing import ENERGY_SCHEMA, read_energy_data
+
+        df = read_energy_data(self.path)
+        arrays = {'timestamp': np.asarray(pd.to_datetime(df['timestamp']), dtype='datetime64[ns]')}
+        for column in self.columns:
+            if column in df.columns:
+                arrays[column] = df[column].to_numpy(dtype=ENERGY_SCHEMA.get(column, 'float32'))
+        logger.info(f"Histórico carregado: {len(df):,} linhas de {self.path}")
+        return _Snapshot(arrays, stat)
+
+    def _reload(self):
+        stat = self._stat()
+        if stat is None:
+            return
+        try:
+            snapshot = self._load(stat)
+        except Exception as e:
+            logger.error(f"Erro ao recarregar histórico: {e}")
+            return
+        self._snapshot = snapshot
+        self.reloads += 1
+
+    def _reload_in_background(self):
+        with self._lock:
+            if self._reloading is not None and self._reloading.is_alive():
+                return
+            self._reloading = threading.Thread(target=self._reload, name='history-reload', daemon=True)
+            self._reloading.start()
+
+    def snapshot(self) -> Optional[_Snapshot]:
+        """
+        Snapshot atual (None se o arquivo não existir).
+
+        Só a primeira chamada carrega de forma síncrona; as demais apenas
+        agendam a recarga quando o arquivo mudou.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    stat = self._stat()
+                    if stat is None:
+                        return None
+                    self._snapshot = self._load(stat)
+                    self._last_check = self._clock()
+            return self._snapshot
+
+        now = self._clock()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            if self._stat() not in (None, snapshot.stat):
+                self._reload_in_background()
+        return snapshot
+
+    def refresh(self, wait: bool = False):
+        """Força a verificação do arquivo (ex.: após uma ingestão)."""
+        self._last_check = float('-inf')
+        self.snapshot()
+        if wait:
+            self.wait()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Aguarda a recarga em andamento, se houver."""
+        thread = self._reloading
+        if thread is not None:
+            thread.join(timeout)
+
+    @property
+    def version(self) -> Optional[str]:
+        """Versão do snapshot atual (tamanho + mtime do arquivo)."""
+        snapshot = self.snapshot()
+        return snapshot.version if snapshot is not None else None
+
+    def peek_version(self) -> Optional[str]:
+        """
+        Versão sem carregar o arquivo: a do snapshot atual ou, antes da
+        primeira carga, a do arquivo (None se não existir).
+        """
+        if self._snapshot is not None:
+            return self.version
+        stat = self._stat()
+        return _version(stat) if stat is not None else None
+
+    def __len__(self) -> int:
+        snapshot = self.snapshot()
+        return len(snapshot.arrays['timestamp']) if snapshot is not None else 0
+
+    def column(self, name: str) -> Optional[np.ndarray]:
+        """Array completo de uma coluna (somente leitura; None se ausente)."""
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return None
+        return snapshot.arrays.get(name)
+
+    def tail(self, n: int, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Últimas n linhas como DataFrame (fatia dos arrays, O(n) só na cópia)."""
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return None
+        names = ['timestamp'] + [c for c in (columns or self.columns) if c in snapshot.arrays and c != 'timestamp']
+        start = max(len(snapshot.arrays['timestamp']) - n, 0)
+        return pd.DataFrame({name: snapshot.arrays[name][start:] for name in names})
+
+    def frame(self, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Série completa como DataFrame."""
+        return self.tail(sys.maxsize, columns)
@@ -0,0 +1,82 @@
+"""
+CACHE HTTP CONDICIONAL
+ETag, Last-Modified e Cache-Control para endpoints de leitura.
+
+Os validadores vêm só das versões do modelo e do dataset (tamanho + mtime
+dos arquivos, um os.stat), de modo que um If-None-Match/If-Modified-Since
+correspondente é respondido com 304 antes de qualquer cálculo: o preditor
+não é chamado e o histórico não é carregado.
+
+O ETag é forte quando a resposta é idêntica byte a byte para as mesmas
+versões; é fraco (W/) quando partes do corpo mudam sem mudar o significado
+(ex.: generated_at de /forecast, renovado a cada recálculo).
+"""
+
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any, weak: bool = False) -> str:
+    """ETag (forte, ou fraco com weak=True) a partir das versões que determinam a resposta."""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def http_date(timestamp: float) -> str:
+    """Data no formato HTTP (RFC 7231, GMT)."""
+    return formatdate(timestamp, usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[float] = None) -> bool:
+    """
+    Verdadeiro se o cliente já tem a representação atual.
+
+    If-None-Match tem precedência; If-Modified-Since só é considerado sem
+    ele (RFC 7232, seção 6).
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        # Comparação fraca (RFC 7232, 2.3.2): W/"x" corresponde a "x"
+        opaque = etag[2:] if etag.startswith('W/') else etag
+        return '*' in tags or opaque in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # Datas HTTP têm resolução de segundos
+        return int(last_modified) <= since
+    return False
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[float], cache_control: str):
+    """Aplica ETag, Last-Modified e Cache-Control a uma resposta."""
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = cache_control
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: Optional[float], cache_control: str) -> Response:
+    """Resposta 304 com os mesmos validadores (sem corpo)."""
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified, cache_control)
+    return response
+
+
+def conditional(request: Request, response: Response, etag: str, last_modified: Optional[float],
+                cache_control: str) -> Optional[Response]:
+    """
+    304 se o cliente já tem a versão atual; caso contrário aplica os
+    validadores à resposta da rota e devolve None (a rota segue normalmente).
+    """
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified, cache_control)
+    set_validators(response, etag, last_modified, cache_control)
+    return None
@@ -41,6 +41,9 @@ class EnergyPredictor:
         self._model_path = model_path
         self._scaler_dir = scaler_dir
         self._is_loaded = False
+        self.model_version = None
+        self._drift_monitor = None
+        self._drift_loaded = False
         
         # Configuração para reduzir uso de memória do joblib
         self._joblib_mmap_mode = 'r'  # Modo de leitura apenas para economizar memória
@@ -59,6 +62,22 @@ class EnergyPredictor:
             self._load_preprocessor()
         return self._preprocessor
     
+    @property
+    def drift_monitor(self):
+        """
+        Monitor de drift com a referência salva no treinamento
+        (None para modelos treinados sem drift_reference.json).
+        """
+        if not self._drift_loaded:
+            from src.model.drift import DriftMonitor, load_reference
+            
+            reference = load_reference(self._scaler_dir)
+            if reference is not None:
+                self._drift_monitor = DriftMonitor(reference, min_samples=settings.DRIFT_MIN_SAMPLES)
+                logger.info(f"Referência de drift carregada ({len(reference['columns'])} features)")
+            self._drift_loaded = True
+        return self._drift_monitor
+    
     def _load_model(self):
         """Carrega o modelo de forma preguiçosa."""
         import joblib
@@ -76,6 +95,10 @@ class EnergyPredictor:
                     mmap_mode=self._joblib_mmap_mode
                 )
                 
+                # Versão = tamanho + mtime do arquivo (muda a cada novo treinamento)
+                stat = os.stat(self._model_path)
+                self.model_version = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+                
                 self._is_loaded = True
                 logger.info("Modelo carregado com sucesso")
                 
@@ -104,8 +127,18 @@ class EnergyPredictor:
             
         try:
             logger.info(f"Carregando preprocessador de: {self._scaler_dir}")
-            self._preprocessor = EnergyDataPreprocessor()
-            self._preprocessor.load_scalers(self._scaler_dir)
+            from src.model.feature_spec import FEATURE_SPEC_VERSION
+            
+            preprocessor = EnergyDataPreprocessor()
+            preprocessor.load_scalers(self._scaler_dir)
+            # Features com significado diferente do treino geram previsões
+            # silenciosamente erradas: o modelo precisa ser retreinado
+            if preprocessor.feature_spec_version != FEATURE_SPEC_VERSION:
+                raise ValueError(
+                    f"Modelo treinado com a especificação de features v{preprocessor.feature_spec_version}, "
+                    f"mas o código usa v{FEATURE_SPEC_VERSION}; retreine com 'python src/model/train.py'"
+                )
+            self._preprocessor = preprocessor
             logger.info("Preprocessador carregado com sucesso")
             
             # Forçar coleta de lixo
@@ -127,175 +160,107 @@ class EnergyPredictor:
                 
         return self._is_loaded and self._model is not None and self._preprocessor is not None
     
-    def _prepare_single_prediction_data(self, data: Dict[str, Any]) -> Any:
+    @property
+    def resolution(self) -> str:
+        """Resolução dos dados usados no treinamento ('1h', '15min' ou '1min')."""
+        return self.preprocessor.resolution
+    
+    def _feature_columns(self) -> List[str]:
+        """Colunas na ordem esperada pelo scaler/modelo salvos."""
+        from src.model.feature_spec import model_feature_columns
+        
+        return self.preprocessor.feature_columns or model_feature_columns()
+    
+    def predict_features(self, X: Any) -> Any:
         """
-        Prepara DataFrame completo para previsão única, preenchendo colunas ausentes.
+        Normaliza as features, executa o modelo e desnormaliza o resultado.
+        
+        Args:
+            X: Matriz de features (n_amostras, n_features)
+            
+        Returns:
+            Array (n_amostras,) com o consumo previsto em kWh
         """
-        import pandas as pd
+        import numpy as np
         
-        # Valores padrão baseados em médias típicas do dataset
-        defaults = {
-            'consumption_kwh': data.get('consumption_lag_1h', 1.0),  # Usar lag_1h como base
-            'Voltage': 240.0,  # Voltagem típica residencial
-            'Global_intensity': 5.0,  # Intensidade típica
-            'Sub_metering_1': 0.0,  # Cozinha
-            'Sub_metering_2': 0.0,  # Lavanderia
-            'Sub_metering_3': 0.0,  # Ar-condicionado/Aquecedor
-        }
+        # Normalizar se necessário
+        if self.preprocessor.scaler_features is not None:
+            X_scaled = self.preprocessor.scaler_features.transform(X)
+        else:
+            X_scaled = X
         
-        # Criar DataFrame base
-        df_data = {
-            'timestamp': pd.Timestamp.now(),
-            'temperature_celsius': data.get('temperature_celsius', 25.0),
-            'hour': data.get('hour', 12),
-            'day_of_week': data.get('day_of_week', 2),
-            'month': data.get('month', 6),
-            'is_weekend': data.get('is_weekend', 0),
-            'is_holiday': data.get('is_holiday', 0),
-            'consumption_kwh': defaults['consumption_kwh'],
-            'Voltage': defaults['Voltage'],
-            'Global_intensity': defaults['Global_intensity'],
-            'Sub_metering_1': defaults['Sub_metering_1'],
-            'Sub_metering_2': defaults['Sub_metering_2'],
-            'Sub_metering_3': defaults['Sub_metering_3'],
-            # Usar valores fornecidos para lags e rolling stats
-            'consumption_lag_1h': data.get('consumption_lag_1h', defaults['consumption_kwh']),
-            'consumption_lag_24h': data.get('consumption_lag_24h', defaults['consumption_kwh']),
-            'consumption_lag_168h': data.get('consumption_lag_168h', defaults['consumption_kwh']),
-            'consumption_rolling_mean_24h': data.get('consumption_rolling_mean_24h', defaults['consumption_kwh']),
-            'consumption_rolling_std_24h': data.get('consumption_rolling_std_24h', 0.1),
-        }
+        # Predição
+        y_pred_scaled = self.model.predict(X_scaled)
         
-        df = pd.DataFrame([df_data])
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        # Desnormalizar
+        if self.preprocessor.scaler_target is not None:
+            y_pred = self.preprocessor.inverse_transform_target(y_pred_scaled)
+        else:
+            y_pred = y_pred_scaled
         
-        return df
+        return np.asarray(y_pred, dtype=float).ravel()
     
-    def predict_single(self, data: Dict[str, Any]) -> float:
+    def predict_single(self, data: Dict[str, Any], history: Optional[Any] = None) -> float:
         """
         Faz uma previsão única.
         
+        As features são calculadas pelo OnlineFeatureEvaluator: valores
+        informados (lags, médias móveis) têm prioridade; o restante vem do
+        histórico do medidor, se fornecido, ou dos defaults de FEATURE_SPEC.
+        
         Args:
             data: Dicionário com os dados de entrada
+            history: DataFrame opcional com o histórico recente do medidor
             
         Returns:
             Previsão de consumo em kWh
         """
-        import numpy as np
-        
         if not self.is_ready():
             raise RuntimeError("Modelo não está pronto. Treine o modelo primeiro.")
         
         try:
-            # Preparar DataFrame completo
-            df = self._prepare_single_prediction_data(data)
-            
-            # Preprocessar - mas sem dropar NaNs (para previsão única)
-            df_processed = self._engineer_features_for_prediction(df)
-            
-            # Preparar features
-            X, _ = self.preprocessor.prepare_features(df_processed)
-            
-            # Normalizar se necessário
-            if self.preprocessor.scaler_features is not None:
-                X_scaled = self.preprocessor.scaler_features.transform(X)
-            else:
-                X_scaled = X
-            
-            # Predição
-            y_pred_scaled = self.model.predict(X_scaled)
-            
-            # Desnormalizar
-            if self.preprocessor.scaler_target is not None:
-                y_pred = self.preprocessor.inverse_transform_target(y_pred_scaled)
-                if len(y_pred.shape) > 1:
-                    y_pred = y_pred.ravel()
-                pred_value = float(y_pred[0])
-            else:
-                pred_value = float(y_pred_scaled[0])
-            
-            # Validar valor
-            if not np.isfinite(pred_value) or pred_value < 0:
-                pred_value = 1.0  # Valor padrão seguro
-            
-            return max(0.0, pred_value)
+            return self.predict_rows([data], [history])[0]
         except Exception as e:
             raise RuntimeError(f"Erro ao fazer previsão: {str(e)}")
     
-    def _engineer_features_for_prediction(self, df: Any) -> Any:
+    def predict_rows(self, data_list: List[Dict[str, Any]],
+                     histories: Optional[List[Any]] = None) -> List[float]:
         """
-        Versão do engineer_features que funciona para previsão única (sem dados históricos).
+        Previsões de várias entradas com uma única chamada ao modelo.
+        
+        Mesma definição de features de predict_single; a matriz de
+        features de todas as linhas é normalizada e prevista de uma vez.
+        
+        Args:
+            data_list: Lista de dicionários com os dados de entrada
+            histories: Histórico opcional de cada entrada (mesma ordem)
+            
+        Returns:
+            Lista de previsões em kWh
         """
         import numpy as np
+        from src.model.feature_spec import OnlineFeatureEvaluator
         
-        # Garantir que todas as colunas necessárias existam
-        if 'Sub_metering_1' not in df.columns:
-            df['Sub_metering_1'] = 0.0
-        if 'Sub_metering_2' not in df.columns:
-            df['Sub_metering_2'] = 0.0
-        if 'Sub_metering_3' not in df.columns:
-            df['Sub_metering_3'] = 0.0
-        if 'Voltage' not in df.columns:
-            df['Voltage'] = 240.0
-        if 'Global_intensity' not in df.columns:
-            df['Global_intensity'] = 5.0
-        if 'consumption_kwh' not in df.columns:
-            # Usar consumption_lag_1h se disponível, senão usar valor padrão
-            if 'consumption_lag_1h' in df.columns:
-                df['consumption_kwh'] = df['consumption_lag_1h']
-            else:
-                df['consumption_kwh'] = 1.0
-        
-        # Features cíclicas
-        df['hour_sin'] = np.sin(2 * np.pi * df['hour'] / 24)
-        df['hour_cos'] = np.cos(2 * np.pi * df['hour'] / 24)
-        df['month_sin'] = np.sin(2 * np.pi * df['month'] / 12)
-        df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12)
-        df['dayofweek_sin'] = np.sin(2 * np.pi * df['day_of_week'] / 7)
-        df['dayofweek_cos'] = np.cos(2 * np.pi * df['day_of_week'] / 7)
-        
-        # Features globais
-        df['sub_metering_total'] = (
-            df['Sub_metering_1'] + df['Sub_metering_2'] + df['Sub_metering_3']
-        )
-        
-        # Para previsão única, usar os valores fornecidos diretamente
-        # (não calcular lags/diffs que requerem histórico)
-        if 'consumption_lag_1h' not in df.columns:
-            df['consumption_lag_1h'] = df['consumption_kwh']
-        if 'consumption_lag_3h' not in df.columns:
-            df['consumption_lag_3h'] = df['consumption_lag_1h']
-        if 'consumption_lag_24h' not in df.columns:
-            df['consumption_lag_24h'] = df['consumption_kwh']
-        if 'consumption_lag_168h' not in df.columns:
-            df['consumption_lag_168h'] = df['consumption_kwh']
-        if 'temperature_lag_24h' not in df.columns:
-            df['temperature_lag_24h'] = df['temperature_celsius']
-        if 'voltage_lag_1h' not in df.columns:
-            df['voltage_lag_1h'] = df['Voltage']
-        if 'global_intensity_lag_1h' not in df.columns:
-            df['global_intensity_lag_1h'] = df['Global_intensity']
-        
-        # Diferenças (usar 0 para previsão única)
-        df['consumption_diff_1h'] = 0.0
-        df['consumption_diff_24h'] = 0.0
-        df['consumption_pct_change_24h'] = 0.0
-        
-        # Rolling stats (usar valores fornecidos ou defaults)
-        if 'consumption_rolling_mean_24h' not in df.columns:
-            df['consumption_rolling_mean_24h'] = df['consumption_kwh']
-        if 'consumption_rolling_std_24h' not in df.columns:
-            df['consumption_rolling_std_24h'] = 0.1
-        if 'consumption_rolling_mean_168h' not in df.columns:
-            df['consumption_rolling_mean_168h'] = df['consumption_kwh']
-        if 'consumption_rolling_std_168h' not in df.columns:
-            df['consumption_rolling_std_168h'] = 0.1
-        
-        # Limpar inf/nan
-        df = df.replace([np.inf, -np.inf], np.nan)
-        df = df.fillna(0)  # Preencher NaNs com 0 ao invés de dropar
-        
-        return df
+        if not self.is_ready():
+            raise RuntimeError("Modelo não está pronto. Treine o modelo primeiro.")
+        
+        columns = self._feature_columns()
+        rows = []
+        for data, history in zip(data_list, histories or [None] * len(data_list)):
+            evaluator = OnlineFeatureEvaluator(resolution=self.resolution)
+            if history is not None:
+                evaluator.warm_up(history)
+            values = evaluator.features(data)
+            rows.append([values[c] for c in columns])
+        X = np.array(rows, dtype=float).reshape(len(rows), len(columns))
+        
+        predictions = self.predict_features(X)
+        # Valores inválidos viram o padrão seguro de 1 kWh
+        predictions = np.where(np.isfinite(predictions) & (predictions >= 0), predictions, 1.0)
+        
+        if self.drift_monitor is not None:
+            self.drift_monitor.observe(X, predictions)
+        return predictions.tolist()
     
     def predict_batch(self, data_list: List[Dict[str, Any]]) -> List[float]:
         """
@@ -324,10 +289,18 @@ class EnergyPredictor:
     def predict_next_hours(self, historical_data: Any, hours: int = 24) -> List[Dict[str, Any]]:
         """
         Prevê as próximas N horas baseado em dados históricos.
-        Atualiza features temporais (hora, dia, mês) e lags para cada hora futura.
+        
+        Uma previsão por intervalo da resolução do modelo (N * 4 previsões
+        em dados de 15 minutos, N * 60 em dados por minuto).
+        
+        O histórico inicializa um OnlineFeatureEvaluator; a cada passo previsto
+        o valor é empurrado de volta no avaliador, que atualiza lags, diffs e
+        janelas móveis em O(1) com a mesma definição usada no treinamento.
+        Variáveis exógenas (temperatura, tensão, sub-medições) repetem o
+        último valor observado.
         
         Args:
-            historical_data: DataFrame com dados históricos
+            historical_data: DataFrame com dados históricos (bruto ou do FeatureStore)
             hours: Número de horas para prever
             
         Returns:
@@ -335,159 +308,36 @@ class EnergyPredictor:
         """
         import pandas as pd
         import numpy as np
+        from src.model.feature_spec import OnlineFeatureEvaluator, resolution_steps
         
         if not self.is_ready():
             raise RuntimeError("Modelo não está pronto. Treine o modelo primeiro.")
         
-        # Preprocessar dados históricos para obter últimas observações
-        df_processed = self.preprocessor.engineer_features(historical_data.copy())
-        
-        # Obter último registro como base
-        last_row = df_processed.iloc[-1].copy()
-        last_timestamp = historical_data['timestamp'].max()
+        step = pd.Timedelta(self.resolution)
+        n_steps = resolution_steps(pd.Timedelta(hours=hours), self.resolution)
+        evaluator = OnlineFeatureEvaluator(resolution=self.resolution).warm_up(historical_data)
+        columns = self._feature_columns()
+        last_timestamp = pd.Timestamp(historical_data['timestamp'].max())
         
-        # Preparar lista de previsões anteriores (para atualizar lags)
-        prediction_history = []
-        
-        # Adicionar últimas 168 horas de consumo real para inicializar lags
-        if 'consumption_kwh' in df_processed.columns:
-            recent_consumption = df_processed['consumption_kwh'].tail(168).tolist()
-            prediction_history = recent_consumption
+        # Histórico recente (últimas 24h) para fallback de valores inválidos
+        recent = historical_data['consumption_kwh'].tail(resolution_steps('24h', self.resolution)).tolist()
         
         predictions = []
         
-        for i in range(hours):
+        for i in range(n_steps):
             # Calcular próximo timestamp
-            next_timestamp = last_timestamp + pd.Timedelta(hours=i+1)
-            
-            # Extrair features temporais do novo timestamp
-            next_hour = next_timestamp.hour
-            next_day_of_week = next_timestamp.dayofweek  # 0=Segunda, 6=Domingo
-            next_month = next_timestamp.month
-            next_is_weekend = 1 if next_day_of_week >= 5 else 0
-            next_is_holiday = 0  # Assumir não é feriado (pode ser melhorado)
-            
-            # Criar novo registro com features atualizadas
-            new_row = last_row.copy()
-            
-            # Atualizar features temporais
-            new_row['hour'] = next_hour
-            new_row['day_of_week'] = next_day_of_week
-            new_row['month'] = next_month
-            new_row['is_weekend'] = next_is_weekend
-            new_row['is_holiday'] = next_is_holiday
-            new_row['timestamp'] = next_timestamp
-            
-            # Atualizar features cíclicas baseadas no novo timestamp
-            new_row['hour_sin'] = np.sin(2 * np.pi * next_hour / 24)
-            new_row['hour_cos'] = np.cos(2 * np.pi * next_hour / 24)
-            new_row['month_sin'] = np.sin(2 * np.pi * next_month / 12)
-            new_row['month_cos'] = np.cos(2 * np.pi * next_month / 12)
-            new_row['dayofweek_sin'] = np.sin(2 * np.pi * next_day_of_week / 7)
-            new_row['dayofweek_cos'] = np.cos(2 * np.pi * next_day_of_week / 7)
-            
-            # Atualizar lags usando histórico de previsões
-            if len(prediction_history) >= 1:
-                new_row['consumption_lag_1h'] = prediction_history[-1]
-            else:
-                new_row['consumption_lag_1h'] = last_row.get('consumption_lag_1h', 1.0) if 'consumption_lag_1h' in last_row else (last_row.get('consumption_kwh', 1.0) if 'consumption_kwh' in last_row else 1.0)
-            
-            if len(prediction_history) >= 24:
-                new_row['consumption_lag_24h'] = prediction_history[-24]
-            else:
-                new_row['consumption_lag_24h'] = last_row.get('consumption_lag_24h', 1.0) if 'consumption_lag_24h' in last_row else (last_row.get('consumption_kwh', 1.0) if 'consumption_kwh' in last_row else 1.0)
-            
-            if len(prediction_history) >= 168:
-                new_row['consumption_lag_168h'] = prediction_history[-168]
-            else:
-                new_row['consumption_lag_168h'] = last_row.get('consumption_lag_168h', 1.0) if 'consumption_lag_168h' in last_row else (last_row.get('consumption_kwh', 1.0) if 'consumption_kwh' in last_row else 1.0)
+            next_timestamp = last_timestamp + step * (i + 1)
             
-            # Atualizar consumption_lag_3h (usar lag_1h como aproximação)
-            new_row['consumption_lag_3h'] = new_row['consumption_lag_1h']
+            # Features temporais vêm do timestamp; feriado assumido falso
+            row = {'timestamp': next_timestamp, 'is_holiday': 0}
+            values = evaluator.features(row)
+            X = np.array([[values[c] for c in columns]])
             
-            # Atualizar rolling statistics
-            if len(prediction_history) >= 24:
-                recent_24h = prediction_history[-24:]
-                new_row['consumption_rolling_mean_24h'] = float(np.mean(recent_24h))
-                new_row['consumption_rolling_std_24h'] = float(np.std(recent_24h)) if len(recent_24h) > 1 else 0.1
-            elif len(prediction_history) > 0:
-                new_row['consumption_rolling_mean_24h'] = float(np.mean(prediction_history))
-                new_row['consumption_rolling_std_24h'] = float(np.std(prediction_history)) if len(prediction_history) > 1 else 0.1
-            else:
-                new_row['consumption_rolling_mean_24h'] = last_row.get('consumption_rolling_mean_24h', 1.0) if 'consumption_rolling_mean_24h' in last_row else 1.0
-                new_row['consumption_rolling_std_24h'] = last_row.get('consumption_rolling_std_24h', 0.1) if 'consumption_rolling_std_24h' in last_row else 0.1
-            
-            if len(prediction_history) >= 168:
-                recent_168h = prediction_history[-168:]
-                new_row['consumption_rolling_mean_168h'] = float(np.mean(recent_168h))
-                new_row['consumption_rolling_std_168h'] = float(np.std(recent_168h)) if len(recent_168h) > 1 else 0.1
-            else:
-                new_row['consumption_rolling_mean_168h'] = last_row.get('consumption_rolling_mean_168h', 1.0) if 'consumption_rolling_mean_168h' in last_row else 1.0
-                new_row['consumption_rolling_std_168h'] = last_row.get('consumption_rolling_std_168h', 0.1) if 'consumption_rolling_std_168h' in last_row else 0.1
-            
-            # Atualizar diferenças (usar 0 para previsão futura)
-            new_row['consumption_diff_1h'] = 0.0
-            new_row['consumption_diff_24h'] = 0.0
-            new_row['consumption_pct_change_24h'] = 0.0
-            
-            # Atualizar temperature_lag_24h (usar temperatura atual como aproximação)
-            if 'temperature_celsius' in new_row:
-                new_row['temperature_lag_24h'] = new_row['temperature_celsius']
-            else:
-                new_row['temperature_lag_24h'] = last_row.get('temperature_celsius', 25.0) if 'temperature_celsius' in last_row else 25.0
-            
-            # Garantir que todas as colunas necessárias existam
-            required_cols = {
-                'Voltage': 240.0,
-                'voltage_lag_1h': 240.0,
-                'Global_intensity': 5.0,
-                'global_intensity_lag_1h': 5.0,
-                'Sub_metering_1': 0.0,
-                'Sub_metering_2': 0.0,
-                'Sub_metering_3': 0.0,
-                'sub_metering_total': 0.0,
-                'consumption_kwh': new_row['consumption_lag_1h'] if 'consumption_lag_1h' in new_row else 1.0
-            }
-            
-            for col, default_val in required_cols.items():
-                if col not in new_row:
-                    new_row[col] = default_val
-            
-            # Recalcular sub_metering_total
-            new_row['sub_metering_total'] = new_row['Sub_metering_1'] + new_row['Sub_metering_2'] + new_row['Sub_metering_3']
-            
-            # Criar DataFrame com uma única linha para previsão
-            df_single = pd.DataFrame([new_row])
-            
-            # Preparar features para o modelo
-            X, _ = self.preprocessor.prepare_features(df_single)
-            
-            # Normalizar
-            if self.preprocessor.scaler_features is not None:
-                X_scaled = self.preprocessor.scaler_features.transform(X)
-            else:
-                X_scaled = X
-            
-            # Fazer previsão
-            y_pred_scaled = self.model.predict(X_scaled)
-            
-            # Desnormalizar
-            if self.preprocessor.scaler_target is not None:
-                y_pred = self.preprocessor.inverse_transform_target(y_pred_scaled)
-                if len(y_pred.shape) > 1:
-                    y_pred = y_pred.ravel()
-                pred_value = float(y_pred[0])
-            else:
-                pred_value = float(y_pred_scaled[0])
+            pred_value = float(self.predict_features(X)[0])
             
             # Garantir que o valor seja positivo, razoável e válido
             if not np.isfinite(pred_value) or pred_value < 0:
-                # Se o valor for inválido, usar a média do histórico ou valor padrão
-                if len(prediction_history) > 0:
-                    pred_value = float(np.mean(prediction_history[-24:])) if len(prediction_history) >= 24 else float(np.mean(prediction_history))
-                else:
-                    pred_value = last_row.get('consumption_kwh', 1.0) if 'consumption_kwh' in last_row else 1.0
-                pred_value = max(0.0, pred_value)
+                pred_value = float(np.mean(recent)) if recent else 1.0
             
             pred_value = float(max(0.0, pred_value))
             
@@ -497,12 +347,10 @@ class EnergyPredictor:
                 'predicted_consumption': pred_value
             })
             
-            # Adicionar previsão ao histórico para próximas iterações
-            prediction_history.append(pred_value)
-            
-            # Manter apenas últimas 168 horas no histórico (para eficiência)
-            if len(prediction_history) > 168:
-                prediction_history = prediction_history[-168:]
+            # Realimentar a previsão como observação da hora seguinte
+            evaluator.push({'timestamp': next_timestamp, 'is_holiday': 0,
+                            'consumption_kwh': pred_value})
+            recent.append(pred_value)
         
         return predictions
     
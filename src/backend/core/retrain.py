@@ -0,0 +1,93 @@
+"""
+RETREINAMENTO EM SEGUNDO PLANO
+Dispara o pipeline de treinamento (src/model/train.py) em um processo
+separado, sem bloquear a API; no máximo uma execução por vez.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Adicionar path do projeto
+project_root = str(Path(__file__).parent.parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.backend.core.config import settings
+from src.backend.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class RetrainLauncher:
+    """
+    Controla o processo de retreinamento disparado pela API.
+    """
+
+    def __init__(self, log_path: str = settings.RETRAIN_LOG_PATH):
+        self.log_path = log_path
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._reason: Optional[str] = None
+        self._started_at: Optional[str] = None
+        self._reloaded = True
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self, reason: str, command: List[str]) -> bool:
+        """
+        Inicia o treinamento se não houver outro em andamento.
+
+        Args:
+            reason: Motivo registrado no log (ex.: features em drift)
+            command: Argumentos após o interpretador Python
+
+        Returns:
+            False se já havia um treinamento em execução
+        """
+        with self._lock:
+            if self.running:
+                return False
+            os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+            log = open(self.log_path, 'a')
+            log.write(f"\n=== {datetime.now().isoformat()} - {reason}\n")
+            log.flush()
+            self._process = subprocess.Popen(
+                [sys.executable, *command], cwd=project_root, stdout=log, stderr=subprocess.STDOUT
+            )
+            log.close()
+            self._reason = reason
+            self._started_at = datetime.now().isoformat()
+            self._reloaded = False
+            logger.warning(f"Retreinamento iniciado (pid {self._process.pid}): {reason}")
+            return True
+
+    def completed(self) -> bool:
+        """
+        True uma única vez após um treinamento bem-sucedido, para que o
+        chamador recarregue o modelo.
+        """
+        with self._lock:
+            if self._reloaded or self.running or self._process.returncode != 0:
+                return False
+            self._reloaded = True
+            return True
+
+    def status(self) -> Dict[str, Any]:
+        """Estado do último retreinamento disparado."""
+        if self._process is None:
+            return {'running': False}
+        return {
+            'running': self.running,
+            'pid': self._process.pid,
+            'returncode': self._process.poll(),
+            'reason': self._reason,
+            'started_at': self._started_at,
+            'log_path': self.log_path
+        }
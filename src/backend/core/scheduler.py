@@ -0,0 +1,112 @@
+"""
+AGENDADOR HORÁRIO
+Executa uma tarefa em uma thread própria logo após cada virada de hora
+(e uma vez ao iniciar). Usado para pré-calcular as previsões, de modo que
+/forecast apenas leia o resultado do cache.
+
+Pode rodar dentro da API ou como processo separado
+(python scripts/utils.py forecast-scheduler), neste caso gravando em um
+backend de cache compartilhado (CACHE_BACKEND = sqlite ou redis).
+"""
+
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+# Adicionar path do projeto
+project_root = str(Path(__file__).parent.parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.backend.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class HourlyScheduler:
+    """
+    Executa `job` a cada hora cheia + `delay` segundos.
+    """
+
+    def __init__(self, job: Callable[[], Any], name: str = 'scheduler', delay: float = 5.0,
+                 period: float = 3600.0, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            job: Tarefa (exceções são registradas e não param o agendador)
+            name: Nome da thread e dos logs
+            delay: Segundos após a virada da hora (tempo para a ingestão gravar)
+            period: Período em segundos (1 hora)
+            clock: Relógio de parede (as viradas de hora são do relógio real)
+        """
+        self.job = job
+        self.name = name
+        self.delay = delay
+        self.period = period
+        self._clock = clock
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.errors = 0
+        self.last_run_at: Optional[str] = None
+        self.last_duration: Optional[float] = None
+        self.last_result: Any = None
+        self.last_error: Optional[str] = None
+
+    def next_run(self, now: Optional[float] = None) -> float:
+        """Instante da próxima execução (próxima hora cheia + delay)."""
+        now = self._clock() if now is None else now
+        boundary = (now // self.period + 1) * self.period + self.delay
+        # Ainda dentro do delay da hora atual
+        if boundary - self.period > now:
+            return boundary - self.period
+        return boundary
+
+    def run_once(self):
+        """Executa a tarefa uma vez, registrando duração e erros."""
+        started = time.perf_counter()
+        self.last_run_at = datetime.now().isoformat()
+        try:
+            self.last_result = self.job()
+            self.last_error = None
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            logger.error(f"Erro na execução agendada ({self.name}): {e}")
+        self.runs += 1
+        self.last_duration = time.perf_counter() - started
+        return self.last_result
+
+    def run_forever(self):
+        """Executa agora e a cada hora até stop() (bloqueia a thread atual)."""
+        self.run_once()
+        while not self._stop.wait(max(self.next_run() - self._clock(), 0.0)):
+            self.run_once()
+
+    def start(self):
+        """Inicia o agendador em uma thread própria."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name=self.name, daemon=True)
+            self._thread.start()
+            logger.info(f"Agendador {self.name} iniciado")
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'runs': self.runs,
+            'errors': self.errors,
+            'last_run_at': self.last_run_at,
+            'last_duration_seconds': self.last_duration,
+            'last_error': self.last_error,
+            'next_run_at': datetime.fromtimestamp(self.next_run()).isoformat(),
+            'last_result': self.last_result
+        }
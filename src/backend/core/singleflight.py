@@ -0,0 +1,168 @@
+"""
+COALESCÊNCIA DE CÁLCULOS (SINGLE-FLIGHT)
+Evita o "estouro" do cache quando muitas requisições pedem o mesmo valor
+ao mesmo tempo logo após ele vencer.
+
+- Single-flight: chamadas simultâneas para a mesma chave aguardam um único
+  cálculo em andamento.
+- Stale-while-revalidate: por `stale_ttl` segundos após vencer, o valor
+  antigo continua sendo servido enquanto um único recálculo roda em
+  segundo plano.
+- Expiração antecipada probabilística (XFetch): antes de vencer, cada
+  leitura decide recalcular com probabilidade que cresce perto do
+  vencimento e com o custo do cálculo, espalhando as renovações.
+
+Os cálculos rodam em um pool de threads; as rotas assíncronas aguardam o
+Future com asyncio.wrap_future, sem bloquear o event loop, e uma
+renovação em segundo plano sobrevive ao fim da requisição que a disparou.
+"""
+
+import asyncio
+import math
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from src.backend.core.cache import CacheManager, cache
+from src.backend.core.cache_backends import MISSING
+from src.backend.core.config import settings
+from src.backend.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class CachedValue(NamedTuple):
+    """Valor guardado com o instante em que deixa de ser fresco e o custo do cálculo."""
+    value: Any
+    fresh_until: float
+    delta: float
+
+
+class SingleFlight:
+    """
+    Cálculos coalescidos por chave sobre um CacheManager.
+    """
+
+    def __init__(self, cache: CacheManager, max_workers: int = 4, beta: float = 1.0,
+                 clock: Callable[[], float] = time.time, rand: Callable[[], float] = random.random):
+        """
+        Args:
+            cache: Cache onde os valores (CachedValue) são guardados
+            max_workers: Threads para os cálculos
+            beta: Agressividade da expiração antecipada (0 = desligada)
+            clock: Relógio de parede (os instantes vão para backends compartilhados)
+            rand: Gerador uniforme em [0, 1) (injetável em testes)
+        """
+        self.cache = cache
+        self.beta = beta
+        self._clock = clock
+        self._rand = rand
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='single-flight')
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.computations = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self.early_refreshes = 0
+        self.errors = 0
+
+    def _run(self, flight, key, compute, ttl, stale_ttl):
+        try:
+            started = self._clock()
+            value = compute()
+            self.store(key, value, ttl, stale_ttl, self._clock() - started)
+            return value
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Erro no cálculo de {key!r}: {e}")
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(flight, None)
+
+    def store(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0.0, delta: float = 0.0):
+        """Grava um valor calculado fora do pool (ex.: pelo agendador)."""
+        fresh_until = self._clock() + ttl
+        self.cache.set(key, CachedValue(value, fresh_until, delta), ttl=ttl + stale_ttl)
+
+    def peek(self, key: Hashable) -> Optional[CachedValue]:
+        """Entrada guardada, sem disparar cálculo nem alterar os contadores do cache."""
+        entry = self.cache.backend.get_many([key])[0]
+        return None if entry is MISSING else entry
+
+    def _start(self, key, compute, ttl, stale_ttl, flight=None) -> Tuple[Future, bool]:
+        """Future do cálculo em andamento para flight, iniciando um se não houver."""
+        flight = key if flight is None else flight
+        with self._lock:
+            future = self._inflight.get(flight)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            self.computations += 1
+            future = self._executor.submit(self._run, flight, key, compute, ttl, stale_ttl)
+            self._inflight[flight] = future
+            return future, True
+
+    def _lookup(self, key, compute, ttl, stale_ttl) -> Tuple[Any, Optional[Future]]:
+        """Valor do cache (disparando renovação se preciso) ou Future a aguardar."""
+        entry = self.cache.get(key)
+        if entry is None:
+            return None, self._start(key, compute, ttl, stale_ttl)[0]
+
+        now = self._clock()
+        if now >= entry.fresh_until:
+            self.stale_served += 1
+            self._start(key, compute, ttl, stale_ttl)
+        elif self.beta and now - entry.delta * self.beta * math.log(1.0 - self._rand()) >= entry.fresh_until:
+            self.early_refreshes += 1
+            self._start(key, compute, ttl, stale_ttl)
+        return entry.value, None
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl: float,
+                             stale_ttl: float = 0.0) -> Any:
+        """
+        Valor da chave, calculado no máximo uma vez entre as chamadas simultâneas.
+
+        Args:
+            key: Chave do cache
+            compute: Função síncrona que calcula o valor (roda no pool)
+            ttl: Segundos em que o valor é fresco
+            stale_ttl: Segundos adicionais em que o valor vencido ainda é
+                servido enquanto é recalculado em segundo plano
+        """
+        value, future = self._lookup(key, compute, ttl, stale_ttl)
+        if future is None:
+            return value
+        return await asyncio.wrap_future(future)
+
+    async def refresh(self, key: Hashable, compute: Callable[[], Any], ttl: float,
+                      stale_ttl: float = 0.0, flight: Optional[Hashable] = None) -> Any:
+        """
+        Recalcula e substitui o valor, coalescendo pela chave de voo
+        (ex.: (chave, horizonte) quando o valor guardado não basta).
+        """
+        future, _ = self._start(key, compute, ttl, stale_ttl, flight)
+        return await asyncio.wrap_future(future)
+
+    def get_stats(self) -> dict:
+        """Cálculos feitos e evitados."""
+        with self._lock:
+            inflight = len(self._inflight)
+        return {
+            'computations': self.computations,
+            'coalesced': self.coalesced,
+            'stale_served': self.stale_served,
+            'early_refreshes': self.early_refreshes,
+            'errors': self.errors,
+            'in_flight': inflight
+        }
+
+
+# Instância global sobre o cache da aplicação
+single_flight = SingleFlight(
+    cache,
+    max_workers=settings.SINGLE_FLIGHT_WORKERS,
+    beta=settings.CACHE_EARLY_EXPIRATION_BETA
+)
@@ -105,11 +105,16 @@ async def global_exception_handler(request, exc):
 
 
 # === EVENTOS ===
+# Snapshot periódico do cache em memória (reinício aquecido)
+_cache_snapshotter = None
+
+
 @app.on_event("startup")
 async def startup_event():
     """
     Executado ao iniciar a aplicação.
     """
+    global _cache_snapshotter
     print("="*80)
     print("ENERGYFLOW AI - BACKEND API")
     print("="*80)
@@ -118,6 +123,18 @@ async def startup_event():
     print(f"Versao: {settings.APP_VERSION}")
     print(f"AI Engine: Scikit-learn + XGBoost (Regressao ML)")
     print("="*80)
+    
+    if settings.CACHE_SNAPSHOT_ENABLED:
+        from src.backend.core.cache import cache
+        from src.backend.core.cache_snapshot import CacheSnapshotter
+        
+        _cache_snapshotter = CacheSnapshotter(cache, settings.CACHE_SNAPSHOT_PATH, settings.CACHE_SNAPSHOT_INTERVAL)
+        _cache_snapshotter.restore()
+        _cache_snapshotter.start()
+    
+    if settings.FORECAST_SCHEDULER_ENABLED:
+        from src.backend.api.routes import get_forecast_scheduler
+        get_forecast_scheduler().start()
 
 
 @app.on_event("shutdown")
@@ -126,6 +143,11 @@ async def shutdown_event():
     Executado ao encerrar a aplicação.
     """
     print("\n👋 Encerrando EnergyFlow AI...")
+    if settings.FORECAST_SCHEDULER_ENABLED:
+        from src.backend.api.routes import get_forecast_scheduler
+        get_forecast_scheduler().stop(timeout=5)
+    if _cache_snapshotter is not None:
+        _cache_snapshotter.stop()
 
 
 # === FUNÇÃO PARA MONITORAR MEMÓRIA ===
@@ -3,6 +3,7 @@ FUNÇÕES UTILITÁRIAS ADICIONAIS
 Utilidades para exportação de dados, análise e relatórios.
 """
 
+import numpy as np
 import pandas as pd
 import json
 from datetime import datetime
@@ -111,6 +112,22 @@ class DataExporter:
         return {"error": "Required column not found"}
 
 
+def _fast_length(n: int) -> int:
+    """Menor tamanho >= n da forma 2^a * 3^b * 5^c (FFT rápida)."""
+    best = 1 << max(0, int(n - 1).bit_length())
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            size = p35
+            while size < n:
+                size *= 2
+            best = min(best, size)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
 class DataAnalyzer:
     """
     Análise de dados e detecção de padrões.
@@ -119,23 +136,14 @@ class DataAnalyzer:
     @staticmethod
     def detect_outliers(values: List[float], threshold: float = 3.0) -> Dict[str, Any]:
         """
-        Detecta outliers usando z-score.
+        Detecta outliers usando z-score global (ver src/backend/core/anomaly.py).
         """
-        import numpy as np
-        
-        if len(values) < 3:
-            return {"outliers": [], "count": 0}
+        from src.backend.core.anomaly import zscore_outliers
         
-        values_array = np.array(values)
-        mean = np.mean(values_array)
-        std = np.std(values_array)
-        
-        if std == 0:
+        outlier_indices, z_scores = zscore_outliers(values, threshold)
+        if not outlier_indices:
             return {"outliers": [], "count": 0}
         
-        z_scores = np.abs((values_array - mean) / std)
-        outlier_indices = np.where(z_scores > threshold)[0].tolist()
-        
         outliers = [
             {
                 "index": int(idx),
@@ -152,9 +160,204 @@ class DataAnalyzer:
         }
     
     @staticmethod
-    def analyze_time_series(data: pd.DataFrame, value_column: str) -> Dict[str, Any]:
+    def regular_grid(timestamps: pd.Series, values: pd.Series, resolution: str = '1h') -> Dict[str, Any]:
+        """
+        Posiciona a série em uma grade regular da resolução (NaN nas lacunas).
+
+        Returns:
+            Dicionário com 'values' (grade densa), 'start' (timestamp da
+            primeira posição) e 'step' (ns entre posições)
+        """
+        step = pd.Timedelta(resolution).value
+        ns = np.asarray(pd.to_datetime(timestamps), dtype='datetime64[ns]').astype(np.int64)
+        steps = ns // step
+        first = steps.min()
+        grid = np.full(int(steps.max() - first) + 1, np.nan)
+        grid[steps - first] = np.asarray(values, dtype=float)
+        return {'values': grid, 'start': pd.Timestamp(int(first * step)), 'step': step}
+
+    @staticmethod
+    def autocorrelation(values: np.ndarray, max_lag: int) -> np.ndarray:
+        """
+        Autocorrelação via FFT em O(n log n), tolerante a lacunas (NaN).
+
+        Cada lag é normalizado pelo número de pares efetivamente
+        observados, obtido com uma segunda FFT da máscara de presença.
+
+        Returns:
+            Array (max_lag + 1,) com a autocorrelação dos lags 0..max_lag
+        """
+        values = np.asarray(values, dtype=float)
+        mask = np.isfinite(values)
+        centered = np.where(mask, values - values[mask].mean(), 0.0)
+        # Zeros suficientes para que a correlação circular não contamine os lags pedidos
+        size = _fast_length(len(values) + max_lag)
+
+        def lagged_products(x):
+            spectrum = np.fft.rfft(x, size)
+            return np.fft.irfft(spectrum * spectrum.conj(), size)[:max_lag + 1]
+
+        if mask.all():
+            pairs = len(values) - np.arange(max_lag + 1, dtype=float)
+        else:
+            pairs = np.rint(lagged_products(mask.astype(float)))
+        covariance = lagged_products(centered) / np.maximum(pairs, 1)
+        acf = covariance / covariance[0] if covariance[0] > 0 else np.zeros_like(covariance)
+        return np.where(pairs > 0, acf, np.nan)
+
+    @staticmethod
+    def periodogram(values: np.ndarray, step_hours: float = 1.0, top: int = 5) -> List[Dict[str, float]]:
+        """
+        Periodograma via FFT; retorna os períodos dominantes.
+
+        Lacunas (NaN) são preenchidas com a média antes da transformada,
+        e a série é completada com zeros até um tamanho de FFT rápida.
+
+        Args:
+            values: Série na grade regular
+            step_hours: Duração de um passo da grade em horas
+            top: Quantidade de picos retornados
+
+        Returns:
+            Lista de {'period_hours', 'power_share'} por potência decrescente
+        """
+        values = np.asarray(values, dtype=float)
+        mask = np.isfinite(values)
+        centered = np.where(mask, values - values[mask].mean(), 0.0)
+        size = _fast_length(len(values))
+        power = np.abs(np.fft.rfft(centered, size)) ** 2
+        power[0] = 0.0
+        total = power.sum()
+        if total == 0:
+            return []
+
+        # Máximos locais: evita que o vazamento de um pico ocupe o ranking
+        peaks = np.flatnonzero((power[1:-1] > power[:-2]) & (power[1:-1] >= power[2:])) + 1
+        peaks = peaks[np.argsort(power[peaks])[::-1][:top]]
+        return [
+            {'period_hours': float(size * step_hours / k), 'power_share': float(power[k] / total)}
+            for k in peaks
+        ]
+
+    @staticmethod
+    def seasonal_decomposition(grid: np.ndarray, start: pd.Timestamp, step: int,
+                               period: str = '168h', trend_window: str = '168h') -> Dict[str, Any]:
+        """
+        Decomposição aditiva: tendência (média móvel centrada), perfil
+        sazonal por hora da semana e resíduo, vetorizada com bincount e
+        somas acumuladas.
+
+        Returns:
+            Dicionário com o perfil sazonal (uma média por hora da semana),
+            a força da sazonalidade e da tendência (0-1) e os desvios
+            padrão de cada componente
+        """
+        mask = np.isfinite(grid)
+        filled = np.where(mask, grid, 0.0)
+
+        # Tendência: média móvel centrada com contagem de observações
+        window = max(1, pd.Timedelta(trend_window).value // step)
+        sums = np.concatenate(([0.0], np.cumsum(filled)))
+        counts = np.concatenate(([0], np.cumsum(mask)))
+        lo = np.clip(np.arange(len(grid)) - window // 2, 0, len(grid))
+        hi = np.clip(lo + window, 0, len(grid))
+        n = counts[hi] - counts[lo]
+        trend = np.where(n > 0, (sums[hi] - sums[lo]) / np.maximum(n, 1), np.nan)
+
+        # Perfil sazonal sobre a série sem tendência, por hora da semana
+        hour_ns = pd.Timedelta('1h').value
+        period_hours = pd.Timedelta(period).value // hour_ns
+        # 1970-01-01 foi quinta-feira: +72h alinha o slot 0 à segunda 00:00
+        hours = (start.value + np.arange(len(grid)) * step) // hour_ns
+        slots = (hours + 72) % period_hours
+        detrended = grid - trend
+        valid = np.isfinite(detrended)
+        profile = (np.bincount(slots[valid], weights=detrended[valid], minlength=period_hours)
+                   / np.maximum(np.bincount(slots[valid], minlength=period_hours), 1))
+        profile -= profile.mean()
+        seasonal = profile[slots]
+        residual = detrended - seasonal
+
+        def strength(component):
+            # Força da componente (Hyndman): 1 - Var(resíduo) / Var(componente + resíduo)
+            total = np.nanvar(component + residual)
+            return float(max(0.0, 1 - np.nanvar(residual) / total)) if total > 0 else 0.0
+
+        return {
+            'period': period,
+            'profile': [float(v) for v in profile],
+            'seasonal_strength': strength(seasonal),
+            'trend_strength': strength(trend),
+            'std': {
+                'trend': float(np.nanstd(trend)),
+                'seasonal': float(np.nanstd(seasonal[valid])),
+                'residual': float(np.nanstd(residual))
+            }
+        }
+
+    @staticmethod
+    def rolling_trend(grid: np.ndarray, start: pd.Timestamp, step: int,
+                      window: str = '30D', every: str = '7D') -> Dict[str, Any]:
+        """
+        Inclinação da regressão linear (kWh/dia) sobre médias diárias,
+        global e em janelas móveis (somas acumuladas, O(n)).
+
+        Returns:
+            Dicionário com a inclinação global, a da janela mais recente e
+            a série de inclinações amostrada a cada `every`
+        """
+        day = pd.Timedelta('1D').value
+        days = (start.value + np.arange(len(grid)) * step) // day
+        days -= days[0]
+        mask = np.isfinite(grid)
+        n_days = int(days[-1]) + 1
+        counts = np.bincount(days[mask], minlength=n_days)
+        daily = np.bincount(days[mask], weights=grid[mask], minlength=n_days) / np.maximum(counts, 1)
+        present = counts > 0
+
+        t = np.arange(n_days, dtype=float)
+        y = np.where(present, daily, 0.0)
+        w = present.astype(float)
+
+        def slopes(lo, hi):
+            cum = [np.concatenate(([0.0], np.cumsum(a))) for a in (w, w * t, y, t * y, w * t * t)]
+            sw, st, sy, sty, stt = (c[hi] - c[lo] for c in cum)
+            denominator = sw * stt - st * st
+            return np.where((sw >= 2) & (denominator > 0),
+                            (sw * sty - st * sy) / np.where(denominator > 0, denominator, 1), np.nan)
+
+        size = pd.Timedelta(window) // pd.Timedelta('1D')
+        stride = max(1, pd.Timedelta(every) // pd.Timedelta('1D'))
+        ends = np.arange(min(size, n_days), n_days + 1, stride)
+        if len(ends) and ends[-1] != n_days:
+            ends = np.append(ends, n_days)
+        rolling = slopes(np.maximum(ends - size, 0), ends)
+        overall = slopes(np.array([0]), np.array([n_days]))[0]
+
+        def finite(value):
+            return float(value) if np.isfinite(value) else None
+
+        first_day = start.normalize()
+        return {
+            'window': window,
+            'slope_kwh_per_day': finite(overall),
+            'recent_slope_kwh_per_day': finite(rolling[-1]) if len(rolling) else None,
+            'rolling': [
+                {'end': str((first_day + pd.Timedelta(days=int(end))).date()), 'slope_kwh_per_day': finite(slope)}
+                for end, slope in zip(ends, rolling)
+            ]
+        }
+
+    @staticmethod
+    def analyze_time_series(data: pd.DataFrame, value_column: str, timestamp_column: str = 'timestamp',
+                            resolution: str = '1h') -> Dict[str, Any]:
         """
         Analisa série temporal.
+
+        Com a coluna de timestamp presente, a série é posicionada na grade
+        da resolução e a análise inclui autocorrelação e periodograma via
+        FFT (confirmação das sazonalidades de 24h e 168h), decomposição por
+        hora da semana e tendência em janelas móveis.
         """
         if value_column not in data.columns:
             return {"error": f"Column {value_column} not found"}
@@ -173,6 +376,45 @@ class DataAnalyzer:
             "volatility": float(values.std() / values.mean()) if values.mean() != 0 else 0
         }
         
+        if timestamp_column not in data.columns or values.notna().sum() < 2:
+            return analysis
+        
+        observed = values.notna()
+        placed = DataAnalyzer.regular_grid(data.loc[observed, timestamp_column], values[observed], resolution)
+        grid, start, step = placed['values'], placed['start'], placed['step']
+        step_hours = step / pd.Timedelta('1h').value
+        
+        # Autocorrelação nos lags sazonais esperados
+        lags = {f'{h}h': int(round(h / step_hours)) for h in (1, 24, 168)}
+        lags = {name: lag for name, lag in lags.items() if 0 < lag < len(grid)}
+        acf = DataAnalyzer.autocorrelation(grid, max(lags.values(), default=0))
+        seasonality = {f'acf_{name}': (float(acf[lag]) if np.isfinite(acf[lag]) else None)
+                       for name, lag in lags.items()}
+        peaks = DataAnalyzer.periodogram(grid, step_hours)
+        seasonality['dominant_periods'] = peaks
+        for name, lag in lags.items():
+            # Sazonalidade confirmada: autocorrelação relevante e máxima
+            # na vizinhança do lag (±25%), acima dos harmônicos vizinhos
+            if name == '1h':
+                continue
+            around = acf[max(1, lag - lag // 4):lag + lag // 4 + 1]
+            seasonality[f'confirmed_{name}'] = bool(
+                np.isfinite(acf[lag]) and acf[lag] >= 0.1 and acf[lag] >= np.nanmax(around)
+            )
+        
+        analysis["grid"] = {
+            "start": str(start),
+            "resolution": resolution,
+            "points": int(len(grid)),
+            "missing": int(len(grid) - np.isfinite(grid).sum())
+        }
+        analysis["seasonality"] = seasonality
+        analysis["decomposition"] = DataAnalyzer.seasonal_decomposition(grid, start, step)
+        analysis["trend_estimates"] = DataAnalyzer.rolling_trend(grid, start, step)
+        slope = analysis["trend_estimates"]["slope_kwh_per_day"]
+        if slope is not None:
+            analysis["trend"] = "increasing" if slope > 0 else "decreasing"
+        
         return analysis
 
 
@@ -5,7 +5,6 @@ Validações avançadas para dados de entrada.
 
 from typing import Dict, Any, List
 from datetime import datetime
-import numpy as np
 
 class DataValidator:
     """
@@ -79,7 +78,11 @@ class DataValidator:
     @staticmethod
     def detect_anomalies(values: List[float], threshold: float = 3.0) -> List[int]:
         """
-        Detecta anomalias em uma série de valores usando z-score.
+        Detecta anomalias em uma série de valores usando z-score global.
+        
+        Para leituras de consumo chegando em tempo real (com sazonalidade
+        diária/semanal), use StreamingAnomalyDetector em
+        src/backend/core/anomaly.py.
         
         Args:
             values: Lista de valores
@@ -88,17 +91,7 @@ class DataValidator:
         Returns:
             Lista de índices com anomalias
         """
-        if len(values) < 3:
-            return []
-        
-        values_array = np.array(values)
-        mean = np.mean(values_array)
-        std = np.std(values_array)
-        
-        if std == 0:
-            return []
-        
-        z_scores = np.abs((values_array - mean) / std)
-        anomalies = np.where(z_scores > threshold)[0].tolist()
+        from src.backend.core.anomaly import zscore_outliers
         
+        anomalies, _ = zscore_outliers(values, threshold)
         return anomalies
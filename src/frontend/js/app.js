@@ -411,13 +411,8 @@ async function handleQuickPredict() {
         console.log(`%c🔮 Gerando previsão para ${hoursAhead} horas...`, 'color: #667eea; font-weight: bold;');
         
         const startTime = performance.now();
-        const response = await fetch(`${API_URL}/forecast`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ hours_ahead: hoursAhead })
-        });
+        // GET: o navegador revalida com ETag e recebe 304 quando nada mudou
+        const response = await fetch(`${API_URL}/forecast?hours_ahead=${encodeURIComponent(hoursAhead)}`);
         
         const endTime = performance.now();
         const processingTime = Math.round(endTime - startTime);
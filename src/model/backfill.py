@@ -0,0 +1,339 @@
+"""
+BACKFILL HISTÓRICO DE PREVISÕES
+Reproduz a previsão recursiva de /forecast a partir de milhares de origens.
+
+Em vez de chamar predict_next_hours uma vez por origem (cada chamada com
+168 previsões de uma linha), todas as origens avançam em conjunto: a cada
+passo do horizonte as features de todas as origens são calculadas de forma
+vetorizada e o modelo é chamado uma única vez para o lote inteiro.
+
+O frame é reposicionado na grade completa da resolução: intervalos
+ausentes viram linhas NaN, de modo que lags e janelas seguem o tempo (como
+no OnlineFeatureEvaluator) e horas sem medição não entram nas métricas.
+Dados com vários medidores (GROUP_COLUMN) são reproduzidos um medidor por
+execução (meter_id).
+
+Saída em disco (<output_dir>/):
+    errors.npy     # cubo (n_origens, horizonte) float32 = real - previsto
+    origins.npy    # timestamp de cada origem (primeira hora prevista)
+    summary.json   # metadados + MAE/RMSE por horizonte
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Adicionar path do projeto
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.model.feature_spec import (
+    DEFAULT_RESOLUTION, GROUP_COLUMN, OnlineFeatureEvaluator, TARGET_COLUMN, resolution_steps
+)
+
+
+class LockstepForecaster:
+    """
+    Previsão recursiva vetorizada sobre várias origens ao mesmo tempo.
+
+    Segue exatamente a semântica do OnlineFeatureEvaluator usado em
+    /forecast: exógenas repetem o último valor observado e apenas as
+    entradas em known_inputs (além das derivadas do timestamp) vêm dos
+    dados reais da hora prevista.
+    """
+
+    def __init__(self, predict_fn, columns, horizon=168, known_inputs=('is_holiday',),
+                 resolution=DEFAULT_RESOLUTION):
+        """
+        Args:
+            predict_fn: Função X (n, n_features) -> previsões (n,) já desnormalizadas
+            columns: Ordem das colunas esperada pelo modelo
+            horizon: Número de passos previstos por origem
+            known_inputs: Entradas cujo valor real na hora prevista é conhecido
+            resolution: Resolução do frame (define lags e janelas em passos)
+        """
+        evaluator = OnlineFeatureEvaluator(resolution=resolution)
+        self.spec = evaluator.spec
+        self.depth = evaluator.history_size
+        self.sources = list(evaluator.source_depths)
+        self.predict_fn = predict_fn
+        self.columns = columns
+        self.horizon = horizon
+        self.known_inputs = set(known_inputs)
+        self.fallback_window = resolution_steps('24h', resolution)
+
+    def forecast(self, frame, origins):
+        """
+        Args:
+            frame: DataFrame na grade completa (NaN nos intervalos ausentes)
+            origins: Índices posicionais da primeira hora prevista de cada origem
+
+        Returns:
+            Matriz (n_origens, horizonte) com as previsões
+        """
+        origins = np.asarray(origins)
+        n, H, L = len(origins), self.horizon, self.depth
+        timestamps = pd.DatetimeIndex(frame['timestamp'])
+
+        # Buffers (n_origens, L + H): L valores observados + H previstos/persistidos
+        offsets = np.arange(-L, 0)
+        history_idx = origins[:, None] + offsets[None, :]
+        buffers = {}
+        for source in self.sources:
+            values = frame[source].to_numpy(dtype=float)
+            buffer = np.empty((n, L + H))
+            buffer[:, :L] = values[history_idx]
+            buffers[source] = buffer
+
+        # Último valor observado de cada entrada (persistência)
+        last_inputs = {}
+        for feature in self.spec:
+            name = feature['name']
+            if feature['kind'] == 'input' and name in frame.columns:
+                last_inputs[name] = frame[name].to_numpy(dtype=float)[origins - 1]
+
+        # Somas móveis iniciais: janela k = shift .. shift + window - 1 (ignorando lacunas)
+        windows = {}
+        for feature in self.spec:
+            if feature['kind'] == 'rolling':
+                key = (feature['source'], feature.get('shift', 0), feature['window'])
+                if key not in windows:
+                    source, shift, window = key
+                    block = buffers[source][:, L - shift - window + 1:L - shift + 1]
+                    finite = np.isfinite(block)
+                    block = np.where(finite, block, 0.0)
+                    windows[key] = [block.sum(axis=1), (block ** 2).sum(axis=1), finite.sum(axis=1)]
+
+        predictions = np.empty((n, H))
+        for h in range(H):
+            pos = L + h
+            target_idx = origins + h
+            values = self._features(frame, timestamps, target_idx, buffers, windows,
+                                    last_inputs, pos)
+            X = np.column_stack([values[c] for c in self.columns])
+
+            pred = np.asarray(self.predict_fn(X), dtype=float)
+            invalid = ~np.isfinite(pred) | (pred < 0)
+            if invalid.any():
+                # Mesmo fallback de predict_next_hours: média das últimas 24h
+                block = buffers[TARGET_COLUMN][:, pos - self.fallback_window:pos]
+                finite = np.isfinite(block)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    recent = np.where(finite, block, 0.0).sum(axis=1) / finite.sum(axis=1)
+                pred = np.where(invalid, np.where(np.isfinite(recent), recent, 1.0), pred)
+            predictions[:, h] = np.maximum(pred, 0.0)
+
+            # Realimentar: alvo recebe a previsão, exógenas repetem o último valor
+            for source, buffer in buffers.items():
+                if source == TARGET_COLUMN:
+                    buffer[:, pos] = predictions[:, h]
+                else:
+                    buffer[:, pos] = buffer[:, pos - 1]
+
+            for (source, shift, window), sums in windows.items():
+                entering = buffers[source][:, pos + 1 - shift]
+                leaving = buffers[source][:, pos + 1 - shift - window]
+                has_entering, has_leaving = np.isfinite(entering), np.isfinite(leaving)
+                entering = np.where(has_entering, entering, 0.0)
+                leaving = np.where(has_leaving, leaving, 0.0)
+                sums[0] += entering - leaving
+                sums[1] += entering ** 2 - leaving ** 2
+                sums[2] += has_entering.astype(int) - has_leaving
+
+        return predictions
+
+    def _features(self, frame, timestamps, target_idx, buffers, windows, last_inputs, pos):
+        """Calcula todas as features do passo atual para todas as origens."""
+        n = len(target_idx)
+        target_ts = timestamps[target_idx]
+        values = {}
+
+        for feature in self.spec:
+            name = feature['name']
+            kind = feature['kind']
+
+            if kind == 'input':
+                attr = feature.get('timestamp_attr')
+                if attr == 'is_weekend':
+                    value = (target_ts.dayofweek >= 5).astype(float)
+                elif attr is not None:
+                    value = np.asarray(getattr(target_ts, attr), dtype=float)
+                elif name in self.known_inputs and name in frame.columns:
+                    value = frame[name].to_numpy(dtype=float)[target_idx]
+                elif name in last_inputs:
+                    value = last_inputs[name]
+                else:
+                    value = np.full(n, np.nan)
+            elif kind == 'cyclic':
+                fn = np.sin if feature['fn'] == 'sin' else np.cos
+                value = fn(2 * np.pi * values[feature['source']] / feature['period'])
+            elif kind == 'sum':
+                value = sum(values[s] for s in feature['sources'])
+            else:
+                buffer = buffers[feature['source']]
+                shift = feature.get('shift', 0)
+                if kind == 'lag':
+                    value = buffer[:, pos - feature['periods']]
+                elif kind == 'diff':
+                    value = buffer[:, pos - shift] - buffer[:, pos - shift - feature['periods']]
+                elif kind == 'pct_change':
+                    base = buffer[:, pos - shift - feature['periods']]
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        value = buffer[:, pos - shift] / base - 1
+                else:
+                    total, total_sq, count = windows[(feature['source'], shift, feature['window'])]
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        mean = np.where(count >= 1, total / count, np.nan)
+                        if feature['stat'] == 'mean':
+                            value = mean
+                        else:
+                            variance = np.maximum((total_sq - count * mean * mean) / (count - 1), 0.0)
+                            value = np.where(count >= 2, np.sqrt(variance), np.nan)
+
+            value = np.asarray(value, dtype=float)
+            invalid = ~np.isfinite(value)
+            if invalid.any():
+                default = feature.get('default', 0.0)
+                fallback = values[default] if isinstance(default, str) else default
+                value = np.where(invalid, fallback, value)
+            values[name] = value
+
+        return values
+
+
+def backfill(frame, predict_fn, columns, output_dir, horizon=168, stride=1,
+             chunk_size=2048, start=None, end=None, resolution=DEFAULT_RESOLUTION,
+             meter_id=None):
+    """
+    Executa o backfill e grava o cubo de erros (origem, horizonte) em disco.
+
+    Args:
+        frame: DataFrame com features pré-calculadas (ex.: FeatureStore.load_frame)
+        predict_fn: Função X -> previsões desnormalizadas
+        columns: Ordem das colunas do modelo
+        output_dir: Diretório de saída
+        horizon: Passos previstos por origem (horas em dados horários)
+        stride: Intervalo (em passos da resolução) entre origens consecutivas
+        chunk_size: Origens processadas por lote (limita a memória)
+        start, end: Limites opcionais (timestamps) para as origens
+        resolution: Resolução do frame
+        meter_id: Medidor a reproduzir quando o frame tem GROUP_COLUMN
+            (obrigatório se houver mais de um)
+
+    Returns:
+        Resumo com MAE/RMSE por horizonte (apenas horas com medição real)
+    """
+    # Uma série por execução: timestamps de medidores diferentes não se misturam
+    if GROUP_COLUMN in frame.columns:
+        if meter_id is not None:
+            frame = frame[frame[GROUP_COLUMN] == meter_id]
+            if frame.empty:
+                raise ValueError(f"Medidor {meter_id} não encontrado no frame")
+        elif frame[GROUP_COLUMN].nunique() > 1:
+            raise ValueError("Frame com vários medidores: informe meter_id")
+        frame = frame.drop(columns=GROUP_COLUMN)
+    elif meter_id is not None:
+        raise ValueError(f"Frame sem a coluna {GROUP_COLUMN}: meter_id não se aplica")
+
+    # Grade completa: lacunas do dataset viram linhas NaN
+    observed = frame.drop_duplicates('timestamp').set_index('timestamp').sort_index()
+    grid = pd.date_range(observed.index[0], observed.index[-1], freq=resolution, name='timestamp')
+    frame = observed.reindex(grid).reset_index()
+    present = frame[TARGET_COLUMN].notna().to_numpy()
+
+    forecaster = LockstepForecaster(predict_fn, columns, horizon=horizon, resolution=resolution)
+    timestamps = pd.DatetimeIndex(frame['timestamp'])
+
+    first = forecaster.depth
+    if start is not None:
+        first = max(first, int(timestamps.searchsorted(pd.Timestamp(start))))
+    last = len(frame) - horizon
+    if end is not None:
+        last = min(last, int(timestamps.searchsorted(pd.Timestamp(end), side='right')) - 1)
+    origins = np.arange(first, last + 1, stride)
+    # A previsão parte da última hora observada: origens logo após uma lacuna ficam de fora
+    origins = origins[present[origins - 1]] if len(origins) else origins
+    if len(origins) == 0:
+        raise ValueError("Nenhuma origem disponível para o intervalo/horizonte informado")
+
+    os.makedirs(output_dir, exist_ok=True)
+    errors = np.lib.format.open_memmap(
+        os.path.join(output_dir, 'errors.npy'), mode='w+',
+        dtype=np.float32, shape=(len(origins), horizon)
+    )
+    np.save(os.path.join(output_dir, 'origins.npy'), timestamps[origins].to_numpy(dtype='datetime64[ns]'))
+
+    actual = frame[TARGET_COLUMN].to_numpy(dtype=float)
+    abs_sum = np.zeros(horizon)
+    sq_sum = np.zeros(horizon)
+    counts = np.zeros(horizon)
+
+    print(f"⏪ Backfill: {len(origins):,} origens x {horizon} passos (lotes de {chunk_size})")
+    for begin in range(0, len(origins), chunk_size):
+        chunk = origins[begin:begin + chunk_size]
+        predictions = forecaster.forecast(frame, chunk)
+        # Erro NaN onde não há medição real
+        chunk_errors = actual[chunk[:, None] + np.arange(horizon)[None, :]] - predictions
+        errors[begin:begin + len(chunk)] = chunk_errors
+        abs_sum += np.nansum(np.abs(chunk_errors), axis=0)
+        sq_sum += np.nansum(chunk_errors ** 2, axis=0)
+        counts += np.isfinite(chunk_errors).sum(axis=0)
+        print(f"   {begin + len(chunk):,}/{len(origins):,} origens")
+    errors.flush()
+    del errors
+
+    summary = {
+        'n_origins': int(len(origins)),
+        'horizon': horizon,
+        'stride': stride,
+        'meter_id': None if meter_id is None else int(meter_id),
+        'first_origin': str(timestamps[origins[0]]),
+        'last_origin': str(timestamps[origins[-1]]),
+        'missing_steps': int((~present).sum()),
+        'mae_by_horizon': (abs_sum / np.maximum(counts, 1)).tolist(),
+        'rmse_by_horizon': np.sqrt(sq_sum / np.maximum(counts, 1)).tolist()
+    }
+    with open(os.path.join(output_dir, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"✅ Cubo de erros salvo em: {output_dir}")
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.backend.core.config import settings
+    from src.backend.core.predictor import EnergyPredictor
+    from src.model.feature_store import FeatureStore
+
+    parser = argparse.ArgumentParser(description="Backfill histórico de previsões recursivas")
+    parser.add_argument("--data", default=settings.DATA_PATH)
+    parser.add_argument("--output", default="data/processed/backfill")
+    parser.add_argument("--horizon", type=int, default=168)
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=2048)
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--meter", type=int, default=None, help="Medidor (dados com meter_id)")
+    args = parser.parse_args()
+
+    predictor = EnergyPredictor(settings.MODEL_PATH, settings.SCALER_DIR)
+    if not predictor.is_ready():
+        print("❌ Modelo não está pronto. Execute o treinamento primeiro.")
+        sys.exit(1)
+
+    resolution = predictor.preprocessor.resolution
+    data = FeatureStore(settings.FEATURE_STORE_DIR, resolution=resolution).load_frame(args.data)
+    result = backfill(
+        data, predictor.predict_features, predictor.preprocessor.feature_columns,
+        args.output, horizon=args.horizon, stride=args.stride,
+        chunk_size=args.chunk_size, start=args.start, end=args.end, resolution=resolution,
+        meter_id=args.meter
+    )
+    print(f"📊 MAE h=1: {result['mae_by_horizon'][0]:.4f} | "
+          f"h={args.horizon}: {result['mae_by_horizon'][-1]:.4f}")
@@ -0,0 +1,351 @@
+"""
+BACKTESTING COM ORIGEM MÓVEL (ROLLING ORIGIN)
+Avalia o modelo respeitando a ordem temporal, sem vazamento entre treino e teste.
+
+Cada fold treina com dados até a origem e testa nas horas seguintes:
+
+    expanding:  [treino.........][teste]
+                [treino..............][teste]
+    sliding:         [treino....][teste]
+                          [treino....][teste]
+
+Os folds rodam em paralelo (joblib). A matriz de features é gravada uma vez
+em .npy e aberta pelos workers com mmap_mode='r', sem cópias por processo.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor
+
+# Adicionar path do projeto
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.model.feature_spec import (
+    DEFAULT_RESOLUTION, OnlineFeatureEvaluator, TARGET_COLUMN, model_feature_columns
+)
+
+
+def default_model_factory():
+    """Mesmo RandomForest usado em train.py (model_type='rf'), com 1 job por fold."""
+    return RandomForestRegressor(
+        n_estimators=50,
+        max_depth=10,
+        min_samples_split=5,
+        min_samples_leaf=2,
+        random_state=42,
+        n_jobs=1,
+        max_features='sqrt',
+        bootstrap=True
+    )
+
+
+def error_metrics(y_true, y_pred):
+    """MAE, RMSE e MAPE (mesma definição de train.calculate_metrics)."""
+    y_true = np.asarray(y_true, dtype=float)
+    y_pred = np.asarray(y_pred, dtype=float)
+    if len(y_true) == 0:
+        return {'mae': None, 'rmse': None, 'mape': None, 'n': 0}
+    errors = y_true - y_pred
+    return {
+        'mae': float(np.mean(np.abs(errors))),
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'mape': float(np.mean(np.abs(errors / (y_true + 1e-8))) * 100),
+        'n': int(len(y_true))
+    }
+
+
+def _load_shared(shared_dir):
+    """Abre os arrays compartilhados em modo somente leitura (sem cópia)."""
+    return {
+        name: np.load(os.path.join(shared_dir, f'{name}.npy'), mmap_mode='r')
+        for name in ('X', 'y', 'timestamps')
+    }
+
+
+def _recursive_forecast(model, shared, columns, origin, horizon, resolution=DEFAULT_RESOLUTION):
+    """
+    Previsão recursiva a partir da origem, como em /forecast.
+
+    Variáveis exógenas repetem o último valor observado; apenas o timestamp
+    e o flag de feriado da hora prevista são conhecidos.
+    """
+    X, y, timestamps = shared['X'], shared['y'], shared['timestamps']
+    evaluator = OnlineFeatureEvaluator(resolution=resolution)
+    start = max(0, origin - evaluator.history_size)
+
+    history = pd.DataFrame(np.asarray(X[start:origin]), columns=columns)
+    history[TARGET_COLUMN] = np.asarray(y[start:origin])
+    history['timestamp'] = pd.to_datetime(np.asarray(timestamps[start:origin]))
+    evaluator.warm_up(history)
+
+    holiday_idx = columns.index('is_holiday')
+    predictions = np.empty(horizon)
+    for h in range(horizon):
+        row = {
+            'timestamp': pd.Timestamp(timestamps[origin + h]),
+            'is_holiday': float(X[origin + h, holiday_idx])
+        }
+        features = evaluator.vector(row)
+        predictions[h] = max(0.0, float(model.predict(features)[0]))
+        row[TARGET_COLUMN] = predictions[h]
+        evaluator.push(row)
+    return predictions
+
+
+def recursive_origins(test_start, test_end, horizon, origin_step):
+    """
+    Origens da previsão recursiva dentro da janela de teste: a cada
+    origin_step passos, enquanto o horizonte inteiro couber na janela.
+    """
+    steps = min(horizon, test_end - test_start)
+    return list(range(test_start, test_end - steps + 1, max(1, origin_step))), steps
+
+
+def _run_fold(shared_dir, fold, columns, horizon, model, resolution=DEFAULT_RESOLUTION, origin_step=1):
+    """Treina e avalia um fold (executado no worker)."""
+    shared = _load_shared(shared_dir)
+    X, y, timestamps = shared['X'], shared['y'], shared['timestamps']
+    train_start, train_end, test_start, test_end = fold
+
+    # Fatias contíguas de memmap são views: nenhuma cópia da matriz completa
+    model.fit(X[train_start:train_end], y[train_start:train_end])
+    y_pred = model.predict(X[test_start:test_end])
+
+    recursive = recursive_true = None
+    if horizon:
+        origins, steps = recursive_origins(test_start, test_end, horizon, origin_step)
+        # Matrizes (origens, passos): cada linha é uma previsão recursiva completa
+        recursive = np.array([
+            _recursive_forecast(model, shared, columns, origin, steps, resolution) for origin in origins
+        ])
+        recursive_true = np.array([np.asarray(y[origin:origin + steps]) for origin in origins])
+
+    return {
+        'y_true': np.asarray(y[test_start:test_end]),
+        'y_pred': y_pred,
+        'hours': pd.DatetimeIndex(np.asarray(timestamps[test_start:test_end])).hour.to_numpy(),
+        'recursive': recursive,
+        'recursive_true': recursive_true
+    }
+
+
+class RollingOriginBacktester:
+    """
+    Motor de backtesting temporal com folds paralelos.
+    """
+
+    def __init__(self, n_folds=5, test_size=168, mode='expanding', train_size=None,
+                 horizon=24, n_jobs=-1, fast=False, warm_start_trees=10,
+                 model_factory=default_model_factory, resolution=DEFAULT_RESOLUTION,
+                 origin_step=None):
+        """
+        Args:
+            n_folds: Número de origens
+            test_size: Horas avaliadas após cada origem
+            mode: 'expanding' (treino cresce) ou 'sliding' (janela fixa)
+            train_size: Tamanho da janela no modo 'sliding' (None = até o 1º fold)
+            horizon: Passos da previsão recursiva (0 desativa)
+            n_jobs: Processos paralelos (-1 = todos os núcleos)
+            fast: Reaproveita o modelo do fold anterior via warm_start
+                (apenas 'expanding'; folds rodam em sequência)
+            warm_start_trees: Árvores adicionadas por fold no modo fast
+            model_factory: Função que cria um estimador scikit-learn novo
+            resolution: Resolução dos dados (test_size e horizon são contados em passos)
+            origin_step: Passos entre origens da previsão recursiva dentro de
+                cada fold (None = horizon // 4); cada horizonte é avaliado
+                em todas as origens de todos os folds
+        """
+        if mode not in ('expanding', 'sliding'):
+            raise ValueError(f"Modo inválido: {mode} (use 'expanding' ou 'sliding')")
+        if fast and mode != 'expanding':
+            raise ValueError("O modo fast só é suportado com folds 'expanding'")
+
+        self.n_folds = n_folds
+        self.test_size = test_size
+        self.mode = mode
+        self.train_size = train_size
+        self.horizon = horizon
+        self.n_jobs = n_jobs
+        self.fast = fast
+        self.warm_start_trees = warm_start_trees
+        self.model_factory = model_factory
+        self.resolution = resolution
+        self.origin_step = origin_step if origin_step is not None else max(1, horizon // 4)
+
+    def split(self, n_samples):
+        """
+        Gera os folds como tuplas (train_start, train_end, test_start, test_end).
+        """
+        first_origin = n_samples - self.n_folds * self.test_size
+        min_train = self.train_size or first_origin
+        if first_origin < max(min_train, 1) and self.mode == 'sliding':
+            raise ValueError("Dados insuficientes para os folds solicitados")
+        if first_origin <= 0:
+            raise ValueError("Dados insuficientes para os folds solicitados")
+
+        folds = []
+        for k in range(self.n_folds):
+            origin = first_origin + k * self.test_size
+            train_start = 0 if self.mode == 'expanding' else max(0, origin - min_train)
+            folds.append((train_start, origin, origin, origin + self.test_size))
+        return folds
+
+    def _share(self, df, columns, shared_dir):
+        """Grava a matriz em .npy (float32, C-contígua) para os workers."""
+        X = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float32))
+        np.save(os.path.join(shared_dir, 'X.npy'), X)
+        np.save(os.path.join(shared_dir, 'y.npy'), df[TARGET_COLUMN].to_numpy(dtype=np.float64))
+        np.save(os.path.join(shared_dir, 'timestamps.npy'),
+                pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ns]'))
+
+    def _run_fast(self, shared_dir, folds, columns):
+        """Folds em sequência: cada modelo continua o anterior (warm_start)."""
+        results = []
+        model = None
+        for fold in folds:
+            if model is None:
+                model = self.model_factory()
+                model.set_params(warm_start=True)
+            else:
+                # Só as árvores novas são treinadas; as anteriores são mantidas
+                model.set_params(n_estimators=model.n_estimators + self.warm_start_trees)
+            results.append(_run_fold(shared_dir, fold, columns, self.horizon, model, self.resolution,
+                                     self.origin_step))
+        return results
+
+    def run(self, df, columns=None):
+        """
+        Executa o backtest.
+
+        Args:
+            df: DataFrame com features (ex.: FeatureStore.load_frame), timestamp e alvo
+            columns: Colunas de features (padrão: FEATURE_SPEC)
+
+        Returns:
+            Relatório com métricas por fold, por horizonte e por hora do dia
+        """
+        columns = columns or model_feature_columns()
+        df = df.sort_values('timestamp').reset_index(drop=True)
+        folds = self.split(len(df))
+
+        print(f"🧪 Backtest {self.mode}: {len(folds)} folds x {self.test_size}h "
+              f"({'fast/warm-start' if self.fast else f'n_jobs={self.n_jobs}'})")
+
+        shared_dir = tempfile.mkdtemp(prefix='energyflow_backtest_')
+        try:
+            self._share(df, columns, shared_dir)
+            if self.fast:
+                results = self._run_fast(shared_dir, folds, columns)
+            else:
+                results = Parallel(n_jobs=self.n_jobs)(
+                    delayed(_run_fold)(shared_dir, fold, columns, self.horizon, self.model_factory(),
+                                       self.resolution, self.origin_step)
+                    for fold in folds
+                )
+        finally:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+
+        return self._report(df, folds, results)
+
+    def _report(self, df, folds, results):
+        timestamps = pd.to_datetime(df['timestamp'])
+        report = {
+            'mode': self.mode,
+            'fast': self.fast,
+            'folds': [],
+            'overall': None,
+            'origin_step': self.origin_step,
+            'recursive_origins': 0,
+            'by_horizon': [],
+            'by_hour': []
+        }
+
+        for (train_start, train_end, test_start, test_end), result in zip(folds, results):
+            fold_metrics = error_metrics(result['y_true'], result['y_pred'])
+            fold_metrics.update({
+                'train_rows': train_end - train_start,
+                'origin': str(timestamps.iloc[test_start]),
+                'test_end': str(timestamps.iloc[test_end - 1])
+            })
+            report['folds'].append(fold_metrics)
+
+        y_true = np.concatenate([r['y_true'] for r in results])
+        y_pred = np.concatenate([r['y_pred'] for r in results])
+        hours = np.concatenate([r['hours'] for r in results])
+        report['overall'] = error_metrics(y_true, y_pred)
+
+        for hour in range(24):
+            mask = hours == hour
+            report['by_hour'].append({'hour': hour, **error_metrics(y_true[mask], y_pred[mask])})
+
+        recursive = [r for r in results if r['recursive'] is not None and len(r['recursive'])]
+        if recursive:
+            steps = min(r['recursive'].shape[1] for r in recursive)
+            forecast = np.concatenate([r['recursive'][:, :steps] for r in recursive])
+            actual = np.concatenate([r['recursive_true'][:, :steps] for r in recursive])
+            report['recursive_origins'] = int(len(forecast))
+            # 'n' de cada horizonte = número de origens avaliadas
+            for h in range(steps):
+                report['by_horizon'].append({'horizon': h + 1, **error_metrics(actual[:, h], forecast[:, h])})
+
+        return report
+
+
+def print_report(report):
+    """Exibe um resumo do backtest no console."""
+    print("\n" + "=" * 80)
+    print(f"📈 BACKTEST ({report['mode']}{', fast' if report['fast'] else ''})")
+    print("=" * 80)
+    for i, fold in enumerate(report['folds'], 1):
+        print(f"  Fold {i}: origem {fold['origin']} | treino {fold['train_rows']:,} | "
+              f"MAE {fold['mae']:.4f} | RMSE {fold['rmse']:.4f} | MAPE {fold['mape']:.2f}%")
+    overall = report['overall']
+    print(f"\n  Geral (1 passo): MAE {overall['mae']:.4f} | RMSE {overall['rmse']:.4f} | "
+          f"MAPE {overall['mape']:.2f}%")
+    if report['by_horizon']:
+        first, last = report['by_horizon'][0], report['by_horizon'][-1]
+        print(f"  Recursivo ({report['recursive_origins']} origens, a cada {report['origin_step']} passos): "
+              f"h=1 MAE {first['mae']:.4f} | h={last['horizon']} MAE {last['mae']:.4f} "
+              f"(n={last['n']} por horizonte)")
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from src.model.feature_store import FeatureStore
+
+    parser = argparse.ArgumentParser(description="Backtest temporal do modelo")
+    parser.add_argument("--data", default="data/raw/energy_consumption.csv")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--test-size", type=int, default=168)
+    parser.add_argument("--mode", choices=["expanding", "sliding"], default="expanding")
+    parser.add_argument("--train-size", type=int, default=None)
+    parser.add_argument("--horizon", type=int, default=24)
+    parser.add_argument("--origin-step", type=int, default=None,
+                        help="Passos entre origens da previsão recursiva (padrão: horizon // 4)")
+    parser.add_argument("--fast", action="store_true")
+    parser.add_argument("--output", default=None, help="Salvar relatório em JSON")
+    args = parser.parse_args()
+
+    frame = FeatureStore().load_frame(args.data)
+    backtester = RollingOriginBacktester(
+        n_folds=args.folds, test_size=args.test_size, mode=args.mode,
+        train_size=args.train_size, horizon=args.horizon, fast=args.fast,
+        origin_step=args.origin_step
+    )
+    result = backtester.run(frame)
+    print_report(result)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Relatório salvo em: {args.output}")
@@ -0,0 +1,417 @@
+"""
+FORMATO COLUNAR BINÁRIO
+Cópia tipada do dataset em um arquivo .npy por coluna, lida via memmap.
+
+Layout em disco (ao lado do CSV de origem):
+
+    data/raw/energy_consumption.columnar/
+        manifest.json        # schema, n_rows, row groups e origem (tamanho/mtime do CSV)
+        timestamp.npy        # datetime64[ns], ordenado
+        consumption_kwh.npy  # float32
+        hour.npy             # int8
+        ...
+
+Os row groups guardam o timestamp mínimo/máximo de cada bloco de linhas,
+permitindo descartar blocos inteiros em consultas por intervalo sem ler
+os dados. Projeção de colunas abre apenas os arquivos pedidos.
+
+Datasets grandes (ex.: gerador sintético multi-medidor) são gravados como
+vários diretórios colunares (shards) com um manifest de dataset:
+
+    <dataset>/
+        manifest.json        # shards com intervalo temporal e metadados
+        shard_00000/         # diretório colunar
+        shard_00001/
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+COLUMNAR_VERSION = 1
+
+# Linhas por row group (~1 ano de dados horários)
+DEFAULT_ROW_GROUP_ROWS = 8760
+
+
+def columnar_path(csv_path):
+    """Diretório colunar correspondente a um CSV."""
+    root, _ = os.path.splitext(csv_path)
+    return root + '.columnar'
+
+
+def _source_stat(csv_path):
+    if not os.path.exists(csv_path):
+        return None
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _rewrite_npy_header(f, shape, dtype):
+    """
+    Reescreve o cabeçalho de um .npy aberto em 'r+b' com um novo shape.
+
+    Returns:
+        True se o novo cabeçalho coube no espaço do anterior.
+    """
+    f.seek(0)
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        np.lib.format.read_array_header_1_0(f)
+        prefix_len = 10
+    else:
+        np.lib.format.read_array_header_2_0(f)
+        prefix_len = 12
+    header_end = f.tell()
+
+    header = repr({
+        'descr': np.lib.format.dtype_to_descr(dtype),
+        'fortran_order': False,
+        'shape': tuple(shape),
+    })
+    available = header_end - prefix_len
+    if len(header) + 1 > available:
+        return False
+
+    f.seek(prefix_len)
+    f.write((header.ljust(available - 1) + '\n').encode('latin1'))
+    return True
+
+
+def append_npy(path, rows):
+    """Acrescenta linhas ao final de um .npy sem reescrever o arquivo inteiro."""
+    current = np.load(path, mmap_mode='r')
+    rows = np.ascontiguousarray(rows, dtype=current.dtype)
+    new_shape = (current.shape[0] + rows.shape[0],) + current.shape[1:]
+    dtype = current.dtype
+    del current
+
+    with open(path, 'r+b') as f:
+        if _rewrite_npy_header(f, new_shape, dtype):
+            f.seek(0, os.SEEK_END)
+            f.write(rows.tobytes())
+            return
+
+    # Cabeçalho não coube (mudança no número de dígitos): regravar o arquivo
+    merged = np.concatenate([np.load(path), rows])
+    np.save(path, merged)
+
+
+def write_columnar_dir(df, directory, schema=None, row_group_rows=DEFAULT_ROW_GROUP_ROWS, source=None):
+    """
+    Grava um DataFrame em formato colunar no diretório informado.
+
+    Args:
+        df: DataFrame com coluna 'timestamp'
+        directory: Diretório de destino
+        schema: Dtypes desejados por coluna (colunas ausentes mantêm o dtype atual)
+        row_group_rows: Linhas por row group
+        source: Metadados da origem gravados no manifest
+
+    Returns:
+        Manifest gravado
+    """
+    schema = schema or {}
+    os.makedirs(directory, exist_ok=True)
+
+    df = df.sort_values('timestamp', kind='stable') if not df['timestamp'].is_monotonic_increasing else df
+    timestamps = pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ns]')
+
+    columns = {}
+    for name in df.columns:
+        if name == 'timestamp':
+            values = timestamps
+        elif name not in schema and not pd.api.types.is_numeric_dtype(df[name]):
+            # Texto como unicode de largura fixa (memmap não suporta objetos)
+            values = df[name].astype(str).to_numpy(dtype=str)
+        else:
+            values = df[name].to_numpy(dtype=schema.get(name, df[name].dtype))
+        np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(values))
+        columns[name] = str(values.dtype)
+
+    row_groups = []
+    for start in range(0, len(df), row_group_rows):
+        end = min(start + row_group_rows, len(df))
+        row_groups.append({
+            'start': start,
+            'end': end,
+            'min': str(timestamps[start]),
+            'max': str(timestamps[end - 1]),
+        })
+
+    manifest = {
+        'version': COLUMNAR_VERSION,
+        'n_rows': int(len(df)),
+        'columns': columns,
+        'row_groups': row_groups,
+        'source': source,
+    }
+    # Manifest por último: leitores só usam a cópia depois que ela está completa
+    _write_manifest(directory, manifest)
+    return manifest
+
+
+def write_columnar(df, csv_path, schema=None, row_group_rows=DEFAULT_ROW_GROUP_ROWS):
+    """
+    Grava a cópia colunar de um DataFrame já salvo em csv_path.
+
+    A cópia é invalidada automaticamente se o CSV mudar.
+
+    Returns:
+        Diretório gravado
+    """
+    directory = columnar_path(csv_path)
+    write_columnar_dir(df, directory, schema=schema, row_group_rows=row_group_rows,
+                       source=_source_stat(csv_path))
+    return directory
+
+
+def append_columnar(df, csv_path, manifest, schema=None, row_group_rows=DEFAULT_ROW_GROUP_ROWS):
+    """
+    Acrescenta linhas à cópia colunar depois que elas foram anexadas ao CSV.
+
+    Apenas os novos bytes são gravados em cada .npy; o último row group é
+    completado e os seguintes são criados. Só é seguro quando a cópia estava
+    válida antes do append e as novas linhas não são anteriores às existentes.
+
+    Args:
+        df: Linhas acrescentadas (mesmas colunas da cópia)
+        csv_path: CSV de origem, já com as linhas anexadas
+        manifest: Manifest da cópia lido ANTES do append no CSV (ou None)
+
+    Returns:
+        Manifest atualizado, ou None se a cópia precisou ser descartada
+    """
+    if manifest is None or set(df.columns) != set(manifest['columns']):
+        return None
+    if len(df) == 0:
+        return manifest
+
+    directory = columnar_path(csv_path)
+    schema = schema or {}
+    df = df.sort_values('timestamp', kind='stable') if not df['timestamp'].is_monotonic_increasing else df
+    timestamps = pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ns]')
+
+    groups = manifest['row_groups']
+    if groups and timestamps[0] < np.datetime64(pd.Timestamp(groups[-1]['max']), 'ns'):
+        # Fora de ordem: row groups deixariam de ser ordenados
+        return None
+
+    for name, dtype in manifest['columns'].items():
+        values = timestamps if name == 'timestamp' else df[name].to_numpy(dtype=schema.get(name, dtype))
+        append_npy(os.path.join(directory, f'{name}.npy'), values)
+
+    n_rows = manifest['n_rows']
+    position = 0
+    if groups and groups[-1]['end'] - groups[-1]['start'] < row_group_rows:
+        take = min(row_group_rows - (groups[-1]['end'] - groups[-1]['start']), len(df))
+        groups[-1]['end'] += take
+        groups[-1]['max'] = str(timestamps[take - 1])
+        position = take
+    while position < len(df):
+        take = min(row_group_rows, len(df) - position)
+        groups.append({
+            'start': n_rows + position,
+            'end': n_rows + position + take,
+            'min': str(timestamps[position]),
+            'max': str(timestamps[position + take - 1]),
+        })
+        position += take
+
+    manifest.update({'n_rows': n_rows + len(df), 'row_groups': groups,
+                     'source': _source_stat(csv_path)})
+    _write_manifest(directory, manifest)
+    return manifest
+
+
+def _write_manifest(directory, manifest):
+    """Grava o manifest de forma atômica (arquivo temporário + os.replace)."""
+    path = os.path.join(directory, 'manifest.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(csv_path):
+    """
+    Manifest da cópia colunar, ou None se ela não existir ou estiver desatualizada.
+    """
+    path = os.path.join(columnar_path(csv_path), 'manifest.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != COLUMNAR_VERSION:
+        return None
+    # CSV alterado depois da gravação (ex.: append): a cópia não é confiável
+    source = _source_stat(csv_path)
+    if source is not None and source != manifest.get('source'):
+        return None
+    return manifest
+
+
+def _row_range(directory, manifest, start, end):
+    """Linhas [first, last) que podem conter o intervalo, pulando row groups."""
+    groups = manifest['row_groups']
+    if start is not None:
+        groups = [g for g in groups if pd.Timestamp(g['max']) >= start]
+    if end is not None:
+        groups = [g for g in groups if pd.Timestamp(g['min']) <= end]
+    if not groups:
+        return 0, 0
+
+    first, last = groups[0]['start'], groups[-1]['end']
+    # Refinar dentro dos grupos das bordas (timestamps ordenados)
+    timestamps = np.load(os.path.join(directory, 'timestamp.npy'), mmap_mode='r')
+    if start is not None:
+        first = int(np.searchsorted(timestamps[first:last], np.datetime64(start, 'ns'), side='left')) + first
+    if end is not None:
+        last = int(np.searchsorted(timestamps[first:last], np.datetime64(end, 'ns'), side='right')) + first
+    return first, last
+
+
+def read_columnar_dir(directory, columns=None, start=None, end=None, nrows=None, manifest=None):
+    """
+    Lê um diretório colunar.
+
+    Args:
+        directory: Diretório gravado por write_columnar_dir
+        columns: Colunas desejadas ('timestamp' é sempre incluída)
+        start, end: Intervalo temporal (inclusive)
+        nrows: Número máximo de linhas
+        manifest: Manifest já carregado (evita reler o arquivo)
+
+    Returns:
+        DataFrame
+    """
+    if manifest is None:
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            manifest = json.load(f)
+
+    names = list(manifest['columns'])
+    if columns is not None:
+        missing = [c for c in columns if c not in manifest['columns']]
+        if missing:
+            raise KeyError(f"Colunas não encontradas no dataset colunar: {missing}")
+        names = ['timestamp'] + [c for c in columns if c != 'timestamp']
+
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    first, last = _row_range(directory, manifest, start, end)
+    if nrows is not None:
+        last = min(last, first + nrows)
+
+    data = {}
+    for name in names:
+        values = np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+        data[name] = np.array(values[first:last])
+    return pd.DataFrame(data)
+
+
+def read_columnar(csv_path, columns=None, start=None, end=None, nrows=None):
+    """
+    Lê a cópia colunar de csv_path.
+
+    Returns:
+        DataFrame, ou None se não houver cópia colunar válida
+    """
+    manifest = read_manifest(csv_path)
+    if manifest is None:
+        return None
+    return read_columnar_dir(columnar_path(csv_path), columns=columns, start=start,
+                             end=end, nrows=nrows, manifest=manifest)
+
+
+# === DATASETS EM SHARDS ===
+class ShardedWriter:
+    """
+    Grava um dataset grande como uma sequência de diretórios colunares (shards).
+
+    Cada shard é gravado e liberado antes do próximo, mantendo a memória
+    limitada ao tamanho de um shard. O manifest do dataset registra o
+    intervalo temporal e os metadados de cada shard para que leitores
+    possam pular shards inteiros.
+    """
+
+    def __init__(self, directory, schema=None, row_group_rows=DEFAULT_ROW_GROUP_ROWS):
+        self.directory = directory
+        self.schema = schema
+        self.row_group_rows = row_group_rows
+        self.shards = []
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, df, **metadata):
+        """Grava um shard; metadata (ex.: faixa de medidores) vai para o manifest."""
+        name = f'shard_{len(self.shards):05d}'
+        manifest = write_columnar_dir(df, os.path.join(self.directory, name), schema=self.schema,
+                                      row_group_rows=self.row_group_rows)
+        groups = manifest['row_groups']
+        self.shards.append({
+            'path': name,
+            'n_rows': manifest['n_rows'],
+            'min': groups[0]['min'] if groups else None,
+            'max': groups[-1]['max'] if groups else None,
+            **metadata,
+        })
+
+    def close(self, **metadata):
+        """Grava o manifest do dataset (por último, como nos shards)."""
+        manifest = {
+            'version': COLUMNAR_VERSION,
+            'n_rows': int(sum(s['n_rows'] for s in self.shards)),
+            'shards': self.shards,
+            **metadata,
+        }
+        _write_manifest(self.directory, manifest)
+        return manifest
+
+
+def iter_shards(directory, columns=None, start=None, end=None, where=None):
+    """
+    Itera sobre os shards de um dataset, um DataFrame por vez.
+
+    Args:
+        directory: Diretório gravado por ShardedWriter
+        columns: Colunas desejadas
+        start, end: Intervalo temporal; shards fora dele não são abertos
+        where: Filtro opcional sobre os metadados do shard (dict -> bool)
+    """
+    with open(os.path.join(directory, 'manifest.json')) as f:
+        manifest = json.load(f)
+
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    for shard in manifest['shards']:
+        if shard['n_rows'] == 0:
+            continue
+        if start is not None and pd.Timestamp(shard['max']) < start:
+            continue
+        if end is not None and pd.Timestamp(shard['min']) > end:
+            continue
+        if where is not None and not where(shard):
+            continue
+        yield read_columnar_dir(os.path.join(directory, shard['path']), columns=columns,
+                                start=start, end=end)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    # Adicionar path do projeto
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+    from src.model.preprocessing import ENERGY_SCHEMA, read_energy_csv
+
+    parser = argparse.ArgumentParser(description="Gera a cópia colunar de um CSV de energia existente")
+    parser.add_argument("csv", nargs="?", default="data/raw/energy_consumption.csv")
+    args = parser.parse_args()
+
+    directory = write_columnar(read_energy_csv(args.csv), args.csv, schema=ENERGY_SCHEMA)
+    print(f"✅ Cópia colunar gravada em: {directory}")
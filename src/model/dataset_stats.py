@@ -0,0 +1,391 @@
+"""
+ESTATÍSTICAS INCREMENTAIS DO DATASET
+Momentos, mínimo/máximo exatos e quantis aproximados mantidos ao lado do
+dataset e atualizados a cada append, sem reler as linhas anteriores.
+
+Layout em disco (ao lado do CSV de origem):
+
+    data/raw/energy_consumption.stats.json   # estado mesclável + origem (tamanho/mtime do CSV)
+
+- Momentos: contagem, média e M2 (Welford/Chan), combinados em lote.
+- Quantis: sketch de buckets logarítmicos com erro relativo limitado
+  (mesma ideia do DDSketch); mesclar dois sketches é somar contagens.
+- Quebras por hora do dia, dia da semana e mês: os mesmos momentos por
+  grupo, calculados com bincount.
+
+Como todo o estado é mesclável, o append de N linhas custa O(N) e a
+leitura das estatísticas é O(1) em relação ao tamanho do dataset.
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+STATS_VERSION = 1
+
+# Colunas resumidas e quantis reportados
+STATS_COLUMNS = ('consumption_kwh', 'temperature_celsius')
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Erro relativo dos quantis do sketch
+SKETCH_ACCURACY = 0.005
+
+# Grupos das quebras: nome -> (atributo do timestamp, número de grupos, deslocamento)
+BREAKDOWNS = {
+    'hour': ('hour', 24, 0),
+    'day_of_week': ('dayofweek', 7, 0),
+    'month': ('month', 12, 1),
+}
+
+
+def stats_path(csv_path):
+    """Arquivo de estatísticas correspondente a um CSV."""
+    root, _ = os.path.splitext(csv_path)
+    return root + '.stats.json'
+
+
+def _source_stat(csv_path):
+    if not os.path.exists(csv_path):
+        return None
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _float(value):
+    return float(value) if value is not None and np.isfinite(value) else None
+
+
+class GroupMoments:
+    """
+    Contagem, média, M2, mínimo e máximo de n grupos (n = 1 para o total).
+    """
+
+    def __init__(self, n_groups=1):
+        self.count = np.zeros(n_groups, dtype=np.int64)
+        self.mean = np.zeros(n_groups)
+        self.m2 = np.zeros(n_groups)
+        self.min = np.full(n_groups, np.inf)
+        self.max = np.full(n_groups, -np.inf)
+
+    def update(self, values, groups=None):
+        """Acrescenta valores (sem NaN); groups indica o grupo de cada valor."""
+        values = np.asarray(values, dtype=float)
+        if groups is None:
+            groups = np.zeros(len(values), dtype=np.int64)
+        n_groups = len(self.count)
+
+        count = np.bincount(groups, minlength=n_groups)
+        total = np.bincount(groups, weights=values, minlength=n_groups)
+        mean = total / np.maximum(count, 1)
+        m2 = np.bincount(groups, weights=(values - mean[groups]) ** 2, minlength=n_groups)
+        low = np.full(n_groups, np.inf)
+        high = np.full(n_groups, -np.inf)
+        np.minimum.at(low, groups, values)
+        np.maximum.at(high, groups, values)
+        self._merge(count, mean, m2, low, high)
+        return self
+
+    def _merge(self, count, mean, m2, low, high):
+        # Combinação de Chan et al. para média e M2 de dois lotes
+        total = self.count + count
+        safe = np.maximum(total, 1)
+        delta = mean - self.mean
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / safe
+        self.mean = np.where(total > 0, self.mean + delta * count / safe, 0.0)
+        self.count = total
+        self.min = np.minimum(self.min, low)
+        self.max = np.maximum(self.max, high)
+
+    def merge(self, other):
+        self._merge(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def std(self):
+        """Desvio padrão amostral (ddof=1, como pandas)."""
+        return np.where(self.count > 1, np.sqrt(self.m2 / np.maximum(self.count - 1, 1)), np.nan)
+
+    def to_dict(self):
+        return {
+            'count': self.count.tolist(),
+            'mean': self.mean.tolist(),
+            'm2': self.m2.tolist(),
+            'min': [_float(v) for v in self.min],
+            'max': [_float(v) for v in self.max],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        moments = cls(len(data['count']))
+        moments.count = np.asarray(data['count'], dtype=np.int64)
+        moments.mean = np.asarray(data['mean'], dtype=float)
+        moments.m2 = np.asarray(data['m2'], dtype=float)
+        moments.min = np.array([np.inf if v is None else v for v in data['min']], dtype=float)
+        moments.max = np.array([-np.inf if v is None else v for v in data['max']], dtype=float)
+        return moments
+
+
+class QuantileSketch:
+    """
+    Sketch de quantis com buckets logarítmicos e erro relativo limitado.
+
+    Cada valor positivo cai no bucket ceil(log_gamma(x)), com
+    gamma = (1 + a) / (1 - a); negativos usam buckets espelhados e valores
+    próximos de zero, um bucket próprio. O quantil devolvido está a no
+    máximo `accuracy` (relativo) do valor exato.
+    """
+
+    _ZERO = 1e-9
+
+    def __init__(self, accuracy=SKETCH_ACCURACY):
+        self.accuracy = accuracy
+        self._gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+
+    @property
+    def count(self):
+        return self.zeros + sum(self.positive.values()) + sum(self.negative.values())
+
+    def _add(self, store, magnitudes):
+        index, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64),
+                                  return_counts=True)
+        for i, c in zip(index.tolist(), counts.tolist()):
+            store[i] = store.get(i, 0) + c
+
+    def update(self, values):
+        """Acrescenta valores (sem NaN)."""
+        values = np.asarray(values, dtype=float)
+        positive = values > self._ZERO
+        negative = values < -self._ZERO
+        if positive.any():
+            self._add(self.positive, values[positive])
+        if negative.any():
+            self._add(self.negative, -values[negative])
+        self.zeros += int(len(values) - positive.sum() - negative.sum())
+        return self
+
+    def merge(self, other):
+        for store, incoming in ((self.positive, other.positive), (self.negative, other.negative)):
+            for i, c in incoming.items():
+                store[i] = store.get(i, 0) + c
+        self.zeros += other.zeros
+        return self
+
+    def _value(self, index):
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def quantiles(self, qs):
+        """Quantis aproximados (lista na ordem de qs; None se vazio)."""
+        total = self.count
+        if total == 0:
+            return [None] * len(qs)
+
+        # Buckets em ordem crescente de valor: negativos (maior módulo primeiro), zero, positivos
+        values = ([-self._value(i) for i in sorted(self.negative, reverse=True)] + [0.0]
+                  + [self._value(i) for i in sorted(self.positive)])
+        counts = ([self.negative[i] for i in sorted(self.negative, reverse=True)] + [self.zeros]
+                  + [self.positive[i] for i in sorted(self.positive)])
+        cumulative = np.cumsum(counts)
+        return [float(values[int(np.searchsorted(cumulative, q * (total - 1), side='right'))]) for q in qs]
+
+    def to_dict(self):
+        return {
+            'accuracy': self.accuracy,
+            'zeros': self.zeros,
+            'positive': {str(i): c for i, c in self.positive.items()},
+            'negative': {str(i): c for i, c in self.negative.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['accuracy'])
+        sketch.zeros = data['zeros']
+        sketch.positive = {int(i): c for i, c in data['positive'].items()}
+        sketch.negative = {int(i): c for i, c in data['negative'].items()}
+        return sketch
+
+
+class DatasetStats:
+    """
+    Estatísticas mescláveis do dataset de energia.
+    """
+
+    def __init__(self, columns=STATS_COLUMNS):
+        self.columns = list(columns)
+        self.rows = 0
+        self.start = None
+        self.end = None
+        self.moments = {c: GroupMoments() for c in self.columns}
+        self.sketches = {c: QuantileSketch() for c in self.columns}
+        self.breakdowns = {
+            c: {name: GroupMoments(n) for name, (_, n, _) in BREAKDOWNS.items()}
+            for c in self.columns
+        }
+
+    def update(self, df):
+        """
+        Acrescenta as linhas de df (colunas ausentes são ignoradas).
+        """
+        if len(df) == 0:
+            return self
+        timestamps = pd.DatetimeIndex(pd.to_datetime(df['timestamp']))
+        self.rows += len(df)
+        first, last = timestamps.min(), timestamps.max()
+        self.start = first if self.start is None else min(self.start, first)
+        self.end = last if self.end is None else max(self.end, last)
+
+        groups = {name: np.asarray(getattr(timestamps, attr), dtype=np.int64) - offset
+                  for name, (attr, _, offset) in BREAKDOWNS.items()}
+        for column in self.columns:
+            if column not in df.columns:
+                continue
+            values = df[column].to_numpy(dtype=float)
+            valid = np.isfinite(values)
+            values = values[valid]
+            self.moments[column].update(values)
+            self.sketches[column].update(values)
+            for name, moments in self.breakdowns[column].items():
+                moments.update(values, groups[name][valid])
+        return self
+
+    def merge(self, other):
+        """Combina com as estatísticas de outro bloco de linhas."""
+        self.rows += other.rows
+        for bound, pick in (('start', min), ('end', max)):
+            values = [v for v in (getattr(self, bound), getattr(other, bound)) if v is not None]
+            setattr(self, bound, pick(values) if values else None)
+        for column in self.columns:
+            self.moments[column].merge(other.moments[column])
+            self.sketches[column].merge(other.sketches[column])
+            for name, moments in self.breakdowns[column].items():
+                moments.merge(other.breakdowns[column][name])
+        return self
+
+    def summary(self):
+        """
+        Estatísticas no formato de /stats, com quantis e quebras por
+        hora, dia da semana e mês.
+        """
+        result = {
+            'total_records': self.rows,
+            'date_range': {'start': str(self.start), 'end': str(self.end)},
+        }
+        for column in self.columns:
+            moments = self.moments[column]
+            low, high = _float(moments.min[0]), _float(moments.max[0])
+            quantiles = self.sketches[column].quantiles(QUANTILES)
+            # O sketch tem erro relativo; mínimo e máximo exatos limitam os extremos
+            quantiles = [None if q is None else min(max(q, low), high) for q in quantiles]
+            summary = {
+                'count': int(moments.count[0]),
+                'mean': _float(moments.mean[0]) if moments.count[0] else None,
+                'std': _float(moments.std()[0]),
+                'min': low,
+                'max': high,
+                'median': quantiles[QUANTILES.index(0.5)],
+                'quantiles': {f'p{int(q * 100):02d}': v for q, v in zip(QUANTILES, quantiles)},
+                'breakdowns': {}
+            }
+            for name, (_, n_groups, offset) in BREAKDOWNS.items():
+                group = self.breakdowns[column][name]
+                std = group.std()
+                summary['breakdowns'][name] = [
+                    {name: g + offset, 'count': int(group.count[g]),
+                     'mean': _float(group.mean[g]) if group.count[g] else None,
+                     'std': _float(std[g]), 'min': _float(group.min[g]), 'max': _float(group.max[g])}
+                    for g in range(n_groups)
+                ]
+            result[column.split('_')[0]] = summary
+        return result
+
+    def to_dict(self):
+        return {
+            'version': STATS_VERSION,
+            'columns': self.columns,
+            'rows': self.rows,
+            'start': None if self.start is None else str(self.start),
+            'end': None if self.end is None else str(self.end),
+            'moments': {c: self.moments[c].to_dict() for c in self.columns},
+            'sketches': {c: self.sketches[c].to_dict() for c in self.columns},
+            'breakdowns': {c: {name: m.to_dict() for name, m in groups.items()}
+                           for c, groups in self.breakdowns.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data['columns'])
+        stats.rows = data['rows']
+        stats.start = None if data['start'] is None else pd.Timestamp(data['start'])
+        stats.end = None if data['end'] is None else pd.Timestamp(data['end'])
+        for column in stats.columns:
+            stats.moments[column] = GroupMoments.from_dict(data['moments'][column])
+            stats.sketches[column] = QuantileSketch.from_dict(data['sketches'][column])
+            stats.breakdowns[column] = {name: GroupMoments.from_dict(m)
+                                        for name, m in data['breakdowns'][column].items()}
+        return stats
+
+
+def save_dataset_stats(stats, csv_path):
+    """Grava as estatísticas ao lado do CSV, registrando o estado atual do CSV."""
+    data = stats.to_dict()
+    data['source'] = _source_stat(csv_path)
+    path = stats_path(csv_path)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_dataset_stats(csv_path):
+    """
+    Estatísticas salvas, ou None se não existirem ou estiverem desatualizadas.
+    """
+    path = stats_path(csv_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('version') != STATS_VERSION or data.get('source') != _source_stat(csv_path):
+        return None
+    return DatasetStats.from_dict(data)
+
+
+def build_dataset_stats(csv_path):
+    """Calcula as estatísticas varrendo o dataset inteiro e as grava."""
+    from src.model.preprocessing import read_energy_data
+
+    df = read_energy_data(csv_path)
+    stats = DatasetStats().update(df)
+    save_dataset_stats(stats, csv_path)
+    return stats
+
+
+def load_dataset_stats(csv_path):
+    """Estatísticas salvas; recalculadas (varredura única) se ausentes ou desatualizadas."""
+    return read_dataset_stats(csv_path) or build_dataset_stats(csv_path)
+
+
+def append_dataset_stats(df, csv_path, previous):
+    """
+    Atualiza as estatísticas com as linhas anexadas ao CSV.
+
+    Args:
+        df: Linhas acrescentadas
+        csv_path: CSV de origem, já com as linhas anexadas
+        previous: Estatísticas lidas ANTES do append (None = desatualizadas;
+            o arquivo é descartado e será recalculado na próxima leitura)
+    """
+    if previous is None:
+        path = stats_path(csv_path)
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    stats = previous.update(df)
+    save_dataset_stats(stats, csv_path)
+    return stats
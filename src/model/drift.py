@@ -0,0 +1,252 @@
+"""
+MONITORAMENTO DE DRIFT
+Histogramas de bins fixos das features e das previsões, comparados com a
+referência salva no treinamento (PSI e KS).
+
+Os bins de cada feature são definidos uma única vez, pelos quantis do
+conjunto de treino, e ficam gravados em drift_reference.json junto com as
+contagens de referência. Em produção cada previsão apenas incrementa as
+contagens: memória fixa (features x bins) e custo de uma comparação
+vetorizada por requisição, independente do volume já observado.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+# Nome do histograma das previsões (as features usam o nome da coluna)
+PREDICTION = 'prediction'
+
+REFERENCE_FILE = 'drift_reference.json'
+
+DEFAULT_BINS = 20
+
+# Faixas usuais do PSI: < 0.1 estável, 0.1-0.25 moderado, > 0.25 significativo
+PSI_WARNING = 0.1
+PSI_DRIFT = 0.25
+
+# Suavização das proporções (bins vazios em um dos lados)
+_EPSILON = 1e-4
+
+# Linhas por bloco na contagem em lote (limita a matriz linhas x features x bins)
+_CHUNK_ROWS = 8192
+
+
+def histogram_edges(X, bins=DEFAULT_BINS, sample_size=200_000, seed=0):
+    """
+    Bordas internas dos bins de cada coluna pelos quantis de X.
+
+    Colunas com poucos valores distintos (ex.: is_weekend) geram bordas
+    repetidas, que são removidas; a matriz é completada com +inf, de modo
+    que todas as colunas tenham o mesmo número de bordas.
+
+    Returns:
+        Array (n_colunas, bins - 1) com as bordas em ordem crescente
+    """
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X[:, None]
+    if len(X) > sample_size:
+        X = X[np.random.default_rng(seed).choice(len(X), sample_size, replace=False)]
+
+    quantiles = np.nanquantile(X, np.linspace(0, 1, bins + 1)[1:-1], axis=0).T
+    edges = np.full(quantiles.shape, np.inf)
+    for j, column in enumerate(quantiles):
+        unique = np.unique(column[np.isfinite(column)])
+        edges[j, :len(unique)] = unique
+    return edges
+
+
+def bin_counts(X, edges):
+    """
+    Contagens por bin de cada coluna (bins abertos nas pontas).
+
+    Bin 0 recebe valores abaixo da primeira borda e o último, valores
+    acima da última; NaN é ignorado.
+
+    Args:
+        X: Linha ou matriz (n, n_colunas)
+        edges: Bordas de histogram_edges
+
+    Returns:
+        Array (n_colunas, n_bordas + 1) de contagens
+    """
+    n_columns, n_edges = edges.shape
+    X = np.asarray(X, dtype=float).reshape(-1, n_columns)
+    counts = np.zeros((n_columns, n_edges + 1), dtype=np.int64)
+    offsets = np.arange(n_columns) * (n_edges + 1)
+
+    for start in range(0, len(X), _CHUNK_ROWS):
+        chunk = X[start:start + _CHUNK_ROWS]
+        index = (chunk[:, :, None] >= edges[None, :, :]).sum(axis=2)
+        index = (index + offsets)[np.isfinite(chunk)]
+        counts += np.bincount(index, minlength=counts.size).reshape(counts.shape)
+    return counts
+
+
+def psi(reference, current):
+    """Population Stability Index entre dois histogramas com os mesmos bins."""
+    p = reference / max(reference.sum(), 1)
+    q = current / max(current.sum(), 1)
+    p, q = np.maximum(p, _EPSILON), np.maximum(q, _EPSILON)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks_statistic(reference, current):
+    """Estatística KS (máxima distância entre as CDFs) sobre os bins."""
+    p = np.cumsum(reference) / max(reference.sum(), 1)
+    q = np.cumsum(current) / max(current.sum(), 1)
+    return float(np.max(np.abs(p - q)))
+
+
+def drift_status(value):
+    """Classificação do PSI em 'stable', 'warning' ou 'drift'."""
+    if value >= PSI_DRIFT:
+        return 'drift'
+    return 'warning' if value >= PSI_WARNING else 'stable'
+
+
+def build_reference(X, feature_columns, predictions, bins=DEFAULT_BINS):
+    """
+    Referência de drift a partir dos dados de treinamento.
+
+    Args:
+        X: Matriz de features (não normalizada) na ordem de feature_columns
+        feature_columns: Nomes das colunas de X
+        predictions: Previsões do modelo (kWh) no conjunto de avaliação
+        bins: Número de bins por feature
+
+    Returns:
+        Dicionário serializável em JSON (ver save_reference)
+    """
+    X = np.asarray(X, dtype=float)
+    predictions = np.asarray(predictions, dtype=float).ravel()
+    feature_edges = histogram_edges(X, bins)
+    prediction_edges = histogram_edges(predictions, bins)
+
+    def encode(edges):
+        # JSON não tem infinito: bordas de preenchimento viram None
+        return [[float(v) if np.isfinite(v) else None for v in row] for row in edges]
+
+    return {
+        'columns': list(feature_columns),
+        'bins': bins,
+        'rows': int(len(X)),
+        'features': {
+            'edges': encode(feature_edges),
+            'counts': bin_counts(X, feature_edges).tolist()
+        },
+        PREDICTION: {
+            'edges': encode(prediction_edges),
+            'counts': bin_counts(predictions, prediction_edges).tolist()
+        }
+    }
+
+
+def save_reference(reference, output_dir='src/model/saved_models'):
+    """Grava a referência em <output_dir>/drift_reference.json."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, REFERENCE_FILE)
+    with open(path, 'w') as f:
+        json.dump(reference, f)
+    return path
+
+
+def load_reference(input_dir='src/model/saved_models'):
+    """Carrega a referência salva no treinamento (None se não existir)."""
+    path = os.path.join(input_dir, REFERENCE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _decode(section):
+    edges = np.array([[np.inf if v is None else v for v in row] for row in section['edges']], dtype=float)
+    return edges, np.asarray(section['counts'], dtype=np.int64)
+
+
+class DriftMonitor:
+    """
+    Histogramas de produção comparados com a referência do treinamento.
+
+    Thread-safe: observe() pode ser chamado de várias requisições ao mesmo
+    tempo. A memória é fixa (features x bins), independente do tráfego.
+    """
+
+    def __init__(self, reference, min_samples=200, psi_threshold=PSI_DRIFT):
+        """
+        Args:
+            reference: Dicionário de build_reference/load_reference
+            min_samples: Observações mínimas antes de sinalizar drift
+            psi_threshold: PSI a partir do qual uma feature é considerada em drift
+        """
+        self.columns = list(reference['columns'])
+        self.min_samples = min_samples
+        self.psi_threshold = psi_threshold
+        self._feature_edges, self._feature_reference = _decode(reference['features'])
+        self._prediction_edges, self._prediction_reference = _decode(reference[PREDICTION])
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zera os histogramas de produção (ex.: após um novo treinamento)."""
+        with self._lock:
+            self._feature_counts = np.zeros_like(self._feature_reference)
+            self._prediction_counts = np.zeros_like(self._prediction_reference)
+            self.samples = 0
+
+    def observe(self, X, predictions):
+        """
+        Acumula features e previsões de uma ou mais requisições.
+
+        Args:
+            X: Linha (n_features,) ou matriz (n, n_features), não normalizada
+            predictions: Previsão ou array de previsões correspondentes
+        """
+        features = bin_counts(X, self._feature_edges)
+        prediction = bin_counts(predictions, self._prediction_edges)
+        with self._lock:
+            self._feature_counts += features
+            self._prediction_counts += prediction
+            self.samples += int(prediction.sum())
+
+    def _compare(self, reference, current):
+        value = psi(reference, current)
+        return {'psi': value, 'ks': ks_statistic(reference, current), 'status': drift_status(value)}
+
+    def report(self):
+        """
+        Compara os histogramas de produção com a referência.
+
+        Returns:
+            Dicionário com PSI/KS por feature e da previsão, as features
+            em drift e se há drift (só após min_samples observações)
+        """
+        with self._lock:
+            feature_counts = self._feature_counts.copy()
+            prediction_counts = self._prediction_counts.copy()
+            samples = self.samples
+
+        features = {
+            name: self._compare(self._feature_reference[j], feature_counts[j])
+            for j, name in enumerate(self.columns)
+        }
+        prediction = self._compare(self._prediction_reference[0], prediction_counts[0])
+        drifted = [name for name, result in features.items() if result['psi'] >= self.psi_threshold]
+        if prediction['psi'] >= self.psi_threshold:
+            drifted.append(PREDICTION)
+
+        enough = samples >= self.min_samples
+        return {
+            'samples': samples,
+            'min_samples': self.min_samples,
+            'psi_threshold': self.psi_threshold,
+            'max_psi': max([r['psi'] for r in features.values()] + [prediction['psi']]) if samples else 0.0,
+            'drifted': drifted if enough else [],
+            'drift_detected': bool(enough and drifted),
+            'features': features,
+            PREDICTION: prediction
+        }
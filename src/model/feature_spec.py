@@ -0,0 +1,713 @@
+"""
+ESPECIFICAÇÃO DECLARATIVA DE FEATURES
+Define cada feature uma única vez e compila para dois avaliadores:
+
+- BatchFeatureEvaluator: vetorizado (pandas), usado no treinamento
+- OnlineFeatureEvaluator: incremental O(1) por passo, usado em /predict e /forecast
+
+Tipos de feature:
+    input        Coluna bruta (pode vir do timestamp, persiste o último valor)
+    cyclic       sin/cos de uma coluna com período fixo
+    sum          Soma de colunas
+    lag          x[t - periods]
+    diff         x[t - shift] - x[t - shift - periods]
+    pct_change   x[t - shift] / x[t - shift - periods] - 1
+    rolling      mean/std de x[t - shift - window + 1 .. t - shift]
+
+Features de consumo usam shift=1 (apenas histórico), pois o consumo da hora
+atual é o alvo e não está disponível em produção.
+
+'periods' e 'window' são durações ('24h', '168h'); 'shift' é contado em
+passos (1 = último intervalo observado). compile_spec converte as durações
+em número de linhas para a resolução do dataset ('1min', '15min', '1h'),
+de modo que a mesma especificação serve para qualquer resolução.
+
+'default' é usado quando o valor não pode ser calculado (histórico
+insuficiente). Pode ser um número ou o nome de uma feature anterior.
+
+Lags e janelas são indexados pelo tempo, não pela posição da linha: em
+datasets com lacunas (horas ausentes), consumption_lag_24h é o consumo de
+exatamente 24h antes ou NaN (e então o default), e as janelas usam apenas
+as observações presentes no intervalo. gap_statistics resume as lacunas.
+
+Com vários medidores (coluna GROUP_COLUMN), lags e janelas do avaliador
+em lote são calculados por medidor; o avaliador online continua sendo uma
+instância por medidor.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+
+# Incrementar sempre que a especificação mudar de forma incompatível
+FEATURE_SPEC_VERSION = 2
+
+TARGET_COLUMN = 'consumption_kwh'
+
+# Identificador da série (multi-medidor)
+GROUP_COLUMN = 'meter_id'
+
+# Resolução padrão dos datasets (um registro por hora)
+DEFAULT_RESOLUTION = '1h'
+SUPPORTED_RESOLUTIONS = ('1min', '15min', '1h')
+
+FEATURE_SPEC = [
+    # === ENTRADAS AUXILIARES (não usadas diretamente pelo modelo) ===
+    {'name': 'hour', 'kind': 'input', 'timestamp_attr': 'hour', 'default': 12, 'model': False},
+    {'name': 'month', 'kind': 'input', 'timestamp_attr': 'month', 'default': 6, 'model': False},
+
+    # === FEATURES DO MODELO (ordem = ordem das colunas do scaler) ===
+    {'name': 'temperature_celsius', 'kind': 'input', 'default': 25.0},
+    {'name': 'temperature_lag_24h', 'kind': 'lag', 'source': 'temperature_celsius', 'periods': '24h',
+     'default': 'temperature_celsius'},
+    {'name': 'hour_sin', 'kind': 'cyclic', 'source': 'hour', 'period': 24, 'fn': 'sin'},
+    {'name': 'hour_cos', 'kind': 'cyclic', 'source': 'hour', 'period': 24, 'fn': 'cos'},
+    {'name': 'month_sin', 'kind': 'cyclic', 'source': 'month', 'period': 12, 'fn': 'sin'},
+    {'name': 'month_cos', 'kind': 'cyclic', 'source': 'month', 'period': 12, 'fn': 'cos'},
+    {'name': 'dayofweek_sin', 'kind': 'cyclic', 'source': 'day_of_week', 'period': 7, 'fn': 'sin'},
+    {'name': 'dayofweek_cos', 'kind': 'cyclic', 'source': 'day_of_week', 'period': 7, 'fn': 'cos'},
+    {'name': 'day_of_week', 'kind': 'input', 'timestamp_attr': 'dayofweek', 'default': 2},
+    {'name': 'is_weekend', 'kind': 'input', 'timestamp_attr': 'is_weekend', 'default': 0},
+    {'name': 'is_holiday', 'kind': 'input', 'default': 0},
+    {'name': 'Voltage', 'kind': 'input', 'default': 240.0},
+    {'name': 'voltage_lag_1h', 'kind': 'lag', 'source': 'Voltage', 'periods': '1h', 'default': 'Voltage'},
+    {'name': 'Global_intensity', 'kind': 'input', 'default': 5.0},
+    {'name': 'global_intensity_lag_1h', 'kind': 'lag', 'source': 'Global_intensity', 'periods': '1h',
+     'default': 'Global_intensity'},
+    {'name': 'Sub_metering_1', 'kind': 'input', 'default': 0.0},
+    {'name': 'Sub_metering_2', 'kind': 'input', 'default': 0.0},
+    {'name': 'Sub_metering_3', 'kind': 'input', 'default': 0.0},
+    {'name': 'sub_metering_total', 'kind': 'sum',
+     'sources': ['Sub_metering_1', 'Sub_metering_2', 'Sub_metering_3']},
+    {'name': 'consumption_lag_1h', 'kind': 'lag', 'source': TARGET_COLUMN, 'periods': '1h', 'default': 1.0},
+    {'name': 'consumption_lag_3h', 'kind': 'lag', 'source': TARGET_COLUMN, 'periods': '3h',
+     'default': 'consumption_lag_1h'},
+    {'name': 'consumption_lag_24h', 'kind': 'lag', 'source': TARGET_COLUMN, 'periods': '24h',
+     'default': 'consumption_lag_1h'},
+    {'name': 'consumption_lag_168h', 'kind': 'lag', 'source': TARGET_COLUMN, 'periods': '168h',
+     'default': 'consumption_lag_24h'},
+    {'name': 'consumption_diff_1h', 'kind': 'diff', 'source': TARGET_COLUMN, 'periods': '1h', 'shift': 1,
+     'default': 0.0},
+    {'name': 'consumption_diff_24h', 'kind': 'diff', 'source': TARGET_COLUMN, 'periods': '24h', 'shift': 1,
+     'default': 0.0},
+    {'name': 'consumption_pct_change_24h', 'kind': 'pct_change', 'source': TARGET_COLUMN, 'periods': '24h',
+     'shift': 1, 'default': 0.0},
+    {'name': 'consumption_rolling_mean_24h', 'kind': 'rolling', 'source': TARGET_COLUMN, 'window': '24h',
+     'stat': 'mean', 'shift': 1, 'default': 'consumption_lag_1h'},
+    {'name': 'consumption_rolling_std_24h', 'kind': 'rolling', 'source': TARGET_COLUMN, 'window': '24h',
+     'stat': 'std', 'shift': 1, 'default': 0.1},
+    {'name': 'consumption_rolling_mean_168h', 'kind': 'rolling', 'source': TARGET_COLUMN, 'window': '168h',
+     'stat': 'mean', 'shift': 1, 'default': 'consumption_rolling_mean_24h'},
+    {'name': 'consumption_rolling_std_168h', 'kind': 'rolling', 'source': TARGET_COLUMN, 'window': '168h',
+     'stat': 'std', 'shift': 1, 'default': 'consumption_rolling_std_24h'},
+]
+
+HISTORY_KINDS = ('lag', 'diff', 'pct_change', 'rolling')
+
+
+def model_feature_columns(spec=FEATURE_SPEC):
+    """Colunas usadas pelo modelo, na ordem do scaler."""
+    return [f['name'] for f in spec if f.get('model', True)]
+
+
+def resolution_steps(duration, resolution=DEFAULT_RESOLUTION):
+    """
+    Número de passos da resolução contidos em uma duração.
+
+    Raises:
+        ValueError: Duração que não é múltiplo inteiro da resolução
+    """
+    steps = pd.Timedelta(duration) / pd.Timedelta(resolution)
+    if steps < 1 or steps != int(steps):
+        raise ValueError(f"Duração {duration} não é múltiplo da resolução {resolution}")
+    return int(steps)
+
+
+def compile_spec(spec=FEATURE_SPEC, resolution=DEFAULT_RESOLUTION):
+    """Cópia da especificação com 'periods'/'window' convertidos em passos."""
+    if resolution not in SUPPORTED_RESOLUTIONS:
+        raise ValueError(f"Resolução inválida: {resolution} (use {', '.join(SUPPORTED_RESOLUTIONS)})")
+    compiled = []
+    for feature in spec:
+        feature = dict(feature)
+        for key in ('periods', 'window'):
+            if isinstance(feature.get(key), str):
+                feature[key] = resolution_steps(feature[key], resolution)
+        compiled.append(feature)
+    return compiled
+
+
+def _evaluation_order(spec):
+    """Entradas primeiro (as derivadas dependem delas), depois o resto na ordem declarada."""
+    inputs = [f for f in spec if f['kind'] == 'input']
+    derived = [f for f in spec if f['kind'] != 'input']
+    return inputs + derived
+
+
+def _history_depth(feature):
+    """Quantos passos para trás a feature precisa enxergar."""
+    kind = feature['kind']
+    shift = feature.get('shift', 0)
+    if kind == 'lag':
+        return feature['periods']
+    if kind in ('diff', 'pct_change'):
+        return shift + feature['periods']
+    if kind == 'rolling':
+        # +1 para retirar da soma o valor que sai da janela
+        return shift + feature['window']
+    return 0
+
+
+def _timestamp_value(timestamp, attr):
+    if attr == 'is_weekend':
+        return 1 if timestamp.dayofweek >= 5 else 0
+    return getattr(timestamp, attr)
+
+
+def _group_keys(steps, groups=None, pad=1):
+    """
+    Posição inteira de cada linha em uma grade única.
+
+    Sem grupos é a própria posição (relativa à primeira). Com grupos, cada
+    série ocupa uma faixa própria seguida de `pad` posições vazias: um
+    deslocamento de até `pad` passos nunca alcança a série vizinha.
+    """
+    steps = np.asarray(steps, dtype=np.int64)
+    if len(steps) == 0:
+        return steps
+    if groups is None:
+        return steps - steps.min()
+    codes, _ = pd.factorize(np.asarray(groups))
+    bounds = pd.Series(steps).groupby(codes).agg(['min', 'max'])
+    spans = (bounds['max'] - bounds['min'] + 1 + pad).to_numpy()
+    starts = np.concatenate([[0], np.cumsum(spans)[:-1]])
+    return steps - bounds['min'].to_numpy()[codes] + starts[codes]
+
+
+def _timestamp_steps(timestamps, resolution):
+    """Índice de cada timestamp na grade da resolução."""
+    ns = np.asarray(pd.to_datetime(timestamps), dtype='datetime64[ns]').astype(np.int64)
+    return ns // pd.Timedelta(resolution).value
+
+
+class TimeIndex:
+    """
+    Lags e janelas indexados pelo tempo, tolerantes a lacunas no dataset.
+
+    Se as linhas cobrem a maior parte da grade (caso comum: poucas lacunas)
+    os valores são espalhados em um vetor denso da grade, com NaN nos
+    intervalos ausentes: lags viram fatias do vetor e janelas usam somas
+    acumuladas, com o mesmo custo para qualquer tamanho de janela. Séries
+    muito esparsas usam busca binária (searchsorted) nas posições ordenadas.
+    """
+
+    # Grade densa apenas se tiver até DENSE_FACTOR posições por linha presente
+    DENSE_FACTOR = 4
+
+    def __init__(self, keys):
+        keys = np.asarray(keys, dtype=np.int64)
+        self._order = None if _is_sorted(keys) else np.argsort(keys, kind='stable')
+        self.keys = keys if self._order is None else keys[self._order]
+        if len(keys):
+            self.keys = self.keys - self.keys[0]
+        self.size = int(self.keys[-1]) + 1 if len(keys) else 0
+        self.dense = self.size <= self.DENSE_FACTOR * max(len(keys), 1)
+        # Grade completa: cada linha é exatamente uma posição (sem lacunas)
+        self.complete = self.size == len(keys)
+
+    @classmethod
+    def from_timestamps(cls, timestamps, resolution=DEFAULT_RESOLUTION, groups=None, pad=1):
+        """Índice pelo timestamp; pad deve cobrir o maior deslocamento usado."""
+        return cls(_group_keys(_timestamp_steps(timestamps, resolution), groups, pad))
+
+    @classmethod
+    def positional(cls, n_rows, groups=None, pad=1):
+        """Índice pela posição da linha (dados sem timestamp): equivale a shift()."""
+        steps = np.arange(n_rows, dtype=np.int64)
+        if groups is not None:
+            codes, _ = pd.factorize(np.asarray(groups))
+            steps = pd.Series(steps).groupby(codes).cumcount().to_numpy()
+        return cls(_group_keys(steps, groups, pad))
+
+    # === CONVERSÕES ===
+    def _sorted(self, values):
+        values = np.asarray(values, dtype=float)
+        return values if self._order is None else values[self._order]
+
+    def _restore(self, values):
+        if self._order is None:
+            return values
+        restored = np.empty_like(values)
+        restored[self._order] = values
+        return restored
+
+    def _to_grid(self, values):
+        """Valores (na ordem das chaves) na grade, NaN nos intervalos ausentes."""
+        if self.complete:
+            return values
+        grid = np.full(self.size, np.nan)
+        # Ordem inversa: em timestamps repetidos vale a primeira linha
+        grid[self.keys[::-1]] = values[::-1]
+        return grid
+
+    def _from_grid(self, grid):
+        return self._restore(grid if self.complete else grid[self.keys])
+
+    # === OPERAÇÕES ===
+    def lag(self, values, periods):
+        """values[t - periods] no tempo (NaN se a linha não existir)."""
+        values = self._sorted(values)
+        if periods == 0:
+            return self._restore(values)
+
+        if self.dense:
+            grid = self._to_grid(values)
+            lagged = np.full(self.size, np.nan)
+            lagged[periods:] = grid[:max(self.size - periods, 0)]
+            return self._from_grid(lagged)
+
+        target = self.keys - periods
+        pos = np.searchsorted(self.keys, target)
+        found = pos < len(self.keys)
+        found[found] = self.keys[pos[found]] == target[found]
+        return self._restore(np.where(found, values[np.where(found, pos, 0)], np.nan))
+
+    def rolling(self, values, shift, window):
+        """
+        (mean, std) das observações presentes em [t - shift - window + 1, t - shift].
+
+        Mesma semântica de rolling(min_periods=1) sobre a série deslocada:
+        NaN são ignorados e std exige ao menos duas observações.
+        """
+        values = self._sorted(values)
+        if self.dense:
+            values = self._to_grid(values)
+        finite = np.isfinite(values)
+        clean = np.where(finite, values, 0.0)
+
+        window_sum = self._window_sum(shift, window)
+        # Contagens são inteiras: a soma acumulada simples já é exata
+        n = window_sum(finite.astype(float), exact=False)
+        total = window_sum(clean)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(n >= 1, total / n, np.nan)
+            variance = np.maximum((window_sum(clean * clean) - n * mean * mean) / (n - 1), 0.0)
+            std = np.where(n >= 2, np.sqrt(variance), np.nan)
+        restore = self._from_grid if self.dense else self._restore
+        return restore(mean), restore(std)
+
+    def _window_sum(self, shift, window):
+        """Função que soma valores em cada janela via somas acumuladas."""
+        if self.dense:
+            # Janela da posição i: acumulado até i - shift menos acumulado até
+            # i - shift - window (zero antes do início da grade)
+            lead = shift + window
+
+            def difference(cumulative):
+                result = np.zeros(self.size)
+                result[shift:] = cumulative[:max(self.size - shift, 0)]
+                result[lead:] -= cumulative[:max(self.size - lead, 0)]
+                return result
+        else:
+            lo = np.searchsorted(self.keys, self.keys - (shift + window - 1), side='left')
+            hi = np.searchsorted(self.keys, self.keys - shift, side='right')
+
+            def difference(cumulative):
+                cumulative = np.concatenate([[0.0], cumulative])
+                return cumulative[hi] - cumulative[lo]
+
+        def window_sum(values, exact=True):
+            if not exact:
+                return difference(np.cumsum(values))
+            high, low = _split_exact(values)
+            return difference(np.cumsum(high)) + difference(np.cumsum(low))
+        return window_sum
+
+
+def _split_exact(values):
+    """
+    Divide values em parte alta (múltiplos de um quantum) e resto.
+
+    As somas acumuladas da parte alta são exatas, de modo que a soma de uma
+    janela não depende de onde a série começa: o append incremental do
+    feature store (que parte de uma cauda do histórico) reproduz o rebuild.
+    """
+    total = float(np.abs(values).sum())
+    if total == 0:
+        return values, np.zeros_like(values)
+    # Somas parciais até 2**52 quanta são representáveis sem arredondamento
+    quantum = 2.0 ** (np.ceil(np.log2(total)) - 52)
+    high = np.round(values / quantum) * quantum
+    return high, values - high
+
+
+def _is_sorted(keys):
+    return len(keys) < 2 or bool(np.all(keys[1:] >= keys[:-1]))
+
+
+def gap_statistics(timestamps, resolution=DEFAULT_RESOLUTION, groups=None):
+    """
+    Estatísticas de lacunas na grade regular da resolução.
+
+    Returns:
+        Dicionário com linhas presentes/esperadas, número de lacunas e a
+        maior lacuna (em passos e como duração, com o timestamp de início)
+    """
+    step = pd.Timedelta(resolution)
+    steps = _timestamp_steps(timestamps, resolution)
+    codes = pd.factorize(np.asarray(groups))[0] if groups is not None else np.zeros(len(steps), dtype=np.int64)
+    frame = pd.DataFrame({'code': codes, 'step': steps}).drop_duplicates().sort_values(['code', 'step'])
+    code, steps = frame['code'].to_numpy(), frame['step'].to_numpy()
+
+    missing = np.where(code[1:] == code[:-1], np.diff(steps) - 1, 0)
+    stats = {
+        'rows': int(len(steps)),
+        'expected_rows': int(len(steps) + missing.sum()),
+        'missing_rows': int(missing.sum()),
+        'gaps': int((missing > 0).sum()),
+        'longest_gap_steps': int(missing.max()) if len(missing) else 0,
+        'longest_gap': None,
+        'longest_gap_start': None,
+    }
+    if stats['longest_gap_steps'] > 0:
+        first_missing = (int(steps[missing.argmax()]) + 1) * step.value
+        stats['longest_gap'] = str(step * stats['longest_gap_steps'])
+        stats['longest_gap_start'] = str(pd.Timestamp(first_missing))
+    return stats
+
+
+class BatchFeatureEvaluator:
+    """
+    Avaliador vetorizado da especificação (treinamento e backtests).
+    """
+
+    def __init__(self, spec=FEATURE_SPEC, resolution=DEFAULT_RESOLUTION):
+        self.resolution = resolution
+        self.spec = _evaluation_order(compile_spec(spec, resolution))
+
+    def transform(self, df):
+        """
+        Adiciona todas as features da especificação ao DataFrame.
+
+        Não remove linhas. Lags e janelas são indexados pelo timestamp
+        (TimeIndex): o lag de 24h de uma linha é a linha de exatamente 24h
+        antes, ou NaN se ela faltar no dataset; janelas usam apenas as linhas
+        presentes no intervalo. Se houver GROUP_COLUMN, o histórico é
+        calculado por medidor. Sem coluna 'timestamp', usa posições.
+        """
+        timestamps = pd.to_datetime(df['timestamp']) if 'timestamp' in df.columns else None
+        groups = df[GROUP_COLUMN] if GROUP_COLUMN in df.columns else None
+        # Separação entre séries: maior deslocamento usado pela especificação
+        pad = max([_history_depth(f) for f in self.spec] + [1])
+        if timestamps is not None:
+            index = TimeIndex.from_timestamps(timestamps, self.resolution, groups, pad=pad)
+        else:
+            index = TimeIndex.positional(len(df), groups, pad=pad)
+        # (source, shift, window) -> (mean, std), calculados juntos
+        windows = {}
+
+        for feature in self.spec:
+            name = feature['name']
+            kind = feature['kind']
+
+            if kind == 'input':
+                if name in df.columns:
+                    continue
+                attr = feature.get('timestamp_attr')
+                if attr is not None and timestamps is not None:
+                    if attr == 'is_weekend':
+                        df[name] = (timestamps.dt.dayofweek >= 5).astype(int)
+                    else:
+                        df[name] = getattr(timestamps.dt, attr)
+                else:
+                    df[name] = feature['default']
+            elif kind == 'cyclic':
+                fn = np.sin if feature['fn'] == 'sin' else np.cos
+                df[name] = fn(2 * np.pi * df[feature['source']].to_numpy(dtype=float) / feature['period'])
+            elif kind == 'sum':
+                # Igual a DataFrame.sum(axis=1): NaN conta como zero
+                df[name] = np.nansum([df[s].to_numpy(dtype=float) for s in feature['sources']], axis=0)
+            else:
+                source = df[feature['source']].to_numpy(dtype=float)
+                offset = feature.get('shift', 0)
+                if kind == 'lag':
+                    df[name] = index.lag(source, feature['periods'])
+                elif kind == 'diff':
+                    df[name] = index.lag(source, offset) - index.lag(source, offset + feature['periods'])
+                elif kind == 'pct_change':
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        df[name] = index.lag(source, offset) / index.lag(source, offset + feature['periods']) - 1
+                elif kind == 'rolling':
+                    key = (feature['source'], offset, feature['window'])
+                    if key not in windows:
+                        windows[key] = index.rolling(source, offset, feature['window'])
+                    df[name] = windows[key][0 if feature['stat'] == 'mean' else 1]
+
+        return df
+
+
+class OnlineFeatureEvaluator:
+    """
+    Avaliador incremental da especificação (serving e forecast recursivo).
+
+    Mantém um buffer circular por coluna de origem e somas móveis para as
+    janelas, de modo que push() e features() custam O(1) por passo
+    (independente do tamanho das janelas).
+    """
+
+    def __init__(self, spec=FEATURE_SPEC, resolution=DEFAULT_RESOLUTION):
+        self.resolution = resolution
+        self.spec = _evaluation_order(compile_spec(spec, resolution))
+        self.columns = model_feature_columns(spec)
+
+        # Profundidade necessária por coluna de origem
+        depth = {}
+        for feature in self.spec:
+            if feature['kind'] not in HISTORY_KINDS:
+                continue
+            if feature.get('shift', 0) < 1 and feature['kind'] != 'lag':
+                raise ValueError(
+                    f"Feature {feature['name']}: o avaliador online exige shift >= 1 "
+                    "(o valor da hora atual ainda não foi observado)"
+                )
+            src = feature['source']
+            depth[src] = max(depth.get(src, 1), _history_depth(feature))
+        self._capacity = depth
+        self._buffers = {src: np.zeros(size) for src, size in depth.items()}
+        self._count = 0
+        self._last_inputs = {}
+        self._last_timestamp = None
+        self._step = pd.Timedelta(resolution)
+
+        # Somas móveis por janela: (source, shift, window) -> [soma, soma_quadrados, n_observações]
+        self._windows = {}
+        for feature in self.spec:
+            if feature['kind'] == 'rolling':
+                key = (feature['source'], feature.get('shift', 0), feature['window'])
+                self._windows[key] = [0.0, 0.0, 0]
+
+    @property
+    def history_size(self):
+        """Número de linhas de histórico necessárias para features completas."""
+        return max(self._capacity.values()) if self._capacity else 0
+
+    @property
+    def source_depths(self):
+        """Profundidade de histórico exigida por coluna de origem."""
+        return dict(self._capacity)
+
+    # === HISTÓRICO ===
+    def _back(self, source, k):
+        """Valor observado k passos atrás (k=1 é o último push)."""
+        if k < 1 or k > self._count or k > self._capacity[source]:
+            return np.nan
+        buffer = self._buffers[source]
+        return buffer[(self._count - k) % len(buffer)]
+
+    def _recompute_window(self, key):
+        source, shift, window = key
+        buffer = self._buffers[source]
+        # Mesmos limites de _back(), vetorizado (janelas de 10 mil passos em 1 min)
+        ks = np.arange(max(shift, 1), min(shift + window - 1, self._count, len(buffer)) + 1)
+        values = buffer[(self._count - ks) % len(buffer)]
+        values = values[np.isfinite(values)]
+        self._windows[key] = [float(values.sum()), float((values ** 2).sum()), len(values)]
+
+    def _missing_steps(self, row):
+        """Intervalos ausentes entre a última observação e o timestamp de row."""
+        if self._last_timestamp is None or row.get('timestamp') is None:
+            return 0
+        elapsed = (pd.Timestamp(row['timestamp']) - self._last_timestamp) // self._step
+        return max(int(elapsed) - 1, 0)
+
+    def _skip(self, steps):
+        """Avança o histórico em intervalos não observados (lacuna nos dados)."""
+        for buffer in self._buffers.values():
+            positions = self._count + np.arange(min(steps, len(buffer)))
+            buffer[positions % len(buffer)] = np.nan
+        # Além de history_size passos a lacuna apaga todo o histórico igualmente
+        self._count += min(steps, self.history_size)
+        for key in self._windows:
+            self._recompute_window(key)
+
+    def push(self, row):
+        """
+        Registra uma observação (hora completa) no histórico.
+
+        Colunas ausentes em row repetem o último valor observado. Se o
+        timestamp de row pular intervalos, eles ficam registrados como
+        ausentes (lags que caem na lacuna usam o default).
+        """
+        missing = self._missing_steps(row)
+        if missing:
+            self._skip(missing)
+        if row.get('timestamp') is not None:
+            self._last_timestamp = pd.Timestamp(row['timestamp'])
+
+        for feature in self.spec:
+            if feature['kind'] == 'input' and feature['name'] in row:
+                self._last_inputs[feature['name']] = row[feature['name']]
+
+        for source, buffer in self._buffers.items():
+            if source in row and row[source] is not None:
+                value = float(row[source])
+            else:
+                value = self._back(source, 1)
+                if not np.isfinite(value):
+                    value = self._last_inputs.get(source, np.nan)
+            buffer[self._count % len(buffer)] = value
+        self._count += 1
+
+        # Atualizar somas móveis: entra k=shift, sai k=shift+window
+        for key, sums in self._windows.items():
+            source, shift, window = key
+            if self._count % window == 0:
+                # Recalcular periodicamente evita acumular erro de ponto flutuante
+                self._recompute_window(key)
+                continue
+            entering = self._back(source, shift)
+            leaving = self._back(source, shift + window)
+            if np.isfinite(entering):
+                sums[0] += entering
+                sums[1] += entering * entering
+                sums[2] += 1
+            if np.isfinite(leaving):
+                sums[0] -= leaving
+                sums[1] -= leaving * leaving
+                sums[2] -= 1
+
+    def warm_up(self, df):
+        """
+        Inicializa o histórico a partir das últimas linhas de um DataFrame.
+
+        Em um avaliador novo os buffers são preenchidos de forma vetorizada
+        (equivalente a push() linha a linha, sem o custo por linha em
+        resoluções de minuto). Cada linha é posicionada pelo timestamp, de
+        modo que intervalos ausentes no DataFrame ficam como lacunas.
+        """
+        history = df.tail(self.history_size)
+        if self._count > 0 or len(history) == 0:
+            for record in history.to_dict('records'):
+                self.push(record)
+            return self
+
+        for feature in self.spec:
+            if feature['kind'] == 'input' and feature['name'] in history.columns:
+                self._last_inputs[feature['name']] = history[feature['name']].iloc[-1]
+
+        n = len(history)
+        # Posição lógica de cada linha (em passos): lacunas avançam o contador
+        if 'timestamp' in history.columns:
+            timestamps = pd.to_datetime(history['timestamp'])
+            steps = ((timestamps - timestamps.iloc[0]) // self._step).to_numpy(dtype=np.int64)
+            if np.any(np.diff(steps) < 1):
+                # Timestamps fora de ordem ou repetidos: manter a ordem das linhas
+                steps = np.arange(n)
+            self._last_timestamp = timestamps.iloc[-1]
+        else:
+            steps = np.arange(n)
+        total = int(steps[-1]) + 1
+
+        for source, buffer in self._buffers.items():
+            if source in history.columns:
+                column = history[source]
+                if column.dtype == object:
+                    # push() repete o valor anterior quando recebe None
+                    column = pd.to_numeric(column).ffill()
+                values = column.to_numpy(dtype=float)
+            else:
+                values = np.full(n, self._last_inputs.get(source, np.nan), dtype=float)
+            buffer[:] = np.nan
+            recent = steps >= total - len(buffer)
+            buffer[steps[recent] % len(buffer)] = values[recent]
+        self._count = total
+
+        for key in self._windows:
+            self._recompute_window(key)
+        return self
+
+    # === AVALIAÇÃO ===
+    def _rolling(self, feature):
+        source, shift, window = feature['source'], feature.get('shift', 0), feature['window']
+        total, total_sq, n = self._windows[(source, shift, window)]
+        if n < 1:
+            return np.nan
+        mean = total / n
+        if feature['stat'] == 'mean':
+            return mean
+        if n < 2:
+            return np.nan
+        variance = max((total_sq - n * mean * mean) / (n - 1), 0.0)
+        return float(np.sqrt(variance))
+
+    def _compute(self, feature, values, row):
+        kind = feature['kind']
+        name = feature['name']
+
+        if kind == 'input':
+            attr = feature.get('timestamp_attr')
+            if attr is not None and row.get('timestamp') is not None:
+                return _timestamp_value(pd.Timestamp(row['timestamp']), attr)
+            return self._last_inputs.get(name, np.nan)
+        if kind == 'cyclic':
+            fn = np.sin if feature['fn'] == 'sin' else np.cos
+            return fn(2 * np.pi * values[feature['source']] / feature['period'])
+        if kind == 'sum':
+            return sum(values[s] for s in feature['sources'])
+
+        source = feature['source']
+        shift = feature.get('shift', 0)
+        if kind == 'lag':
+            return self._back(source, feature['periods'])
+        if kind == 'diff':
+            return self._back(source, shift) - self._back(source, shift + feature['periods'])
+        if kind == 'pct_change':
+            base = self._back(source, shift + feature['periods'])
+            if base == 0:
+                return np.nan
+            return self._back(source, shift) / base - 1
+        if kind == 'rolling':
+            return self._rolling(feature)
+        raise ValueError(f"Tipo de feature desconhecido: {kind}")
+
+    def features(self, row=None):
+        """
+        Calcula todas as features para a próxima hora.
+
+        Args:
+            row: Valores conhecidos da próxima hora (timestamp, temperatura, ...).
+                Features informadas explicitamente têm prioridade sobre o histórico.
+                Um timestamp além do próximo intervalo é tratado como lacuna.
+
+        Returns:
+            Dicionário {nome_da_feature: valor}
+        """
+        row = row or {}
+        evaluator = self
+        missing = self._missing_steps(row)
+        if missing:
+            # A lacuna vale só para esta avaliação; o histórico não é alterado
+            evaluator = copy.deepcopy(self)
+            evaluator._skip(missing)
+
+        values = {}
+        for feature in self.spec:
+            name = feature['name']
+            provided = row.get(name)
+            if provided is not None:
+                values[name] = float(provided)
+                continue
+
+            value = evaluator._compute(feature, values, row)
+            if value is None or not np.isfinite(value):
+                default = feature.get('default', 0.0)
+                value = values[default] if isinstance(default, str) else default
+            values[name] = float(value)
+        return values
+
+    def vector(self, row=None):
+        """Features da próxima hora na ordem das colunas do modelo (1, n_features)."""
+        values = self.features(row)
+        return np.array([[values[c] for c in self.columns]])
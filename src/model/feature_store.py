@@ -0,0 +1,328 @@
+"""
+FEATURE STORE PERSISTENTE
+Armazena a matriz de features engenheiradas em arquivos .npy mapeados em memória.
+
+Layout em disco (um diretório por dataset de origem):
+
+    <root>/<nome_do_dataset>/
+        manifest.json    # fingerprint da origem + versão da especificação de features
+        features.npy     # matriz (n_linhas, n_features)
+        timestamps.npy   # índice temporal datetime64[ns], ordenado
+        tail.pkl         # últimas linhas brutas (contexto para lags/rolling no append)
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Adicionar path do projeto
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.model.columnar import append_npy
+from src.model.feature_spec import DEFAULT_RESOLUTION, FEATURE_SPEC_VERSION, OnlineFeatureEvaluator
+from src.model.preprocessing import EnergyDataPreprocessor, read_energy_csv
+
+
+# Tamanho dos blocos lidos ao calcular o hash do arquivo de origem
+_HASH_CHUNK = 1024 * 1024
+
+
+def scan_source(path, prefix_size=None):
+    """
+    Lê o arquivo inteiro em blocos e calcula seu hash (SHA-1).
+
+    Args:
+        path: Arquivo de origem
+        prefix_size: Se informado, calcula na mesma passada o hash dos
+            primeiros prefix_size bytes (usado para detectar append)
+
+    Returns:
+        dict com size, mtime_ns, hash, prefix_hash (None se o arquivo for
+        menor que o prefixo) e prefix_newline (prefixo termina em quebra de linha)
+    """
+    stat = os.stat(path)
+    digest = hashlib.sha1()
+    prefix_hash = None
+    prefix_newline = False
+    with open(path, 'rb') as f:
+        if prefix_size is not None and prefix_size <= stat.st_size:
+            remaining = prefix_size
+            last = b''
+            while remaining > 0:
+                chunk = f.read(min(_HASH_CHUNK, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+                last = chunk[-1:]
+            prefix_hash = digest.hexdigest()
+            prefix_newline = last == b'\n'
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'hash': digest.hexdigest(),
+        'prefix_hash': prefix_hash,
+        'prefix_newline': prefix_newline,
+    }
+
+
+def file_fingerprint(path):
+    """
+    Fingerprint de um arquivo: tamanho + mtime (ns) + hash do conteúdo inteiro.
+
+    Uma correção no meio do arquivo altera o hash mesmo que o tamanho e o
+    início/fim continuem iguais.
+    """
+    return _fingerprint(scan_source(path))
+
+
+def _fingerprint(scan):
+    return f"{scan['size']}-{scan['mtime_ns']}-{scan['hash'][:16]}"
+
+
+class FeatureStore:
+    """
+    Feature store persistente baseado em arquivos .npy mapeados em memória.
+
+    A matriz de features é calculada uma única vez por dataset e reutilizada
+    por treino, previsão e notebooks. Quando o CSV de origem apenas recebe
+    novas linhas no final, somente essas linhas são processadas.
+    """
+
+    def __init__(self, root='data/processed/feature_store', dtype=np.float32, resolution=DEFAULT_RESOLUTION):
+        """
+        Args:
+            root: Diretório base do feature store
+            dtype: Tipo numérico da matriz de features
+            resolution: Resolução do dataset de origem (define lags e janelas)
+        """
+        self.root = root
+        self.dtype = np.dtype(dtype)
+        self.resolution = resolution
+        self.lookback_rows = OnlineFeatureEvaluator(resolution=resolution).history_size
+        self._preprocessor = EnergyDataPreprocessor(use_scaler=None, resolution=resolution)
+
+    # === CAMINHOS ===
+    def _store_dir(self, source_path):
+        name = os.path.splitext(os.path.basename(source_path))[0]
+        return os.path.join(self.root, name)
+
+    def _paths(self, source_path):
+        store_dir = self._store_dir(source_path)
+        return {
+            'dir': store_dir,
+            'manifest': os.path.join(store_dir, 'manifest.json'),
+            'features': os.path.join(store_dir, 'features.npy'),
+            'timestamps': os.path.join(store_dir, 'timestamps.npy'),
+            'tail': os.path.join(store_dir, 'tail.pkl'),
+        }
+
+    def read_manifest(self, source_path):
+        """Retorna o manifest do dataset ou None se ainda não existir."""
+        manifest_path = self._paths(source_path)['manifest']
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, source_path, manifest):
+        manifest_path = self._paths(source_path)['manifest']
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    # === SINCRONIZAÇÃO ===
+    def sync(self, source_path):
+        """
+        Garante que o store está atualizado em relação ao arquivo de origem.
+
+        - Tamanho e mtime iguais ao manifest: nada a fazer (apenas um stat).
+        - Caso contrário o arquivo é lido inteiro para o hash:
+          - conteúdo idêntico: só atualiza o manifest;
+          - prefixo antigo intacto e arquivo maior: processa as linhas novas.
+        - Qualquer outra mudança: reconstrói o store.
+
+        Returns:
+            Manifest atualizado
+        """
+        manifest = self.read_manifest(source_path)
+
+        if manifest is not None and manifest.get('spec_version') == FEATURE_SPEC_VERSION \
+                and manifest.get('resolution', DEFAULT_RESOLUTION) == self.resolution \
+                and 'source_hash' in manifest:
+            stat = os.stat(source_path)
+            # Mesmo tamanho e mtime: arquivo não foi tocado (apenas um stat)
+            if stat.st_size == manifest['source_size'] and stat.st_mtime_ns == manifest['source_mtime_ns']:
+                return manifest
+
+            scan = scan_source(source_path, prefix_size=manifest['source_size'])
+            if scan['hash'] == manifest['source_hash']:
+                # Conteúdo idêntico (só o mtime mudou)
+                manifest.update(self._source_fields(scan))
+                self._write_manifest(source_path, manifest)
+                return manifest
+            if self._is_append_only(scan, manifest):
+                return self._append(source_path, manifest, scan)
+
+        return self.build(source_path)
+
+    @staticmethod
+    def _is_append_only(scan, manifest):
+        """
+        Verifica se o arquivo atual é o anterior acrescido de novas linhas:
+        o hash de todo o prefixo antigo precisa coincidir, de modo que
+        edições ou backfills no meio do arquivo forçam a reconstrução.
+        """
+        return (
+            scan['size'] > manifest['source_size']
+            and scan['prefix_hash'] == manifest['source_hash']
+            # O arquivo anterior precisa terminar em uma linha completa
+            and scan['prefix_newline']
+        )
+
+    @staticmethod
+    def _source_fields(scan):
+        return {
+            'fingerprint': _fingerprint(scan),
+            'source_size': scan['size'],
+            'source_mtime_ns': scan['mtime_ns'],
+            'source_hash': scan['hash'],
+        }
+
+    def _engineer(self, df):
+        engineered = self._preprocessor.engineer_features(df)
+        numeric = engineered.drop(columns=['timestamp']).select_dtypes(include=[np.number])
+        return engineered, numeric
+
+    def build(self, source_path):
+        """
+        Reconstrói o store completo a partir do arquivo de origem.
+
+        Returns:
+            Manifest gerado
+        """
+        paths = self._paths(source_path)
+        os.makedirs(paths['dir'], exist_ok=True)
+
+        print(f"🗄️ Construindo feature store para: {source_path}")
+        # Hash antes da leitura: se o arquivo mudar durante o build, o
+        # próximo sync detecta a diferença e processa de novo
+        scan = scan_source(source_path)
+        df = self._preprocessor.load_data(source_path)
+        tail = df.tail(self.lookback_rows).copy()
+
+        engineered, numeric = self._engineer(df)
+        np.save(paths['features'], np.ascontiguousarray(numeric.to_numpy(dtype=self.dtype)))
+        np.save(paths['timestamps'], engineered['timestamp'].to_numpy(dtype='datetime64[ns]'))
+        tail.to_pickle(paths['tail'])
+
+        manifest = {
+            'spec_version': FEATURE_SPEC_VERSION,
+            'resolution': self.resolution,
+            'source_path': source_path,
+            **self._source_fields(scan),
+            'source_columns': list(df.columns),
+            'columns': list(numeric.columns),
+            'dtype': self.dtype.name,
+            'n_rows': int(len(numeric)),
+        }
+        self._write_manifest(source_path, manifest)
+        print(f"✅ Feature store pronto: {manifest['n_rows']:,} linhas x {len(manifest['columns'])} features")
+        return manifest
+
+    def _append(self, source_path, manifest, scan):
+        """Processa apenas as linhas acrescentadas desde o último sync."""
+        paths = self._paths(source_path)
+
+        with open(source_path, 'rb') as f:
+            f.seek(manifest['source_size'])
+            new_bytes = f.read(scan['size'] - manifest['source_size'])
+
+        new_rows = read_energy_csv(io.BytesIO(new_bytes), names=manifest['source_columns'])
+
+        tail = pd.read_pickle(paths['tail'])
+        if len(new_rows) == 0 or new_rows['timestamp'].min() <= tail['timestamp'].max():
+            # Linhas fora de ordem: o incremental não é seguro
+            return self.build(source_path)
+
+        combined = pd.concat([tail, new_rows], ignore_index=True)
+        engineered, numeric = self._engineer(combined.copy())
+        is_new = engineered.index >= len(tail)
+        engineered = engineered[is_new]
+        numeric = numeric[is_new]
+
+        if list(numeric.columns) != manifest['columns']:
+            return self.build(source_path)
+
+        if len(numeric) > 0:
+            append_npy(paths['features'], numeric.to_numpy(dtype=self.dtype))
+            append_npy(paths['timestamps'], engineered['timestamp'].to_numpy(dtype='datetime64[ns]'))
+        combined.tail(self.lookback_rows).to_pickle(paths['tail'])
+
+        manifest.update({
+            **self._source_fields(scan),
+            'n_rows': manifest['n_rows'] + int(len(numeric)),
+        })
+        self._write_manifest(source_path, manifest)
+        print(f"➕ Feature store: {len(numeric):,} novas linhas (total {manifest['n_rows']:,})")
+        return manifest
+
+    # === LEITURA ===
+    def load(self, source_path, start=None, end=None, last_n=None, sync=True):
+        """
+        Mapeia em memória um recorte do store, sem parsing.
+
+        Args:
+            source_path: Arquivo de origem do dataset
+            start: Timestamp inicial (inclusivo) ou None
+            end: Timestamp final (inclusivo) ou None
+            last_n: Se informado, retorna apenas as últimas N linhas do recorte
+            sync: Se True, atualiza o store antes de ler
+
+        Returns:
+            (timestamps, features, columns) onde timestamps e features são
+            views somente leitura sobre os arquivos .npy
+        """
+        manifest = self.sync(source_path) if sync else self.read_manifest(source_path)
+        if manifest is None:
+            raise FileNotFoundError(f"Feature store não encontrado para: {source_path}")
+
+        paths = self._paths(source_path)
+        timestamps = np.load(paths['timestamps'], mmap_mode='r')
+        features = np.load(paths['features'], mmap_mode='r')
+
+        lo = 0 if start is None else int(np.searchsorted(timestamps, np.datetime64(pd.Timestamp(start)), side='left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, np.datetime64(pd.Timestamp(end)), side='right'))
+        if last_n is not None:
+            lo = max(lo, hi - last_n)
+
+        return timestamps[lo:hi], features[lo:hi], manifest['columns']
+
+    def load_frame(self, source_path, start=None, end=None, last_n=None, sync=True):
+        """
+        Igual a load(), mas retorna um DataFrame no formato de engineer_features.
+        """
+        timestamps, features, columns = self.load(
+            source_path, start=start, end=end, last_n=last_n, sync=sync
+        )
+        df = pd.DataFrame(np.asarray(features), columns=columns)
+        df.insert(0, 'timestamp', pd.to_datetime(np.asarray(timestamps)))
+        return df
+
+
+if __name__ == "__main__":
+    store = FeatureStore()
+    manifest = store.sync('data/raw/energy_consumption.csv')
+    timestamps, features, columns = store.load('data/raw/energy_consumption.csv', last_n=5)
+    print(f"📐 Shape: {features.shape}")
+    print(f"📅 Últimos timestamps: {timestamps}")
@@ -0,0 +1,268 @@
+"""
+INGESTÃO INCREMENTAL DE LEITURAS
+Acrescenta novas leituras por minuto (formato UCI) ao dataset horário sem
+reprocessar o histórico.
+
+Cada série (a série principal ou um medidor) tem uma marca d'água: a última
+hora já finalizada no dataset. A cada lote recebido:
+
+    1. As leituras são agregadas por hora (somas e contagens, como em
+       src/model/uci.py) e combinadas com a hora parcial
+       guardada no lote anterior.
+    2. Horas até a marca d'água são descartadas (leituras atrasadas).
+    3. Só as horas anteriores à hora da leitura mais recente são finalizadas;
+       a última hora continua aberta no estado até chegar o próximo lote.
+    4. As horas finalizadas são anexadas ao CSV, à cópia colunar e ao
+       feature store, com custo proporcional às novas linhas.
+
+Em resoluções abaixo de 1 hora ('15min', '1min') o mesmo vale para cada
+intervalo: "hora" nos campos do resumo significa intervalo da resolução.
+
+Estado em disco (JSON):
+
+    {"series": {"main": {"watermark": "...", "pending": {...}, "fill": {...}}}}
+"""
+
+import io
+import json
+import os
+import sys
+
+import pandas as pd
+
+# Adicionar path do projeto
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.model.columnar import read_manifest
+from src.model.feature_spec import DEFAULT_RESOLUTION, GROUP_COLUMN
+from src.model.preprocessing import append_energy_dataset, read_energy_data
+from src.model.uci import (
+    MEAN_COLUMNS, SUM_COLUMNS, UCI_COLUMNS,
+    aggregate_block, holiday_flags, iter_blocks, open_source, simulate_temperature
+)
+
+
+DEFAULT_STATE_PATH = 'data/processed/ingest_state.json'
+
+# Nome da série principal (dataset sem meter_id)
+MAIN_SERIES = 'main'
+
+_UCI_HEADER = (';'.join(UCI_COLUMNS) + '\n').encode()
+
+
+def _series_key(meter_id):
+    return MAIN_SERIES if meter_id is None else str(int(meter_id))
+
+
+def _last_timestamp(dataset_path, meter_id=None):
+    """Última hora presente no dataset para a série (None se não houver)."""
+    if not os.path.exists(dataset_path):
+        return None
+
+    if meter_id is None:
+        manifest = read_manifest(dataset_path)
+        if manifest is not None and manifest['row_groups']:
+            return pd.Timestamp(manifest['row_groups'][-1]['max'])
+        # Última linha do CSV, sem ler o arquivo inteiro
+        with open(dataset_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 4096))
+            last_line = f.read().strip().splitlines()[-1]
+        if last_line.startswith(b'timestamp'):
+            return None
+        return pd.Timestamp(last_line.split(b',')[0].decode())
+
+    df = read_energy_data(dataset_path, columns=[GROUP_COLUMN])
+    series = df.loc[df[GROUP_COLUMN] == int(meter_id), 'timestamp']
+    return series.max() if len(series) else None
+
+
+class IncrementalIngester:
+    """
+    Ingestor incremental com marca d'água por série.
+    """
+
+    def __init__(self, dataset_path='data/raw/energy_consumption.csv', state_path=DEFAULT_STATE_PATH,
+                 feature_store_dir=None, seed=42, resolution=DEFAULT_RESOLUTION):
+        """
+        Args:
+            dataset_path: CSV horário de destino
+            state_path: Arquivo JSON com marcas d'água e horas parciais
+            feature_store_dir: Feature store a sincronizar (None = não sincronizar)
+            seed: Semente da temperatura simulada
+            resolution: Resolução do dataset de destino
+        """
+        self.dataset_path = dataset_path
+        self.state_path = state_path
+        self.feature_store_dir = feature_store_dir
+        self.seed = seed
+        self.resolution = resolution
+        # Linhas anexadas pelo último ingest() (para atualizar índices em memória)
+        self.last_rows = pd.DataFrame()
+
+    # === ESTADO ===
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {'series': {}}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    # === ENTRADAS ===
+    def ingest_file(self, path, meter_id=None, flush=False, chunk_bytes=16 * 1024 * 1024):
+        """Ingere um arquivo UCI (.txt ou .zip) lido em blocos."""
+        with open_source(path) as stream:
+            return self.ingest(iter_blocks(stream, chunk_bytes), meter_id=meter_id, flush=flush)
+
+    def ingest_bytes(self, data, meter_id=None, flush=False):
+        """Ingere o conteúdo de um arquivo UCI (cabeçalho opcional)."""
+        if not data.lstrip().startswith(b'Date'):
+            data = _UCI_HEADER + data
+        return self.ingest(iter_blocks(io.BytesIO(data)), meter_id=meter_id, flush=flush)
+
+    # === PROCESSAMENTO ===
+    def ingest(self, blocks, meter_id=None, flush=False):
+        """
+        Agrega os blocos recebidos e anexa as horas completas ao dataset.
+
+        Args:
+            blocks: Iterável de blocos de bytes com linhas por minuto (sem cabeçalho)
+            meter_id: Medidor da série (None = série principal)
+            flush: Finaliza também a última hora (ex.: fim do arquivo de origem)
+
+        Returns:
+            Resumo do lote (minutos, horas finalizadas, marca d'água)
+        """
+        self.last_rows = pd.DataFrame()
+        if os.path.exists(self.dataset_path):
+            with open(self.dataset_path) as f:
+                has_meters = GROUP_COLUMN in f.readline().strip().split(',')
+            if has_meters != (meter_id is not None):
+                raise ValueError("meter_id é obrigatório se e somente se o dataset tiver a coluna meter_id")
+
+        state = self.load_state()
+        key = _series_key(meter_id)
+        series = state['series'].get(key)
+        if series is None:
+            watermark = _last_timestamp(self.dataset_path, meter_id)
+            series = {'watermark': str(watermark) if watermark is not None else None,
+                      'pending': None, 'fill': {}}
+
+        partials = [aggregate_block(block, self.resolution) for block in blocks]
+        new_minutes = int(sum(p['n'].sum() for p in partials if len(p)))
+        if series['pending'] is not None:
+            pending = pd.DataFrame([series['pending']]).set_index('timestamp')
+            pending.index = pd.to_datetime(pending.index)
+            partials.append(pending)
+        partials = [p for p in partials if len(p)]
+
+        summary = {'series': key, 'minutes': new_minutes, 'late_minutes': 0,
+                   'finalized_hours': 0, 'pending_hour': None, 'watermark': series['watermark']}
+        if not partials:
+            return summary
+
+        totals = pd.concat(partials).groupby(level=0).sum().sort_index()
+
+        # Leituras de horas já finalizadas não reabrem o dataset
+        if series['watermark'] is not None:
+            late = totals.index <= pd.Timestamp(series['watermark'])
+            summary['late_minutes'] = int(totals.loc[late, 'n'].sum())
+            totals = totals[~late]
+
+        if flush or totals.empty:
+            complete, open_hour = totals, totals.iloc[0:0]
+        else:
+            complete, open_hour = totals.iloc[:-1], totals.iloc[-1:]
+
+        rows = self._finalize(complete, series['fill'], meter_id)
+        self.last_rows = rows
+        if len(rows):
+            append_energy_dataset(rows, self.dataset_path)
+            series['watermark'] = str(rows['timestamp'].iloc[-1])
+
+        series['pending'] = None
+        if len(open_hour):
+            pending = open_hour.reset_index().iloc[0].to_dict()
+            pending['timestamp'] = str(pending['timestamp'])
+            series['pending'] = {k: (v if k == 'timestamp' else float(v)) for k, v in pending.items()}
+            summary['pending_hour'] = pending['timestamp']
+
+        state['series'][key] = series
+        self._save_state(state)
+
+        if len(rows) and meter_id is None and self.feature_store_dir is not None:
+            self._sync_feature_store()
+
+        summary.update(finalized_hours=int(len(rows)), watermark=series['watermark'])
+        return summary
+
+    def _finalize(self, totals, fill, meter_id):
+        """Converte agregados horários completos em linhas do dataset."""
+        if totals.empty:
+            return pd.DataFrame()
+
+        hourly = pd.DataFrame({'timestamp': totals.index})
+        n = totals['n'].to_numpy()
+        hourly['consumption_kwh'] = totals['Global_active_power'].to_numpy() / n
+        for col in MEAN_COLUMNS:
+            # Média acumulada da série preenche minutos sem a medição
+            value_sum, count = fill.get(col, (0.0, 0.0))
+            value_sum += float(totals[f'{col}_sum'].sum())
+            count += float(totals[f'{col}_count'].sum())
+            fill[col] = [value_sum, count]
+            mean = value_sum / count if count > 0 else 0.0
+            hourly[col] = (totals[f'{col}_sum'].to_numpy() + (n - totals[f'{col}_count'].to_numpy()) * mean) / n
+        for col in SUM_COLUMNS:
+            hourly[col] = totals[col].to_numpy()
+
+        ts = hourly['timestamp']
+        hourly['hour'] = ts.dt.hour
+        hourly['day_of_week'] = ts.dt.dayofweek
+        hourly['month'] = ts.dt.month
+        hourly['is_weekend'] = (hourly['day_of_week'] >= 5).astype(int)
+        # Semente derivada do primeiro intervalo: o mesmo lote gera a mesma temperatura
+        first_step = int(ts.iloc[0].value // pd.Timedelta(self.resolution).value)
+        hourly['temperature_celsius'] = simulate_temperature(ts, seed=[self.seed, first_step])
+        hourly['is_holiday'] = holiday_flags(ts)
+        if meter_id is not None:
+            hourly[GROUP_COLUMN] = int(meter_id)
+        return hourly
+
+    def _sync_feature_store(self):
+        """Atualiza o feature store existente (apenas as linhas novas)."""
+        from src.model.feature_store import FeatureStore
+
+        store = FeatureStore(self.feature_store_dir, resolution=self.resolution)
+        if store.read_manifest(self.dataset_path) is not None:
+            store.sync(self.dataset_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.backend.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Ingere novas leituras por minuto (formato UCI) no dataset horário")
+    parser.add_argument("input", help="Arquivo .txt ou .zip com leituras por minuto")
+    parser.add_argument("--dataset", default=settings.DATA_PATH)
+    parser.add_argument("--state", default=settings.INGEST_STATE_PATH)
+    parser.add_argument("--meter-id", type=int, default=None)
+    parser.add_argument("--flush", action="store_true", help="Finalizar também a última hora")
+    parser.add_argument("--resolution", default=settings.RESOLUTION)
+    args = parser.parse_args()
+
+    ingester = IncrementalIngester(args.dataset, args.state, feature_store_dir=settings.FEATURE_STORE_DIR,
+                                   resolution=args.resolution)
+    summary = ingester.ingest_file(args.input, meter_id=args.meter_id, flush=args.flush)
+    print(f"✅ {summary['minutes']:,} minutos lidos, {summary['finalized_hours']:,} horas anexadas")
+    print(f"   Marca d'água: {summary['watermark']} | Hora aberta: {summary['pending_hour']}")
+    if summary['late_minutes']:
+        print(f"⚠️ {summary['late_minutes']:,} minutos atrasados ignorados")
@@ -0,0 +1,272 @@
+"""
+SÉRIES MULTI-MEDIDOR
+Índice do histórico recente por medidor e carga de dados agrupados para treino.
+
+MeterHistoryIndex guarda, para cada medidor, as últimas N linhas brutas
+(N = histórico exigido pelo OnlineFeatureEvaluator) em matrizes alinhadas
+à direita:
+
+    <dir>/
+        manifest.json    # colunas, profundidade e origem do índice
+        meters.npy       # (M,) ids dos medidores
+        counts.npy       # (M,) linhas válidas por medidor
+        timestamps.npy   # (M, N) datetime64[ns]
+        values.npy       # (M, N, C) float32
+
+Assim /forecast de um medidor é uma busca O(1) no dicionário id -> linha
+seguida da inferência, sem varrer o dataset.
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Adicionar path do projeto
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.model.columnar import iter_shards
+from src.model.feature_spec import (
+    DEFAULT_RESOLUTION, FEATURE_SPEC, GROUP_COLUMN, TARGET_COLUMN, OnlineFeatureEvaluator
+)
+from src.model.preprocessing import EnergyDataPreprocessor
+
+
+def history_columns(spec=FEATURE_SPEC):
+    """Colunas brutas necessárias para reconstruir as features online."""
+    columns = [TARGET_COLUMN]
+    for feature in spec:
+        if feature['kind'] == 'input' and 'timestamp_attr' not in feature:
+            columns.append(feature['name'])
+    return columns
+
+
+def dataset_resolution(directory):
+    """Resolução de um dataset em shards (campo 'freq' do manifest do gerador)."""
+    with open(os.path.join(directory, 'manifest.json')) as f:
+        freq = json.load(f).get('freq', DEFAULT_RESOLUTION)
+    # '1h', '15min', ... normalizados para a forma usada em SUPPORTED_RESOLUTIONS
+    minutes = int(pd.Timedelta(freq) / pd.Timedelta(minutes=1))
+    return '1h' if minutes == 60 else f'{minutes}min'
+
+
+class MeterHistoryIndex:
+    """
+    Últimas linhas de histórico de cada medidor, com busca O(1) por id.
+    """
+
+    def __init__(self, meters, counts, timestamps, values, columns):
+        self.meters = meters
+        self.counts = counts
+        self.timestamps = timestamps
+        self.values = values
+        self.columns = list(columns)
+        self.depth = timestamps.shape[1]
+        self._rows = {int(m): i for i, m in enumerate(meters)}
+
+    def __len__(self):
+        return len(self.meters)
+
+    def __contains__(self, meter_id):
+        return int(meter_id) in self._rows
+
+    # === CONSTRUÇÃO ===
+    @classmethod
+    def from_frame(cls, df, depth=None, columns=None):
+        """
+        Constrói o índice a partir de um DataFrame com GROUP_COLUMN (vetorizado).
+        """
+        depth = depth or OnlineFeatureEvaluator().history_size
+        columns = [c for c in (columns or history_columns()) if c in df.columns]
+
+        df = df.sort_values([GROUP_COLUMN, 'timestamp'], kind='stable')
+        tail = df.groupby(GROUP_COLUMN, sort=True).tail(depth)
+
+        meters, inverse = np.unique(tail[GROUP_COLUMN].to_numpy(), return_inverse=True)
+        # Alinhar à direita: a última linha de cada medidor fica na posição depth-1
+        slot = depth - 1 - tail.groupby(GROUP_COLUMN).cumcount(ascending=False).to_numpy()
+
+        values = np.full((len(meters), depth, len(columns)), np.nan, dtype=np.float32)
+        values[inverse, slot] = tail[columns].to_numpy(dtype=np.float32)
+        timestamps = np.full((len(meters), depth), np.datetime64('NaT'), dtype='datetime64[ns]')
+        timestamps[inverse, slot] = pd.to_datetime(tail['timestamp']).to_numpy(dtype='datetime64[ns]')
+        counts = np.bincount(inverse, minlength=len(meters)).astype(np.int32)
+
+        return cls(meters.astype(np.int64), counts, timestamps, values, columns)
+
+    @classmethod
+    def from_shards(cls, directory, depth=None):
+        """
+        Constrói o índice a partir de um dataset em shards (memória limitada).
+
+        Mantém apenas a cauda de cada medidor enquanto percorre os shards.
+        """
+        depth = depth or OnlineFeatureEvaluator(resolution=dataset_resolution(directory)).history_size
+        tail = None
+        for shard in iter_shards(directory):
+            combined = shard if tail is None else pd.concat([tail, shard], ignore_index=True)
+            combined = combined.sort_values([GROUP_COLUMN, 'timestamp'], kind='stable')
+            tail = combined.groupby(GROUP_COLUMN, sort=False).tail(depth)
+        if tail is None:
+            raise ValueError(f"Nenhum dado encontrado em: {directory}")
+        return cls.from_frame(tail, depth=depth)
+
+    # === PERSISTÊNCIA ===
+    def save(self, directory, source=None):
+        # Manifest por último (load_or_build confia em 'source'): o antigo é
+        # removido antes e cada arquivo é trocado de forma atômica
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, 'manifest.json')
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        for name in ('meters', 'counts', 'timestamps', 'values'):
+            path = os.path.join(directory, f'{name}.npy')
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, getattr(self, name))
+            os.replace(path + '.tmp', path)
+        with open(manifest_path + '.tmp', 'w') as f:
+            json.dump({'columns': self.columns, 'depth': self.depth,
+                       'n_meters': len(self), 'source': source}, f, indent=2)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            manifest = json.load(f)
+        return cls(
+            np.load(os.path.join(directory, 'meters.npy')),
+            np.load(os.path.join(directory, 'counts.npy')),
+            np.load(os.path.join(directory, 'timestamps.npy'), mmap_mode='r'),
+            np.load(os.path.join(directory, 'values.npy'), mmap_mode='r'),
+            manifest['columns'],
+        )
+
+    @classmethod
+    def load_or_build(cls, dataset_dir, index_dir):
+        """
+        Carrega o índice salvo ou reconstrói se o dataset mudou.
+
+        Returns:
+            Índice, ou None se o dataset não existir
+        """
+        dataset_manifest = os.path.join(dataset_dir, 'manifest.json')
+        if not os.path.exists(dataset_manifest):
+            return None
+        source = {'dataset': dataset_dir, 'mtime_ns': os.stat(dataset_manifest).st_mtime_ns}
+
+        index_manifest = os.path.join(index_dir, 'manifest.json')
+        if os.path.exists(index_manifest):
+            with open(index_manifest) as f:
+                if json.load(f).get('source') == source:
+                    return cls.load(index_dir)
+
+        index = cls.from_shards(dataset_dir)
+        index.save(index_dir, source=source)
+        return cls.load(index_dir)
+
+    # === ATUALIZAÇÃO ===
+    def update(self, meter_id, rows):
+        """
+        Acrescenta linhas novas de um medidor (ex.: horas finalizadas pela
+        ingestão incremental), mantendo apenas as últimas `depth`.
+
+        As matrizes carregadas com mmap são copiadas para a memória na
+        primeira atualização; o arquivo do índice não é alterado.
+        """
+        meter_id = int(meter_id)
+        history = self.get(meter_id) if meter_id in self else None
+        combined = pd.concat([history, rows], ignore_index=True) if history is not None else rows.copy()
+        combined['timestamp'] = pd.to_datetime(combined['timestamp'])
+        tail = (combined.drop_duplicates('timestamp', keep='last')
+                .sort_values('timestamp', kind='stable').tail(self.depth))
+        tail = tail.reindex(columns=['timestamp'] + self.columns)
+
+        n = len(tail)
+        timestamps = np.full(self.depth, np.datetime64('NaT'), dtype='datetime64[ns]')
+        timestamps[self.depth - n:] = tail['timestamp'].to_numpy(dtype='datetime64[ns]')
+        values = np.full((self.depth, len(self.columns)), np.nan, dtype=np.float32)
+        values[self.depth - n:] = tail[self.columns].to_numpy(dtype=np.float32)
+
+        if meter_id in self:
+            if not self.values.flags.writeable:
+                self.timestamps = np.array(self.timestamps)
+                self.values = np.array(self.values)
+            row = self._rows[meter_id]
+            self.timestamps[row] = timestamps
+            self.values[row] = values
+            self.counts[row] = n
+        else:
+            self.meters = np.append(self.meters, np.int64(meter_id))
+            self.counts = np.append(self.counts, np.int32(n))
+            self.timestamps = np.concatenate([self.timestamps, timestamps[None]])
+            self.values = np.concatenate([self.values, values[None]])
+            self._rows[meter_id] = len(self.meters) - 1
+
+    # === CONSULTA ===
+    def get(self, meter_id):
+        """
+        Histórico recente de um medidor (timestamp + colunas brutas).
+
+        Raises:
+            KeyError: Medidor desconhecido
+        """
+        row = self._rows[int(meter_id)]
+        n = int(self.counts[row])
+        df = pd.DataFrame(np.asarray(self.values[row, self.depth - n:], dtype=float), columns=self.columns)
+        df.insert(0, 'timestamp', pd.to_datetime(np.asarray(self.timestamps[row, self.depth - n:])))
+        return df
+
+
+def load_pooled_frame(directory, max_meters=None, preprocessor=None):
+    """
+    Carrega um dataset multi-medidor em shards com features engenheiradas.
+
+    Os shards de cada bloco de medidores são concatenados e processados de
+    uma vez (lags/rolling agrupados por medidor, sem loop por medidor).
+
+    Args:
+        directory: Dataset gravado por ShardedWriter (ex.: generate_meter_dataset)
+        max_meters: Usar apenas os medidores com id < max_meters
+        preprocessor: EnergyDataPreprocessor (engineer_features)
+
+    Returns:
+        DataFrame com features de todos os medidores
+    """
+    preprocessor = preprocessor or EnergyDataPreprocessor(use_scaler=None,
+                                                          resolution=dataset_resolution(directory))
+
+    with open(os.path.join(directory, 'manifest.json')) as f:
+        blocks = sorted({(s['meter_start'], s['meter_end']) for s in json.load(f)['shards']})
+
+    frames = []
+    for meter_start, meter_end in blocks:
+        if max_meters is not None and meter_start >= max_meters:
+            break
+        block = pd.concat(iter_shards(directory, where=lambda s: s['meter_start'] == meter_start),
+                          ignore_index=True)
+        if max_meters is not None:
+            block = block[block[GROUP_COLUMN] < max_meters]
+        frames.append(preprocessor.engineer_features(block))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.backend.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Constrói o índice de histórico por medidor")
+    parser.add_argument("--dataset", default=settings.METER_DATA_DIR)
+    parser.add_argument("--output", default=settings.METER_HISTORY_DIR)
+    args = parser.parse_args()
+
+    index = MeterHistoryIndex.load_or_build(args.dataset, args.output)
+    if index is None:
+        print(f"❌ Dataset não encontrado: {args.dataset}")
+        sys.exit(1)
+    print(f"✅ Índice com {len(index):,} medidores salvo em: {args.output}")
@@ -9,6 +9,173 @@ from sklearn.preprocessing import MinMaxScaler, StandardScaler
 from sklearn.model_selection import train_test_split
 import joblib
 import os
+import sys
+
+# Adicionar path do projeto
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.model.columnar import append_columnar, read_columnar, read_manifest, write_columnar
+from src.model.dataset_stats import DatasetStats, append_dataset_stats, read_dataset_stats, save_dataset_stats
+from src.model.feature_spec import (
+    BatchFeatureEvaluator, DEFAULT_RESOLUTION, FEATURE_SPEC_VERSION, GROUP_COLUMN, gap_statistics,
+    model_feature_columns
+)
+
+
+# Schema explícito do dataset bruto: inteiros pequenos para calendário/flags,
+# float32 para medições. Colunas fora do schema usam a inferência do pandas.
+ENERGY_SCHEMA = {
+    'meter_id': 'int32',
+    'consumption_kwh': 'float32',
+    'temperature_celsius': 'float32',
+    'hour': 'int8',
+    'day_of_week': 'int8',
+    'month': 'int8',
+    'is_weekend': 'int8',
+    'is_holiday': 'int8',
+    'Voltage': 'float32',
+    'Global_intensity': 'float32',
+    'Sub_metering_1': 'float32',
+    'Sub_metering_2': 'float32',
+    'Sub_metering_3': 'float32',
+}
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Linhas lidas por bloco quando há filtro temporal
+_CHUNK_ROWS = 100_000
+
+
+def energy_dataset_path(resolution=DEFAULT_RESOLUTION, root='data/raw'):
+    """Caminho padrão do dataset em uma resolução (horário = energy_consumption.csv)."""
+    if resolution == DEFAULT_RESOLUTION:
+        return os.path.join(root, 'energy_consumption.csv')
+    return os.path.join(root, f'energy_consumption_{resolution}.csv')
+
+
+def _parse_timestamps(values):
+    """Converte timestamps com formato fixo (fallback para inferência)."""
+    try:
+        return pd.to_datetime(values, format=TIMESTAMP_FORMAT)
+    except (ValueError, TypeError):
+        return pd.to_datetime(values)
+
+
+def read_energy_csv(source, columns=None, start=None, end=None, names=None, nrows=None):
+    """
+    Lê o CSV de energia com tipos explícitos.
+
+    Args:
+        source: Caminho ou buffer do CSV
+        columns: Colunas desejadas (projeção; 'timestamp' é sempre incluída)
+        start, end: Intervalo temporal (inclusive) a manter
+        names: Nomes das colunas quando o CSV não tem cabeçalho
+        nrows: Número máximo de linhas lidas
+
+    Returns:
+        DataFrame ordenado por timestamp
+    """
+    usecols = None
+    if columns is not None:
+        usecols = ['timestamp'] + [c for c in columns if c != 'timestamp']
+
+    read_kwargs = dict(
+        usecols=usecols,
+        dtype={**ENERGY_SCHEMA, 'timestamp': str},
+        nrows=nrows,
+    )
+    if names is not None:
+        read_kwargs.update(header=None, names=names)
+
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    if start is None and end is None:
+        df = pd.read_csv(source, **read_kwargs)
+        df['timestamp'] = _parse_timestamps(df['timestamp'])
+    else:
+        # Filtrar bloco a bloco: só as linhas do intervalo ficam em memória
+        parts = []
+        for chunk in pd.read_csv(source, chunksize=_CHUNK_ROWS, **read_kwargs):
+            chunk['timestamp'] = _parse_timestamps(chunk['timestamp'])
+            mask = np.ones(len(chunk), dtype=bool)
+            if start is not None:
+                mask &= (chunk['timestamp'] >= start).to_numpy()
+            if end is not None:
+                mask &= (chunk['timestamp'] <= end).to_numpy()
+            parts.append(chunk[mask])
+            # Dados em ordem: nada depois deste bloco está no intervalo
+            if end is not None and chunk['timestamp'].is_monotonic_increasing \
+                    and len(chunk) and chunk['timestamp'].iloc[-1] > end:
+                break
+        df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=usecols or ['timestamp'])
+
+    if not df['timestamp'].is_monotonic_increasing:
+        df = df.sort_values('timestamp', kind='stable')
+    return df.reset_index(drop=True)
+
+
+def read_energy_data(path, columns=None, start=None, end=None, nrows=None):
+    """
+    Lê o dataset de energia preferindo a cópia colunar binária.
+
+    Usa o CSV quando a cópia não existe ou está desatualizada.
+    Mesmos argumentos de read_energy_csv.
+    """
+    df = read_columnar(path, columns=columns, start=start, end=end, nrows=nrows)
+    if df is not None:
+        return df
+    return read_energy_csv(path, columns=columns, start=start, end=end, nrows=nrows)
+
+
+def write_energy_dataset(df, path):
+    """
+    Salva o dataset em CSV e grava a cópia colunar tipada (ENERGY_SCHEMA)
+    e as estatísticas incrementais (ver dataset_stats).
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    df.to_csv(path, index=False)
+    write_columnar(df, path, schema=ENERGY_SCHEMA)
+    save_dataset_stats(DatasetStats().update(df), path)
+
+
+def append_energy_dataset(df, path):
+    """
+    Acrescenta linhas ao final do CSV e da cópia colunar, sem regravá-los.
+
+    As linhas são gravadas na ordem de colunas do cabeçalho existente.
+    Se a cópia colunar não puder ser estendida ela fica desatualizada e
+    os leitores voltam ao CSV. As estatísticas são atualizadas só com as
+    novas linhas quando estavam em dia antes do append.
+
+    Returns:
+        Número de linhas acrescentadas
+    """
+    if not os.path.exists(path):
+        write_energy_dataset(df, path)
+        return len(df)
+
+    manifest = read_manifest(path)
+    stats = read_dataset_stats(path)
+    with open(path, 'rb') as f:
+        header = f.readline().decode().strip().split(',')
+        f.seek(-1, os.SEEK_END)
+        needs_newline = f.read(1) != b'\n'
+
+    missing = [c for c in header if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colunas ausentes nas novas linhas: {missing}")
+
+    df = df[header]
+    with open(path, 'a', newline='') as f:
+        if needs_newline:
+            f.write('\n')
+        df.to_csv(f, header=False, index=False)
+    append_columnar(df, path, manifest, schema=ENERGY_SCHEMA)
+    append_dataset_stats(df, path, stats)
+    return len(df)
 
 
 class EnergyDataPreprocessor:
@@ -16,12 +183,14 @@ class EnergyDataPreprocessor:
     Classe responsável por preprocessar dados de energia para modelos de regressão ML.
     """
     
-    def __init__(self, use_scaler='standard'):
+    def __init__(self, use_scaler='standard', resolution=DEFAULT_RESOLUTION):
         """
         Args:
             use_scaler: Tipo de scaler ('standard', 'minmax', ou None)
+            resolution: Resolução dos dados ('1min', '15min' ou '1h')
         """
         self.use_scaler = use_scaler
+        self.resolution = resolution
         if use_scaler == 'standard':
             self.scaler_features = StandardScaler()
             self.scaler_target = StandardScaler()
@@ -32,96 +201,67 @@ class EnergyDataPreprocessor:
             self.scaler_features = None
             self.scaler_target = None
         self.feature_columns = None
+        # Versão da especificação de features usada pelos scalers/modelo
+        self.feature_spec_version = FEATURE_SPEC_VERSION
+        self.gap_stats = None
+        
+    def load_data(self, file_path, columns=None, start=None, end=None):
+        """
+        Carrega o dataset de energia com tipos explícitos (ENERGY_SCHEMA).
+        
+        Usa a cópia colunar binária quando disponível.
         
-    def load_data(self, file_path):
-        """Carrega o dataset de energia."""
+        Args:
+            file_path: Caminho do CSV
+            columns: Colunas desejadas (None = todas)
+            start, end: Intervalo temporal opcional
+        """
         print(f"📂 Carregando dados de: {file_path}")
-        df = pd.read_csv(file_path)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp')
+        df = read_energy_data(file_path, columns=columns, start=start, end=end)
         print(f"✅ {len(df):,} registros carregados")
         return df
     
     def engineer_features(self, df):
         """
         Engenharia de features temporais adicionais.
+        
+        As features são definidas em src/model/feature_spec.py (mesma
+        especificação usada pelo avaliador online em produção). Lags e
+        janelas seguem o timestamp: linhas cujo histórico cai em uma lacuna
+        do dataset ficam com NaN e são removidas, em vez de receberem o
+        valor da linha anterior na tabela.
         """
         print("🔧 Engenharia de features...")
         
-        # Features cíclicas (hora e mês)
-        df['hour_sin'] = np.sin(2 * np.pi * df['hour'] / 24)
-        df['hour_cos'] = np.cos(2 * np.pi * df['hour'] / 24)
-        df['month_sin'] = np.sin(2 * np.pi * df['month'] / 12)
-        df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12)
-        df['dayofweek_sin'] = np.sin(2 * np.pi * df['day_of_week'] / 7)
-        df['dayofweek_cos'] = np.cos(2 * np.pi * df['day_of_week'] / 7)
-        
-        # Features globais adicionais
-        df['sub_metering_total'] = (
-            df['Sub_metering_1'] + df['Sub_metering_2'] + df['Sub_metering_3']
-        )
+        # Vários medidores: histórico de cada um precisa estar contíguo e em ordem
+        if GROUP_COLUMN in df.columns:
+            df = df.sort_values([GROUP_COLUMN, 'timestamp'], kind='stable').reset_index(drop=True)
         
-        # Features de lag (consumo e temperatura anteriores)
-        df['consumption_lag_1h'] = df['consumption_kwh'].shift(1)
-        df['consumption_lag_3h'] = df['consumption_kwh'].shift(3)
-        df['consumption_lag_24h'] = df['consumption_kwh'].shift(24)
-        df['consumption_lag_168h'] = df['consumption_kwh'].shift(168)  # 1 semana
-        df['temperature_lag_24h'] = df['temperature_celsius'].shift(24)
-        df['voltage_lag_1h'] = df['Voltage'].shift(1)
-        df['global_intensity_lag_1h'] = df['Global_intensity'].shift(1)
+        groups = df[GROUP_COLUMN] if GROUP_COLUMN in df.columns else None
+        self.gap_stats = gap_statistics(df['timestamp'], self.resolution, groups)
+        if self.gap_stats['gaps']:
+            print(f"⚠️ {self.gap_stats['gaps']} lacunas no dataset "
+                  f"({self.gap_stats['missing_rows']:,} intervalos ausentes; maior: "
+                  f"{self.gap_stats['longest_gap']} a partir de {self.gap_stats['longest_gap_start']})")
         
-        # Diferenças e tendências
-        df['consumption_diff_1h'] = df['consumption_kwh'].diff(1)
-        df['consumption_diff_24h'] = df['consumption_kwh'].diff(24)
-        df['consumption_pct_change_24h'] = df['consumption_kwh'].pct_change(24)
+        df = BatchFeatureEvaluator(resolution=self.resolution).transform(df)
         
-        # Rolling statistics
-        df['consumption_rolling_mean_24h'] = df['consumption_kwh'].rolling(window=24, min_periods=1).mean()
-        df['consumption_rolling_std_24h'] = df['consumption_kwh'].rolling(window=24, min_periods=1).std()
-        df['consumption_rolling_mean_168h'] = df['consumption_kwh'].rolling(window=168, min_periods=1).mean()
-        df['consumption_rolling_std_168h'] = df['consumption_kwh'].rolling(window=168, min_periods=1).std()
-        
-        # Remover NaNs criados pelos lags
+        # Remover NaNs criados pelos lags (início de cada série e após lacunas)
+        n_rows = len(df)
         df = df.replace([np.inf, -np.inf], np.nan)
         df = df.dropna()
+        self.gap_stats['dropped_rows'] = int(n_rows - len(df))
         
-        print(f"✅ Features criadas. Total de colunas: {len(df.columns)}")
+        print(f"✅ Features criadas. Total de colunas: {len(df.columns)} "
+              f"({self.gap_stats['dropped_rows']:,} linhas sem histórico completo removidas)")
         return df
     
     def prepare_features(self, df):
         """
         Seleciona e prepara features para o modelo.
         """
-        # Features para o modelo
-        self.feature_columns = [
-            'temperature_celsius',
-            'temperature_lag_24h',
-            'hour_sin', 'hour_cos',
-            'month_sin', 'month_cos',
-            'dayofweek_sin', 'dayofweek_cos',
-            'day_of_week',
-            'is_weekend',
-            'is_holiday',
-            'Voltage',
-            'voltage_lag_1h',
-            'Global_intensity',
-            'global_intensity_lag_1h',
-            'Sub_metering_1',
-            'Sub_metering_2',
-            'Sub_metering_3',
-            'sub_metering_total',
-            'consumption_lag_1h',
-            'consumption_lag_3h',
-            'consumption_lag_24h',
-            'consumption_lag_168h',
-            'consumption_diff_1h',
-            'consumption_diff_24h',
-            'consumption_pct_change_24h',
-            'consumption_rolling_mean_24h',
-            'consumption_rolling_std_24h',
-            'consumption_rolling_mean_168h',
-            'consumption_rolling_std_168h'
-        ]
+        # Features para o modelo (ordem definida em FEATURE_SPEC)
+        self.feature_columns = model_feature_columns()
         
         X = df[self.feature_columns].values
         y = df['consumption_kwh'].values.reshape(-1, 1)
@@ -146,12 +286,17 @@ class EnergyDataPreprocessor:
         
         return X, y
     
-    def fit_transform(self, df):
+    def fit_transform(self, df, engineer=True):
         """
         Pipeline completo de preprocessamento para regressão.
+        
+        Args:
+            df: DataFrame bruto (ou já com features, se engineer=False)
+            engineer: Se False, assume que df veio pronto do FeatureStore
         """
         # Engenharia de features
-        df = self.engineer_features(df)
+        if engineer:
+            df = self.engineer_features(df)
         
         # Preparar features e target
         X, y = self.prepare_features(df)
@@ -223,6 +368,8 @@ class EnergyDataPreprocessor:
             joblib.dump(self.scaler_target, f'{output_dir}/scaler_target.pkl')
         joblib.dump(self.feature_columns, f'{output_dir}/feature_columns.pkl')
         joblib.dump(self.use_scaler, f'{output_dir}/scaler_type.pkl')
+        joblib.dump(self.resolution, f'{output_dir}/resolution.pkl')
+        joblib.dump(self.feature_spec_version, f'{output_dir}/feature_spec_version.pkl')
         
         print(f"💾 Scalers salvos em: {output_dir}")
     
@@ -243,6 +390,14 @@ class EnergyDataPreprocessor:
         else:
             self.use_scaler = 'standard'
         
+        # Modelos antigos (sem o arquivo) foram treinados com dados horários
+        resolution_path = f'{input_dir}/resolution.pkl'
+        self.resolution = joblib.load(resolution_path) if os.path.exists(resolution_path) else DEFAULT_RESOLUTION
+        
+        # Modelos sem o arquivo são anteriores ao versionamento (especificação v1)
+        spec_version_path = f'{input_dir}/feature_spec_version.pkl'
+        self.feature_spec_version = joblib.load(spec_version_path) if os.path.exists(spec_version_path) else 1
+        
         scaler_features_path = f'{input_dir}/scaler_features.pkl'
         if os.path.exists(scaler_features_path):
             self.scaler_features = joblib.load(scaler_features_path)
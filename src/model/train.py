@@ -15,8 +15,16 @@ import json
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
-from src.model.preprocessing import EnergyDataPreprocessor
+from src.model.preprocessing import EnergyDataPreprocessor, energy_dataset_path, read_energy_data
+from src.model.feature_store import FeatureStore
+from src.model.backtest import RollingOriginBacktester, print_report
 from src.model.model import create_default_model
+from src.model.feature_spec import (
+    DEFAULT_RESOLUTION, FEATURE_SPEC_VERSION, GROUP_COLUMN, SUPPORTED_RESOLUTIONS, gap_statistics,
+    resolution_steps
+)
+from src.model.meters import dataset_resolution, load_pooled_frame
+from src.model.drift import build_reference, save_reference
 
 
 def plot_training_results(y_true, y_pred, save_path='src/model/saved_models/predictions.png'):
@@ -138,36 +146,30 @@ def compare_models(X_train, y_train, X_test, y_test, preprocessor):
     return best_model, best_model_type, results
 
 
-def main():
+def check_real_dataset(data_path='data/raw/energy_consumption.csv'):
     """
-    Pipeline completo de treinamento.
+    Verifica se o dataset principal existe e é real (não sintético).
     """
-    print("="*80)
-    print("🚀 ENERGYFLOW AI - TREINAMENTO DO MODELO DE REGRESSÃO ML")
-    print("="*80)
-    
     # === PASSO 1: VERIFICAR DATASET REAL ===
     print("\n📊 PASSO 1: Verificando dataset REAL (não sintético)...")
     
-    if not os.path.exists('data/raw/energy_consumption.csv'):
+    if not os.path.exists(data_path):
         print("❌ Dataset não encontrado!")
         print("📥 Para usar dados REAIS:")
         print("   1. Baixe o dataset UCI: https://archive.ics.uci.edu/ml/datasets/individual+household+electric+power+consumption")
         print("   2. Execute: python data/process_uci_dataset.py")
         print("\n⚠️ ATENÇÃO: Não use dados sintéticos para treinamento!")
-        return
+        return False
     
     # Validar que é dataset REAL (não sintético)
-    import pandas as pd
-    df_check = pd.read_csv('data/raw/energy_consumption.csv', nrows=1)
+    df_check = read_energy_data(data_path, nrows=1)
     
     # Verificar se tem colunas de dataset UCI real
     if 'Voltage' in df_check.columns or 'Global_intensity' in df_check.columns or 'Sub_metering_1' in df_check.columns:
         print("✅ Dataset REAL detectado (formato UCI)")
     else:
         # Verificar timestamp para detectar dados sintéticos
-        df_sample = pd.read_csv('data/raw/energy_consumption.csv', nrows=100)
-        df_sample['timestamp'] = pd.to_datetime(df_sample['timestamp'])
+        df_sample = read_energy_data(data_path, columns=['timestamp'], nrows=100)
         first_date = df_sample['timestamp'].min()
         
         # Dados sintéticos geralmente começam em 2022
@@ -175,26 +177,63 @@ def main():
             print("⚠️ ATENÇÃO: Dataset parece ser SINTÉTICO (data >= 2022)")
             print("❌ Não é permitido usar dados sintéticos!")
             print("📥 Use dados REAIS do UCI: python data/process_uci_dataset.py")
-            return
+            return False
         elif first_date.year >= 2000 and first_date.year <= 2015:
             print(f"✅ Dataset REAL confirmado (período: {first_date.year})")
         else:
             print("✅ Dataset encontrado (validar manualmente)")
     
-    print(f"✅ Dataset já existe! ({len(pd.read_csv('data/raw/energy_consumption.csv')):,} registros)")
+    n_records = len(read_energy_data(data_path, columns=['timestamp']))
+    print(f"✅ Dataset já existe! ({n_records:,} registros)")
+    return True
+
+
+def main(meters_dir=None, max_meters=None, resolution=DEFAULT_RESOLUTION):
+    """
+    Pipeline completo de treinamento.
+    
+    Args:
+        meters_dir: Dataset multi-medidor em shards (treino com dados agrupados)
+        max_meters: Limite de medidores usados do dataset multi-medidor
+        resolution: Resolução do dataset principal ('1h', '15min' ou '1min');
+            o dataset multi-medidor usa a resolução gravada no seu manifest
+    """
+    print("="*80)
+    print("🚀 ENERGYFLOW AI - TREINAMENTO DO MODELO DE REGRESSÃO ML")
+    print("="*80)
+    
+    data_path = energy_dataset_path(resolution)
+    if meters_dir is None:
+        # Dataset principal precisa ser real (UCI)
+        if not check_real_dataset(data_path):
+            return
+    else:
+        resolution = dataset_resolution(meters_dir)
+    print(f"⏱️ Resolução dos dados: {resolution}")
     
     # === PASSO 2: PREPROCESSAMENTO ===
     print("\n🔧 PASSO 2: Preprocessando dados...")
-    preprocessor = EnergyDataPreprocessor(use_scaler='standard')
-    
-    # Carregar TODOS os dados disponíveis (sem limitações)
-    print("📂 Carregando TODOS os dados do dataset real...")
-    df = preprocessor.load_data('data/raw/energy_consumption.csv')
+    preprocessor = EnergyDataPreprocessor(use_scaler='standard', resolution=resolution)
+    
+    gaps = None
+    if meters_dir is None:
+        # Carregar TODOS os dados disponíveis (features reaproveitadas do feature store)
+        print("📂 Carregando TODOS os dados do dataset real...")
+        df = FeatureStore(resolution=resolution).load_frame(data_path)
+        # Lacunas medidas no dataset bruto (o store já não tem as linhas sem histórico)
+        gaps = gap_statistics(read_energy_data(data_path, columns=['timestamp'])['timestamp'], resolution)
+        print(f"🕳️ Lacunas: {gaps['gaps']} ({gaps['missing_rows']:,} de {gaps['expected_rows']:,} "
+              f"intervalos ausentes; maior: {gaps['longest_gap']})")
+    else:
+        # Um único modelo para todos os medidores (lags/rolling calculados por medidor)
+        print(f"📂 Carregando dataset multi-medidor: {meters_dir}")
+        df = load_pooled_frame(meters_dir, max_meters=max_meters, preprocessor=preprocessor)
+        print(f"✅ {df[GROUP_COLUMN].nunique():,} medidores agrupados")
     print(f"✅ Dataset completo carregado: {len(df):,} registros")
     print(f"📅 Período: {df['timestamp'].min()} até {df['timestamp'].max()}")
     
     # Preprocessar TODOS os dados
-    X_train, X_test, y_train, y_test = preprocessor.fit_transform(df)
+    X_train, X_test, y_train, y_test = preprocessor.fit_transform(df, engineer=False)
     
     # Salvar preprocessador
     preprocessor.save_scalers()
@@ -259,6 +298,27 @@ def main():
     print(f"  📊 R² Score: {metrics['R2']:.4f} ({metrics['R2']*100:.2f}% da variação explicada)")
     print("="*80)
     
+    # === PASSO 4.2: REFERÊNCIA DE DRIFT ===
+    # Histogramas das features (escala original) e das previsões, comparados
+    # em produção com o que chega em /predict
+    X_reference = (preprocessor.scaler_features.inverse_transform(X_train)
+                   if preprocessor.scaler_features is not None else X_train)
+    reference_path = save_reference(build_reference(X_reference, preprocessor.feature_columns, y_pred))
+    print(f"📐 Referência de drift salva em: {reference_path}")
+    
+    # === PASSO 4.5: BACKTEST TEMPORAL ===
+    # O split acima é aleatório (shuffle=True) e tende a ser otimista;
+    # o backtest com origem móvel mede o erro sem vazamento temporal.
+    print("\n🧪 PASSO 4.5: Backtest temporal (rolling origin)...")
+    # Com vários medidores, o backtest usa a série do primeiro medidor
+    backtest_df = df if GROUP_COLUMN not in df.columns else df[df[GROUP_COLUMN] == df[GROUP_COLUMN].min()]
+    # Folds de 1 semana e horizonte recursivo de 24h, em passos da resolução
+    backtest_report = RollingOriginBacktester(
+        n_folds=5, test_size=resolution_steps('168h', resolution),
+        horizon=resolution_steps('24h', resolution), fast=True, resolution=resolution
+    ).run(backtest_df)
+    print_report(backtest_report)
+    
     # === PASSO 5: VISUALIZAÇÕES ===
     print("\n📊 PASSO 5: Gerando visualizações...")
     os.makedirs('src/model/saved_models', exist_ok=True)
@@ -272,8 +332,16 @@ def main():
     # Salvar configuração
     config = {
         'model_type': model_type,
+        'resolution': resolution,
+        'feature_spec_version': FEATURE_SPEC_VERSION,
+        'gaps': gaps,
         'model_info': model.get_model_info(),
         'metrics': {k: float(v) for k, v in metrics.items()},
+        'backtest': {
+            'overall': backtest_report['overall'],
+            'folds': backtest_report['folds'],
+            'by_horizon': backtest_report['by_horizon']
+        },
         'all_models_comparison': {
             k: {
                 'mae': float(v['test_mae']),
@@ -296,10 +364,22 @@ def main():
     print("  • src/model/saved_models/scaler_features.pkl")
     print("  • src/model/saved_models/scaler_target.pkl")
     print("  • src/model/saved_models/feature_columns.pkl")
+    print("  • src/model/saved_models/feature_spec_version.pkl")
     print("  • src/model/saved_models/model_config.json")
+    print("  • src/model/saved_models/drift_reference.json")
     print("  • src/model/saved_models/predictions.png")
     print("\n🚀 Próximo passo: Execute o backend com 'python src/backend/main.py'")
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Treinamento do modelo de regressão")
+    parser.add_argument("--meters-dir", default=None,
+                        help="Dataset multi-medidor em shards (ex.: data/raw/synthetic_meters)")
+    parser.add_argument("--max-meters", type=int, default=None)
+    parser.add_argument("--resolution", default=DEFAULT_RESOLUTION, choices=SUPPORTED_RESOLUTIONS,
+                        help="Resolução do dataset principal (gerado por process_uci_dataset.py --resolution)")
+    args = parser.parse_args()
+    
+    main(meters_dir=args.meters_dir, max_meters=args.max_meters, resolution=args.resolution)
@@ -0,0 +1,175 @@
+"""
+LEITORES DO FORMATO UCI (HOUSEHOLD POWER CONSUMPTION)
+Leitura em blocos e agregação por intervalo das leituras por minuto no
+formato do dataset UCI ("Date;Time;Global_active_power;...").
+
+Compartilhado por data/process_uci_dataset.py (processamento completo) e
+src/model/ingest.py (ingestão incremental). Os agregados parciais são
+somas e contagens, de modo que blocos que dividem o mesmo intervalo podem
+ser combinados depois (merge_aggregates).
+"""
+
+import io
+import os
+import sys
+import zipfile
+from contextlib import ExitStack, contextmanager
+
+import numpy as np
+import pandas as pd
+
+# Adicionar path do projeto
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.model.feature_spec import DEFAULT_RESOLUTION, resolution_steps
+
+
+UCI_COLUMNS = ['Date', 'Time', 'Global_active_power', 'Global_reactive_power', 'Voltage',
+               'Global_intensity', 'Sub_metering_1', 'Sub_metering_2', 'Sub_metering_3']
+MEASUREMENT_COLUMNS = UCI_COLUMNS[2:]
+
+# Colunas cuja média horária é calculada (demais sub-medições são somadas)
+MEAN_COLUMNS = ['Voltage', 'Global_intensity']
+SUM_COLUMNS = ['Sub_metering_1', 'Sub_metering_2', 'Sub_metering_3']
+
+# Tamanho dos blocos enviados aos workers
+DEFAULT_CHUNK_BYTES = 16 * 1024 * 1024
+
+# Temperatura base por mês (França - hemisfério norte), índice = mês
+MONTH_TEMP_BASE = np.array([np.nan, 4, 6, 10, 13, 17, 20, 22, 22, 18, 14, 9, 5], dtype=float)
+
+# Feriados franceses principais (mês, dia)
+FRENCH_HOLIDAYS = [
+    (1, 1),   # Ano Novo
+    (5, 1),   # Dia do Trabalho
+    (7, 14),  # Dia da Bastilha
+    (8, 15),  # Assunção
+    (11, 1),  # Dia de Todos os Santos
+    (11, 11), # Armistício
+    (12, 25)  # Natal
+]
+
+
+@contextmanager
+def open_source(input_path):
+    """
+    Abre o .txt ou o membro .txt dentro do .zip como stream binário.
+
+    Usado como context manager: ao sair, fecha o membro e o próprio .zip.
+    """
+    with ExitStack() as stack:
+        if input_path.endswith('.zip'):
+            archive = stack.enter_context(zipfile.ZipFile(input_path))
+            member = next(name for name in archive.namelist() if name.endswith('.txt'))
+            yield stack.enter_context(archive.open(member))
+        else:
+            yield stack.enter_context(open(input_path, 'rb'))
+
+
+def iter_blocks(stream, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Divide o stream em blocos que terminam em linha completa.
+
+    O cabeçalho é removido do primeiro bloco.
+    """
+    header_skipped = False
+    remainder = b''
+    while True:
+        data = stream.read(chunk_bytes)
+        if not data:
+            break
+        data = remainder + data
+        cut = data.rfind(b'\n')
+        if cut < 0:
+            remainder = data
+            continue
+        block, remainder = data[:cut + 1], data[cut + 1:]
+        if not header_skipped:
+            block = block[block.find(b'\n') + 1:]
+            header_skipped = True
+        if block:
+            yield block
+    if remainder.strip() and header_skipped:
+        yield remainder
+
+
+def aggregate_block(block, resolution=DEFAULT_RESOLUTION):
+    """
+    Interpreta um bloco de linhas por minuto e retorna agregados parciais
+    por intervalo da resolução.
+
+    Somas e contagens (em vez de médias) permitem combinar blocos que
+    dividem o mesmo intervalo.
+    """
+    df = pd.read_csv(
+        io.BytesIO(block), sep=';', header=None, names=UCI_COLUMNS,
+        na_values=['?'], dtype={'Date': 'category', 'Time': 'category',
+                                **{c: 'float32' for c in MEASUREMENT_COLUMNS}}
+    )
+
+    # Mantém apenas minutos com a medição principal
+    df = df[df['Global_active_power'].notna()]
+    if df.empty:
+        return pd.DataFrame()
+
+    # Datas repetem ~1440 vezes: converter só as categorias (formato fixo)
+    dates = pd.to_datetime(df['Date'].cat.categories, format='%d/%m/%Y')
+    day = dates.values[df['Date'].cat.codes.to_numpy()]
+    # Horários também repetem (1440 valores): interpretar só as categorias
+    times = df['Time'].cat.categories.str
+    minutes = times.slice(0, 2).astype('int64').to_numpy() * 60 + times.slice(3, 5).astype('int64').to_numpy()
+    minute_of_day = minutes[df['Time'].cat.codes.to_numpy()]
+    step = resolution_steps(resolution, '1min')
+    timestamp = day + (minute_of_day // step * step).astype('timedelta64[m]')
+
+    parts = {
+        'n': np.ones(len(df)),
+        'Global_active_power': df['Global_active_power'].to_numpy(dtype=float),
+    }
+    for col in MEAN_COLUMNS:
+        values = df[col].to_numpy(dtype=float)
+        valid = np.isfinite(values)
+        parts[f'{col}_sum'] = np.where(valid, values, 0.0)
+        parts[f'{col}_count'] = valid.astype(float)
+    for col in SUM_COLUMNS:
+        parts[col] = np.nan_to_num(df[col].to_numpy(dtype=float))
+
+    return pd.DataFrame(parts, index=pd.DatetimeIndex(timestamp, name='timestamp')).groupby(level=0).sum()
+
+
+def merge_aggregates(partials):
+    """Combina os agregados parciais e calcula as médias por intervalo."""
+    totals = pd.concat([p for p in partials if len(p)]).groupby(level=0).sum().sort_index()
+
+    hourly = pd.DataFrame(index=totals.index)
+    hourly['Global_active_power'] = totals['Global_active_power'] / totals['n']
+    for col in MEAN_COLUMNS:
+        # Minutos sem a medição recebem a média global (mesma regra de antes)
+        count = totals[f'{col}_count']
+        fill = totals[f'{col}_sum'].sum() / count.sum() if count.sum() > 0 else 0.0
+        hourly[col] = (totals[f'{col}_sum'] + (totals['n'] - count) * fill) / totals['n']
+    for col in SUM_COLUMNS:
+        hourly[col] = totals[col]
+
+    return hourly.reset_index(), int(totals['n'].sum())
+
+
+def simulate_temperature(timestamps, seed=42):
+    """
+    Temperatura sintética vetorizada: base mensal + ciclo diário + ruído.
+
+    O gerador é semeado para que o dataset seja reproduzível.
+    """
+    rng = np.random.default_rng(seed)
+    base = MONTH_TEMP_BASE[timestamps.dt.month.to_numpy()]
+    daily_variation = np.sin((timestamps.dt.hour.to_numpy() - 6) * np.pi / 12) * 4
+    return base + daily_variation + rng.normal(0, 2, len(timestamps))
+
+
+def holiday_flags(timestamps):
+    """Marca feriados franceses fixos (vetorizado)."""
+    keys = timestamps.dt.month.to_numpy() * 100 + timestamps.dt.day.to_numpy()
+    holidays = [month * 100 + day for month, day in FRENCH_HOLIDAYS]
+    return np.isin(keys, holidays).astype(int)
@@ -0,0 +1,72 @@
+"""
+TESTES UNITÁRIOS - ANÁLISE DE SÉRIES TEMPORAIS
+Autocorrelação/periodograma via FFT, decomposição e tendência.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.backend.utils.export import DataAnalyzer
+
+
+@pytest.fixture(scope="module")
+def seasonal():
+    """Dez semanas horárias: ciclo diário, fim de semana mais alto e tendência."""
+    rng = np.random.default_rng(3)
+    index = pd.date_range('2010-01-04', periods=24 * 7 * 10, freq='h')
+    days = np.arange(len(index)) / 24
+    consumption = (1.0 + 0.01 * days
+                   + 0.5 * np.sin(2 * np.pi * index.hour.to_numpy() / 24)
+                   + 0.4 * (index.dayofweek.to_numpy() >= 5)
+                   + rng.normal(0, 0.1, len(index)))
+    df = pd.DataFrame({'timestamp': index, 'consumption_kwh': consumption})
+    # Lacuna de um dia inteiro
+    return df.drop(df.index[500:524]).reset_index(drop=True)
+
+
+class TestDataAnalyzer:
+    """Analytics vetorizadas de DataAnalyzer."""
+
+    def test_autocorrelation_matches_direct_sum(self):
+        """Testa se a ACF via FFT com lacunas bate com a soma direta."""
+        values = np.random.default_rng(0).normal(size=2000)
+        values[300:340] = np.nan
+        acf = DataAnalyzer.autocorrelation(values, 30)
+
+        mask = np.isfinite(values)
+        centered = np.where(mask, values - values[mask].mean(), 0.0)
+        direct = np.array([
+            (centered[:len(values) - k] * centered[k:]).sum() / (mask[:len(values) - k] & mask[k:]).sum()
+            for k in range(31)
+        ])
+        np.testing.assert_allclose(acf, direct / direct[0], atol=1e-12)
+
+    def test_analysis_recovers_seasonality_and_trend(self, seasonal):
+        """Testa se sazonalidades de 24h/168h e a inclinação são detectadas."""
+        analysis = DataAnalyzer.analyze_time_series(seasonal, 'consumption_kwh')
+
+        assert analysis['grid']['missing'] == 24
+        assert analysis['seasonality']['confirmed_24h']
+        assert analysis['seasonality']['confirmed_168h']
+        assert any(abs(p['period_hours'] - 24) < 0.5 for p in analysis['seasonality']['dominant_periods'])
+        assert analysis['trend'] == 'increasing'
+        assert analysis['trend_estimates']['slope_kwh_per_day'] == pytest.approx(0.01, abs=0.003)
+
+        profile = np.array(analysis['decomposition']['profile'])
+        assert len(profile) == 168
+        # Slots de sábado/domingo (120-167) acima dos dias úteis
+        assert profile[120:].mean() - profile[:120].mean() == pytest.approx(0.4, abs=0.05)
+        assert analysis['decomposition']['seasonal_strength'] > 0.8
+
+    def test_without_timestamp_keeps_basic_stats(self):
+        """Testa se, sem timestamp, a análise continua só com as estatísticas básicas."""
+        analysis = DataAnalyzer.analyze_time_series(pd.DataFrame({'v': [1.0, 2.0, 3.0]}), 'v')
+
+        assert analysis['basic_stats']['count'] == 3
+        assert 'seasonality' not in analysis
@@ -0,0 +1,82 @@
+"""
+TESTES UNITÁRIOS - DETECÇÃO DE ANOMALIAS
+Paridade entre o modo em lote e o streaming e sensibilidade dos detectores.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.backend.core.anomaly import StreamingAnomalyDetector, zscore_outliers
+from src.backend.utils.validators import DataValidator
+
+
+@pytest.fixture(scope="module")
+def series():
+    """Oito semanas horárias com ciclo diário, ruído e previsões."""
+    rng = np.random.default_rng(7)
+    index = pd.date_range('2010-01-04', periods=24 * 7 * 8, freq='h')
+    hour = index.hour.to_numpy()
+    consumption = 1.0 + 0.8 * np.sin(2 * np.pi * hour / 24) ** 2 + rng.normal(0, 0.05, len(index))
+    return pd.DataFrame({
+        'timestamp': index,
+        'consumption_kwh': consumption,
+        'predicted_kwh': consumption + rng.normal(0, 0.05, len(index)),
+    })
+
+
+class TestStreamingAnomalyDetector:
+    """Detectores em lote (histórico) e em streaming (uma leitura por vez)."""
+
+    def test_stream_matches_batch(self, series):
+        """Testa se update() após score_history() reproduz o lote no histórico completo."""
+        batch = StreamingAnomalyDetector().score_history(series, prediction_column='predicted_kwh')
+
+        detector = StreamingAnomalyDetector()
+        detector.score_history(series.iloc[:800], prediction_column='predicted_kwh')
+        streamed = [
+            detector.update(row.timestamp, row.consumption_kwh, row.predicted_kwh)
+            for row in series.iloc[800:].itertuples()
+        ]
+
+        for column in ('robust_z', 'ewma_z', 'residual_z'):
+            expected = batch[column].to_numpy()[800:]
+            actual = np.array([np.nan if r[column] is None else r[column] for r in streamed])
+            np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9)
+        assert [r['is_anomaly'] for r in streamed] == batch['is_anomaly'].tolist()[800:]
+
+    def test_spike_flagged_but_not_daily_cycle(self, series):
+        """Testa se um pico isolado é sinalizado e o ciclo diário não."""
+        detector = StreamingAnomalyDetector()
+        scored = detector.score_history(series)
+        assert scored['is_anomaly'].mean() < 0.02
+
+        last = series['timestamp'].iloc[-1]
+        normal = series['consumption_kwh'].iloc[-24 * 7 + 1]
+        assert not detector.update(last + pd.Timedelta(hours=1), normal)['is_anomaly']
+        spike = detector.update(last + pd.Timedelta(hours=2), 10.0)
+        assert spike['is_anomaly']
+        assert 'robust' in spike['detectors']
+
+    def test_repeated_reading_does_not_change_state(self, series):
+        """Testa se leituras já vistas são pontuadas sem alterar o estado."""
+        detector = StreamingAnomalyDetector()
+        detector.score_history(series)
+        row = series.iloc[-1]
+
+        first = detector.update(row['timestamp'], 10.0)
+        again = detector.update(row['timestamp'], 10.0)
+        assert first == again
+
+    def test_zscore_helpers_agree(self):
+        """Testa se o validador usa o mesmo z-score global."""
+        values = np.r_[np.ones(50), 1.1 * np.ones(50), 20.0]
+
+        indices, _ = zscore_outliers(values)
+        assert indices == [100]
+        assert DataValidator.detect_anomalies(values.tolist()) == [100]
@@ -68,5 +68,264 @@ class TestModelInfoEndpoint:
         assert "status" in data
 
 
+
+class TestStatsAnalysisEndpoint:
+    """Testes para o endpoint de análise da série."""
+    
+    def test_analysis_is_cached_per_fingerprint(self, monkeypatch):
+        """Testa se a segunda chamada reutiliza a análise do mesmo dataset."""
+        from src.backend.utils.export import DataAnalyzer
+        
+        calls = []
+        analyze = DataAnalyzer.analyze_time_series
+        monkeypatch.setattr(DataAnalyzer, 'analyze_time_series',
+                            staticmethod(lambda *a, **k: calls.append(1) or analyze(*a, **k)))
+        
+        first = client.get("/stats/analysis")
+        second = client.get("/stats/analysis")
+        assert first.status_code == 200
+        assert second.json() == first.json()
+        assert len(calls) <= 1
+        assert "seasonality" in first.json()
+
+
+class FakePredictor:
+    """Preditor mínimo que conta as linhas enviadas ao modelo."""
+    
+    model_version = 'v1'
+    resolution = '1h'
+    drift_monitor = None
+    
+    def __init__(self):
+        self.rows = 0
+    
+    def is_ready(self):
+        return True
+    
+    def predict_rows(self, data_list, histories=None):
+        self.rows += len(data_list)
+        return [row['temperature_celsius'] / 10 for row in data_list]
+    
+    def predict_single(self, data, history=None):
+        return self.predict_rows([data])[0]
+
+
+PREDICTION = {
+    "temperature_celsius": 25.04, "hour": 14, "day_of_week": 2, "month": 6,
+    "is_weekend": 0, "is_holiday": 0, "consumption_lag_1h": 1.2,
+    "consumption_lag_24h": 1.1, "consumption_lag_168h": 1.0,
+    "consumption_rolling_mean_24h": 1.15, "consumption_rolling_std_24h": 0.2
+}
+
+
+class TestPredictionCache:
+    """Testes para o cache de /predict e /predict/batch."""
+    
+    @pytest.fixture
+    def predictor(self, monkeypatch):
+        from src.backend.api import routes
+        from src.backend.core.cache import cache
+        
+        fake = FakePredictor()
+        monkeypatch.setattr(routes, '_predictor', fake)
+        monkeypatch.setitem(routes.settings.PREDICTION_CACHE_QUANTA, 'temperature_celsius', 0.5)
+        cache.clear()
+        yield fake
+        cache.clear()
+    
+    def test_repeated_prediction_is_cached(self, predictor):
+        """Testa se a mesma entrada (após arredondamento) não volta ao modelo."""
+        first = client.post("/predict", json=PREDICTION)
+        second = client.post("/predict", json={**PREDICTION, "temperature_celsius": 24.9})
+        
+        assert first.status_code == 200
+        assert predictor.rows == 1
+        assert second.json()["predicted_consumption_kwh"] == first.json()["predicted_consumption_kwh"] == 2.5
+    
+    def test_model_version_is_part_of_key(self, predictor):
+        """Testa se um novo modelo não reutiliza previsões antigas."""
+        client.post("/predict", json=PREDICTION)
+        predictor.model_version = 'v2'
+        client.post("/predict", json=PREDICTION)
+        
+        assert predictor.rows == 2
+    
+    def test_batch_sends_only_misses(self, predictor):
+        """Testa se o lote serve linhas do cache e envia só as demais ao modelo."""
+        client.post("/predict", json=PREDICTION)
+        batch = [PREDICTION, {**PREDICTION, "temperature_celsius": 30.0}, {**PREDICTION, "hour": 3}]
+        response = client.post("/predict/batch", json={"data": batch})
+        
+        assert response.status_code == 200
+        assert predictor.rows == 1 + 2
+        assert [p["predicted_consumption_kwh"] for p in response.json()["predictions"]] == [2.5, 3.0, 2.5]
+
+
+class TestForecastCache:
+    """Testes para o cache de /forecast servido por prefixo."""
+    
+    @pytest.fixture
+    def predictor(self, monkeypatch, tmp_path):
+        import pandas as pd
+        from src.backend.api import routes
+        from src.backend.core.cache import cache
+        
+        from src.backend.core.history import HistoryStore
+        
+        data_path = tmp_path / "energy.csv"
+        data_path.write_text("timestamp,consumption_kwh\n2024-01-01 00:00:00,1.0\n")
+        
+        fake = FakePredictor()
+        fake.horizons = []
+        
+        def predict_next_hours(historical_data, hours=24):
+            fake.horizons.append(hours)
+            start = historical_data['timestamp'].iloc[-1]
+            return [{'timestamp': (start + pd.Timedelta(hours=i + 1)).isoformat(),
+                     'predicted_consumption': float(i)} for i in range(hours)]
+        
+        fake.predict_next_hours = predict_next_hours
+        monkeypatch.setattr(routes, '_predictor', fake)
+        store = HistoryStore(str(data_path), check_interval=0)
+        monkeypatch.setattr(routes, '_history_store', store)
+        cache.clear()
+        yield fake, store
+        cache.clear()
+    
+    def test_shorter_horizons_are_prefix_slices(self, predictor):
+        """Testa se 24h após 168h vem do cache como prefixo."""
+        fake, _ = predictor
+        long = client.post("/forecast", json={"hours_ahead": 168}).json()
+        short = client.post("/forecast", json={"hours_ahead": 24}).json()
+        
+        assert fake.horizons == [168]
+        assert short["forecasts"] == long["forecasts"][:24]
+        assert short["end_time"] == long["forecasts"][23]["timestamp"]
+    
+    def test_longer_horizon_and_new_data_recompute(self, predictor, monkeypatch):
+        """Testa se um horizonte maior ou um dataset alterado recalculam a previsão."""
+        from src.backend.core.config import settings
+        
+        fake, store = predictor
+        monkeypatch.setattr(settings, 'FORECAST_SCHEDULER_ENABLED', False)
+        client.post("/forecast", json={"hours_ahead": 12})
+        client.post("/forecast", json={"hours_ahead": 48})
+        client.post("/forecast", json={"hours_ahead": 48})
+        with open(store.path, "a") as f:
+            f.write("2024-01-01 01:00:00,2.0\n")
+        store.refresh(wait=True)
+        short = client.post("/forecast", json={"hours_ahead": 6}).json()
+        assert short["start_time"] == "2024-01-01T02:00:00"
+        fake.model_version = 'v2'
+        client.post("/forecast", json={"hours_ahead": 6})
+        
+        assert fake.horizons == [24, 48, 24, 24]
+    
+    def test_stale_refresh_keeps_precomputed_horizon(self, predictor, monkeypatch):
+        """Testa se um pedido curto sobre a entrada vencida não encurta o horizonte pré-calculado."""
+        import time
+        from src.backend.api import routes
+        from src.backend.core.config import settings
+        from src.backend.core.singleflight import single_flight
+        
+        fake, _ = predictor
+        routes.precompute_forecasts(meter_ids=[], hours=168)
+        # Entrada vencida, ainda na janela stale; sem expiração antecipada
+        now = time.time() + settings.FORECAST_CACHE_TTL + 1
+        monkeypatch.setattr(single_flight, '_clock', lambda: now)
+        monkeypatch.setattr(single_flight, '_rand', lambda: 0.0)
+        
+        short = client.post("/forecast", json={"hours_ahead": 24}).json()
+        assert len(short["forecasts"]) == 24
+        deadline = time.time() + 5
+        while single_flight._inflight and time.time() < deadline:
+            time.sleep(0.01)
+        long = client.post("/forecast", json={"hours_ahead": 168}).json()
+        
+        assert len(long["forecasts"]) == 168
+        assert fake.horizons == [168, 168]
+    
+    def test_conditional_get_skips_predictor(self, predictor, monkeypatch):
+        """Testa se GET /forecast com ETag atual recebe 304 sem consultar o preditor."""
+        fake, store = predictor
+        calls = []
+        monkeypatch.setattr(fake, 'is_ready', lambda: calls.append(1) or True, raising=False)
+        # Mesmo formato de EnergyPredictor.model_version (tamanho-mtime_ns)
+        fake.model_version = f"a-{1_700_000_000 * 10**9:x}"
+        
+        first = client.get("/forecast", params={"hours_ahead": 24})
+        assert first.status_code == 200 and len(first.json()["forecasts"]) == 24
+        etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+        assert "must-revalidate" in first.headers["cache-control"]
+        # generated_at muda a cada recálculo: o validador é fraco
+        assert etag.startswith('W/"')
+        calls.clear()
+        
+        assert client.get("/forecast", params={"hours_ahead": 24},
+                          headers={"If-None-Match": etag}).status_code == 304
+        assert client.get("/forecast", params={"hours_ahead": 24},
+                          headers={"If-Modified-Since": last_modified}).status_code == 304
+        assert calls == [] and fake.horizons == [168]
+        
+        # Outro horizonte ou novos dados mudam o ETag
+        assert client.get("/forecast", params={"hours_ahead": 12},
+                          headers={"If-None-Match": etag}).status_code == 200
+        with open(store.path, "a") as f:
+            f.write("2024-01-01 01:00:00,2.0\n")
+        store.refresh(wait=True)
+        assert client.get("/forecast", params={"hours_ahead": 24},
+                          headers={"If-None-Match": etag}).status_code == 200
+    
+    def test_stats_not_modified(self, predictor):
+        """Testa se /stats responde 304 ao ETag da versão atual do dataset."""
+        response = client.get("/stats")
+        assert response.status_code == 200
+        assert response.json()["total_records"] == 1
+        
+        again = client.get("/stats", headers={"If-None-Match": response.headers["etag"]})
+        assert again.status_code == 304 and again.content == b""
+    
+    def test_precomputed_forecast_is_a_lookup(self, predictor):
+        """Testa se, após o pré-cálculo, /forecast só lê o cache e informa quando foi gerada."""
+        from src.backend.api.routes import precompute_forecasts
+        
+        fake, _ = predictor
+        summary = precompute_forecasts(meter_ids=[], hours=168)
+        assert fake.horizons == [168]
+        assert precompute_forecasts(meter_ids=[], hours=168)['main']['compute_seconds'] is None
+        
+        response = client.post("/forecast", json={"hours_ahead": 72}).json()
+        assert fake.horizons == [168]
+        assert len(response["forecasts"]) == 72
+        assert response["generated_at"] == summary['main']['generated_at']
+
+class TestConditionalRequests:
+    """Testes de ETag/304 nos endpoints de leitura."""
+    
+    def test_model_info_not_modified_skips_predictor(self, monkeypatch):
+        """Testa se /model/info com ETag atual recebe 304 sem consultar o preditor."""
+        from src.backend.api import routes
+        
+        fake = FakePredictor()
+        calls = []
+        fake.get_model_info = lambda: calls.append(1) or {'status': 'ready', 'model_version': 'v1'}
+        monkeypatch.setattr(routes, '_predictor', fake)
+        
+        first = client.get("/model/info")
+        assert first.status_code == 200 and calls == [1]
+        second = client.get("/model/info", headers={"If-None-Match": f'W/{first.headers["etag"]}'})
+        assert second.status_code == 304 and calls == [1]
+        assert second.headers["etag"] == first.headers["etag"]
+        
+        fake.model_version = 'v2'
+        assert client.get("/model/info", headers={"If-None-Match": first.headers["etag"]}).status_code == 200
+    
+    def test_root_etag(self):
+        """Testa o 304 do endpoint raiz."""
+        first = client.get("/")
+        assert "max-age" in first.headers["cache-control"]
+        assert client.get("/", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
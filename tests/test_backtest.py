@@ -0,0 +1,60 @@
+"""
+TESTES UNITÁRIOS - BACKTEST TEMPORAL
+Valida a geração de folds e o relatório do backtest.
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+from sklearn.tree import DecisionTreeRegressor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.model.backtest import RollingOriginBacktester
+from src.model.preprocessing import EnergyDataPreprocessor
+
+DATASET = os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'energy_consumption.csv')
+
+
+class TestFolds:
+    """Testes para a geração de folds."""
+
+    def test_expanding_folds_never_overlap_test(self):
+        """Testa se o treino sempre termina antes do teste."""
+        folds = RollingOriginBacktester(n_folds=3, test_size=10).split(100)
+        assert folds == [(0, 70, 70, 80), (0, 80, 80, 90), (0, 90, 90, 100)]
+
+    def test_sliding_folds_keep_window_size(self):
+        """Testa se a janela deslizante mantém o tamanho do treino."""
+        folds = RollingOriginBacktester(n_folds=2, test_size=10, mode='sliding', train_size=30).split(100)
+        assert folds == [(50, 80, 80, 90), (60, 90, 90, 100)]
+
+    def test_insufficient_data_raises(self):
+        """Testa se dados insuficientes geram erro."""
+        with pytest.raises(ValueError):
+            RollingOriginBacktester(n_folds=5, test_size=30).split(100)
+
+
+class TestReport:
+    """Testes para o relatório do backtest."""
+
+    def test_report_has_fold_horizon_and_hour_metrics(self):
+        """Testa se o relatório traz métricas por fold, horizonte e hora."""
+        df = pd.read_csv(DATASET, nrows=800)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        frame = EnergyDataPreprocessor(use_scaler=None).engineer_features(df)
+
+        report = RollingOriginBacktester(
+            n_folds=2, test_size=48, horizon=12, n_jobs=1,
+            model_factory=lambda: DecisionTreeRegressor(max_depth=4, random_state=0)
+        ).run(frame)
+
+        assert len(report['folds']) == 2
+        assert len(report['by_horizon']) == 12
+        # Origens a cada 3 passos (12 // 4): 13 por fold de 48 passos
+        assert report['recursive_origins'] == 26
+        assert all(entry['n'] == 26 for entry in report['by_horizon'])
+        assert len(report['by_hour']) == 24
+        assert report['overall']['n'] == 96
@@ -0,0 +1,224 @@
+"""
+TESTES UNITÁRIOS - CACHE
+LRU limitado, expiração por heap com relógio monotônico, contadores e
+backends compartilhados (SQLite e um servidor RESP local no lugar do Redis).
+"""
+
+import fnmatch
+import os
+import socketserver
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.backend.core.cache import CacheManager
+from src.backend.core.cache_backends import RedisBackend, SQLiteBackend
+
+
+class FakeClock:
+    """Relógio controlado pelo teste."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCacheManager:
+    """Orçamento, expiração e estatísticas do CacheManager."""
+
+    def test_lru_eviction_by_entries(self):
+        """Testa se, acima do limite, a entrada menos usada é despejada."""
+        cache = CacheManager(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1  # 'b' passa a ser a menos usada
+        cache.set('c', 3)
+
+        assert 'b' not in cache
+        assert cache.get('a') == 1 and cache.get('c') == 3
+        assert cache.get_stats()['evictions'] == 1
+
+    def test_byte_budget(self):
+        """Testa se o orçamento de bytes limita o cache e rejeita valores grandes demais."""
+        cache = CacheManager(max_entries=100, max_bytes=10_000)
+        for i in range(10):
+            cache.set(i, np.zeros(250))  # ~2 KB cada
+
+        stats = cache.get_stats()
+        assert stats['bytes'] <= 10_000
+        assert stats['total_entries'] == 4
+        assert 9 in cache and 0 not in cache
+
+        cache.set('huge', np.zeros(10_000))
+        assert 'huge' not in cache
+
+    def test_ttl_expiry_with_monotonic_clock(self):
+        """Testa se entradas vencem pelo relógio, inclusive após sobrescrita."""
+        clock = FakeClock()
+        cache = CacheManager(default_ttl=10, clock=clock)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=30)
+        cache.set('a', 3, ttl=60)  # sobrescrita: o vencimento antigo é ignorado
+
+        clock.now = 20
+        assert cache.get('a') == 3
+        assert cache.get('b') == 2
+        clock.now = 40
+        assert cache.get('b') is None
+        clock.now = 61
+        assert 'a' not in cache
+        assert cache.get_stats()['expirations'] == 2
+
+    def test_counters_and_cached_none(self):
+        """Testa hits/misses e que None armazenado não recomputa."""
+        cache = CacheManager()
+        calls = []
+        compute = lambda: calls.append(1)  # retorna None
+
+        cache.get_or_compute({'x': 1}, compute)
+        cache.get_or_compute({'x': 1}, compute)
+
+        stats = cache.get_stats()
+        assert len(calls) == 1
+        assert (stats['hits'], stats['misses']) == (1, 1)
+        assert stats['hit_rate'] == 0.5
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    """Subconjunto do protocolo Redis: SET PX, MGET, DEL, SCAN e DBSIZE."""
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def bulk(self, value):
+        return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            command = args[0].upper()
+            self.server.commands.append(command)
+            now = time.time()
+            live = lambda k: k in store and store[k][1] > now
+            if command == b'SET':
+                store[args[1]] = (args[2], now + int(args[4]) / 1000)
+                reply = b'+OK\r\n'
+            elif command == b'MGET':
+                values = [store[k][0] if live(k) else None for k in args[1:]]
+                reply = b'*%d\r\n' % len(values) + b''.join(self.bulk(v) for v in values)
+            elif command == b'DEL':
+                reply = b':%d\r\n' % sum(store.pop(k, None) is not None for k in args[1:])
+            elif command == b'SCAN':
+                keys = [k for k in store if live(k) and fnmatch.fnmatchcase(k, args[3])]
+                reply = b'*2\r\n$1\r\n0\r\n*%d\r\n' % len(keys) + b''.join(self.bulk(k) for k in keys)
+            elif command == b'DBSIZE':
+                reply = b':%d\r\n' % sum(live(k) for k in store)
+            else:
+                reply = b'-ERR unknown command\r\n'
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def resp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _RespHandler)
+    server.daemon_threads = True
+    server.store, server.commands = {}, []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestSharedBackends:
+    """Backends compartilhados entre processos com a mesma interface."""
+
+    def test_sqlite_shared_between_instances(self, tmp_path):
+        """Testa se duas instâncias (workers) veem o mesmo arquivo."""
+        path = str(tmp_path / 'cache.sqlite3')
+        writer = CacheManager(backend=SQLiteBackend(path))
+        reader = CacheManager(backend=SQLiteBackend(path))
+        key = ('predict', 'v1', None, 20.5, 18)
+        writer.set(key, {'kwh': np.float32(1.5)})
+
+        assert reader.get(key) == {'kwh': 1.5}
+        assert reader.get_many([key, ('outra',)], default='x') == [{'kwh': 1.5}, 'x']
+        assert reader.get_stats()['hits'] == 2 and reader.get_stats()['misses'] == 1
+        assert writer.delete(key) and key not in reader
+
+    def test_sqlite_expiry_and_entry_limit(self, tmp_path):
+        """Testa vencimento pelo relógio e limite de entradas."""
+        clock = FakeClock()
+        backend = SQLiteBackend(str(tmp_path / 'cache.sqlite3'), max_entries=3, purge_every=1, clock=clock)
+        cache = CacheManager(default_ttl=10, backend=backend)
+        for i in range(5):
+            cache.set(i, i, ttl=10 + i)
+
+        stats = cache.get_stats()
+        assert stats['backend'] == 'sqlite'
+        assert stats['total_entries'] == 3 and stats['evictions'] == 2
+        clock.now = 12.5
+        assert cache.get_many([2, 3, 4]) == [None, 3, 4]
+
+    def test_redis_protocol_batch(self, resp_server):
+        """Testa MGET em lote e SET em pipeline contra um servidor RESP local."""
+        host, port = resp_server.server_address
+        cache = CacheManager(backend=RedisBackend(f'redis://{host}:{port}/0', prefix='t:'))
+        cache.set_many({('a', 1): [1, 2], ('b', 2.5): None}, ttl=60)
+        resp_server.commands.clear()
+
+        assert cache.get_many([('a', 1), ('b', 2.5), ('c',)], default='x') == [[1, 2], None, 'x']
+        assert resp_server.commands == [b'MGET']
+        assert len(cache) == 2
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.get_stats()['hits'] == 2
+
+    def test_stats_do_not_scan_on_every_call(self, resp_server, tmp_path):
+        """Testa se stats()/len() reaproveitam a contagem em vez de varrer o backend a cada chamada."""
+        host, port = resp_server.server_address
+        scanned = CacheManager(backend=RedisBackend(f'redis://{host}:{port}/0', prefix='t:'))
+        scanned.set_many({'a': 1, 'b': 2}, ttl=60)
+        resp_server.commands.clear()
+        for _ in range(3):
+            assert scanned.get_stats()['total_entries'] == 2
+        assert resp_server.commands == [b'SCAN']
+
+        dedicated = CacheManager(backend=RedisBackend(f'redis://{host}:{port}/0', dedicated_db=True))
+        resp_server.commands.clear()
+        assert len(dedicated) == 2
+        assert resp_server.commands == [b'DBSIZE']
+
+        clock = FakeClock()
+        backend = SQLiteBackend(str(tmp_path / 'cache.sqlite3'), clock=clock, count_interval=30)
+        sqlite_cache = CacheManager(backend=backend)
+        sqlite_cache.set_many({'a': 1, 'b': 2}, ttl=60)
+        assert len(sqlite_cache) == 2
+        # Gravação de outro processo: só aparece na próxima contagem
+        SQLiteBackend(backend.path, clock=clock).set_many({'c': 3}, ttl=60)
+        assert len(sqlite_cache) == 2
+        clock.now = 31
+        assert len(sqlite_cache) == 3
+
+    def test_redis_unavailable_degrades_to_miss(self):
+        """Testa se um servidor fora do ar resulta em ausência, sem erro."""
+        cache = CacheManager(backend=RedisBackend('redis://127.0.0.1:1/0', timeout=0.2))
+        cache.set('a', 1)
+        assert cache.get('a', 'miss') == 'miss'
+        assert cache.backend.errors == 2
@@ -0,0 +1,96 @@
+"""
+TESTES UNITÁRIOS - SNAPSHOT DO CACHE
+Gravação e recarga com TTL descontado, invalidação por versão do modelo
+ou do dataset e medição da recuperação da taxa de acerto.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.backend.core.cache import CacheManager
+from src.backend.core.cache_snapshot import WarmRestart, load_snapshot, save_snapshot
+
+
+class FakeClock:
+    """Relógio controlado pelo teste."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+FINGERPRINTS = {'model': 'm1', 'dataset': 'd1'}
+
+
+def filled_cache():
+    cache = CacheManager()
+    cache.set(('predict', 'm1', None, 20.0), 1.5, ttl=100)
+    cache.set(('forecast', 'm1', '1h', None, 'd1'), [1, 2, 3], ttl=100)
+    cache.set(('stats', 'd1'), {'total_records': 10}, ttl=100)
+    cache.set(('stats', 'curto'), {}, ttl=5)
+    cache.get(('stats', 'd1'))
+    cache.get(('ausente',))
+    return cache
+
+
+class TestCacheSnapshot:
+    """Reinício aquecido a partir do arquivo de snapshot."""
+
+    def test_roundtrip_with_adjusted_ttl(self, tmp_path):
+        """Testa se as entradas voltam com o TTL descontado do tempo parado."""
+        path = str(tmp_path / 'cache.bin')
+        wall = FakeClock(1000.0)
+        assert save_snapshot(filled_cache(), path, FINGERPRINTS, clock=wall) == 4
+
+        wall.now += 30
+        clock = FakeClock()
+        restored = CacheManager(clock=clock)
+        report = load_snapshot(restored, path, FINGERPRINTS, clock=wall)
+
+        assert (report['loaded'], report['expired'], report['invalidated']) == (3, 1, 0)
+        assert report['previous_hit_rate'] == 0.5
+        assert restored.get(('stats', 'd1')) == {'total_records': 10}
+        clock.now = 71
+        assert restored.get(('stats', 'd1')) is None
+
+    def test_changed_fingerprints_invalidate_entries(self, tmp_path):
+        """Testa se um novo modelo ou dataset descarta as entradas dependentes."""
+        path = str(tmp_path / 'cache.bin')
+        save_snapshot(filled_cache(), path, FINGERPRINTS)
+
+        restored = CacheManager()
+        report = load_snapshot(restored, path, {'model': 'm2', 'dataset': 'd1'})
+        assert report['invalidated'] == 2
+        assert ('stats', 'd1') in restored and len(restored) == 2
+
+        restored = CacheManager()
+        load_snapshot(restored, path, {'model': 'm1', 'dataset': 'd2'})
+        assert ('predict', 'm1', None, 20.0) in restored
+        assert ('stats', 'd1') not in restored
+
+    def test_missing_or_corrupt_snapshot(self, tmp_path):
+        """Testa se um arquivo ausente ou corrompido resulta em cache frio."""
+        path = tmp_path / 'cache.bin'
+        assert load_snapshot(CacheManager(), str(path), FINGERPRINTS) is None
+        path.write_bytes(b'lixo')
+        assert load_snapshot(CacheManager(), str(path), FINGERPRINTS) is None
+
+    def test_recovery_time(self):
+        """Testa se a recuperação é a primeira janela com taxa >= alvo."""
+        clock = FakeClock()
+        cache = CacheManager()
+        cache.warm_restart = WarmRestart(0.8, window=10, ratio=0.9, clock=clock)
+        cache.set('k', 1)
+
+        for _ in range(10):
+            cache.get('ausente')
+        clock.now = 5.0
+        cache.get_many(['k'] * 8 + ['ausente'] * 2)
+
+        report = cache.get_stats()['warm_restart']
+        assert report['recovered'] and report['recovery_seconds'] == 5.0
+        assert report['lookups_to_recover'] == 20 and report['last_window_hit_rate'] == 0.8
@@ -0,0 +1,60 @@
+"""
+TESTES UNITÁRIOS - FORMATO COLUNAR
+Valida round-trip, projeção, filtro por row group e fallback para CSV.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.model.columnar import read_columnar, read_manifest
+from src.model.preprocessing import read_energy_csv, read_energy_data, write_energy_dataset
+
+DATASET = os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'energy_consumption.csv')
+
+
+def _write_sample(tmp_path, nrows=2000):
+    df = read_energy_csv(DATASET, nrows=nrows)
+    path = str(tmp_path / 'energy.csv')
+    write_energy_dataset(df, path)
+    return df, path
+
+
+class TestColumnar:
+    """Testes para a cópia colunar binária."""
+
+    def test_round_trip_keeps_schema(self, tmp_path):
+        """Testa se a leitura colunar reproduz o CSV com os mesmos tipos."""
+        df, path = _write_sample(tmp_path)
+        result = read_columnar(path)
+
+        assert result['hour'].dtype == 'int8'
+        assert result['consumption_kwh'].dtype == 'float32'
+        np.testing.assert_array_equal(result['consumption_kwh'], df['consumption_kwh'])
+        assert (result['timestamp'] == df['timestamp']).all()
+
+    def test_projection_and_row_group_skipping(self, tmp_path):
+        """Testa se projeção e intervalo batem com o filtro feito no CSV."""
+        df, path = _write_sample(tmp_path)
+        start, end = df['timestamp'].iloc[500], df['timestamp'].iloc[520]
+
+        result = read_columnar(path, columns=['consumption_kwh'], start=start, end=end)
+        expected = read_energy_csv(path, columns=['consumption_kwh'], start=start, end=end)
+
+        assert list(result.columns) == ['timestamp', 'consumption_kwh']
+        assert len(result) == 21
+        np.testing.assert_array_equal(result['consumption_kwh'], expected['consumption_kwh'])
+
+    def test_stale_copy_falls_back_to_csv(self, tmp_path):
+        """Testa se o CSV é usado quando mudou depois da cópia colunar."""
+        df, path = _write_sample(tmp_path, nrows=100)
+        with open(path, 'a') as f:
+            f.write('2030-01-01 00:00:00,1.0,20.0,0,1,1,0,0,240.0,5.0,0.0,0.0,0.0\n')
+
+        assert read_manifest(path) is None
+        assert len(read_energy_data(path)) == 101
+        assert read_energy_data(path)['timestamp'].iloc[-1] == pd.Timestamp('2030-01-01')
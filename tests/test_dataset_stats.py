@@ -0,0 +1,102 @@
+"""
+TESTES UNITÁRIOS - ESTATÍSTICAS INCREMENTAIS DO DATASET
+Momentos, quantis aproximados, quebras por grupo e atualização no append.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.model.dataset_stats import (
+    DatasetStats, QuantileSketch, load_dataset_stats, read_dataset_stats, stats_path
+)
+from src.model.preprocessing import append_energy_dataset, write_energy_dataset
+
+
+def make_frame(start, periods, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=periods, freq='h')
+    return pd.DataFrame({
+        'timestamp': index,
+        'consumption_kwh': rng.lognormal(0, 0.6, periods),
+        'temperature_celsius': rng.normal(15, 8, periods),
+    })
+
+
+class TestDatasetStats:
+    """Estado mesclável comparado com o cálculo direto do pandas."""
+
+    def test_moments_match_pandas(self):
+        """Testa média, desvio, mínimo e máximo contra o pandas."""
+        df = make_frame('2024-01-01', 5000)
+        df.loc[10, 'consumption_kwh'] = np.nan
+        summary = DatasetStats().update(df).summary()
+        consumption = summary['consumption']
+        assert summary['total_records'] == 5000
+        assert consumption['count'] == 4999
+        assert np.isclose(consumption['mean'], df['consumption_kwh'].mean())
+        assert np.isclose(consumption['std'], df['consumption_kwh'].std())
+        assert consumption['min'] == df['consumption_kwh'].min()
+        assert consumption['max'] == df['consumption_kwh'].max()
+        assert summary['date_range']['end'] == str(df['timestamp'].iloc[-1])
+
+    def test_quantiles_within_relative_accuracy(self):
+        """Testa se os quantis do sketch ficam dentro do erro relativo."""
+        values = np.random.default_rng(1).normal(0, 5, 20_000)
+        sketch = QuantileSketch(0.01).update(values)
+        qs = [0.05, 0.5, 0.95]
+        for estimate, exact in zip(sketch.quantiles(qs), np.quantile(values, qs)):
+            assert abs(estimate - exact) <= 0.01 * abs(exact) + 0.05
+
+    def test_merge_equals_single_pass(self):
+        """Testa se atualizar em dois blocos equivale a uma passada única."""
+        df = make_frame('2024-01-01', 3000)
+        whole = DatasetStats().update(df).summary()
+        parts = DatasetStats().update(df.iloc[:1234]).merge(DatasetStats().update(df.iloc[1234:])).summary()
+        assert parts['consumption']['quantiles'] == whole['consumption']['quantiles']
+        assert np.isclose(parts['consumption']['std'], whole['consumption']['std'])
+
+    def test_breakdowns(self):
+        """Testa as quebras por hora, dia da semana e mês."""
+        df = make_frame('2024-01-01', 24 * 60)
+        breakdowns = DatasetStats().update(df).summary()['consumption']['breakdowns']
+        hour = df[df['timestamp'].dt.hour == 18]['consumption_kwh']
+        assert len(breakdowns['hour']) == 24
+        assert breakdowns['hour'][18]['count'] == len(hour)
+        assert np.isclose(breakdowns['hour'][18]['mean'], hour.mean())
+        assert [m['month'] for m in breakdowns['month']][:3] == [1, 2, 3]
+        assert breakdowns['month'][2]['count'] == 0
+        assert sum(d['count'] for d in breakdowns['day_of_week']) == len(df)
+
+
+class TestDatasetStatsFile:
+    """Arquivo de estatísticas ao lado do CSV."""
+
+    def test_append_updates_incrementally(self, tmp_path):
+        """Testa se o append atualiza as estatísticas sem recalcular."""
+        path = str(tmp_path / 'energy.csv')
+        write_energy_dataset(make_frame('2024-01-01', 500), path)
+        assert read_dataset_stats(path).rows == 500
+
+        append_energy_dataset(make_frame('2024-01-21 20:00', 100, seed=2), path)
+        stats = read_dataset_stats(path)
+        assert stats is not None and stats.rows == 600
+
+        rebuilt = DatasetStats().update(pd.read_csv(path, parse_dates=['timestamp']))
+        assert np.isclose(stats.summary()['consumption']['mean'], rebuilt.summary()['consumption']['mean'])
+
+    def test_stale_file_is_rebuilt(self, tmp_path):
+        """Testa se estatísticas desatualizadas são descartadas e recalculadas."""
+        path = str(tmp_path / 'energy.csv')
+        write_energy_dataset(make_frame('2024-01-01', 200), path)
+        make_frame('2024-01-01', 300).to_csv(path, index=False)
+        assert read_dataset_stats(path) is None
+
+        append_energy_dataset(make_frame('2024-01-13 12:00', 10), path)
+        assert not os.path.exists(stats_path(path))
+        assert load_dataset_stats(path).rows == 310
+        assert read_dataset_stats(path).rows == 310
@@ -0,0 +1,85 @@
+"""
+TESTES UNITÁRIOS - MONITORAMENTO DE DRIFT
+Histogramas de bins fixos, PSI/KS e referência salva no treinamento.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.model.drift import (
+    DriftMonitor, bin_counts, build_reference, histogram_edges, load_reference, save_reference
+)
+
+COLUMNS = ['temperature_celsius', 'is_weekend', 'consumption_lag_1h']
+
+
+@pytest.fixture(scope="module")
+def training():
+    rng = np.random.default_rng(1)
+    X = np.column_stack([
+        rng.normal(15, 5, 20000),
+        rng.integers(0, 2, 20000),
+        rng.gamma(2, 0.5, 20000),
+    ])
+    return X, rng.gamma(2, 0.5, 20000)
+
+
+class TestDriftMonitor:
+    """Comparação dos histogramas de produção com a referência."""
+
+    def test_bin_counts_match_histogram(self, training):
+        """Testa se as contagens vetorizadas batem com np.histogram e ignoram bordas repetidas."""
+        X, _ = training
+        edges = histogram_edges(X)
+        counts = bin_counts(X, edges)
+
+        finite = edges[0][np.isfinite(edges[0])]
+        expected, _ = np.histogram(X[:, 0], np.r_[-np.inf, finite, np.inf])
+        np.testing.assert_array_equal(counts[0, :len(expected)], expected)
+        # Coluna binária: quantis repetidos reduzidos às bordas 0 e 1
+        assert edges[1][np.isfinite(edges[1])].tolist() == [0.0, 1.0]
+        assert counts.sum(axis=1).tolist() == [len(X)] * 3
+
+    def test_same_distribution_is_stable(self, training, tmp_path):
+        """Testa se dados da mesma distribuição não sinalizam drift (referência via JSON)."""
+        X, y = training
+        save_reference(build_reference(X, COLUMNS, y), str(tmp_path))
+        monitor = DriftMonitor(load_reference(str(tmp_path)))
+
+        for row, prediction in zip(X[:500], y[:500]):
+            monitor.observe(row, prediction)
+        report = monitor.report()
+
+        assert report['samples'] == 500
+        assert not report['drift_detected']
+        assert report['max_psi'] < 0.1
+
+    def test_shifted_feature_is_flagged(self, training):
+        """Testa se o deslocamento de uma feature e das previsões é detectado."""
+        X, y = training
+        monitor = DriftMonitor(build_reference(X, COLUMNS, y))
+
+        shifted = X[:1000].copy()
+        shifted[:, 0] += 10
+        monitor.observe(shifted, y[:1000] * 2)
+        report = monitor.report()
+
+        assert report['drift_detected']
+        assert report['drifted'] == ['temperature_celsius', 'prediction']
+        assert report['features']['temperature_celsius']['ks'] > 0.5
+
+        monitor.reset()
+        assert monitor.report()['samples'] == 0
+
+    def test_min_samples_guard(self, training):
+        """Testa se poucas observações não disparam drift."""
+        X, y = training
+        monitor = DriftMonitor(build_reference(X, COLUMNS, y), min_samples=200)
+        monitor.observe(X[:10] + 100, y[:10])
+
+        assert not monitor.report()['drift_detected']
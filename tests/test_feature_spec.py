@@ -0,0 +1,172 @@
+"""
+TESTES UNITÁRIOS - ESPECIFICAÇÃO DE FEATURES
+Garante paridade entre o avaliador em lote (treino) e o online (serving).
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.model.feature_spec import (
+    BatchFeatureEvaluator, OnlineFeatureEvaluator, compile_spec, gap_statistics, model_feature_columns
+)
+
+DATASET = os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'energy_consumption.csv')
+EXOGENOUS = ['timestamp', 'temperature_celsius', 'is_holiday', 'Voltage',
+             'Global_intensity', 'Sub_metering_1', 'Sub_metering_2', 'Sub_metering_3']
+
+
+@pytest.fixture(scope="module")
+def history():
+    df = pd.read_csv(DATASET, nrows=600)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+
+@pytest.fixture(scope="module")
+def batch_features(history):
+    return BatchFeatureEvaluator().transform(history.copy())
+
+
+class TestFeatureParity:
+    """Paridade batch x online para o mesmo histórico."""
+
+    @pytest.mark.parametrize("t", [169, 250, 400, 599])
+    def test_warm_up_matches_batch(self, history, batch_features, t):
+        """Testa se o online inicializado com o histórico reproduz a linha t."""
+        evaluator = OnlineFeatureEvaluator().warm_up(history.iloc[:t])
+        row = history.iloc[t][EXOGENOUS].to_dict()
+
+        online = evaluator.vector(row)[0]
+        expected = batch_features.iloc[t][model_feature_columns()].to_numpy(dtype=float)
+
+        np.testing.assert_allclose(online, expected, rtol=1e-9, atol=1e-9)
+
+    def test_incremental_push_matches_batch(self, history, batch_features):
+        """Testa se push() passo a passo mantém paridade em todas as linhas."""
+        evaluator = OnlineFeatureEvaluator()
+        columns = model_feature_columns()
+        records = history.to_dict('records')
+
+        for t, record in enumerate(records):
+            if t >= evaluator.history_size:
+                row = {k: record[k] for k in EXOGENOUS}
+                expected = batch_features.iloc[t][columns].to_numpy(dtype=float)
+                np.testing.assert_allclose(evaluator.vector(row)[0], expected, rtol=1e-9, atol=1e-9)
+            evaluator.push(record)
+
+    def test_single_row_uses_declared_defaults(self):
+        """Testa se, sem histórico, valores informados e defaults são usados."""
+        values = OnlineFeatureEvaluator().features({
+            'temperature_celsius': 20.0, 'hour': 6, 'day_of_week': 1, 'month': 3,
+            'is_weekend': 0, 'consumption_lag_1h': 2.0, 'consumption_lag_24h': 1.5,
+            'consumption_lag_168h': 1.2, 'consumption_rolling_mean_24h': 1.8,
+            'consumption_rolling_std_24h': 0.3,
+        })
+
+        assert values['consumption_lag_3h'] == 2.0
+        assert values['consumption_rolling_mean_168h'] == 1.8
+        assert values['consumption_rolling_std_168h'] == 0.3
+        assert values['temperature_lag_24h'] == 20.0
+        assert values['Voltage'] == 240.0
+        assert values['consumption_diff_1h'] == 0.0
+
+
+class TestResolution:
+    """Durações da especificação compiladas para outras resoluções."""
+
+    def test_durations_compile_to_steps(self):
+        """Testa se lags e janelas em horas viram o número de linhas da resolução."""
+        spec = {f['name']: f for f in compile_spec(resolution='15min')}
+
+        assert spec['consumption_lag_24h']['periods'] == 96
+        assert spec['consumption_rolling_mean_168h']['window'] == 672
+        assert spec['consumption_diff_1h']['shift'] == 1
+        assert OnlineFeatureEvaluator(resolution='1min').history_size == 168 * 60 + 1
+        with pytest.raises(ValueError):
+            compile_spec(resolution='7min')
+
+    def test_quarter_hour_warm_up_matches_batch(self):
+        """Testa a paridade batch x online em dados de 15 minutos."""
+        rng = np.random.default_rng(0)
+        index = pd.date_range('2010-01-01', periods=800, freq='15min')
+        history = pd.DataFrame({'timestamp': index, 'consumption_kwh': rng.uniform(0.5, 3, len(index))})
+        for column in EXOGENOUS[1:]:
+            history[column] = rng.uniform(0, 1, len(index))
+        batch = BatchFeatureEvaluator(resolution='15min').transform(history.copy())
+
+        t = 700
+        evaluator = OnlineFeatureEvaluator(resolution='15min').warm_up(history.iloc[:t])
+        online = evaluator.vector(history.iloc[t][EXOGENOUS].to_dict())[0]
+        expected = batch.iloc[t][model_feature_columns()].to_numpy(dtype=float)
+
+        np.testing.assert_allclose(online, expected, rtol=1e-9, atol=1e-9)
+
+
+@pytest.fixture(scope="module")
+def gapped(history):
+    """Histórico sem um bloco de 10 horas e sem uma hora isolada."""
+    return history.drop(history.index[list(range(300, 310)) + [450]]).reset_index(drop=True)
+
+
+class TestGaps:
+    """Lags e janelas indexados pelo tempo em históricos com lacunas."""
+
+    def test_lag_follows_timestamp(self, gapped):
+        """Testa se o lag de 24h é o valor de exatamente 24h antes (ou NaN na lacuna)."""
+        batch = BatchFeatureEvaluator().transform(gapped.copy())
+        by_time = gapped.set_index('timestamp')['consumption_kwh']
+        expected = gapped['timestamp'].map(lambda ts: by_time.get(ts - pd.Timedelta(hours=24), np.nan))
+
+        np.testing.assert_allclose(batch['consumption_lag_24h'], expected.to_numpy(dtype=float))
+        assert batch['consumption_lag_24h'].isna().sum() == 24 + 11
+
+    @pytest.mark.parametrize("t", [300, 320, 460, 585])
+    def test_online_matches_batch_across_gaps(self, gapped, t):
+        """Testa se warm_up/push com lacunas reproduzem o avaliador em lote."""
+        batch = BatchFeatureEvaluator().transform(gapped.copy())
+        columns = model_feature_columns()
+        expected = batch.iloc[t][columns].to_numpy(dtype=float)
+        # NaN no lote (lag na lacuna) vira o default declarado no online
+        fallback = np.isnan(expected)
+
+        warm = OnlineFeatureEvaluator().warm_up(gapped.iloc[:t]).vector(gapped.iloc[t][EXOGENOUS].to_dict())[0]
+        pushed = OnlineFeatureEvaluator()
+        for record in gapped.iloc[:t].to_dict('records'):
+            pushed.push(record)
+        pushed = pushed.vector(gapped.iloc[t][EXOGENOUS].to_dict())[0]
+
+        np.testing.assert_allclose(warm[~fallback], expected[~fallback], rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(pushed, warm, rtol=1e-9, atol=1e-9)
+
+    def test_gap_statistics(self, gapped):
+        """Testa a contagem de lacunas e a maior lacuna."""
+        stats = gap_statistics(gapped['timestamp'])
+
+        assert stats['rows'] == 589
+        assert stats['missing_rows'] == 11
+        assert stats['gaps'] == 2
+        assert stats['longest_gap_steps'] == 10
+        assert stats['longest_gap_start'] == str(gapped['timestamp'].iloc[299] + pd.Timedelta(hours=1))
+
+
+class TestSpecVersion:
+    """Testes para a versão da especificação gravada junto ao modelo."""
+
+    def test_predictor_refuses_other_spec_version(self, tmp_path):
+        """Testa se o preditor recusa scalers/modelo de outra versão da especificação."""
+        from src.backend.core.predictor import EnergyPredictor
+        from src.model.preprocessing import EnergyDataPreprocessor
+
+        EnergyDataPreprocessor(use_scaler=None).save_scalers(str(tmp_path))
+        EnergyPredictor('modelo.pkl', str(tmp_path))._load_preprocessor()
+
+        # Sem o arquivo de versão: modelo anterior ao versionamento (v1)
+        os.remove(tmp_path / 'feature_spec_version.pkl')
+        with pytest.raises(ValueError):
+            EnergyPredictor('modelo.pkl', str(tmp_path))._load_preprocessor()
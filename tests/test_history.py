@@ -0,0 +1,67 @@
+"""
+TESTES UNITÁRIOS - HISTÓRICO EM MEMÓRIA
+Carga única, janela final e recarga quando o arquivo muda.
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.backend.core.history import HistoryStore
+
+
+def write_rows(path, start, periods, mode='w'):
+    index = pd.date_range(start, periods=periods, freq='h')
+    df = pd.DataFrame({'timestamp': index, 'consumption_kwh': range(len(index)), 'temperature_celsius': 20.0})
+    df.to_csv(path, mode=mode, header=(mode == 'w'), index=False)
+
+
+class TestHistoryStore:
+    """Snapshot em memória e detecção de mudanças por tamanho/mtime."""
+
+    def test_tail_and_typed_columns(self, tmp_path):
+        """Testa a janela final e os tipos compactos das colunas."""
+        path = str(tmp_path / 'energy.csv')
+        write_rows(path, '2024-01-01', 100)
+        store = HistoryStore(path)
+
+        tail = store.tail(24)
+        assert len(store) == 100
+        assert len(tail) == 24
+        assert tail['timestamp'].iloc[-1] == pd.Timestamp('2024-01-05 03:00')
+        assert store.column('consumption_kwh').dtype == 'float32'
+        assert list(store.tail(0).columns) == ['timestamp', 'consumption_kwh', 'temperature_celsius']
+
+    def test_reload_only_when_file_changes(self, tmp_path):
+        """Testa se a recarga ocorre em segundo plano só após mudança do arquivo."""
+        path = str(tmp_path / 'energy.csv')
+        write_rows(path, '2024-01-01', 48)
+        now = [0.0]
+        store = HistoryStore(path, check_interval=5, clock=lambda: now[0])
+        version = store.version
+
+        write_rows(path, '2024-01-03', 24, mode='a')
+        assert len(store) == 48  # dentro do intervalo: sem verificação
+
+        now[0] = 10
+        store.snapshot()
+        store.wait()
+        assert len(store) == 72
+        assert store.version != version
+        assert store.reloads == 1
+
+        now[0] = 20
+        store.snapshot()
+        store.wait()
+        assert store.reloads == 1
+
+    def test_missing_file(self, tmp_path):
+        """Testa se um dataset inexistente não gera erro."""
+        store = HistoryStore(str(tmp_path / 'missing.csv'))
+
+        assert store.snapshot() is None
+        assert store.tail(10) is None
+        assert len(store) == 0
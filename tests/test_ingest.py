@@ -0,0 +1,99 @@
+"""
+TESTES UNITÁRIOS - INGESTÃO INCREMENTAL
+Valida marca d'água, hora parcial reaberta e append no CSV/cópia colunar.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from data.process_uci_dataset import process_uci_dataset
+from src.model.columnar import read_manifest
+from src.model.feature_store import FeatureStore
+from src.model.ingest import IncrementalIngester
+from src.model.preprocessing import read_energy_csv, read_energy_data
+
+
+def _uci_bytes(part, header=True):
+    return part.to_csv(sep=';', index=False, header=header).encode()
+
+
+@pytest.fixture
+def readings():
+    """Três dias de leituras por minuto no formato UCI."""
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2010-01-01', periods=3 * 1440, freq='min')
+    return pd.DataFrame({
+        'Date': index.strftime('%-d/%-m/%Y'),
+        'Time': index.strftime('%H:%M:%S'),
+        'Global_active_power': rng.uniform(0.1, 5, len(index)).round(3),
+        'Global_reactive_power': 0.1,
+        'Voltage': rng.uniform(230, 250, len(index)).round(2),
+        'Global_intensity': 5.0,
+        'Sub_metering_1': 1.0,
+        'Sub_metering_2': 0.0,
+        'Sub_metering_3': 3.0,
+    })
+
+
+@pytest.fixture
+def dataset(readings, tmp_path):
+    """Dataset horário com o primeiro dia, gerado pelo processamento completo."""
+    source = tmp_path / 'base.txt'
+    source.write_bytes(_uci_bytes(readings.iloc[:1440]))
+    path = str(tmp_path / 'energy.csv')
+    assert process_uci_dataset(str(source), path, n_jobs=1)
+    return path
+
+
+class TestIncrementalIngester:
+    """Testes para o ingestor incremental."""
+
+    def test_partial_hours_are_reopened(self, readings, dataset, tmp_path):
+        """Testa se horas divididas entre lotes resultam nas médias corretas."""
+        ingester = IncrementalIngester(dataset, str(tmp_path / 'state.json'))
+
+        first = ingester.ingest_bytes(_uci_bytes(readings.iloc[1440:2140]))
+        assert first['finalized_hours'] == 11
+        assert first['pending_hour'] == '2010-01-02 11:00:00'
+
+        second = ingester.ingest_bytes(_uci_bytes(readings.iloc[2140:2910], header=False))
+        assert second['watermark'] == '2010-01-02 23:00:00'
+
+        result = read_energy_csv(dataset)
+        minutes = readings.iloc[:2880].assign(timestamp=pd.to_datetime(
+            readings['Date'] + ' ' + readings['Time'], format='%d/%m/%Y %H:%M:%S').dt.floor('h'))
+        expected = minutes.groupby('timestamp')['Global_active_power'].mean()
+
+        assert len(result) == 48
+        np.testing.assert_allclose(result['consumption_kwh'], expected.to_numpy(), rtol=1e-5)
+
+    def test_late_readings_are_ignored(self, readings, dataset, tmp_path):
+        """Testa se leituras anteriores à marca d'água não alteram o dataset."""
+        ingester = IncrementalIngester(dataset, str(tmp_path / 'state.json'))
+        size = os.path.getsize(dataset)
+
+        summary = ingester.ingest_bytes(_uci_bytes(readings.iloc[100:200]))
+
+        assert summary['late_minutes'] == 100
+        assert summary['finalized_hours'] == 0
+        assert os.path.getsize(dataset) == size
+
+    def test_columnar_and_feature_store_are_extended(self, readings, dataset, tmp_path):
+        """Testa se a cópia colunar e o feature store recebem apenas as linhas novas."""
+        store_dir = str(tmp_path / 'store')
+        FeatureStore(store_dir).build(dataset)
+        ingester = IncrementalIngester(dataset, str(tmp_path / 'state.json'), feature_store_dir=store_dir)
+
+        ingester.ingest_bytes(_uci_bytes(readings.iloc[1440:]), flush=True)
+
+        assert read_manifest(dataset)['n_rows'] == 72
+        pd.testing.assert_frame_equal(read_energy_data(dataset), read_energy_csv(dataset), check_dtype=False)
+        manifest = FeatureStore(store_dir).read_manifest(dataset)
+        assert manifest['source_size'] == os.path.getsize(dataset)
+        assert len(pd.read_pickle(os.path.join(store_dir, 'energy', 'tail.pkl'))) == 72
@@ -0,0 +1,122 @@
+"""
+TESTES UNITÁRIOS - MULTI-MEDIDOR
+Valida features agrupadas por medidor e o índice de histórico recente.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from data.generate_dataset import generate_meter_dataset
+from src.model.columnar import iter_shards
+from src.model.feature_spec import BatchFeatureEvaluator, OnlineFeatureEvaluator, model_feature_columns
+from src.model.meters import MeterHistoryIndex, load_pooled_frame
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp('meters'))
+    generate_meter_dataset(n_meters=5, days=12, output_dir=directory, meters_per_shard=2,
+                           max_shard_rows=200)
+    frame = pd.concat(iter_shards(directory), ignore_index=True)
+    return directory, frame.sort_values(['meter_id', 'timestamp'], kind='stable').reset_index(drop=True)
+
+
+class TestGroupedFeatures:
+    """Features calculadas por medidor."""
+
+    def test_grouped_transform_matches_each_meter_alone(self, dataset):
+        """Testa se lags/rolling agrupados não vazam entre medidores."""
+        _, frame = dataset
+        columns = model_feature_columns()
+        grouped = BatchFeatureEvaluator().transform(frame.copy())
+
+        for meter_id in (0, 3):
+            alone = BatchFeatureEvaluator().transform(frame[frame['meter_id'] == meter_id].reset_index(drop=True))
+            mixed = grouped[grouped['meter_id'] == meter_id].reset_index(drop=True)
+            np.testing.assert_allclose(mixed[columns].to_numpy(float), alone[columns].to_numpy(float),
+                                       rtol=1e-9, equal_nan=True)
+
+    def test_pooled_frame_has_all_meters(self, dataset):
+        """Testa se o carregamento agrupado traz todos os medidores sem NaN."""
+        directory, _ = dataset
+        pooled = load_pooled_frame(directory)
+
+        assert sorted(pooled['meter_id'].unique()) == [0, 1, 2, 3, 4]
+        assert not pooled[model_feature_columns()].isna().any().any()
+
+
+class TestMeterHistoryIndex:
+    """Índice de histórico por medidor."""
+
+    def test_get_returns_latest_rows_of_meter(self, dataset):
+        """Testa se o índice devolve as últimas linhas do medidor, em ordem."""
+        directory, frame = dataset
+        index = MeterHistoryIndex.from_shards(directory)
+        depth = OnlineFeatureEvaluator().history_size
+
+        history = index.get(2)
+        expected = frame[frame['meter_id'] == 2].tail(depth)
+
+        assert len(index) == 5 and 2 in index and 99 not in index
+        assert len(history) == depth
+        assert (history['timestamp'].to_numpy() == expected['timestamp'].to_numpy()).all()
+        np.testing.assert_allclose(history['consumption_kwh'], expected['consumption_kwh'], rtol=1e-6)
+
+    def test_saved_index_is_reused(self, dataset, tmp_path):
+        """Testa se load_or_build persiste o índice e o recarrega igual."""
+        directory, _ = dataset
+        built = MeterHistoryIndex.load_or_build(directory, str(tmp_path))
+        loaded = MeterHistoryIndex.load_or_build(directory, str(tmp_path))
+
+        pd.testing.assert_frame_equal(built.get(4), loaded.get(4))
+        assert MeterHistoryIndex.load_or_build(str(tmp_path / 'missing'), str(tmp_path)) is None
+
+    def test_interrupted_save_is_not_trusted(self, dataset, tmp_path, monkeypatch):
+        """Testa se um save interrompido antes do manifest força a reconstrução."""
+        from src.model import meters
+
+        directory, _ = dataset
+        index = MeterHistoryIndex.load_or_build(directory, str(tmp_path))
+
+        def fail(*args, **kwargs):
+            raise OSError("disco cheio")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(meters.json, 'dump', fail)
+            with pytest.raises(OSError):
+                index.save(str(tmp_path), source={'dataset': 'outro'})
+        assert not os.path.exists(tmp_path / 'manifest.json')
+
+        rebuilt = MeterHistoryIndex.load_or_build(directory, str(tmp_path))
+        pd.testing.assert_frame_equal(rebuilt.get(4), index.get(4))
+        assert os.path.exists(tmp_path / 'manifest.json')
+
+    def test_update_appends_new_rows(self, dataset, tmp_path):
+        """Testa se linhas ingeridas entram no histórico do medidor (inclusive medidor novo)."""
+        directory, frame = dataset
+        index_dir = str(tmp_path / 'index')
+        MeterHistoryIndex.from_shards(directory).save(index_dir)
+        index = MeterHistoryIndex.load(index_dir)
+
+        last = frame[frame['meter_id'] == 2].iloc[-1]
+        new_rows = pd.DataFrame({
+            'timestamp': [last['timestamp'] + pd.Timedelta(hours=h) for h in (1, 2)],
+            'consumption_kwh': [7.5, 8.5]
+        })
+        index.update(2, new_rows)
+        index.update(99, new_rows)
+
+        history = index.get(2)
+        assert len(history) == index.depth
+        assert list(history['consumption_kwh'].tail(2)) == [7.5, 8.5]
+        assert history['timestamp'].iloc[-1] == new_rows['timestamp'].iloc[-1]
+        assert len(index.get(99)) == 2
+        # Demais medidores continuam iguais; o arquivo salvo não é alterado
+        pd.testing.assert_frame_equal(index.get(1), MeterHistoryIndex.load(index_dir).get(1))
+        assert 99 not in MeterHistoryIndex.load(index_dir)
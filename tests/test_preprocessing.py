@@ -0,0 +1,45 @@
+"""
+TESTES UNITÁRIOS - CARREGAMENTO TIPADO
+Valida schema, projeção de colunas e filtro temporal do loader.
+"""
+
+import io
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.model.preprocessing import read_energy_csv
+
+DATASET = os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'energy_consumption.csv')
+
+
+class TestReadEnergyCsv:
+    """Testes para read_energy_csv."""
+
+    def test_schema_uses_compact_dtypes(self):
+        """Testa se calendário/flags são int8 e medições float32."""
+        df = read_energy_csv(DATASET, nrows=50)
+
+        assert df['hour'].dtype == 'int8'
+        assert df['is_holiday'].dtype == 'int8'
+        assert df['consumption_kwh'].dtype == 'float32'
+        assert pd.api.types.is_datetime64_any_dtype(df['timestamp'])
+
+    def test_projection_and_time_range(self):
+        """Testa se apenas as colunas e o intervalo pedidos são retornados."""
+        df = read_energy_csv(DATASET, columns=['consumption_kwh'],
+                             start='2007-01-01', end='2007-01-02 23:00')
+
+        assert list(df.columns) == ['timestamp', 'consumption_kwh']
+        assert len(df) == 48
+        assert df['timestamp'].min() == pd.Timestamp('2007-01-01')
+
+    def test_unsorted_input_is_sorted(self):
+        """Testa se dados fora de ordem são ordenados pelo timestamp."""
+        csv = "timestamp,consumption_kwh\n2020-01-01 02:00:00,2\n2020-01-01 01:00:00,1\n"
+        df = read_energy_csv(io.StringIO(csv))
+
+        assert df['consumption_kwh'].tolist() == [1.0, 2.0]
@@ -0,0 +1,91 @@
+"""
+TESTES UNITÁRIOS - INGESTÃO DO DATASET UCI
+Valida a agregação horária em blocos contra um groupby direto.
+"""
+
+import os
+import sys
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from data.process_uci_dataset import process_uci_dataset
+from src.model.uci import UCI_COLUMNS, holiday_flags, open_source, simulate_temperature
+
+
+@pytest.fixture
+def minute_file(tmp_path):
+    """Arquivo UCI sintético (3 dias por minuto, com linhas '?') dentro de um .zip."""
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2007-12-30 00:00', periods=3 * 1440, freq='min')
+    df = pd.DataFrame({
+        'Date': index.strftime('%-d/%-m/%Y'),
+        'Time': index.strftime('%H:%M:%S'),
+        'Global_active_power': rng.uniform(0.1, 5, len(index)).round(3),
+        'Global_reactive_power': rng.uniform(0, 0.5, len(index)).round(3),
+        'Voltage': rng.uniform(230, 250, len(index)).round(2),
+        'Global_intensity': rng.uniform(0, 20, len(index)).round(1),
+        'Sub_metering_1': rng.integers(0, 3, len(index)).astype(float),
+        'Sub_metering_2': rng.integers(0, 3, len(index)).astype(float),
+        'Sub_metering_3': rng.integers(0, 20, len(index)).astype(float),
+    })
+    text = df.astype(str)
+    text.loc[100:160, UCI_COLUMNS[2:]] = '?'
+    text.loc[2000:2010, 'Voltage'] = '?'
+
+    txt_path = tmp_path / 'household_power_consumption.txt'
+    text.to_csv(txt_path, sep=';', index=False)
+    zip_path = tmp_path / 'household_power_consumption.zip'
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.write(txt_path, arcname='household_power_consumption.txt')
+    os.remove(txt_path)
+    return df, text, zip_path
+
+
+class TestUciIngestion:
+    """Testes para o processamento do dataset UCI."""
+
+    def test_chunked_aggregation_matches_groupby(self, minute_file, tmp_path):
+        """Testa se blocos pequenos (horas divididas) reproduzem o groupby completo."""
+        df, text, zip_path = minute_file
+        output = tmp_path / 'energy.csv'
+
+        assert process_uci_dataset(str(zip_path), str(output), n_jobs=1, chunk_bytes=4096)
+        result = pd.read_csv(output, parse_dates=['timestamp'])
+
+        raw = text.replace('?', np.nan)
+        raw[UCI_COLUMNS[2:]] = raw[UCI_COLUMNS[2:]].astype(float)
+        raw = raw[raw['Global_active_power'].notna()].copy()
+        raw['Voltage'] = raw['Voltage'].fillna(raw['Voltage'].mean())
+        raw['timestamp'] = pd.to_datetime(raw['Date'] + ' ' + raw['Time'], format='%d/%m/%Y %H:%M:%S').dt.floor('h')
+        expected = raw.groupby('timestamp').agg({
+            'Global_active_power': 'mean', 'Voltage': 'mean', 'Sub_metering_3': 'sum'
+        }).reset_index()
+
+        assert len(result) == len(expected)
+        np.testing.assert_allclose(result['consumption_kwh'], expected['Global_active_power'], rtol=1e-5)
+        np.testing.assert_allclose(result['Voltage'], expected['Voltage'], rtol=1e-5)
+        np.testing.assert_allclose(result['Sub_metering_3'], expected['Sub_metering_3'])
+        assert result['is_holiday'].sum() == 24  # 1º de janeiro
+
+    def test_temperature_is_reproducible(self):
+        """Testa se a temperatura simulada é determinística para a mesma semente."""
+        timestamps = pd.Series(pd.date_range('2008-07-14', periods=48, freq='h'))
+
+        np.testing.assert_array_equal(simulate_temperature(timestamps, seed=1),
+                                      simulate_temperature(timestamps, seed=1))
+        assert holiday_flags(timestamps)[:24].all() and not holiday_flags(timestamps)[24:].any()
+
+    @pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason="requer /proc")
+    def test_zip_source_is_closed(self, minute_file):
+        """Testa se abrir o .zip repetidas vezes não deixa descritores abertos."""
+        _, _, zip_path = minute_file
+        before = len(os.listdir('/proc/self/fd'))
+        for _ in range(5):
+            with open_source(str(zip_path)) as stream:
+                assert stream.read(4)
+        assert len(os.listdir('/proc/self/fd')) == before
@@ -0,0 +1,41 @@
+"""
+TESTES UNITÁRIOS - AGENDADOR HORÁRIO
+Instante da próxima execução e registro de execuções e erros.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.backend.core.scheduler import HourlyScheduler
+
+
+class TestHourlyScheduler:
+    """Execuções logo após cada virada de hora."""
+
+    def test_next_run_after_hour_boundary(self):
+        """Testa o instante da próxima execução em relação à virada da hora."""
+        scheduler = HourlyScheduler(lambda: None, delay=5)
+        assert scheduler.next_run(3600 * 10 + 100) == 3600 * 11 + 5
+        assert scheduler.next_run(3600 * 10 + 2) == 3600 * 10 + 5  # ainda dentro do delay
+        assert scheduler.next_run(3600 * 10 + 5) == 3600 * 11 + 5
+
+    def test_run_once_records_result_and_errors(self):
+        """Testa se erros são registrados sem interromper as execuções seguintes."""
+        outcomes = iter([ValueError("sem dados"), {'main': 'ok'}])
+
+        def job():
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        scheduler = HourlyScheduler(job)
+        scheduler.run_once()
+        assert scheduler.errors == 1 and scheduler.last_error == "sem dados"
+        assert scheduler.run_once() == {'main': 'ok'}
+
+        status = scheduler.status()
+        assert (status['runs'], status['errors'], status['last_error']) == (2, 1, None)
+        assert not status['running']
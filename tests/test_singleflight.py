@@ -0,0 +1,111 @@
+"""
+TESTES UNITÁRIOS - SINGLE-FLIGHT
+Coalescência de chamadas simultâneas, valor vencido servido durante a
+renovação e expiração antecipada probabilística.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.backend.core.cache import CacheManager
+from src.backend.core.singleflight import SingleFlight
+
+
+class FakeClock:
+    """Relógio controlado pelo teste."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_flight(clock=None, beta=0.0, rand=lambda: 0.5):
+    return SingleFlight(CacheManager(), beta=beta, clock=clock or FakeClock(), rand=rand)
+
+
+class TestSingleFlight:
+    """Cálculos evitados pelo SingleFlight."""
+
+    def test_concurrent_callers_share_one_computation(self):
+        """Testa se 50 chamadas simultâneas disparam um único cálculo."""
+        flight = make_flight()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return 42
+
+        async def burst():
+            tasks = [asyncio.ensure_future(flight.get_or_compute('k', compute, ttl=60)) for _ in range(50)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        assert asyncio.run(burst()) == [42] * 50
+        assert len(calls) == 1
+        stats = flight.get_stats()
+        assert (stats['computations'], stats['coalesced'], stats['in_flight']) == (1, 49, 0)
+
+    def test_stale_value_served_while_refreshing(self):
+        """Testa se o valor vencido é servido e renovado em segundo plano."""
+        clock = FakeClock()
+        flight = make_flight(clock)
+        values = iter(['old', 'new'])
+
+        async def get():
+            return await flight.get_or_compute('k', lambda: next(values), ttl=10, stale_ttl=30)
+
+        assert asyncio.run(get()) == 'old'
+        clock.now += 20
+        assert asyncio.run(get()) == 'old'
+        flight._executor.shutdown(wait=True)
+        assert asyncio.run(get()) == 'new'
+        assert flight.get_stats()['stale_served'] == 1
+
+    def test_probabilistic_early_expiration(self):
+        """Testa se, perto do vencimento, um sorteio alto antecipa a renovação."""
+        clock = FakeClock()
+        flight = make_flight(clock, beta=1.0, rand=lambda: 0.0)
+        values = iter([1, 2])
+
+        def compute():
+            clock.now += 1  # o cálculo "custa" 1 s
+            return next(values)
+
+        async def get():
+            return await flight.get_or_compute('k', compute, ttl=10)
+
+        assert asyncio.run(get()) == 1
+        clock.now += 8  # 2 s antes de vencer
+        assert asyncio.run(get()) == 1 and flight.early_refreshes == 0
+
+        flight._rand = lambda: 0.9  # -ln(0.1) * 1 s > 2 s restantes
+        assert asyncio.run(get()) == 1
+        flight._executor.shutdown(wait=True)
+        assert flight.early_refreshes == 1
+        assert asyncio.run(get()) == 2
+
+    def test_errors_reach_all_waiters_and_are_not_cached(self):
+        """Testa se uma falha é propagada e o próximo pedido recalcula."""
+        flight = make_flight()
+
+        def fail():
+            raise ValueError("falhou")
+
+        async def get(compute):
+            return await flight.get_or_compute('k', compute, ttl=10)
+
+        with pytest.raises(ValueError):
+            asyncio.run(get(fail))
+        assert asyncio.run(get(lambda: 'ok')) == 'ok'
+        assert flight.get_stats()['errors'] == 1